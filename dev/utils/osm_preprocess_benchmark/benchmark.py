@@ -0,0 +1,158 @@
+"""Benchmark of the OSM polygon preprocessing on a synthetic dense agricultural region.
+
+The region is a grid of fields with mixed land use, crossed by tracks and roads in both
+directions, with ponds and buildings inside the fields and single trees. Every field is named,
+so it is a target group of its own and the polygon stage has to find the splitters and holes of
+thousands of groups. The time of the polygon stage is printed apart from the whole run, which
+also includes parsing and writing the OSM file.
+
+Usage:
+    python benchmark.py [--fields 60] [--roads 40] [--trees 3000] [--repeat 3] [--output PATH]
+
+Run it with two checkouts of maps4fs on PYTHONPATH and compare the files written with --output
+to check that both versions produce the same result.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import resource
+import shutil
+import tempfile
+import time
+
+from maps4fs.generator import osm
+from maps4fs.generator.osm import preprocess
+
+FIELD_STEP = 0.004
+TAGS = [{"landuse": ["farmland", "meadow", "orchard"], "name": True}]
+
+
+def write_region(path: str, fields: int, roads: int, trees: int, seed: int = 1) -> None:
+    """Write the synthetic OSM file.
+
+    Arguments:
+        path (str): Path of the OSM file.
+        fields (int): Number of fields per side of the grid.
+        roads (int): Number of roads in each direction.
+        trees (int): Number of single trees.
+        seed (int, optional): Seed of the random layout.
+    """
+    rng = random.Random(seed)
+    span = fields * FIELD_STEP
+    nodes: list[str] = []
+    ways: list[str] = []
+
+    def node(lon: float, lat: float, tags: str = "") -> int:
+        node_id = len(nodes) + 1
+        if tags:
+            nodes.append(f'<node id="{node_id}" lat="{lat:.7f}" lon="{lon:.7f}">{tags}</node>')
+        else:
+            nodes.append(f'<node id="{node_id}" lat="{lat:.7f}" lon="{lon:.7f}"/>')
+        return node_id
+
+    def way(refs: list[int], tags: dict[str, str]) -> None:
+        members = "".join(f'<nd ref="{ref}"/>' for ref in refs)
+        members += "".join(f'<tag k="{key}" v="{value}"/>' for key, value in tags.items())
+        ways.append(f'<way id="{len(ways) + 1}">{members}</way>')
+
+    def rectangle(lon: float, lat: float, width: float, height: float) -> list[int]:
+        refs = [
+            node(lon, lat),
+            node(lon + width, lat),
+            node(lon + width, lat + height),
+            node(lon, lat + height),
+        ]
+        return refs + refs[:1]
+
+    for column in range(fields):
+        for row in range(fields):
+            lon = 10.0 + column * FIELD_STEP
+            lat = 50.0 + row * FIELD_STEP * 0.7
+            landuse = rng.choice(["farmland", "farmland", "meadow", "orchard"])
+            way(
+                rectangle(lon, lat, FIELD_STEP * 0.95, FIELD_STEP * 0.65),
+                {"landuse": landuse, "name": f"Field {column}-{row}"},
+            )
+            if rng.random() < 0.2:
+                way(rectangle(lon + 0.001, lat + 0.001, 0.0004, 0.0003), {"natural": "water"})
+            if rng.random() < 0.2:
+                way(rectangle(lon + 0.002, lat + 0.0015, 0.0001, 0.0001), {"building": "yes"})
+
+    for _ in range(roads):
+        lon = 10.0 + rng.random() * span
+        way([node(lon, 49.999), node(lon + 0.002, 50.0 + span * 0.7)], {"highway": "track"})
+        lat = 50.0 + rng.random() * span * 0.7
+        way([node(9.999, lat), node(10.0 + span, lat + 0.001)], {"highway": "unclassified"})
+
+    for _ in range(trees):
+        lon = 10.0 + rng.random() * span
+        lat = 50.0 + rng.random() * span * 0.7
+        node(lon, lat, '<tag k="natural" v="tree"/>')
+
+    with open(path, "w", encoding="utf-8") as file:
+        file.write('<?xml version="1.0" encoding="UTF-8"?>\n<osm version="0.6">\n')
+        file.write("\n".join(nodes + ways))
+        file.write("\n</osm>\n")
+
+
+def time_polygon_stage() -> list[float]:
+    """Wrap the polygon stage of the preprocessing to record its duration.
+
+    Returns:
+        list[float]: Durations of the polygon stage in seconds, one per call.
+    """
+    durations: list[float] = []
+    stage = osm._preprocess_target_polygon_groups  # pylint: disable=protected-access
+
+    def timed(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return stage(*args, **kwargs)
+        finally:
+            durations.append(time.perf_counter() - start)
+
+    osm._preprocess_target_polygon_groups = timed  # pylint: disable=protected-access
+    return durations
+
+
+def main() -> None:
+    """Run the benchmark and print the time of every run and the peak memory."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fields", type=int, default=60, help="Fields per side of the grid.")
+    parser.add_argument("--roads", type=int, default=40, help="Roads in each direction.")
+    parser.add_argument("--trees", type=int, default=3000, help="Single trees.")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of runs.")
+    parser.add_argument("--output", help="Copy the processed OSM file to this path.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        input_path = os.path.join(directory, "region.osm")
+        output_path = os.path.join(directory, "processed.osm")
+        write_region(input_path, args.fields, args.roads, args.trees)
+        polygon_stage = time_polygon_stage()
+
+        for run in range(args.repeat):
+            start = time.perf_counter()
+            stats = preprocess(
+                input_path,
+                output_path,
+                TAGS,
+                merge_tags=False,
+                validate_input=False,
+                validate_output=False,
+            )
+            total = time.perf_counter() - start
+            print(f"run {run + 1}: {total:.2f} s, polygon stage {polygon_stage[-1]:.2f} s {stats}")
+
+        if args.output:
+            shutil.copyfile(output_path, args.output)
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"peak RSS: {peak:.0f} MiB")
+
+
+if __name__ == "__main__":
+    main()
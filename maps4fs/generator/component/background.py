@@ -7,6 +7,7 @@ import json
 import os
 import shutil
 import subprocess
+from functools import partial
 from typing import Any, Sequence
 
 import cv2
@@ -16,10 +17,12 @@ import trimesh
 from tqdm import tqdm
 from trimesh import Trimesh
 
+from maps4fs.generator import image_io
 from maps4fs.generator.component.base.component_image import ImageComponent
 from maps4fs.generator.component.base.component_mesh import MeshComponent
 from maps4fs.generator.component.texture import Texture, TextureOptions
 from maps4fs.generator.constants import Paths
+from maps4fs.generator.image_io import ImageKind
 from maps4fs.generator.monitor import monitor_performance
 from maps4fs.generator.settings import Parameters
 
@@ -38,6 +41,34 @@ class Background(MeshComponent, ImageComponent):
             info, warning. If not provided, default logging will be used.
     """
 
+    reads = (
+        Parameters.RESOURCE_OSM,
+        "texture_layers",
+        "dem_path",
+        "dem_not_subtracted_path",
+        "satellite_background_path",
+        "buildings",
+        "roads_polylines",
+        "height_scale_multiplier",
+        "mesh_z_scaling_factor",
+        Parameters.RESOURCE_SATELLITE,
+        Parameters.RESOURCE_BACKGROUND_DEM,
+        Parameters.RESOURCE_ROADS,
+        Parameters.RESOURCE_WEIGHTS,
+    )
+    writes = (
+        "extended_buildings",
+        "extended_roads_polylines",
+        "extended_electricity_lines_polylines",
+        "extended_electricity_poles_points",
+        "mesh_positions",
+        Parameters.RESOURCE_BACKGROUND_DEM,
+        Parameters.RESOURCE_GAME_DEM,
+        Parameters.RESOURCE_ROADS,
+        Parameters.RESOURCE_WEIGHTS,
+    )
+    cache_inputs = ("background_settings", "texture_custom_schema")
+
     @monitor_performance
     def preprocess(self) -> None:
         """Registers the DEMs for the background terrain."""
@@ -162,15 +193,15 @@ class Background(MeshComponent, ImageComponent):
 
     def _prepare_main_dem(self) -> str:
         """Prepare and save DEM outputs used by downstream generation steps."""
-        if not os.path.isfile(self.output_path):
+        if not self.map.context.rasters.exists(self.output_path):
             raise FileNotFoundError(
                 f"Background DEM not found. Expected DEM component output: {self.output_path}"
             )
 
         self.validate_np_for_mesh(self.output_path, self.map_size)
 
-        if not os.path.isfile(self.not_substracted_path):
-            shutil.copyfile(self.output_path, self.not_substracted_path)
+        if not self.map.context.rasters.exists(self.not_substracted_path):
+            self.copy_image(self.output_path, self.not_substracted_path)
 
         cutted_dem_path = self.save_map_dem(self.output_path)
         self.save_map_dem(
@@ -185,10 +216,14 @@ class Background(MeshComponent, ImageComponent):
     def _generate_optional_assets(self) -> None:
         """Generate optional background terrain assets based on settings."""
         if self.map.background_settings.generate_background:
-            self.generate_obj_files()
-            self.decimate_background_mesh()
-            self.texture_background_mesh()
-            self.convert_background_mesh_to_i3d()
+            # The mesh stages are chained in memory, OBJ files are exported only on request.
+            mesh = self.generate_obj_files()
+            if mesh is not None:
+                mesh = self.decimate_background_mesh(mesh)
+            if mesh is not None:
+                mesh = self.texture_background_mesh(mesh)
+            if mesh is not None:
+                self.convert_background_mesh_to_i3d(mesh)
             self.generate_background_trees()
 
     def _read_background_tree_schema(self) -> list[dict[str, Any]]:
@@ -381,8 +416,10 @@ class Background(MeshComponent, ImageComponent):
         weights_directory = self.game.weights_dir_path
         mask: np.ndarray = np.zeros((self.background_size, self.background_size), dtype=np.uint8)
         for layer in processed_layers:
-            layer_image_path = layer.get_preview_or_path(weights_directory)
-            layer_image = cv2.imread(layer_image_path, cv2.IMREAD_GRAYSCALE)
+            layer_image_path = layer.get_preview_or_path(
+                weights_directory, self.map.context.rasters.exists
+            )
+            layer_image = self.read_image(layer_image_path, cv2.IMREAD_GRAYSCALE)
             if layer_image is None:
                 continue
             if layer_image.shape != mask.shape:
@@ -792,13 +829,13 @@ class Background(MeshComponent, ImageComponent):
 
         self._cleanup_previous_background_tree_assets()
 
-        if not os.path.isfile(self.output_path):
+        if not self.map.context.rasters.exists(self.output_path):
             self.logger.warning(
                 "Background DEM not found for background trees: %s", self.output_path
             )
             return
 
-        dem_image = cv2.imread(self.output_path, cv2.IMREAD_UNCHANGED)
+        dem_image = self.read_image(self.output_path)
         if dem_image is None:
             self.logger.warning(
                 "Could not read background DEM for background trees: %s",
@@ -993,7 +1030,7 @@ class Background(MeshComponent, ImageComponent):
 
         additional_dem_path = os.path.join(dem_directory, dem_name)
 
-        shutil.copyfile(dem_path, additional_dem_path)
+        self.copy_image(dem_path, additional_dem_path)
         self.logger.debug("Additional DEM data was copied to %s.", additional_dem_path)
 
     def info_sequence(self) -> dict[str, Any]:
@@ -1020,28 +1057,27 @@ class Background(MeshComponent, ImageComponent):
         return data
 
     @monitor_performance
-    def generate_obj_files(self) -> None:
-        """Iterates over all dems and generates 3D obj files based on DEM data.
-        If at least one DEM file is missing, the generation will be stopped at all.
+    def generate_obj_files(self) -> Trimesh | None:
+        """Generates the background terrain mesh based on DEM data and saves it as an obj file
+        if the export of meshes is enabled in the background settings.
+
+        Returns:
+            Trimesh | None -- The background terrain mesh or None if the DEM file is missing.
         """
-        if not os.path.isfile(self.output_path):
+        if not self.map.context.rasters.exists(self.output_path):
             self.logger.error(
                 "DEM file not found, generation will be stopped: %s", self.output_path
             )
-            return
+            return None
 
         self.logger.debug("DEM file for found: %s", self.output_path)
 
         filename = os.path.splitext(os.path.basename(self.output_path))[0]
         save_path = os.path.join(self.background_directory, f"{filename}.obj")
-        self.logger.debug("Generating obj file in path: %s", save_path)
-
-        self.assets.background_mesh = save_path
-
-        dem_data = cv2.imread(self.output_path, cv2.IMREAD_UNCHANGED)
+        dem_data = self.read_image(self.output_path)
         if dem_data is None:
             self.logger.warning("Failed to read DEM file for OBJ generation: %s", self.output_path)
-            return
+            return None
 
         if self.map.output_size is not None:
             scaled_background_size = int(self.background_size * self.map.size_scale)
@@ -1051,12 +1087,25 @@ class Background(MeshComponent, ImageComponent):
                 interpolation=cv2.INTER_NEAREST,
             )
 
-        self.plane_from_np(
+        reduction_factor = None
+        if self.map.background_settings.adaptive_mesh:
+            try:
+                reduction_factor = self.get_decimate_factor(self.map_size)
+            except ValueError as e:
+                self.logger.error("Could not determine decimation factor: %s", e)
+                return None
+
+        # The STL preview is rendered on demand by previews().
+        mesh = self.plane_from_np(
             dem_data,
             save_path,
-            create_preview=True,
             remove_center=False,
+            export=self.map.background_settings.export_meshes,
+            reduction_factor=reduction_factor,
         )
+        if self.map.background_settings.export_meshes:
+            self.assets.background_mesh = save_path
+        return mesh
 
     @staticmethod
     def get_decimate_factor(map_size: int) -> float:
@@ -1165,34 +1214,32 @@ class Background(MeshComponent, ImageComponent):
         return chunks
 
     @monitor_performance
-    def decimate_background_mesh(self) -> None:
-        """Decimates the background mesh based on the map size."""
-        if not self.assets.background_mesh or not os.path.isfile(self.assets.background_mesh):
-            self.logger.warning("Background mesh not found, cannot generate i3d background.")
-            return
+    def decimate_background_mesh(self, mesh: Trimesh) -> Trimesh | None:
+        """Decimates the background mesh based on the map size. The adaptive mesh is generated
+        with the target density already, so only the center is removed from it.
 
-        try:
-            mesh = trimesh.load_mesh(self.assets.background_mesh, force="mesh")
-        except Exception as e:
-            self.logger.error("Could not load background mesh: %s", e)
-            return
+        Arguments:
+            mesh (Trimesh): The background terrain mesh.
 
-        try:
-            decimate_factor = self.get_decimate_factor(self.map_size)
-        except ValueError as e:
-            self.logger.error("Could not determine decimation factor: %s", e)
-            return
+        Returns:
+            Trimesh | None -- The decimated mesh or None if the decimation failed.
+        """
+        if self.map.background_settings.adaptive_mesh:
+            decimated_mesh = mesh
+        else:
+            try:
+                decimate_factor = self.get_decimate_factor(self.map_size)
+            except ValueError as e:
+                self.logger.error("Could not determine decimation factor: %s", e)
+                return None
 
-        decimated_save_path = os.path.join(
-            self.background_directory, f"{Parameters.DECIMATED_BACKGROUND}.obj"
-        )
-        try:
-            self.logger.debug("Decimating background mesh with factor %s.", decimate_factor)
-            decimated_mesh = self.decimate_mesh(mesh, decimate_factor)
-            self.logger.debug("Decimation completed.")
-        except Exception as e:
-            self.logger.error("Could not decimate background mesh: %s", e)
-            return
+            try:
+                self.logger.debug("Decimating background mesh with factor %s.", decimate_factor)
+                decimated_mesh = self.decimate_mesh(mesh, decimate_factor)
+                self.logger.debug("Decimation completed.")
+            except Exception as e:
+                self.logger.error("Could not decimate background mesh: %s", e)
+                return None
 
         if self.map.background_settings.remove_center:
             try:
@@ -1205,49 +1252,53 @@ class Background(MeshComponent, ImageComponent):
                 self.logger.debug("Center removal from decimated background mesh completed.")
             except Exception as e:
                 self.logger.error("Could not remove center from decimated background mesh: %s", e)
-                return
+                return None
 
-        decimated_mesh.export(decimated_save_path)
-        self.logger.debug("Decimated background mesh saved: %s", decimated_save_path)
+        if self.map.background_settings.export_meshes:
+            decimated_save_path = os.path.join(
+                self.background_directory, f"{Parameters.DECIMATED_BACKGROUND}.obj"
+            )
+            decimated_mesh.export(decimated_save_path)
+            self.logger.debug("Decimated background mesh saved: %s", decimated_save_path)
+            self.assets.decimated_background_mesh = decimated_save_path
 
-        self.assets.decimated_background_mesh = decimated_save_path
+        return decimated_mesh
 
     @monitor_performance
-    def texture_background_mesh(self) -> None:
-        """Textures the background mesh using satellite imagery."""
-        decimated_background_mesh_path = self.assets.decimated_background_mesh
-        if not decimated_background_mesh_path or not os.path.isfile(decimated_background_mesh_path):
-            self.logger.warning(
-                "Decimated background mesh not found, cannot texture background mesh."
-            )
-            return
+    def texture_background_mesh(self, mesh: Trimesh) -> Trimesh | None:
+        """Textures the background mesh using satellite imagery.
 
+        Arguments:
+            mesh (Trimesh): The decimated background mesh, textured in place.
+
+        Returns:
+            Trimesh | None -- The textured mesh or None if the texturing failed.
+        """
         texture_bundle = self._prepare_background_texture_bundle()
         if texture_bundle is None:
-            return
+            return None
         resized_texture_save_path, texture_for_i3d = texture_bundle
 
         try:
-            decimated_mesh = trimesh.load_mesh(decimated_background_mesh_path, force="mesh")
-        except Exception as e:
-            self.logger.error("Could not load decimated background mesh: %s", e)
-            return
-
-        try:
-            obj_save_path, mtl_save_path = self.texture_mesh(
-                decimated_mesh,
-                resized_texture_save_path,
-                output_directory=self.textured_mesh_directory,
-                output_name="background_textured_mesh",
-            )
+            if self.map.background_settings.export_meshes:
+                obj_save_path, mtl_save_path = self.texture_mesh(
+                    mesh,
+                    resized_texture_save_path,
+                    output_directory=self.textured_mesh_directory,
+                    output_name="background_textured_mesh",
+                )
+                self.assets.textured_background_mesh = obj_save_path
+                self.assets.textured_background_mtl = mtl_save_path
+                self.logger.debug("Textured background mesh saved: %s", obj_save_path)
+            else:
+                self.apply_ground_plane_texture(mesh, resized_texture_save_path)
 
-            self.assets.textured_background_mesh = obj_save_path
-            self.assets.textured_background_mtl = mtl_save_path
             self.assets.resized_background_texture = texture_for_i3d
-            self.logger.debug("Textured background mesh saved: %s", obj_save_path)
         except Exception as e:
             self.logger.error("Could not texture background mesh: %s", e)
-            return
+            return None
+
+        return mesh
 
     def _prepare_background_texture_bundle(self) -> tuple[str, str] | None:
         """Load, resize, and optionally convert the background texture to DDS."""
@@ -1257,7 +1308,7 @@ class Background(MeshComponent, ImageComponent):
             return None
 
         resolution = self.get_background_texture_resolution(self.map_size)
-        source_image = cv2.imread(background_texture_path, cv2.IMREAD_UNCHANGED)
+        source_image = image_io.read_image(background_texture_path)
         if source_image is None:
             self.logger.error(
                 "Failed to read background texture image: %s", background_texture_path
@@ -1272,7 +1323,7 @@ class Background(MeshComponent, ImageComponent):
         resized_texture_save_path = os.path.join(
             self.textured_mesh_directory, "background_texture.jpg"
         )
-        cv2.imwrite(resized_texture_save_path, resized_texture_image)
+        self.save_image(resized_texture_save_path, resized_texture_image, ImageKind.INTERMEDIATE)
 
         dds_texture_save_path = os.path.join(self.textured_mesh_directory, "background_texture.dds")
         texture_for_i3d = resized_texture_save_path
@@ -1285,37 +1336,28 @@ class Background(MeshComponent, ImageComponent):
         return resized_texture_save_path, texture_for_i3d
 
     @monitor_performance
-    def convert_background_mesh_to_i3d(self) -> bool:
+    def convert_background_mesh_to_i3d(self, mesh: Trimesh) -> bool:
         """Converts the textured background mesh to i3d format.
 
+        Arguments:
+            mesh (Trimesh): The textured background mesh.
+
         Returns:
             bool -- True if the conversion was successful, False otherwise.
         """
-        if not self.assets.textured_background_mesh or not os.path.isfile(
-            self.assets.textured_background_mesh
-        ):
-            self.logger.warning("Textured background mesh not found, cannot convert to i3d.")
-            return False
-
         if not self.assets.resized_background_texture or not os.path.isfile(
             self.assets.resized_background_texture
         ):
             self.logger.warning("Resized background texture not found, cannot convert to i3d.")
             return False
 
-        try:
-            mesh = trimesh.load_mesh(self.assets.textured_background_mesh, force="mesh")
-        except Exception as e:
-            self.logger.error("Could not load textured background mesh: %s", e)
-            return False
-
         self._cleanup_previous_background_terrain_assets()
 
         # Compute terrain max elevation and save for GE positioning.
         # The mesh is built with z_vertex = (pixel - max_pixel) * z_factor (inverted),
         # so T_y = max_pixel * z_factor maps every vertex back to its real elevation.
         try:
-            background_dem = cv2.imread(self.not_substracted_path, cv2.IMREAD_UNCHANGED)
+            background_dem = self.read_image(self.not_substracted_path)
             if background_dem is not None:
                 z_factor = self.get_z_scaling_factor(ignore_height_scale_multiplier=True)
                 max_elevation = float(np.max(background_dem) * z_factor)
@@ -1389,26 +1431,30 @@ class Background(MeshComponent, ImageComponent):
         Returns:
             str -- The path to the cutout DEM file.
         """
-        dem_data = cv2.imread(dem_path, cv2.IMREAD_UNCHANGED)
+        dem_data = self.read_image(dem_path)
         if dem_data is None:
             raise ValueError(f"Could not load DEM image: {dem_path}")
 
         if save_path is None and self.map.dem_settings.add_foundations:
             dem_data = self.create_foundations(dem_data, to_full_dem=True)
-            cv2.imwrite(self.full_foundations_path, dem_data)
-            cv2.imwrite(dem_path, dem_data)
+            self.write_image(self.full_foundations_path, dem_data, ImageKind.INTERMEDIATE)
+            self.write_image(dem_path, dem_data)
             self.logger.debug("Full DEM with foundations saved: %s", self.full_foundations_path)
 
         half_size = self.map_size // 2
         dem_data = self.cut_out_np(dem_data, half_size, return_cutout=True)
 
         if save_path:
-            cv2.imwrite(save_path, dem_data)
+            self.write_image(save_path, dem_data, ImageKind.INTERMEDIATE)
             self.logger.debug("Not resized DEM saved: %s", save_path)
             return save_path
 
         if self.map.dem_settings.add_foundations:
-            cv2.imwrite(self.not_resized_path(Parameters.NOT_RESIZED_DEM_FOUNDATIONS), dem_data)
+            self.write_image(
+                self.not_resized_path(Parameters.NOT_RESIZED_DEM_FOUNDATIONS),
+                dem_data,
+                ImageKind.INTERMEDIATE,
+            )
             self.logger.debug(
                 "Not resized DEM with foundations saved: %s",
                 self.not_resized_path(Parameters.NOT_RESIZED_DEM_FOUNDATIONS),
@@ -1418,16 +1464,13 @@ class Background(MeshComponent, ImageComponent):
 
         main_dem_path = self.game.dem_file_path
 
-        try:
-            os.remove(main_dem_path)
-        except FileNotFoundError:
-            pass
+        self.map.context.rasters.remove(main_dem_path)
 
         resized_dem_data = cv2.resize(
             dem_data, (output_size, output_size), interpolation=cv2.INTER_NEAREST
         )
 
-        cv2.imwrite(main_dem_path, resized_dem_data)
+        self.write_image(main_dem_path, resized_dem_data)
         self.logger.debug("DEM cutout saved: %s", main_dem_path)
 
         self.assets.dem = main_dem_path
@@ -1441,42 +1484,67 @@ class Background(MeshComponent, ImageComponent):
         include_zeros: bool = True,
         create_preview: bool = False,
         remove_center: bool = False,
-    ) -> None:
-        """Generates a 3D obj file based on DEM data.
+        export: bool = True,
+        reduction_factor: float | None = None,
+    ) -> Trimesh:
+        """Generates a 3D mesh based on DEM data and optionally saves it as an obj file.
 
         Arguments:
             dem_data (np.ndarray) -- The DEM data as a numpy array.
-            save_path (str) -- The path where the obj file will be saved.
+            save_path (str) -- The path where the obj file will be saved, its name is used
+                in the mesh info.
             include_zeros (bool, optional) -- If True, the mesh will include the zero height values.
             create_preview (bool, optional) -- If True, a simplified mesh will be saved as an STL.
             remove_center (bool, optional) -- If True, the center of the mesh will be removed.
                 This setting is used for a Background Terrain, where the center part where the
                 playable area is will be cut out.
+            export (bool, optional) -- If True, the mesh will be saved as an obj file.
+            reduction_factor (float | None, optional) -- If set, the mesh is generated
+                adaptively with about this fraction of the faces of the full mesh, zero
+                values are always included.
+
+        Returns:
+            Trimesh -- The generated mesh.
         """
-        mesh = self.mesh_from_np(
-            dem_data,
-            include_zeros=include_zeros,
-            z_scaling_factor=self.get_z_scaling_factor(ignore_height_scale_multiplier=True),
-            remove_center=remove_center,
-            remove_size=self.scaled_size,
-            logger=self.logger,
-        )
+        z_scaling_factor = self.get_z_scaling_factor(ignore_height_scale_multiplier=True)
+        if reduction_factor is None:
+            mesh = self.mesh_from_np(
+                dem_data,
+                include_zeros=include_zeros,
+                z_scaling_factor=z_scaling_factor,
+                remove_center=remove_center,
+                remove_size=self.scaled_size,
+                logger=self.logger,
+            )
+        else:
+            mesh = self.adaptive_mesh_from_np(
+                dem_data,
+                z_scaling_factor,
+                max_error=self.map.background_settings.mesh_max_error or None,
+                reduction_factor=reduction_factor,
+            )
+            if remove_center:
+                mesh = self.remove_center_from_mesh(mesh, self.scaled_size, logger=self.logger)
 
         try:
             self.update_mesh_info(save_path, mesh)
         except Exception as e:
             self.logger.error("Could not update mesh info: %s", e)
 
-        mesh.export(save_path)
-        self.logger.debug("Obj file saved: %s", save_path)
+        if export:
+            mesh.export(save_path)
+            self.logger.debug("Obj file saved: %s", save_path)
 
         if create_preview:
             try:
-                mesh.apply_scale([0.5, 0.5, 0.5])
-                self.mesh_to_stl(mesh, save_path=self.stl_preview_path)
+                preview_mesh = mesh.copy()
+                preview_mesh.apply_scale([0.5, 0.5, 0.5])
+                self.mesh_to_stl(preview_mesh, save_path=self.stl_preview_path)
             except Exception as e:
                 self.logger.error("Could not create STL preview: %s", e)
 
+        return mesh
+
     def update_mesh_info(self, save_path: str, mesh: Trimesh) -> None:
         """Updates the mesh info with the data from the mesh.
 
@@ -1502,26 +1570,43 @@ class Background(MeshComponent, ImageComponent):
 
     def previews(self) -> list[str]:
         """Returns the path to the image previews paths and the path to the STL preview file.
+        Previews are rendered on demand and reused while the DEMs are unchanged.
 
         Returns:
             list[str] -- A list of paths to the previews.
         """
         preview_paths = self.dem_previews(self.game.dem_file_path)
 
-        background_dem_preview_path = os.path.join(self.previews_directory, "background_dem.png")
-
         if not os.path.isfile(self.output_path):
             self.logger.warning("DEM file not found for preview generation: %s", self.output_path)
             return []
 
-        background_dem_preview_image = cv2.imread(self.output_path, cv2.IMREAD_UNCHANGED)
-        if background_dem_preview_image is None:
+        background_dem_preview_path = self.render_preview(
+            "background_dem.png", [self.output_path], self._background_dem_preview
+        )
+        if background_dem_preview_path is None:
             self.logger.warning("Could not read DEM preview source: %s", self.output_path)
             return preview_paths
+        preview_paths.append(background_dem_preview_path)
 
-        background_dem_preview_image = cv2.resize(
-            background_dem_preview_image, (0, 0), fx=1 / 4, fy=1 / 4
+        z_scaling_factor = self.get_z_scaling_factor(ignore_height_scale_multiplier=True)
+        stl_preview_path = self.map.preview_cache.get_or_render(
+            self.stl_preview_path,
+            [self.output_path],
+            partial(self._write_stl_preview, z_scaling_factor=z_scaling_factor),
+            options=(z_scaling_factor, self.map.output_size),
         )
+        if stl_preview_path is not None:
+            preview_paths.append(stl_preview_path)
+
+        return preview_paths
+
+    def _background_dem_preview(self) -> np.ndarray | None:
+        """Returns the downsampled background DEM normalized to 8-bit BGR for the preview."""
+        background_dem_preview_image = self.map.preview_cache.load(self.output_path)
+        if background_dem_preview_image is None:
+            return None
+
         background_dem_preview_image = cv2.normalize(
             background_dem_preview_image,
             dst=np.empty_like(background_dem_preview_image),
@@ -1530,17 +1615,50 @@ class Background(MeshComponent, ImageComponent):
             norm_type=cv2.NORM_MINMAX,
             dtype=cv2.CV_8U,
         )
-        background_dem_preview_image = cv2.cvtColor(
-            background_dem_preview_image, cv2.COLOR_GRAY2BGR
-        )
+        return cv2.cvtColor(background_dem_preview_image, cv2.COLOR_GRAY2BGR)
 
-        cv2.imwrite(background_dem_preview_path, background_dem_preview_image)
-        preview_paths.append(background_dem_preview_path)
+    def _write_stl_preview(self, save_path: str, z_scaling_factor: float) -> bool:
+        """Saves a simplified mesh of the background DEM as an STL preview.
 
-        if os.path.isfile(self.stl_preview_path):
-            preview_paths.append(self.stl_preview_path)
+        The mesh is built from the DEM downsampled 8 times, which gives about as many faces as
+        the decimated full resolution mesh, and scaled to the size of the background mesh.
 
-        return preview_paths
+        Arguments:
+            save_path (str): The path where the STL file will be saved.
+            z_scaling_factor (float): The scaling factor for the Z-axis.
+
+        Returns:
+            bool: True if the preview was saved.
+        """
+        dem_data = self.map.preview_cache.load(self.output_path)
+        if dem_data is None:
+            return False
+
+        mesh_size = self.background_size
+        if self.map.output_size is not None:
+            mesh_size = int(self.background_size * self.map.size_scale)
+        preview_size = max(mesh_size // 8, Parameters.RESIZE_FACTOR * 2)
+        if dem_data.shape[0] > preview_size:
+            dem_data = cv2.resize(
+                dem_data, (preview_size, preview_size), interpolation=cv2.INTER_NEAREST
+            )
+
+        try:
+            mesh = self.mesh_from_np(
+                dem_data,
+                include_zeros=True,
+                z_scaling_factor=z_scaling_factor,
+                remove_center=False,
+                remove_size=self.scaled_size,
+                logger=self.logger,
+            )
+            xy_scale = 0.5 * mesh_size / dem_data.shape[0]
+            mesh.apply_scale([xy_scale, xy_scale, 0.5])
+            mesh.export(save_path)
+        except Exception as e:
+            self.logger.error("Could not create STL preview: %s", e)
+            return False
+        return True
 
     def dem_previews(self, image_path: str) -> list[str]:
         """Get list of preview images.
@@ -1552,9 +1670,16 @@ class Background(MeshComponent, ImageComponent):
             list[str]: List of preview images.
         """
         self.logger.debug("Starting DEM previews generation.")
-        return [self.grayscale_preview(image_path), self.colored_preview(image_path)]
+        return [
+            preview_path
+            for preview_path in (
+                self.grayscale_preview(image_path),
+                self.colored_preview(image_path),
+            )
+            if preview_path is not None
+        ]
 
-    def grayscale_preview(self, image_path: str) -> str:
+    def grayscale_preview(self, image_path: str) -> str | None:
         """Converts DEM image to grayscale RGB image and saves it to the map directory.
         Returns path to the preview image.
 
@@ -1562,20 +1687,19 @@ class Background(MeshComponent, ImageComponent):
             image_path (str): Path to the DEM file.
 
         Returns:
-            str: Path to the preview image.
+            str | None: Path to the preview image, None if the DEM is missing.
         """
-        grayscale_dem_path = os.path.join(self.previews_directory, "dem_grayscale.png")
+        self.logger.debug("Creating grayscale preview of DEM data from %s.", image_path)
 
-        self.logger.debug("Creating grayscale preview of DEM data in %s.", grayscale_dem_path)
+        def render() -> np.ndarray:
+            dem_data = self.map.preview_cache.load(image_path, cv2.IMREAD_GRAYSCALE)
+            if dem_data is None:
+                raise ValueError(f"Could not read DEM image for grayscale preview: {image_path}")
+            return cv2.cvtColor(dem_data, cv2.COLOR_GRAY2RGB)
 
-        dem_data = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
-        if dem_data is None:
-            raise ValueError(f"Could not read DEM image for grayscale preview: {image_path}")
-        dem_data_rgb = cv2.cvtColor(dem_data, cv2.COLOR_GRAY2RGB)
-        cv2.imwrite(grayscale_dem_path, dem_data_rgb)
-        return grayscale_dem_path
+        return self.render_preview("dem_grayscale.png", [image_path], render)
 
-    def colored_preview(self, image_path: str) -> str:
+    def colored_preview(self, image_path: str) -> str | None:
         """Converts DEM image to colored RGB image and saves it to the map directory.
         Returns path to the preview image.
 
@@ -1583,25 +1707,21 @@ class Background(MeshComponent, ImageComponent):
             image_path (str): Path to the DEM file.
 
         Returns:
-            list[str]: List with a single path to the DEM file
+            str | None: Path to the preview image, None if the DEM is missing.
         """
-        colored_dem_path = os.path.join(self.previews_directory, "dem_colored.png")
-
-        self.logger.debug("Creating colored preview of DEM data in %s.", colored_dem_path)
-
-        dem_data = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
-        if dem_data is None:
-            raise ValueError(f"Could not read DEM image for colored preview: {image_path}")
+        self.logger.debug("Creating colored preview of DEM data from %s.", image_path)
 
-        # Create an empty array with the same shape and type as dem_data.
-        dem_data_normalized = np.empty_like(dem_data)
+        def render() -> np.ndarray:
+            dem_data = self.map.preview_cache.load(image_path, cv2.IMREAD_GRAYSCALE)
+            if dem_data is None:
+                raise ValueError(f"Could not read DEM image for colored preview: {image_path}")
 
-        # Normalize the DEM data to the range [0, 255]
-        cv2.normalize(dem_data, dem_data_normalized, 0, 255, cv2.NORM_MINMAX)
-        dem_data_colored = cv2.applyColorMap(dem_data_normalized, cv2.COLORMAP_JET)
+            # Normalize the DEM data to the range [0, 255]
+            dem_data_normalized = np.empty_like(dem_data)
+            cv2.normalize(dem_data, dem_data_normalized, 0, 255, cv2.NORM_MINMAX)
+            return cv2.applyColorMap(dem_data_normalized, cv2.COLORMAP_JET)
 
-        cv2.imwrite(colored_dem_path, dem_data_colored)
-        return colored_dem_path
+        return self.render_preview("dem_colored.png", [image_path], render)
 
     @monitor_performance
     def flatten_roads(self) -> None:
@@ -1635,14 +1755,16 @@ class Background(MeshComponent, ImageComponent):
         dem_image = self.blur_by_mask(dem_image, full_mask, blur_radius=5)
         dem_image = self.blur_edges_by_mask(dem_image, full_mask)
 
-        cv2.imwrite(self.output_path, dem_image)
+        self.write_image(self.output_path, dem_image, ImageKind.DELIVERABLE)
         self.logger.debug("Flattened roads saved to full DEM file: %s", self.output_path)
 
         half_size = self.map_size // 2
         map_dem = self.cut_out_np(dem_image, half_size, return_cutout=True)
 
         # Save the not resized DEM with flattened roads.
-        cv2.imwrite(self.not_resized_path(Parameters.NOT_RESIZED_DEM_ROADS), map_dem)
+        self.write_image(
+            self.not_resized_path(Parameters.NOT_RESIZED_DEM_ROADS), map_dem, ImageKind.INTERMEDIATE
+        )
         self.logger.debug(
             "Not resized DEM with flattened roads saved to: %s",
             self.not_resized_path(Parameters.NOT_RESIZED_DEM_ROADS),
@@ -1654,7 +1776,7 @@ class Background(MeshComponent, ImageComponent):
         )
 
         main_dem_path = self.game.dem_file_path
-        cv2.imwrite(main_dem_path, resized_dem)
+        self.write_image(main_dem_path, resized_dem)
         self.logger.debug("Flattened roads saved to DEM file: %s", main_dem_path)
 
     def _load_roads_base_dem(self) -> np.ndarray | None:
@@ -1666,10 +1788,7 @@ class Background(MeshComponent, ImageComponent):
             self.not_resized_path(Parameters.NOT_RESIZED_DEM),
         ]
         for candidate_path in candidate_paths:
-            if not os.path.isfile(candidate_path):
-                continue
-
-            dem_image = cv2.imread(candidate_path, cv2.IMREAD_UNCHANGED)
+            dem_image = self.read_image(candidate_path)
             if dem_image is not None:
                 return dem_image
 
@@ -1776,7 +1895,7 @@ class Background(MeshComponent, ImageComponent):
 
         for mask_file in mask_files:
             mask_path = os.path.join(roads_directory, mask_file)
-            mask = cv2.imread(mask_path, cv2.IMREAD_UNCHANGED)
+            mask = self.read_image(mask_path)
             if mask is None:
                 self.logger.warning("Could not read mask file: %s, skipping.", mask_path)
                 continue
@@ -1811,7 +1930,7 @@ class Background(MeshComponent, ImageComponent):
             )
 
             try:
-                os.remove(mask_path)
+                self.map.context.rasters.remove(mask_path)
                 self.logger.debug("Temporary road mask %s removed.", mask_path)
             except Exception as e:
                 self.logger.warning(
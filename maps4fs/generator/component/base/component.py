@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import json
 import os
+import threading
 from copy import deepcopy
 from dataclasses import dataclass
 from typing import TYPE_CHECKING, Any, Callable
@@ -14,12 +15,17 @@ import osmnx as ox
 from shapely.affinity import rotate, translate
 from shapely.geometry import LineString, Polygon, box
 
+from maps4fs.generator import image_io
+from maps4fs.generator.image_io import ImageKind
 from maps4fs.generator.settings import Parameters
 
 if TYPE_CHECKING:
     from maps4fs.generator.game import Game
     from maps4fs.generator.map import Map
 
+# Components may be processed concurrently, generation info updates are read-modify-write.
+_GENERATION_INFO_LOCK = threading.Lock()
+
 
 class AttrDict(dict):
     """A dictionary that allows attribute-style access to its keys.
@@ -83,6 +89,18 @@ class Component:
             (default: map.rotated_size). Used by Background to pass a larger canvas.
     """
 
+    # Resources consumed and produced by the component: MapContext field names or one of the
+    # Parameters.RESOURCE_* artifact names. Map.generate runs components concurrently only when
+    # their declarations do not overlap. None means "not declared": the component then waits
+    # for all previous components and blocks all following ones.
+    reads: tuple[str, ...] | None = None
+    writes: tuple[str, ...] | None = None
+
+    # Names of the Map attributes (settings sections, custom schemas, custom input files) the
+    # component output depends on, used by ComponentCache to fingerprint the component.
+    # None means the component is never restored from the cache.
+    cache_inputs: tuple[str, ...] | None = None
+
     def __init__(
         self,
         game: Game,
@@ -104,6 +122,8 @@ class Component:
         self.paths = ComponentPaths(self.map_directory)
         self.logger = map.logger
         self.kwargs = kwargs
+        # Paths of the rasters written through the map raster store by this component.
+        self.written_rasters: set[str] = set()
 
         self.logger.debug(
             "Component %s initialized. Map size: %s, map rotated size: %s",
@@ -182,6 +202,25 @@ class Component:
         """
         return {}
 
+    def get_cache_state(self) -> dict[str, Any]:
+        """Returns additional state which must be restored together with the cached results.
+        Plain instance attributes and MapContext contributions are cached automatically, the
+        method must be re-implemented only if the component changes something else.
+
+        Returns:
+            dict[str, Any]: Picklable state of the component.
+        """
+        return {}
+
+    def restore_cache_state(self, state: dict[str, Any]) -> None:
+        """Applies the state returned by get_cache_state() when the component is restored
+        from the cache.
+
+        Arguments:
+            state (dict[str, Any]): State of the component.
+        """
+        return
+
     def commit_generation_info(self) -> None:
         """Commits the generation info to the generation info JSON file."""
         self.update_generation_info(self.info_sequence())
@@ -193,27 +232,28 @@ class Component:
         Arguments:
             data (dict[Any, Any]): The data to update the generation info with.
         """
-        if os.path.isfile(self.generation_info_path):
-            with open(self.generation_info_path, "r", encoding="utf-8") as file:
-                generation_info = json.load(file)
-                self.logger.debug("Loaded generation info from %s", self.generation_info_path)
-        else:
-            self.logger.debug(
-                "Generation info file does not exist, creating a new one in %s",
-                self.generation_info_path,
-            )
-            generation_info = {}
+        with _GENERATION_INFO_LOCK:
+            if os.path.isfile(self.generation_info_path):
+                with open(self.generation_info_path, "r", encoding="utf-8") as file:
+                    generation_info = json.load(file)
+                    self.logger.debug("Loaded generation info from %s", self.generation_info_path)
+            else:
+                self.logger.debug(
+                    "Generation info file does not exist, creating a new one in %s",
+                    self.generation_info_path,
+                )
+                generation_info = {}
 
-        updated_generation_info = deepcopy(generation_info)
-        updated_generation_info[self.__class__.__name__] = data
+            updated_generation_info = deepcopy(generation_info)
+            updated_generation_info[self.__class__.__name__] = data
 
-        self.logger.debug("Updated generation info, now contains %s fields", len(data))
+            self.logger.debug("Updated generation info, now contains %s fields", len(data))
 
-        with open(self.generation_info_path, "w", encoding="utf-8") as file:
-            try:
-                json.dump(updated_generation_info, file, indent=4)
-            except Exception as e:
-                self.logger.warning("Could not save updated generation info: %s", e)
+            with open(self.generation_info_path, "w", encoding="utf-8") as file:
+                try:
+                    json.dump(updated_generation_info, file, indent=4)
+                except Exception as e:
+                    self.logger.warning("Could not save updated generation info: %s", e)
 
         self.logger.debug("Saved updated generation info to %s", self.generation_info_path)
 
@@ -593,11 +633,118 @@ class Component:
             return None
 
         try:
-            image = cv2.imread(image_path, cv2.IMREAD_UNCHANGED)
-            return image
+            return image_io.read_image(image_path)
+        except Exception:
+            return None
+
+    def read_image(self, image_path: str, flags: int = cv2.IMREAD_UNCHANGED) -> np.ndarray | None:
+        """Reads the image through the map raster store, so rasters written by the previous
+        components are served from memory instead of being decoded from disk again.
+
+        Arguments:
+            image_path (str): The path to the image.
+            flags (int, optional): cv2.imread flags. Defaults to cv2.IMREAD_UNCHANGED.
+
+        Returns:
+            np.ndarray | None: The image or None if not found or failed to load.
+        """
+        if not self.map.context.rasters.exists(image_path):
+            return None
+
+        try:
+            return self.map.context.rasters.read(image_path, flags)
         except Exception:
             return None
 
+    def write_image(
+        self, image_path: str, image: np.ndarray, kind: ImageKind = ImageKind.DELIVERABLE
+    ) -> None:
+        """Writes the image through the map raster store. The file is written to disk when
+        the generation is finished, until then it's available via read_image().
+
+        Arguments:
+            image_path (str): The path to the image.
+            image (np.ndarray): The image data.
+            kind (ImageKind, optional): Kind of the image, intermediate images are written
+                with fast PNG compression. Defaults to ImageKind.DELIVERABLE.
+        """
+        self.map.context.rasters.write(image_path, image, kind)
+        self.written_rasters.add(image_path)
+
+    def copy_image(self, source_path: str, destination_path: str) -> None:
+        """Copies the image through the map raster store, pending images are copied in memory.
+
+        Arguments:
+            source_path (str): The path to the source image.
+            destination_path (str): The path to the copy.
+        """
+        self.map.context.rasters.copy(source_path, destination_path)
+        self.written_rasters.add(destination_path)
+
+    def stream_image(
+        self, image_path: str, width: int, height: int, kind: ImageKind = ImageKind.DELIVERABLE
+    ) -> image_io.PngStripWriter:
+        """Opens the image for writing strip by strip directly to disk, bypassing the memory of
+        the map raster store. Use it as a context manager.
+
+        Arguments:
+            image_path (str): The path to the image.
+            width (int): Width of the image.
+            height (int): Height of the image.
+            kind (ImageKind, optional): Kind of the image. Defaults to ImageKind.DELIVERABLE.
+
+        Returns:
+            image_io.PngStripWriter: Writer of the image strips.
+        """
+        return self.map.context.rasters.stream(image_path, width, height, kind)
+
+    def save_image(
+        self, image_path: str, image: np.ndarray, kind: ImageKind = ImageKind.PREVIEW
+    ) -> None:
+        """Writes the image to disk immediately, bypassing the map raster store, e.g. for
+        previews which are not read by other components.
+
+        Arguments:
+            image_path (str): The path to the image.
+            image (np.ndarray): The image data.
+            kind (ImageKind, optional): Kind of the image. Defaults to ImageKind.PREVIEW.
+        """
+        self.map.context.rasters.discard(image_path)
+        image_io.write_image(image_path, image, kind)
+
+    def render_preview(
+        self,
+        filename: str,
+        sources: list[str],
+        render: Callable[[], np.ndarray | None],
+        options: Any = None,
+    ) -> str | None:
+        """Renders the preview image if it is missing or its sources changed since it was
+        rendered. Sources should be read with map.preview_cache.load(), which shares the
+        downsampled rasters between previews.
+
+        Arguments:
+            filename (str): File name of the preview in the previews directory.
+            sources (list[str]): Paths of the files the preview is rendered from.
+            render (Callable[[], np.ndarray | None]): Renders the preview image, None if it
+                can not be rendered.
+            options (Any, optional): Render options which change the preview.
+
+        Returns:
+            str | None: Path to the preview or None if it could not be rendered.
+        """
+
+        def write(preview_path: str) -> bool:
+            image = render()
+            if image is None:
+                return False
+            self.save_image(preview_path, image)
+            return True
+
+        return self.map.preview_cache.get_or_render(
+            os.path.join(self.previews_directory, filename), sources, write, options
+        )
+
     def get_dem_image_with_fallback(
         self, start_at: int = 0, end_on: int | None = None
     ) -> np.ndarray | None:
@@ -616,7 +763,7 @@ class Component:
             os.path.join(background_directory, dem_type)
             for dem_type in Parameters.SUPPORTED_DEM_TYPES
         ]
-        return self.get_item_with_fallback(items, self.get_image_safely, start_at, end_on)
+        return self.get_item_with_fallback(items, self.read_image, start_at, end_on)
 
     def get_non_zero_bounds(self, image: np.ndarray) -> tuple[int, int, int, int] | None:
         """Gets the distance from each edge of the image to the nearest non-zero pixel.
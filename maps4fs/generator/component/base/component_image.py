@@ -12,8 +12,10 @@ import numpy as np
 from PIL import Image, ImageFile
 from PIL.Image import Image as PILImage
 
+from maps4fs.generator import image_io
 from maps4fs.generator.component.base.component import Component
 from maps4fs.generator.constants import Paths
+from maps4fs.generator.image_io import ImageKind
 from maps4fs.generator.settings import Parameters
 
 
@@ -127,7 +129,7 @@ class ImageComponent(Component):
         if not os.path.isfile(image_path):
             return
 
-        image = cv2.imread(image_path)
+        image = image_io.read_image(image_path, cv2.IMREAD_COLOR)
         if image is None:
             return
 
@@ -139,7 +141,7 @@ class ImageComponent(Component):
                 image, (Parameters.PREVIEW_MAXIMUM_SIZE, Parameters.PREVIEW_MAXIMUM_SIZE)
             )
 
-        cv2.imwrite(save_path, image)
+        image_io.write_image(save_path, image, ImageKind.PREVIEW)
 
     @staticmethod
     def transfer_border(src_image: np.ndarray, dst_image: np.ndarray | None, border: int) -> None:
@@ -367,11 +369,11 @@ class ImageComponent(Component):
             output_width (int): The width of the output image.
             output_path (str, optional): Output path. Defaults to overwriting input.
         """
-        if not os.path.isfile(image_path):
+        if not self.map.context.rasters.exists(image_path):
             self.logger.warning("Image %s does not exist", image_path)
             return
 
-        image = cv2.imread(image_path, cv2.IMREAD_UNCHANGED)
+        image = self.read_image(image_path)
         if image is None:
             self.logger.warning("Image %s could not be read", image_path)
             return
@@ -393,4 +395,4 @@ class ImageComponent(Component):
         end_y = start_y + output_height
 
         cropped = rotated[start_y:end_y, start_x:end_x]
-        cv2.imwrite(output_path, cropped)
+        self.write_image(output_path, cropped)
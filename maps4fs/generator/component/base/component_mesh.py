@@ -2,15 +2,15 @@
 
 from __future__ import annotations
 
+import io
 import os
 import shutil
 import subprocess
 import sys
 import xml.etree.ElementTree as ET
 from datetime import datetime
-from typing import Any, Callable, NamedTuple
+from typing import Any, Callable, Iterator, NamedTuple
 
-import cv2
 import numpy as np
 import pyvista as pv
 import shapely
@@ -22,6 +22,13 @@ from maps4fs.generator.component.base.component import Component
 from maps4fs.generator.constants import Paths
 from maps4fs.generator.settings import Parameters
 
+# Elements standing in for the vertex and triangle lists in the serialized i3d skeleton, the
+# lists are streamed into their place.
+_I3D_VERTICES_PLACEHOLDER = "maps4fsVertices"
+_I3D_TRIANGLES_PLACEHOLDER = "maps4fsTriangles"
+# Number of vertices or triangles formatted at once.
+_I3D_CHUNK_SIZE = 1 << 16
+
 
 class LineSurfaceEntry(NamedTuple):
     """Data structure representing a line surface entry with its linestring, width,
@@ -35,8 +42,7 @@ class LineSurfaceEntry(NamedTuple):
 class MeshComponent(Component):
     """Base class for all components that primarily used to work with meshes."""
 
-    @staticmethod
-    def validate_np_for_mesh(image_path: str, map_size: int) -> None:
+    def validate_np_for_mesh(self, image_path: str, map_size: int) -> None:
         """Checks if the given image is a valid for mesh generation.
 
         Arguments:
@@ -47,10 +53,10 @@ class MeshComponent(Component):
             FileNotFoundError: If the background image is not found.
             ValueError: If the background image does not meet the requirements.
         """
-        if not os.path.isfile(image_path):
+        if not self.map.context.rasters.exists(image_path):
             raise FileNotFoundError(f"Can't find the background DEM image at {image_path}.")
 
-        image = cv2.imread(image_path, cv2.IMREAD_UNCHANGED)
+        image = self.read_image(image_path)
         if image is None:
             raise ValueError(f"Can't read the background DEM image at {image_path}.")
 
@@ -114,28 +120,30 @@ class MeshComponent(Component):
         ground = z.max()
 
         vertices = np.column_stack([x.ravel(), y.ravel(), z.ravel()])
-        faces = []
-
-        skipped = 0
-
-        for i in tqdm(range(rows - 1), desc="Generating mesh", unit="row"):
-            for j in range(cols - 1):
-                top_left = i * cols + j
-                top_right = top_left + 1
-                bottom_left = top_left + cols
-                bottom_right = bottom_left + 1
-
-                if (
-                    ground in [z[i, j], z[i, j + 1], z[i + 1, j], z[i + 1, j + 1]]
-                    and not include_zeros
-                ):
-                    skipped += 1
-                    continue
 
-                faces.append([top_left, bottom_left, bottom_right])
-                faces.append([top_left, bottom_right, top_right])
+        # Two triangles per grid cell, in row-major cell order.
+        indices = np.arange(rows * cols, dtype=np.int64).reshape(rows, cols)
+        top_left = indices[:-1, :-1]
+        top_right = indices[:-1, 1:]
+        bottom_left = indices[1:, :-1]
+        bottom_right = indices[1:, 1:]
+        cell_faces = np.stack(
+            [
+                np.stack([top_left, bottom_left, bottom_right], axis=-1),
+                np.stack([top_left, bottom_right, top_right], axis=-1),
+            ],
+            axis=2,
+        )
+
+        if not include_zeros:
+            # Cells touching the ground level in any corner are skipped.
+            is_ground = z == ground
+            ground_cells = (
+                is_ground[:-1, :-1] | is_ground[:-1, 1:] | is_ground[1:, :-1] | is_ground[1:, 1:]
+            )
+            cell_faces = cell_faces[~ground_cells]
 
-        faces_np = np.array(faces)
+        faces_np = cell_faces.reshape(-1, 3)
         mesh = trimesh.Trimesh(vertices=vertices, faces=faces_np)
         mesh = MeshComponent.rotate_mesh(mesh)
 
@@ -156,6 +164,289 @@ class MeshComponent(Component):
 
         return mesh
 
+    @staticmethod
+    def adaptive_mesh_from_np(
+        image: np.ndarray,
+        z_scaling_factor: float,
+        max_error: float | None = None,
+        reduction_factor: float | None = None,
+    ) -> trimesh.Trimesh:
+        """Generates an adaptive mesh from the given numpy array with a right-triangulated
+        irregular network (RTIN).
+
+        The array is sampled like in mesh_from_np (with zero values included), but areas which
+        can be approximated within the error are covered by larger triangles, so the mesh is
+        generated with the target density in one pass instead of decimating the full mesh.
+        The mesh has no cracks and no triangle crosses the center lines of the array, so it
+        can be split into quadrants.
+
+        Arguments:
+            image (np.ndarray): The numpy array to generate the mesh from.
+            z_scaling_factor (float): The scaling factor for the Z-axis.
+            max_error (float | None, optional): Maximum vertical error of the mesh after
+                Z-axis scaling. If None, the error is chosen by the reduction factor.
+            reduction_factor (float | None, optional): Approximate fraction of the faces of
+                the full mesh to keep, used if max_error is None. If both are None, the mesh
+                has the full resolution.
+
+        Returns:
+            trimesh.Trimesh: The generated mesh.
+        """
+        output_x_size, _ = image.shape
+        image = image.max() - image
+
+        image = image[:: Parameters.RESIZE_FACTOR, :: Parameters.RESIZE_FACTOR]
+        rows, cols = image.shape
+
+        # RTIN works on a square grid of 2^k + 1 points, the array is padded to it and the
+        # triangles outside of the array are dropped.
+        size = 1 << int(np.ceil(np.log2(max(rows, cols, 2) - 1)))
+        z = np.pad(
+            image.astype(np.float32), ((0, size + 1 - rows), (0, size + 1 - cols)), mode="edge"
+        )
+        errors = MeshComponent._rtin_errors(z, rows, cols)
+
+        if max_error is not None:
+            threshold = max_error / z_scaling_factor if z_scaling_factor else max_error
+        elif reduction_factor is not None:
+            # Every split adds a vertex and a planar mesh has about two faces per vertex.
+            inside_errors = errors[:rows, :cols].ravel()
+            vertices_count = int((rows - 1) * (cols - 1) * reduction_factor)
+            if vertices_count >= inside_errors.size:
+                threshold = -1.0
+            else:
+                kth = inside_errors.size - vertices_count - 1
+                threshold = float(np.partition(inside_errors, kth)[kth])
+        else:
+            threshold = -1.0
+
+        triangles = MeshComponent._rtin_triangles(errors, threshold)
+        ys, xs = triangles[..., 0], triangles[..., 1]
+        inside = ((ys < rows) & (xs < cols)).all(axis=1)
+        ys, xs = ys[inside], xs[inside]
+
+        # Same winding as the faces of mesh_from_np.
+        cross = (xs[:, 1] - xs[:, 0]) * (ys[:, 2] - ys[:, 0]) - (ys[:, 1] - ys[:, 0]) * (
+            xs[:, 2] - xs[:, 0]
+        )
+        flip = cross > 0
+        ys[flip] = ys[flip][:, ::-1]
+        xs[flip] = xs[flip][:, ::-1]
+
+        used, faces = np.unique(ys * cols + xs, return_inverse=True)
+        vertex_ys, vertex_xs = np.divmod(used, cols)
+        vertices = np.column_stack([vertex_xs, vertex_ys, image[vertex_ys, vertex_xs]]).astype(
+            np.float64
+        )
+
+        mesh = trimesh.Trimesh(vertices=vertices, faces=faces.reshape(-1, 3))
+        mesh = MeshComponent.rotate_mesh(mesh)
+
+        return MeshComponent.mesh_to_output_size(
+            mesh,
+            Parameters.RESIZE_FACTOR,
+            z_scaling_factor,
+            output_x_size,
+        )
+
+    @staticmethod
+    def _rtin_errors(z: np.ndarray, rows: int, cols: int) -> np.ndarray:
+        """Returns the RTIN error of every grid point, which is the maximum vertical error of
+        the triangles with the point in the middle of their hypotenuse and of all their
+        descendants, over all grid points in the triangles. Triangles crossing the edges or
+        the center lines of the rows x cols area have infinite errors, so they are always split.
+
+        Arguments:
+            z (np.ndarray): Heights on a square grid of 2^k + 1 points.
+            rows (int): Number of rows of the area.
+            cols (int): Number of columns of the area.
+
+        Returns:
+            np.ndarray: Errors of the grid points.
+        """
+        size = z.shape[0] - 1
+        errors = np.zeros_like(z, dtype=np.float32)
+        y_lines = np.array([rows - 1, (rows - 1) / 2])
+        x_lines = np.array([cols - 1, (cols - 1) / 2])
+
+        def crosses(lines: np.ndarray, low: np.ndarray, high: np.ndarray) -> np.ndarray:
+            """Returns whether any of the lines is strictly between low and high."""
+            return np.asarray(((low[..., None] < lines) & (lines < high[..., None])).any(axis=-1))
+
+        def children(ys: np.ndarray, xs: np.ndarray, offsets: list[tuple[int, int]]) -> np.ndarray:
+            """Returns the maximum error of the points at the offsets which are on the grid."""
+            result = np.zeros((len(ys), len(xs)), dtype=np.float32)
+            for dy, dx in offsets:
+                child_ys, child_xs = ys + dy, xs + dx
+                valid_ys = (child_ys >= 0) & (child_ys <= size)
+                valid_xs = (child_xs >= 0) & (child_xs <= size)
+                region = np.ix_(valid_ys, valid_xs)
+                result[region] = np.maximum(
+                    result[region], errors[np.ix_(child_ys[valid_ys], child_xs[valid_xs])]
+                )
+            return result
+
+        def plane_errors(*corners: tuple[int, int]) -> np.ndarray:
+            return MeshComponent._rtin_plane_errors(z, step, corners)
+
+        step = 2
+        while step <= size:
+            half = step // 2
+            quarter = step // 4
+            count = size // step
+            on_lines = np.arange(0, size + 1, step)
+            between_lines = np.arange(half, size, step)
+            # Middles of the legs of the triangles, the hypotenuse middles of the previous level.
+            leg_middles = [(dy, dx) for dy in (-quarter, quarter) for dx in (-quarter, quarter)]
+
+            # Triangles with the hypotenuse on an edge of the square and the apex in its center.
+            center = (half, half)
+            top = plane_errors((0, 0), (0, step), center)
+            bottom = plane_errors((step, 0), (step, step), center)
+            left = plane_errors((0, 0), (step, 0), center)
+            right = plane_errors((0, step), (step, step), center)
+
+            # Middles of the horizontal hypotenuses, the triangles have apexes above and below.
+            ys, xs = on_lines, between_lines
+            own = np.zeros((count + 1, count), dtype=np.float32)
+            own[:-1] = top
+            own[1:] = np.maximum(own[1:], bottom)
+            if quarter:
+                own = np.maximum(own, children(ys, xs, leg_middles))
+            forced = (
+                crosses(x_lines, xs - half, xs + half)[None, :]
+                | (crosses(y_lines, ys, ys + half) & (ys + half <= size))[:, None]
+                | (crosses(y_lines, ys - half, ys) & (ys - half >= 0))[:, None]
+            )
+            errors[np.ix_(ys, xs)] = np.where(forced, np.inf, own)
+
+            # Middles of the vertical hypotenuses, the triangles have apexes left and right.
+            ys, xs = between_lines, on_lines
+            own = np.zeros((count, count + 1), dtype=np.float32)
+            own[:, :-1] = left
+            own[:, 1:] = np.maximum(own[:, 1:], right)
+            if quarter:
+                own = np.maximum(own, children(ys, xs, leg_middles))
+            forced = (
+                crosses(y_lines, ys - half, ys + half)[:, None]
+                | (crosses(x_lines, xs, xs + half) & (xs + half <= size))[None, :]
+                | (crosses(x_lines, xs - half, xs) & (xs - half >= 0))[None, :]
+            )
+            errors[np.ix_(ys, xs)] = np.where(forced, np.inf, own)
+
+            # Centers of the squares, the hypotenuse is the diagonal from the corner with both
+            # coordinates on the lines of the next level.
+            ys, xs = between_lines, between_lines
+            main_diagonal = (np.arange(count)[:, None] % 2) == (np.arange(count)[None, :] % 2)
+            main = np.maximum(
+                plane_errors((0, 0), (0, step), (step, step)),
+                plane_errors((0, 0), (step, 0), (step, step)),
+            )
+            anti = np.maximum(
+                plane_errors((0, 0), (0, step), (step, 0)),
+                plane_errors((step, step), (0, step), (step, 0)),
+            )
+            own = np.where(main_diagonal, main, anti)
+            own = np.maximum(own, children(ys, xs, [(0, -half), (0, half), (-half, 0), (half, 0)]))
+            forced = (
+                crosses(y_lines, ys - half, ys + half)[:, None]
+                | crosses(x_lines, xs - half, xs + half)[None, :]
+            )
+            errors[np.ix_(ys, xs)] = np.where(forced, np.inf, own)
+
+            step *= 2
+
+        return errors
+
+    @staticmethod
+    def _rtin_plane_errors(
+        z: np.ndarray, step: int, corners: tuple[tuple[int, int], ...]
+    ) -> np.ndarray:
+        """Returns the maximum vertical distance between the grid points in the triangle with
+        the given corners and its plane, for the triangle in every step x step square.
+
+        Arguments:
+            z (np.ndarray): Heights on a square grid of 2^k + 1 points.
+            step (int): Size of the squares.
+            corners (tuple[tuple[int, int], ...]): Corners of the triangle as (row, column)
+                offsets in the square.
+
+        Returns:
+            np.ndarray: Errors of the triangles, one per square.
+        """
+        count = (z.shape[0] - 1) // step
+        squares = np.lib.stride_tricks.sliding_window_view(z, (step + 1, step + 1))
+        squares = squares[::step, ::step]
+
+        # Barycentric weights of the corners at the points of the square in the triangle.
+        (y1, x1), (y2, x2), (y3, x3) = corners
+        local_ys, local_xs = np.mgrid[0 : step + 1, 0 : step + 1]
+        determinant = (y2 - y3) * (x1 - x3) + (x3 - x2) * (y1 - y3)
+        w1 = ((y2 - y3) * (local_xs - x3) + (x3 - x2) * (local_ys - y3)) / determinant
+        w2 = ((y3 - y1) * (local_xs - x3) + (x1 - x3) * (local_ys - y3)) / determinant
+        w3 = 1 - w1 - w2
+        inside = (w1 >= -1e-9) & (w2 >= -1e-9) & (w3 >= -1e-9)
+        points_ys, points_xs = local_ys[inside], local_xs[inside]
+        w1, w2, w3 = w1[inside], w2[inside], w3[inside]
+
+        corner1 = squares[:, :, y1, x1, None]
+        corner2 = squares[:, :, y2, x2, None]
+        corner3 = squares[:, :, y3, x3, None]
+
+        # The points are processed in chunks to bound the memory of the temporary arrays.
+        chunk_size = 1 << 22
+        points_count = len(points_ys)
+        points_step = min(points_count, max(1, chunk_size // count))
+        rows_step = max(1, chunk_size // (count * points_step))
+        result = np.zeros((count, count), dtype=np.float32)
+        for row in range(0, count, rows_step):
+            rows = slice(row, row + rows_step)
+            for point in range(0, points_count, points_step):
+                points = slice(point, point + points_step)
+                heights = squares[rows][:, :, points_ys[points], points_xs[points]]
+                planes = (
+                    w1[points] * corner1[rows]
+                    + w2[points] * corner2[rows]
+                    + w3[points] * corner3[rows]
+                )
+                result[rows] = np.maximum(result[rows], np.abs(heights - planes).max(axis=-1))
+        return result
+
+    @staticmethod
+    def _rtin_triangles(errors: np.ndarray, threshold: float) -> np.ndarray:
+        """Returns the triangles of the RTIN which approximates the grid within the threshold.
+
+        Arguments:
+            errors (np.ndarray): Errors of the grid points from _rtin_errors.
+            threshold (float): Triangles with a larger error are split.
+
+        Returns:
+            np.ndarray: Triangles as (count, 3, 2) array of (row, column) grid coordinates,
+                the first two vertices are the ends of the hypotenuse.
+        """
+        size = errors.shape[0] - 1
+        # The two top triangles share the main diagonal.
+        active = np.array(
+            [[[0, 0], [size, size], [0, size]], [[size, size], [0, 0], [size, 0]]],
+            dtype=np.int64,
+        )
+        emitted = []
+        while len(active):
+            middle_sum = active[:, 0] + active[:, 1]
+            middle = middle_sum // 2
+            splittable = (middle_sum % 2 == 0).all(axis=1)
+            split = splittable & (errors[middle[:, 0], middle[:, 1]] > threshold)
+            emitted.append(active[~split])
+
+            parents, middle = active[split], middle[split]
+            active = np.concatenate(
+                [
+                    np.stack([parents[:, 2], parents[:, 0], middle], axis=1),
+                    np.stack([parents[:, 1], parents[:, 2], middle], axis=1),
+                ]
+            )
+        return np.concatenate(emitted)
+
     @staticmethod
     def rotate_mesh(mesh: trimesh.Trimesh) -> trimesh.Trimesh:
         """Rotates the given mesh by 180 degrees around the Y-axis and Z-axis.
@@ -458,20 +749,8 @@ class MeshComponent(Component):
             output_directory,
         )
 
-        rotation_matrix = trimesh.transformations.rotation_matrix(-np.pi / 2, [1, 0, 0])
-        mesh.apply_transform(rotation_matrix)
+        uv_coords = self.apply_ground_plane_texture(mesh, texture_output_path)
         vertices = mesh.vertices
-        uv_coords = self._calculate_ground_plane_uvs(vertices)
-        texture_image = Image.open(texture_output_path)
-        material = trimesh.visual.material.PBRMaterial(
-            baseColorTexture=texture_image,
-            metallicFactor=0.0,
-            roughnessFactor=1.0,
-            emissiveFactor=[0.0, 0.0, 0.0],
-        )
-
-        visual = trimesh.visual.TextureVisuals(uv=uv_coords, material=material)
-        mesh.visual = visual
 
         mtl_filename = f"{output_name}.mtl"
         obj_filename = f"{output_name}.obj"
@@ -489,6 +768,32 @@ class MeshComponent(Component):
 
         return obj_filepath, mtl_filepath
 
+    def apply_ground_plane_texture(self, mesh: trimesh.Trimesh, texture_path: str) -> np.ndarray:
+        """Rotate the mesh to the ground plane and apply the texture with UV mapping based on
+        X and Z coordinates, in place.
+
+        Arguments:
+            mesh (trimesh.Trimesh): The mesh to texture
+            texture_path (str): Path to the texture image
+
+        Returns:
+            np.ndarray: UV coordinates of the mesh vertices
+        """
+        rotation_matrix = trimesh.transformations.rotation_matrix(-np.pi / 2, [1, 0, 0])
+        mesh.apply_transform(rotation_matrix)
+        uv_coords = self._calculate_ground_plane_uvs(mesh.vertices)
+        texture_image = Image.open(texture_path)
+        material = trimesh.visual.material.PBRMaterial(
+            baseColorTexture=texture_image,
+            metallicFactor=0.0,
+            roughnessFactor=1.0,
+            emissiveFactor=[0.0, 0.0, 0.0],
+        )
+
+        visual = trimesh.visual.TextureVisuals(uv=uv_coords, material=material)
+        mesh.visual = visual
+        return uv_coords
+
     def _copy_texture_to_output(self, texture_path: str, output_directory: str) -> tuple[str, str]:
         """Copy texture to output directory if needed and return filename/path pair."""
         texture_filename = os.path.basename(texture_path)
@@ -695,6 +1000,10 @@ class MeshComponent(Component):
     ) -> None:
         """Write the actual i3d XML file.
 
+        The small parts of the file are built with ElementTree, the vertices and triangles are
+        formatted from the arrays in chunks and streamed into the file, with the same output
+        as if they were part of the tree.
+
         Arguments:
             mesh  (trimesh.Trimesh): object containing the geometry
             output_path (str): Full path where to save the i3d file
@@ -721,13 +1030,81 @@ class MeshComponent(Component):
 
         shape = self._append_i3d_shape(i3d, name, vertices)
 
-        self._append_i3d_vertices(shape, vertices, has_normals, has_uv, mesh)
-        self._append_i3d_triangles(shape, faces, len(vertices))
+        self._append_i3d_vertices(shape, len(vertices), has_normals, has_uv)
+        self._append_i3d_triangles(shape, len(faces), len(vertices))
         self._append_i3d_scene(i3d, name, is_water)
 
         tree = ET.ElementTree(i3d)
         ET.indent(tree, space="  ")
-        tree.write(output_path, encoding=Parameters.I3D_ENCODING, xml_declaration=True)
+        skeleton = io.BytesIO()
+        tree.write(skeleton, encoding=Parameters.I3D_ENCODING, xml_declaration=True)
+
+        vertex_template = '<v p="%.6f %.6f %.6f"'
+        vertex_columns = [vertices]
+        if has_normals:
+            vertex_template += ' n="%.6f %.6f %.6f"'
+            vertex_columns.append(mesh.vertex_normals)
+        if has_uv:
+            vertex_template += ' t0="%.6f %.6f"'
+            vertex_columns.append(mesh.visual.uv)
+        vertex_template += " />"
+        vertex_rows = np.column_stack(vertex_columns).astype(np.float64)
+
+        self._stream_i3d_file(
+            output_path,
+            skeleton.getvalue(),
+            {
+                _I3D_VERTICES_PLACEHOLDER: (vertex_template, vertex_rows),
+                _I3D_TRIANGLES_PLACEHOLDER: ('<t vi="%d %d %d" />', np.asarray(faces)),
+            },
+        )
+
+    @staticmethod
+    def _stream_i3d_file(
+        output_path: str, skeleton: bytes, blocks: dict[str, tuple[str, np.ndarray]]
+    ) -> None:
+        """Write the serialized i3d skeleton, replacing every placeholder element with the
+        elements formatted from the rows of its block.
+
+        Arguments:
+            output_path (str): Full path where to save the i3d file
+            skeleton (bytes): Serialized and indented i3d tree with the placeholder elements
+            blocks (dict[str, tuple[str, np.ndarray]]): Element template and rows by the
+                placeholder tag, in the order of the placeholders in the skeleton
+        """
+        with open(output_path, "wb") as file:
+            position = 0
+            for placeholder, (template, rows) in blocks.items():
+                marker = f"<{placeholder} />".encode(Parameters.I3D_ENCODING)
+                index = skeleton.find(marker, position)
+                if index == -1:
+                    continue
+                # The elements are separated like the siblings of the placeholder would be.
+                line_start = skeleton.rfind(b"\n", 0, index) + 1
+                separator = "\n" + skeleton[line_start:index].decode(Parameters.I3D_ENCODING)
+
+                file.write(skeleton[position:index])
+                for chunk in MeshComponent._format_i3d_rows(template, rows, separator):
+                    file.write(chunk.encode(Parameters.I3D_ENCODING))
+                position = index + len(marker)
+            file.write(skeleton[position:])
+
+    @staticmethod
+    def _format_i3d_rows(template: str, rows: np.ndarray, separator: str) -> Iterator[str]:
+        """Yield the elements formatted from the rows with the %-template, in chunks.
+
+        Arguments:
+            template (str): %-template of one element, with a field for every column
+            rows (np.ndarray): Values of the elements
+            separator (str): Text between the elements
+
+        Yields:
+            str: Formatted elements of a chunk of rows
+        """
+        for start in range(0, len(rows), _I3D_CHUNK_SIZE):
+            chunk = rows[start : start + _I3D_CHUNK_SIZE]
+            prefix = separator if start else ""
+            yield prefix + separator.join([template] * len(chunk)) % tuple(chunk.ravel().tolist())
 
     def _create_i3d_root(self, name: str) -> ET.Element:
         return ET.Element(
@@ -814,35 +1191,22 @@ class MeshComponent(Component):
     def _append_i3d_vertices(
         self,
         shape: ET.Element,
-        vertices: np.ndarray,
+        vertex_count: int,
         has_normals: bool,
         has_uv: bool,
-        mesh: trimesh.Trimesh,
     ) -> None:
-        xml_vertices = ET.SubElement(shape, "Vertices", {"count": str(len(vertices))})
+        xml_vertices = ET.SubElement(shape, "Vertices", {"count": str(vertex_count)})
         if has_normals:
             xml_vertices.set("normal", "true")
         if has_uv:
             xml_vertices.set("uv0", "true")
+        if vertex_count:
+            ET.SubElement(xml_vertices, _I3D_VERTICES_PLACEHOLDER)
 
-        normals = mesh.vertex_normals if has_normals else None
-        uvs = mesh.visual.uv if has_uv else None
-        for idx, vertex in enumerate(tqdm(vertices, desc="Writing vertices", unit="vertex")):
-            vertex_node = ET.SubElement(xml_vertices, "v")
-            vertex_node.set("p", f"{vertex[0]:.6f} {vertex[1]:.6f} {vertex[2]:.6f}")
-            if normals is not None:
-                normal = normals[idx]
-                vertex_node.set("n", f"{normal[0]:.6f} {normal[1]:.6f} {normal[2]:.6f}")
-            if uvs is not None:
-                uv = uvs[idx]
-                vertex_node.set("t0", f"{uv[0]:.6f} {uv[1]:.6f}")
-
-    def _append_i3d_triangles(
-        self, shape: ET.Element, faces: np.ndarray, vertex_count: int
-    ) -> None:
-        xml_tris = ET.SubElement(shape, "Triangles", {"count": str(len(faces))})
-        for face in tqdm(faces, desc="Writing triangles", unit="triangle"):
-            ET.SubElement(xml_tris, "t", {"vi": f"{face[0]} {face[1]} {face[2]}"})
+    def _append_i3d_triangles(self, shape: ET.Element, face_count: int, vertex_count: int) -> None:
+        xml_tris = ET.SubElement(shape, "Triangles", {"count": str(face_count)})
+        if face_count:
+            ET.SubElement(xml_tris, _I3D_TRIANGLES_PLACEHOLDER)
 
         subsets = ET.SubElement(shape, "Subsets", {"count": "1"})
         ET.SubElement(
@@ -852,7 +1216,7 @@ class MeshComponent(Component):
                 "firstVertex": "0",
                 "numVertices": str(vertex_count),
                 "firstIndex": "0",
-                "numIndices": str(len(faces) * 3),
+                "numIndices": str(face_count * 3),
             },
         )
 
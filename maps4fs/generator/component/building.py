@@ -7,7 +7,6 @@ import os
 from typing import Any, NamedTuple
 from xml.etree import ElementTree as ET
 
-import cv2
 import numpy as np
 from tqdm import tqdm
 
@@ -292,6 +291,19 @@ class Building(MeshComponent):
             info, warning. If not provided, default logging will be used.
     """
 
+    reads = (
+        "buildings",
+        "extended_buildings",
+        "texture_layers",
+        "dem_path",
+        "height_scale_multiplier",
+        "mesh_z_scaling_factor",
+        Parameters.RESOURCE_BACKGROUND_DEM,
+        Parameters.RESOURCE_WEIGHTS,
+    )
+    writes = (Parameters.RESOURCE_MAP_I3D, Parameters.RESOURCE_BUILDINGS)
+    cache_inputs = ("building_settings", "buildings_custom_schema")
+
     def preprocess(self) -> None:
         """Preprocess and prepare buildings schema and buildings map image."""
         self.info: dict[str, Any] = {}
@@ -376,7 +388,7 @@ class Building(MeshComponent):
         for layer in self.map.context.get_building_category_layers():
             self._paint_building_category_layer(buildings_map_image, layer)
 
-        cv2.imwrite(self.buildings_map_path, buildings_map_image)
+        self.write_image(self.buildings_map_path, buildings_map_image)
         self.logger.debug("Building categories map saved to: %s", self.buildings_map_path)
         return True
 
@@ -398,11 +410,11 @@ class Building(MeshComponent):
             return
 
         layer_path = layer.path(self.game.weights_dir_path)
-        if not layer_path or not os.path.isfile(layer_path):
+        if not layer_path or not self.map.context.rasters.exists(layer_path):
             self.logger.warning("Layer texture file not found: %s. Skipping.", layer_path)
             return
 
-        layer_image = cv2.imread(layer_path, cv2.IMREAD_UNCHANGED)
+        layer_image = self.read_image(layer_path)
         if layer_image is None:
             self.logger.warning("Failed to read layer image: %s. Skipping.", layer_path)
             return
@@ -579,7 +591,9 @@ class Building(MeshComponent):
         self,
     ) -> tuple[np.ndarray, list[dict[str, Any]], np.ndarray, np.ndarray | None] | None:
         """Load and validate all required inputs before building placement starts."""
-        if not hasattr(self, "buildings_map_path") or not os.path.isfile(self.buildings_map_path):
+        if not hasattr(self, "buildings_map_path") or not self.map.context.rasters.exists(
+            self.buildings_map_path
+        ):
             self.logger.warning(
                 "Buildings map path is not set or file does not exist. Skipping process step."
             )
@@ -591,7 +605,7 @@ class Building(MeshComponent):
             )
             return None
 
-        buildings_map_image = cv2.imread(self.buildings_map_path, cv2.IMREAD_UNCHANGED)
+        buildings_map_image = self.read_image(self.buildings_map_path)
         if buildings_map_image is None:
             self.logger.warning("Failed to read buildings map image. Skipping process step.")
             return None
@@ -618,9 +632,9 @@ class Building(MeshComponent):
     def _load_full_dem_image(self) -> np.ndarray | None:
         """Load full DEM image used to sample heights outside playable map bounds."""
         full_dem_path = self.map.context.dem_path
-        if not full_dem_path or not os.path.isfile(full_dem_path):
+        if not full_dem_path or not self.map.context.rasters.exists(full_dem_path):
             return None
-        return cv2.imread(full_dem_path, cv2.IMREAD_UNCHANGED)
+        return self.read_image(full_dem_path)
 
     def _prepare_i3d_targets(self) -> tuple[XmlDocument, ET.Element, ET.Element] | None:
         """Open map I3D XML and return document sections required for building placement."""
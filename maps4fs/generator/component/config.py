@@ -8,9 +8,11 @@ from typing import Any
 import cv2
 import numpy as np
 
+from maps4fs.generator import image_io
 from maps4fs.generator.component.base.component_image import ImageComponent
 from maps4fs.generator.component.xml_document import XmlDocument
 from maps4fs.generator.geo import get_country_by_coordinates
+from maps4fs.generator.image_io import ImageKind
 from maps4fs.generator.monitor import monitor_performance
 from maps4fs.generator.settings import Parameters
 
@@ -30,6 +32,15 @@ class Config(ImageComponent):
             info, warning. If not provided, default logging will be used.
     """
 
+    reads = (
+        "satellite_overview_path",
+        Parameters.RESOURCE_SATELLITE,
+        Parameters.RESOURCE_GAME_DEM,
+        Parameters.RESOURCE_MAP_I3D,
+    )
+    writes = (Parameters.RESOURCE_MAP_XML,)
+    cache_inputs = ("i3d_settings",)
+
     def preprocess(self) -> None:
         """Initialize Config component runtime state."""
         self.info: dict[str, Any] = {}
@@ -150,11 +161,11 @@ class Config(ImageComponent):
         """
         self.logger.debug("Reading DEM meter parameters...")
         dem_path = self.game.dem_file_path
-        if not dem_path or not os.path.isfile(dem_path):
+        if not dem_path or not self.map.context.rasters.exists(dem_path):
             self.logger.warning("DEM file not found, fog adjustment will not be applied.")
             return None
 
-        dem_image = cv2.imread(dem_path, cv2.IMREAD_UNCHANGED)
+        dem_image = self.read_image(dem_path)
         if dem_image is None:
             self.logger.warning("Failed to read DEM image, fog adjustment will not be applied.")
             return None
@@ -210,7 +221,7 @@ class Config(ImageComponent):
             return
 
         satellite_images_directory = os.path.dirname(overview_path)
-        overview_image = cv2.imread(overview_path, cv2.IMREAD_UNCHANGED)
+        overview_image = image_io.read_image(overview_path)
 
         if overview_image is None:
             self.logger.warning(
@@ -229,7 +240,7 @@ class Config(ImageComponent):
             f"{Parameters.OVERVIEW_IMAGE_FILENAME}.png",
         )
 
-        cv2.imwrite(resized_overview_path, resized_overview_image)
+        self.save_image(resized_overview_path, resized_overview_image, ImageKind.INTERMEDIATE)
         self.logger.debug("Overview image saved to: %s", resized_overview_path)
 
         if os.path.isfile(overview_image_path):
@@ -546,7 +557,7 @@ class Config(ImageComponent):
             raise FileNotFoundError(f"Base texture file not found: {texture_path}")
 
         # 3. Load the base texture.
-        texture = cv2.imread(texture_path, cv2.IMREAD_UNCHANGED)
+        texture = image_io.read_image(texture_path)
         if texture is None:
             raise ValueError(f"Could not load base texture: {texture_path}")
 
@@ -673,7 +684,7 @@ class Config(ImageComponent):
             )
 
         # 16. Save the modified texture.
-        cv2.imwrite(texture_path, texture)
+        self.save_image(texture_path, texture, ImageKind.DELIVERABLE)
         self.logger.debug(
             "Generated license plate texture with country code %s at: %s",
             country_code,
@@ -4,15 +4,17 @@ from __future__ import annotations
 
 import math
 import os
-import shutil
+import tempfile
 from typing import Any
 
 import cv2
 import numpy as np
 from pydtmdl import DTMProvider
 
+from maps4fs.generator import image_io
 from maps4fs.generator.component.base.component_image import ImageComponent
 from maps4fs.generator.constants import Paths
+from maps4fs.generator.image_io import ImageKind
 from maps4fs.generator.monitor import monitor_performance
 from maps4fs.generator.settings import Parameters
 
@@ -32,6 +34,17 @@ class DEM(ImageComponent):
             info, warning. If not provided, default logging will be used.
     """
 
+    reads = ()
+    writes = (
+        Parameters.RESOURCE_BACKGROUND_DEM,
+        "dem_path",
+        "height_scale_value",
+        "height_scale_multiplier",
+        "mesh_z_scaling_factor",
+        "change_height_scale",
+    )
+    cache_inputs = ("dtm_provider", "dtm_provider_settings", "custom_background_path")
+
     def preprocess(self) -> None:
         output_size_multiplier = 1.5 if self.rotation else 1
         self.map_size = self.map_size + Parameters.BACKGROUND_DISTANCE * 2
@@ -110,18 +123,34 @@ class DEM(ImageComponent):
         )
         return dem_size, dem_size
 
-    def update_info(self, state: str, data: np.ndarray) -> None:
+    @staticmethod
+    def min_max(data: np.ndarray) -> tuple[float, float]:
+        """Returns the minimum and maximum of the DEM data in a single pass.
+
+        Arguments:
+            data (np.ndarray): Single channel DEM data.
+
+        Returns:
+            tuple[float, float]: Minimum and maximum values.
+        """
+        minimum, maximum, _, _ = cv2.minMaxLoc(data)
+        return minimum, maximum
+
+    def update_info(self, state: str, data: np.ndarray, extremes: np.ndarray | None = None) -> None:
         """Update info dictionary with additional information about DEM data.
 
         Arguments:
             data (np.ndarray): DEM data.
+            extremes (np.ndarray | None, optional): Minimum and maximum of the data, if they are
+                known already.
         """
 
         try:
+            minimum, maximum = self.min_max(data) if extremes is None else extremes
             entry = {
-                "min": float(data.min()),
-                "max": float(data.max()),
-                "deviation": float(data.max() - data.min()),
+                "min": float(minimum),
+                "max": float(maximum),
+                "deviation": float(maximum) - float(minimum),
                 "dtype": str(data.dtype),
                 "shape": str(data.shape),
             }
@@ -135,10 +164,10 @@ class DEM(ImageComponent):
         saves to map directory."""
 
         if self.map.custom_background_path:
-            custom_dem_data = cv2.imread(self.map.custom_background_path, cv2.IMREAD_UNCHANGED)
+            custom_dem_data = image_io.read_image(self.map.custom_background_path)
             if custom_dem_data is None:
                 raise ValueError(f"Custom DEM could not be read: {self.map.custom_background_path}")
-            shutil.copyfile(self.map.custom_background_path, self._dem_path)
+            self.copy_image(self.map.custom_background_path, self._dem_path)
             self.determine_height_scale(custom_dem_data, adjust=False)
             self.logger.debug("Custom DEM copied to %s.", self._dem_path)
             return
@@ -175,18 +204,18 @@ class DEM(ImageComponent):
                 f"Details: the returned data type is not supported: {data.dtype}."
             )
 
+        original_extremes = np.array(self.min_max(data))
         self.logger.debug(
             "DEM data was retrieved from DTM provider. Shape: %s, dtype: %s. Min: %s, max: %s.",
             data.shape,
             data.dtype,
-            data.min(),
-            data.max(),
+            *original_extremes,
         )
 
-        self.update_info("original", data)
+        self.update_info("original", data, original_extremes)
 
         # Check if the data contains any non-zero values, otherwise raise an error.
-        if not np.any(data):
+        if not original_extremes.any():
             self.logger.error("DTM provider returned empty data.")
             raise ValueError(
                 "The DTM provider returned the downloaded data, however it appears to be empty "
@@ -196,31 +225,51 @@ class DEM(ImageComponent):
                 "Please try using a different DTM provider."
             )
 
-        # 1. Resize DEM data to the output resolution.
+        # 1. Resize DEM data to the output resolution into the float32 working buffer.
         resampled_data = self.resize_to_output(data)
+        del data
+
+        # The steps below work in place and are monotonic, so the minimum and maximum are
+        # gathered once and then updated with the same float32 arithmetic as the buffer.
+        extremes = np.array(self.min_max(resampled_data), dtype=np.float32)
 
         # 2. Apply multiplier (-10 to 120.4 becomes -20 to 240.8)
-        resampled_data = self.apply_multiplier(resampled_data)
-        self.update_info("multiplied", resampled_data)
+        self.apply_multiplier(resampled_data)
+        extremes *= self.map.dem_settings.multiplier
+        extremes.sort()
+        self.update_info("multiplied", resampled_data, extremes)
 
         # 3. Raise terrain, and optionally lower to plateau level+water depth
         # e.g. -20 to 240.8m becomes 20 to 280.8m
-        resampled_data = self.raise_or_lower(resampled_data)
-        self.update_info("raised_lowered", resampled_data)
+        ground_level = float(extremes[0])
+        self.raise_or_lower(resampled_data, ground_level)
+        dem_settings = self.map.dem_settings
+        if dem_settings.adjust_terrain_to_ground_level:
+            extremes += dem_settings.plateau + dem_settings.water_depth - ground_level
+        self.update_info("raised_lowered", resampled_data, extremes)
+        self.logger.debug("DEM data was adjusted to the ground level. Min: %s, max: %s.", *extremes)
 
         # 4. Determine actual height scale value using ceiling
         # e.g. 255 becomes 280.8+10 = 291
-        height_scale_value = self.determine_height_scale(resampled_data)
+        height_scale_value = self.determine_height_scale(resampled_data, maximum=float(extremes[1]))
 
         # 5. Normalize DEM data to 16-bit unsigned integer range (0 to 65535)
         # e.g. multiply by 65535/291, clip and return as uint16
+        normalized_extremes = np.clip(extremes * (65535 / height_scale_value), 0, 65535).astype(
+            np.uint16
+        )
         resampled_data = self.normalize_data(resampled_data, height_scale_value)
-        self.update_info("normalized", resampled_data)
+        self.update_info("normalized", resampled_data, normalized_extremes)
+        self.logger.debug(
+            "DEM data was normalized and clipped to 16-bit unsigned integer range. "
+            "Min: %s, max: %s.",
+            *normalized_extremes,
+        )
 
         # 6. Blur DEM data.
         resampled_data = self.apply_blur(resampled_data, blur_radius=self.get_blur_radius())
 
-        cv2.imwrite(self._dem_path, resampled_data)
+        self.write_image(self._dem_path, resampled_data, ImageKind.DELIVERABLE)
         self.logger.debug("DEM data was saved to %s.", self._dem_path)
 
         if self.rotation:
@@ -228,7 +277,8 @@ class DEM(ImageComponent):
 
     @monitor_performance
     def normalize_data(self, data: np.ndarray, height_scale_value: int) -> np.ndarray:
-        """Normalize DEM data to 16-bit unsigned integer range (0 to 65535).
+        """Normalize DEM data to 16-bit unsigned integer range (0 to 65535). The float32
+        working buffer is scaled and clipped in place.
 
         Arguments:
             data (np.ndarray): DEM data.
@@ -237,30 +287,32 @@ class DEM(ImageComponent):
         Returns:
             np.ndarray: Normalized DEM data.
         """
-        normalized_data = np.clip((data / height_scale_value) * 65535, 0, 65535).astype(np.uint16)
-        self.logger.debug(
-            "DEM data was normalized and clipped to 16-bit unsigned integer range. "
-            "Min: %s, max: %s.",
-            normalized_data.min(),
-            normalized_data.max(),
-        )
-        return normalized_data
+        if data.dtype != np.float32:
+            data = data.astype(np.float32)
+        data *= 65535 / height_scale_value
+        np.clip(data, 0, 65535, out=data)
+        return data.astype(np.uint16)
 
     @monitor_performance
-    def determine_height_scale(self, data: np.ndarray, adjust: bool = True) -> int:
+    def determine_height_scale(
+        self, data: np.ndarray, adjust: bool = True, maximum: float | None = None
+    ) -> int:
         """Determine height scale value using ceiling.
 
         Arguments:
             data (np.ndarray): DEM data.
             adjust (bool, optional): Whether to adjust height scale based on data max value.
+            maximum (float | None, optional): Maximum of the data, if it is known already.
 
         Returns:
             int: Height scale value.
         """
         height_scale = self.map.dem_settings.minimum_height_scale
         if adjust:
+            if maximum is None:
+                maximum = float(data.max())
             adjusted_height_scale = math.ceil(
-                max(height_scale, data.max() + self.map.dem_settings.ceiling)
+                max(height_scale, maximum + self.map.dem_settings.ceiling)
             )
         else:
             adjusted_height_scale = height_scale
@@ -284,31 +336,38 @@ class DEM(ImageComponent):
         self.logger.debug("Height scale value is %s.", adjusted_height_scale)
         return adjusted_height_scale
 
-    def raise_or_lower(self, data: np.ndarray) -> np.ndarray:
-        """Raise or lower terrain to the level of plateau+water depth."""
+    def raise_or_lower(
+        self, data: np.ndarray, current_ground_level: float | None = None
+    ) -> np.ndarray:
+        """Raise or lower terrain to the level of plateau+water depth, in place.
+
+        Arguments:
+            data (np.ndarray): DEM data in the float32 working buffer.
+            current_ground_level (float | None, optional): Minimum of the data, if it is known
+                already.
+
+        Returns:
+            np.ndarray: Shifted DEM data.
+        """
 
         if not self.map.dem_settings.adjust_terrain_to_ground_level:
             return data
 
         desired_ground_level = self.map.dem_settings.plateau + self.map.dem_settings.water_depth
-        current_ground_level = data.min()
+        if current_ground_level is None:
+            current_ground_level = float(data.min())
 
-        data = data + (desired_ground_level - current_ground_level)
+        data += desired_ground_level - current_ground_level
 
-        self.logger.debug(
-            "Array was shifted to the ground level %s. Min: %s, max: %s.",
-            desired_ground_level,
-            data.min(),
-            data.max(),
-        )
+        self.logger.debug("Array was shifted to the ground level %s.", desired_ground_level)
         return data
 
     @monitor_performance
     def apply_multiplier(self, data: np.ndarray) -> np.ndarray:
-        """Apply multiplier to DEM data.
+        """Apply multiplier to DEM data, in place.
 
         Arguments:
-            data (np.ndarray): DEM data.
+            data (np.ndarray): DEM data in the float32 working buffer.
 
         Returns:
             np.ndarray: Multiplied DEM data.
@@ -317,18 +376,15 @@ class DEM(ImageComponent):
         if multiplier == 1:
             return data
 
-        multiplied_data = data * multiplier
-        self.logger.debug(
-            "DEM data was multiplied by %s. Min: %s, max: %s.",
-            multiplier,
-            multiplied_data.min(),
-            multiplied_data.max(),
-        )
-        return multiplied_data
+        data *= multiplier
+        self.logger.debug("DEM data was multiplied by %s.", multiplier)
+        return data
 
     @monitor_performance
     def resize_to_output(self, data: np.ndarray) -> np.ndarray:
-        """Resize DEM data to the output resolution.
+        """Resize DEM data to the output resolution into a float32 working buffer. Buffers of
+        at least Parameters.DEM_MEMMAP_MIN_PIXELS pixels are memory-mapped to a temporary file
+        next to the DEM.
 
         Arguments:
             data (np.ndarray): DEM data.
@@ -336,9 +392,27 @@ class DEM(ImageComponent):
         Returns:
             np.ndarray: Resized DEM data.
         """
-        resampled_data = cv2.resize(data, self.output_resolution, interpolation=cv2.INTER_LINEAR)
+        width, height = self.output_resolution
+        buffer = None
+        if width * height >= Parameters.DEM_MEMMAP_MIN_PIXELS:
+            buffer_file = tempfile.TemporaryFile(dir=os.path.dirname(self._dem_path))
+            buffer = np.memmap(buffer_file, dtype=np.float32, mode="w+", shape=(height, width))
+            self.logger.debug("DEM working buffer is memory-mapped: %s x %s.", width, height)
+
+        # Integer data is interpolated in its own type to keep the rounding of the values.
+        if data.dtype.kind == "f":
+            return cv2.resize(
+                data.astype(np.float32, copy=False),
+                self.output_resolution,
+                dst=buffer,
+                interpolation=cv2.INTER_LINEAR,
+            )
 
-        return resampled_data
+        resampled_data = cv2.resize(data, self.output_resolution, interpolation=cv2.INTER_LINEAR)
+        if buffer is None:
+            return resampled_data.astype(np.float32)
+        buffer[...] = resampled_data
+        return buffer
 
     @monitor_performance
     def rotate_dem(self) -> None:
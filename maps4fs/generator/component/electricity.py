@@ -105,6 +105,21 @@ class ElectricityEntryCollection:
 class Electricity(MeshComponent):
     """Component for placing electricity poles in map.i3d based on OSM point data."""
 
+    reads = (
+        "electricity_lines_polylines",
+        "electricity_poles_points",
+        "extended_electricity_lines_polylines",
+        "extended_electricity_poles_points",
+        "roads_polylines",
+        "extended_roads_polylines",
+        "texture_layers",
+        "height_scale_multiplier",
+        "mesh_z_scaling_factor",
+        Parameters.RESOURCE_BACKGROUND_DEM,
+    )
+    writes = (Parameters.RESOURCE_MAP_I3D,)
+    cache_inputs = ("electricity_custom_schema",)
+
     def preprocess(self) -> None:
         """Load schema and prepare electricity component state."""
         self.info: dict[str, Any] = {}
@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import json
 import os
+from functools import partial
 from random import choice, randint
 from typing import Any, NamedTuple
 
@@ -51,6 +52,10 @@ class GRLE(ImageComponent):
             info, warning. If not provided, default logging will be used.
     """
 
+    reads = ("fields", "farmyards", "texture_layers", Parameters.RESOURCE_WEIGHTS)
+    writes = (Parameters.RESOURCE_WEIGHTS, "foliage_density_map_uint16")
+    cache_inputs = ("grle_settings",)
+
     def preprocess(self) -> None:
         """Gets the path to the map I3D file from the game instance and saves it to the instance
         attribute. If the game does not support I3D files, the attribute is set to None."""
@@ -107,7 +112,7 @@ class GRLE(ImageComponent):
             else:
                 info_layer_data = np.zeros((height, width, channels), dtype=data_type)
             self.logger.debug("Shape of %s: %s.", info_layer.name, info_layer_data.shape)
-            cv2.imwrite(file_path, info_layer_data)
+            self.write_image(file_path, info_layer_data)
             self.logger.debug("InfoLayer PNG file %s created.", file_path)
 
         self.grle_schema = grle_schema
@@ -136,57 +141,73 @@ class GRLE(ImageComponent):
 
     @monitor_performance
     def previews(self) -> list[str]:
-        """Returns a list of paths to the preview images (empty list).
-        The component does not generate any preview images so it returns an empty list.
+        """Returns a list of paths to the colored previews of the info layers, rendered
+        on demand.
 
         Returns:
-            list[str]: An empty list.
+            list[str]: A list of paths to the preview images.
         """
         preview_paths = []
         for preview_name, preview_path in self.preview_paths.items():
-            save_path = os.path.join(self.previews_directory, f"{preview_name}.png")
-            # Resize the preview image to the maximum size allowed for previews.
-            image = cv2.imread(preview_path, cv2.IMREAD_GRAYSCALE)
-            if image is None:
+            save_path = self.render_preview(
+                f"{preview_name}.png",
+                [preview_path],
+                partial(self._colored_preview, preview_path),
+            )
+            if save_path is None:
                 self.logger.warning("Preview source could not be loaded: %s", preview_path)
                 continue
-            if (
-                image.shape[0] > Parameters.PREVIEW_MAXIMUM_SIZE
-                or image.shape[1] > Parameters.PREVIEW_MAXIMUM_SIZE
-            ):
-                image = cv2.resize(
-                    image, (Parameters.PREVIEW_MAXIMUM_SIZE, Parameters.PREVIEW_MAXIMUM_SIZE)
-                )
-            image_normalized = np.empty_like(image)
-            cv2.normalize(image, image_normalized, 0, 255, cv2.NORM_MINMAX)
-            image_colored = cv2.applyColorMap(image_normalized, cv2.COLORMAP_JET)
-            cv2.imwrite(save_path, image_colored)
             preview_paths.append(save_path)
 
             if preview_name != "farmlands":
                 continue
 
-            with_fields_save_path = os.path.join(
-                self.previews_directory, f"{preview_name}_with_fields.png"
-            )
-            image_with_fields = self.overlay_fields(image_colored)
-            if image_with_fields is None:
+            fields_layer_path = self._fields_layer_path()
+            if fields_layer_path is None:
                 continue
-            cv2.imwrite(with_fields_save_path, image_with_fields)
-            preview_paths.append(with_fields_save_path)
+            with_fields_save_path = self.render_preview(
+                f"{preview_name}_with_fields.png",
+                [preview_path, fields_layer_path],
+                partial(self._preview_with_fields, preview_path, fields_layer_path),
+            )
+            if with_fields_save_path is not None:
+                preview_paths.append(with_fields_save_path)
 
         return preview_paths
 
-    @monitor_performance
-    def overlay_fields(self, farmlands_np: np.ndarray) -> np.ndarray | None:
-        """Overlay fields on the farmlands preview image.
+    def _colored_preview(self, preview_path: str) -> np.ndarray | None:
+        """Returns the info layer normalized and colored for the preview.
 
         Arguments:
-            farmlands_np (np.ndarray): The farmlands preview image.
+            preview_path (str): The path to the info layer.
 
         Returns:
-            np.ndarray | None: The farmlands preview image with fields overlayed on top of it.
+            np.ndarray | None: The colored preview or None if the info layer can't be loaded.
         """
+        image = self.map.preview_cache.load(preview_path, cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            return None
+        image_normalized = np.empty_like(image)
+        cv2.normalize(image, image_normalized, 0, 255, cv2.NORM_MINMAX)
+        return cv2.applyColorMap(image_normalized, cv2.COLORMAP_JET)
+
+    def _preview_with_fields(self, preview_path: str, fields_layer_path: str) -> np.ndarray | None:
+        """Returns the colored farmlands preview with the fields overlayed on top of it.
+
+        Arguments:
+            preview_path (str): The path to the farmlands info layer.
+            fields_layer_path (str): The path to the fields weight image.
+
+        Returns:
+            np.ndarray | None: The preview or None if any of the images can't be loaded.
+        """
+        image_colored = self._colored_preview(preview_path)
+        if image_colored is None:
+            return None
+        return self.overlay_fields(image_colored, fields_layer_path)
+
+    def _fields_layer_path(self) -> str | None:
+        """Returns the path to the fields weight image (or its preview) if it exists."""
         fields_layer = self.map.context.get_layer_by_usage("field")
         if not fields_layer:
             self.logger.debug("Fields layer not found in the texture component.")
@@ -196,12 +217,33 @@ class GRLE(ImageComponent):
         if not fields_layer_path or not os.path.isfile(fields_layer_path):
             self.logger.debug("Fields layer not found in the texture component.")
             return None
-        fields_np = cv2.imread(fields_layer_path)
+        return fields_layer_path
+
+    def overlay_fields(
+        self, farmlands_np: np.ndarray, fields_layer_path: str | None = None
+    ) -> np.ndarray | None:
+        """Overlay fields on the farmlands preview image.
+
+        Arguments:
+            farmlands_np (np.ndarray): The farmlands preview image.
+            fields_layer_path (str | None, optional): The path to the fields weight image,
+                looked up from the texture layers if None.
+
+        Returns:
+            np.ndarray | None: The farmlands preview image with fields overlayed on top of it.
+        """
+        fields_layer_path = fields_layer_path or self._fields_layer_path()
+        if fields_layer_path is None:
+            return None
+        # Resize fields_np to the same size as farmlands_np.
+        fields_np = self.map.preview_cache.load(
+            fields_layer_path,
+            cv2.IMREAD_COLOR,
+            size=(farmlands_np.shape[1], farmlands_np.shape[0]),
+        )
         if fields_np is None:
             self.logger.debug("Fields preview image could not be loaded: %s", fields_layer_path)
             return None
-        # Resize fields_np to the same size as farmlands_np.
-        fields_np = cv2.resize(fields_np, (farmlands_np.shape[1], farmlands_np.shape[0]))
 
         # use fields_np as base layer and overlay farmlands_np on top of it with 50% alpha blending.
         return cv2.addWeighted(fields_np, 0.5, farmlands_np, 0.5, 0)
@@ -233,11 +275,11 @@ class GRLE(ImageComponent):
             "Adding farmlands to the InfoLayer PNG file: %s.", info_layer_farmlands_path
         )
 
-        if not os.path.isfile(info_layer_farmlands_path):
+        if not self.map.context.rasters.exists(info_layer_farmlands_path):
             self.logger.warning("InfoLayer PNG file %s not found.", info_layer_farmlands_path)
             return
 
-        image = cv2.imread(info_layer_farmlands_path, cv2.IMREAD_UNCHANGED)
+        image = self.read_image(info_layer_farmlands_path)
         if image is None:
             self.logger.warning(
                 "Could not read farmlands info layer image: %s", info_layer_farmlands_path
@@ -328,7 +370,7 @@ class GRLE(ImageComponent):
         if self.map.grle_settings.fill_empty_farmlands:
             image[image == 0] = 255
 
-        cv2.imwrite(info_layer_farmlands_path, image)
+        self.write_image(info_layer_farmlands_path, image)
 
         self.assets.farmlands = info_layer_farmlands_path
 
@@ -357,19 +399,23 @@ class GRLE(ImageComponent):
             return
 
         weights_directory = self.game.weights_dir_path
-        grass_image_path = grass_layer.get_preview_or_path(weights_directory)
+        grass_image_path = grass_layer.get_preview_or_path(
+            weights_directory, self.map.context.rasters.exists
+        )
         self.logger.debug("Grass image path: %s.", grass_image_path)
 
         forest_layer = self.map.context.get_layer_by_usage("forest")
         forest_image = None
         if forest_layer:
-            forest_image_path = forest_layer.get_preview_or_path(weights_directory)
+            forest_image_path = forest_layer.get_preview_or_path(
+                weights_directory, self.map.context.rasters.exists
+            )
             self.logger.debug("Forest image path: %s.", forest_image_path)
             if forest_image_path:
 
-                forest_image = cv2.imread(forest_image_path, cv2.IMREAD_UNCHANGED)
+                forest_image = self.read_image(forest_image_path)
 
-        if not grass_image_path or not os.path.isfile(grass_image_path):
+        if not grass_image_path or not self.map.context.rasters.exists(grass_image_path):
             self.logger.warning("Base image not found in %s.", grass_image_path)
             return
 
@@ -377,12 +423,12 @@ class GRLE(ImageComponent):
 
         self.logger.debug("Density map for fruits path: %s.", density_map_fruit_path)
 
-        if not os.path.isfile(density_map_fruit_path):
+        if not self.map.context.rasters.exists(density_map_fruit_path):
             self.logger.warning("Density map for fruits not found in %s.", density_map_fruit_path)
             return
 
         # Single channeled 8-bit image, where non-zero values (255) are where the grass is.
-        grass_image = cv2.imread(grass_image_path, cv2.IMREAD_UNCHANGED)
+        grass_image = self.read_image(grass_image_path)
         if grass_image is None:
             self.logger.warning("Could not load grass mask image: %s", grass_image_path)
             return
@@ -466,7 +512,7 @@ class GRLE(ImageComponent):
 
         # Three channeled density map image where non-zero values in channel 0
         # represent foliage types. Depending on schema, dtype can be uint8 or uint16.
-        density_map_fruits = cv2.imread(density_map_fruit_path, cv2.IMREAD_UNCHANGED)
+        density_map_fruits = self.read_image(density_map_fruit_path)
         if density_map_fruits is None:
             self.logger.warning("Could not load density map for fruits: %s", density_map_fruit_path)
             return
@@ -482,7 +528,7 @@ class GRLE(ImageComponent):
         # Save the updated density map.
         # Ensure that order of channels is correct because CV2 uses BGR and we need RGB.
         density_map_fruits = cv2.cvtColor(density_map_fruits, cv2.COLOR_BGR2RGB)
-        cv2.imwrite(density_map_fruit_path, density_map_fruits)
+        self.write_image(density_map_fruit_path, density_map_fruits)
 
         self.assets.plants = density_map_fruit_path
 
@@ -614,7 +660,9 @@ class GRLE(ImageComponent):
     @monitor_performance
     def _process_environment(self) -> None:
         info_layer_environment_path = self.game.environment_path
-        if not info_layer_environment_path or not os.path.isfile(info_layer_environment_path):
+        if not info_layer_environment_path or not self.map.context.rasters.exists(
+            info_layer_environment_path
+        ):
             self.logger.warning(
                 "Environment InfoLayer PNG file not found in %s.", info_layer_environment_path
             )
@@ -624,7 +672,7 @@ class GRLE(ImageComponent):
             "Processing environment InfoLayer PNG file: %s.", info_layer_environment_path
         )
 
-        environment_image = cv2.imread(info_layer_environment_path, cv2.IMREAD_UNCHANGED)
+        environment_image = self.read_image(info_layer_environment_path)
         if environment_image is None:
             self.logger.error("Failed to read the environment InfoLayer PNG file.")
             return
@@ -671,7 +719,7 @@ class GRLE(ImageComponent):
                 Parameters.WATER_AREA_PIXEL_VALUE
             )
 
-        cv2.imwrite(info_layer_environment_path, environment_image)
+        self.write_image(info_layer_environment_path, environment_image)
         self.logger.debug("Environment InfoLayer PNG file saved: %s.", info_layer_environment_path)
         self.preview_paths["environment"] = info_layer_environment_path
 
@@ -689,16 +737,18 @@ class GRLE(ImageComponent):
         Returns:
             np.ndarray | None: The resized and dilated weight image, or None if the image could not be loaded.
         """
-        weight_image_path = layer.get_preview_or_path(self.game.weights_dir_path)
+        weight_image_path = layer.get_preview_or_path(
+            self.game.weights_dir_path, self.map.context.rasters.exists
+        )
         self.logger.debug("Weight image path for area type layer: %s.", weight_image_path)
 
-        if not weight_image_path or not os.path.isfile(weight_image_path):
+        if not weight_image_path or not self.map.context.rasters.exists(weight_image_path):
             self.logger.warning(
                 "Weight image for area type layer not found in %s.", weight_image_path
             )
             return None
 
-        weight_image = cv2.imread(weight_image_path, cv2.IMREAD_UNCHANGED)
+        weight_image = self.read_image(weight_image_path)
         if weight_image is None:
             self.logger.error("Failed to read the weight image for area type layer.")
             return None
@@ -730,13 +780,15 @@ class GRLE(ImageComponent):
     def _process_indoor(self) -> None:
         """Processes the indoor layers."""
         info_layer_indoor_path = self.game.indoor_mask_path
-        if not info_layer_indoor_path or not os.path.isfile(info_layer_indoor_path):
+        if not info_layer_indoor_path or not self.map.context.rasters.exists(
+            info_layer_indoor_path
+        ):
             self.logger.warning(
                 "Indoor InfoLayer PNG file not found in %s.", info_layer_indoor_path
             )
             return
 
-        indoor_mask_image = cv2.imread(info_layer_indoor_path, cv2.IMREAD_UNCHANGED)
+        indoor_mask_image = self.read_image(info_layer_indoor_path)
         if indoor_mask_image is None:
             self.logger.warning(
                 "Failed to read the indoor InfoLayer PNG file %s.", info_layer_indoor_path
@@ -759,6 +811,6 @@ class GRLE(ImageComponent):
 
             indoor_mask_image[weight_image > 0] = 1
 
-        cv2.imwrite(info_layer_indoor_path, indoor_mask_image)
+        self.write_image(info_layer_indoor_path, indoor_mask_image)
         self.logger.debug("Indoor InfoLayer PNG file saved: %s.", info_layer_indoor_path)
         self.preview_paths["indoor"] = info_layer_indoor_path
@@ -6,7 +6,7 @@ import dataclasses
 import os
 import re
 from dataclasses import dataclass
-from typing import Any
+from typing import Any, Callable
 
 
 @dataclass
@@ -93,30 +93,39 @@ class Layer:
         """
         return self.path(weights_directory).replace(".png", "_preview.png")
 
-    def get_preview_or_path(self, weights_directory: str) -> str:
+    def get_preview_or_path(
+        self, weights_directory: str, exists: Callable[[str], bool] = os.path.isfile
+    ) -> str:
         """Returns path to the preview of the first texture of the layer if it exists,
         otherwise returns path to the texture.
 
         Arguments:
             weights_directory (str): Path to the directory with weights.
+            exists (Callable[[str], bool], optional): Function to check if the preview exists,
+                e.g. the exists method of the map raster store. Defaults to os.path.isfile.
 
         Returns:
             str: Path to the preview or texture.
         """
         preview_path = self.path_preview(weights_directory)
-        return preview_path if os.path.isfile(preview_path) else self.path(weights_directory)
+        return preview_path if exists(preview_path) else self.path(weights_directory)
 
-    def paths(self, weights_directory: str) -> list[str]:
+    def paths(
+        self, weights_directory: str, listdir: Callable[[str], list[str]] = os.listdir
+    ) -> list[str]:
         """Returns a list of paths to the textures of the layer.
         NOTE: Works only after the textures are generated, since it just lists the directory.
 
         Arguments:
             weights_directory (str): Path to the directory with weights.
+            listdir (Callable[[str], list[str]], optional): Function to list the directory, e.g.
+                the listdir method of the map raster store, which includes the rasters not
+                written to disk yet. Defaults to os.listdir.
 
         Returns:
             list[str]: List of paths to the textures.
         """
-        weight_files = os.listdir(weights_directory)
+        weight_files = listdir(weights_directory)
 
         # Inconsistent names are the name of textures that are not following the pattern
         # of texture_name{idx}_weight.png.
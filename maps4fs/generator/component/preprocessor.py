@@ -10,19 +10,21 @@ from typing import Any
 from maps4fs.generator.component.base.component import Component
 from maps4fs.generator.component.layer import Layer
 from maps4fs.generator.osm import (
+    OSMDocument,
     OSMTagFilter,
-    append_bounds_overlays,
     check_and_fix_osm,
     download_osm_map_by_bbox,
 )
-from maps4fs.generator.osm import preprocess as preprocess_osm_file
-from maps4fs.generator.osm import prune_osm_file
 from maps4fs.generator.settings import Parameters
 
 
 class Preprocessor(Component):
     """Prepare local inputs for later generation components."""
 
+    reads = (Parameters.RESOURCE_OSM,)
+    writes = (Parameters.RESOURCE_OSM, "texture_layers")
+    cache_inputs = ("preprocessor_settings", "texture_custom_schema", "custom_osm")
+
     custom_osm_filename = "custom_osm.osm"
     exclude_cut_tags: OSMTagFilter = {"power": ["line", "minor_line"]}
     merge_distance = 0.35
@@ -71,9 +73,12 @@ class Preprocessor(Component):
         backup_path = f"{working_osm_path}.preprocessor-backup"
         shutil.copyfile(working_osm_path, backup_path)
         try:
-            self._apply_usage_preprocessing(working_osm_path)
-            self._prune_local_osm(working_osm_path)
-            self._append_bounds_overlays(working_osm_path)
+            # The file is parsed once, all steps edit it in memory and it is written once.
+            document = OSMDocument(working_osm_path)
+            self._apply_usage_preprocessing(document)
+            self._prune_local_osm(document)
+            self._append_bounds_overlays(document)
+            document.save()
             check_and_fix_osm(working_osm_path)
         except Exception as exc:
             shutil.copyfile(backup_path, working_osm_path)
@@ -85,6 +90,17 @@ class Preprocessor(Component):
             if os.path.isfile(backup_path):
                 os.remove(backup_path)
 
+    def get_cache_state(self) -> dict[str, Any]:
+        """Return the OSM source selected by the preprocessor for later components."""
+        return {"custom_osm": self.map.custom_osm}
+
+    def restore_cache_state(self, state: dict[str, Any]) -> None:
+        """Point the map to the restored local OSM file."""
+        custom_osm = state.get("custom_osm")
+        self.map.custom_osm = custom_osm if custom_osm and os.path.isfile(custom_osm) else None
+        if self.auto_download_enabled:
+            self.map.update_main_settings({"custom_osm": self.map.custom_osm is not None})
+
     def _load_layers(self) -> list[Layer]:
         """Load texture layers from schema without instantiating Texture."""
         custom_schema = self.map.texture_custom_schema
@@ -286,7 +302,7 @@ class Preprocessor(Component):
 
         return [(filter_tags, bbox) for _, filter_tags, bbox in rules_by_key.values()]
 
-    def _prune_local_osm(self, working_osm_path: str) -> None:
+    def _prune_local_osm(self, document: OSMDocument) -> None:
         """Drop OSM primitives that will never be queried by the runtime schema."""
         runtime_rules = self._runtime_prune_rules()
         if not runtime_rules:
@@ -294,9 +310,7 @@ class Preprocessor(Component):
             return
 
         try:
-            self.pruning_report = prune_osm_file(
-                working_osm_path,
-                working_osm_path,
+            self.pruning_report = document.prune(
                 [filter_tags for filter_tags, _ in runtime_rules],
                 spatial_filters=runtime_rules,
             )
@@ -316,11 +330,10 @@ class Preprocessor(Component):
                 exc,
             )
 
-    def _append_bounds_overlays(self, working_osm_path: str) -> None:
+    def _append_bounds_overlays(self, document: OSMDocument) -> None:
         """Append synthetic playable and background bounds overlays to the local OSM file."""
         try:
-            self.bounds_overlay_report = append_bounds_overlays(
-                working_osm_path,
+            self.bounds_overlay_report = document.append_bounds_overlays(
                 self.coordinates,
                 map_size=self.map_size,
                 background_size=self.download_map_size,
@@ -329,7 +342,7 @@ class Preprocessor(Component):
             self.logger.info(
                 "Added %d bounds overlays to local OSM file %s.",
                 self.bounds_overlay_report.get("created_ways", 0),
-                working_osm_path,
+                document.file_path,
             )
         except Exception as exc:
             self.bounds_overlay_report = {"error": str(exc)}
@@ -347,8 +360,9 @@ class Preprocessor(Component):
             min(1.0, (radius - self._smooth_radius_floor) / self._smooth_radius_span),
         )
 
-    def _apply_usage_preprocessing(self, working_osm_path: str) -> None:
-        """Apply usage-specific OSM preprocessing to the local OSM file."""
+    def _apply_usage_preprocessing(self, document: OSMDocument) -> None:
+        """Apply usage-specific OSM preprocessing to the local OSM file. All usages share the
+        parsed file and the splitter and hole geometry built from it."""
         for usage, usage_settings in self._usage_settings().items():
             if not usage_settings.enabled:
                 continue
@@ -393,13 +407,9 @@ class Preprocessor(Component):
                 len(usage_filters),
             )
             try:
-                stats = preprocess_osm_file(
-                    working_osm_path,
-                    working_osm_path,
+                stats = document.preprocess(
                     usage_filters,
                     process_bbox=process_bbox,
-                    validate_input=False,
-                    validate_output=False,
                     exclude_cut_tags=self.exclude_cut_tags,
                     smooth_strength=smooth_strength,
                     merge_distance=merge_distance,
@@ -408,6 +418,7 @@ class Preprocessor(Component):
                     collapse_tags=collapse_tags,
                     add_holes=usage_settings.add_holes,
                     shrink_distance=padding,
+                    workers=self.map.preprocessor_settings.workers,
                 )
                 self.preprocessing_reports.append(
                     {
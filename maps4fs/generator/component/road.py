@@ -48,6 +48,16 @@ class Road(MeshComponent):
             info, warning. If not provided, default logging will be used.
     """
 
+    reads = (
+        "roads_polylines",
+        "extended_roads_polylines",
+        "height_scale_multiplier",
+        "mesh_z_scaling_factor",
+        Parameters.RESOURCE_BACKGROUND_DEM,
+    )
+    writes = ("mesh_positions", Parameters.RESOURCE_ROADS)
+    cache_inputs = ()
+
     def preprocess(self) -> None:
         """Initialize road component state before generation."""
         self.info: dict[str, Any] = {}
@@ -1,12 +1,15 @@
 """This module contains the Satellite class for the maps4fs package to download satellite images
 for the map."""
+
 from __future__ import annotations
 
 
 import os
 import shutil
+from functools import partial
 from typing import NamedTuple
 
+import cv2
 from pygmdl import save_image
 
 from maps4fs.generator.component.base.component_image import ImageComponent
@@ -52,6 +55,10 @@ class Satellite(ImageComponent):
             info, warning. If not provided, default logging will be used.
     """
 
+    reads = ()
+    writes = (Parameters.RESOURCE_SATELLITE, "satellite_overview_path", "satellite_background_path")
+    cache_inputs = ("satellite_settings",)
+
     @monitor_performance
     def process(self) -> None:
         """Downloads the satellite images for the map."""
@@ -143,8 +150,12 @@ class Satellite(ImageComponent):
         """
         previews = []
         for image_path in self.image_paths:
-            preview_path = os.path.join(self.previews_directory, os.path.basename(image_path))
-            self.resize_to_preview(image_path, preview_path)
-            previews.append(preview_path)
+            preview_path = self.render_preview(
+                os.path.basename(image_path),
+                [image_path],
+                partial(self.map.preview_cache.load, image_path, cv2.IMREAD_COLOR),
+            )
+            if preview_path is not None:
+                previews.append(preview_path)
 
         return previews
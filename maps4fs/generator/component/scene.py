@@ -34,6 +34,30 @@ class Scene(ImageComponent):
         logger (Any, optional): The logger to use.
     """
 
+    reads = (
+        "fields",
+        "water_polylines",
+        "texture_layers",
+        "mesh_positions",
+        "height_scale_value",
+        "change_height_scale",
+        "foliage_density_map_uint16",
+        "height_scale_multiplier",
+        "mesh_z_scaling_factor",
+        Parameters.RESOURCE_BACKGROUND_DEM,
+        Parameters.RESOURCE_WEIGHTS,
+        Parameters.RESOURCE_WATER,
+        Parameters.RESOURCE_ROADS,
+    )
+    writes = (
+        "roads_polylines",
+        Parameters.RESOURCE_MAP_I3D,
+        Parameters.RESOURCE_SPLINES,
+        Parameters.RESOURCE_WATER,
+        Parameters.RESOURCE_ROADS,
+    )
+    cache_inputs = ("i3d_settings", "texture_settings", "tree_custom_schema")
+
     def preprocess(self) -> None:
         """Gets the path to the map I3D file from the game instance and saves it to the instance
         attribute. If the game does not support I3D files, the attribute is set to None."""
@@ -729,9 +753,11 @@ class Scene(ImageComponent):
 
         for forest_layer in forest_layers:
             weights_directory = self.game.weights_dir_path
-            forest_image_path = forest_layer.get_preview_or_path(weights_directory)
+            forest_image_path = forest_layer.get_preview_or_path(
+                weights_directory, self.map.context.rasters.exists
+            )
 
-            if not forest_image_path or not os.path.isfile(forest_image_path):
+            if not forest_image_path or not self.map.context.rasters.exists(forest_image_path):
                 self.logger.warning("Forest image not found.")
                 continue
 
@@ -757,7 +783,7 @@ class Scene(ImageComponent):
                     interpolation=cv2.INTER_NEAREST,
                 )
 
-            forest_image = cv2.imread(forest_image_path, cv2.IMREAD_UNCHANGED)
+            forest_image = self.read_image(forest_image_path)
             if forest_image is None:
                 self.logger.warning("Forest image not found: %s", forest_image_path)
                 continue
@@ -17,6 +17,10 @@ from maps4fs.generator.settings import Parameters
 class Soil(ImageComponent):
     """Generate soil map and update map XML/I3D references."""
 
+    reads = (Parameters.RESOURCE_BACKGROUND_DEM, Parameters.RESOURCE_WEIGHTS)
+    writes = (Parameters.RESOURCE_WEIGHTS, Parameters.RESOURCE_MAP_I3D, Parameters.RESOURCE_MAP_XML)
+    cache_inputs = ()
+
     def preprocess(self) -> None:
         """Initialize runtime state for Soil component."""
         self.soil_map_path: str | None = None
@@ -48,36 +52,40 @@ class Soil(ImageComponent):
             self.logger.warning("Soil map not found for preview generation: %s", soil_map_path)
             return []
 
-        soil_map = cv2.imread(soil_map_path, cv2.IMREAD_UNCHANGED)
-        if soil_map is None:
-            self.logger.warning("Could not read soil map for preview generation: %s", soil_map_path)
-            return []
-
-        if soil_map.ndim == 3:
-            soil_map = cv2.cvtColor(soil_map, cv2.COLOR_BGR2GRAY)
-
-        normalized_preview_path = os.path.join(
-            self.previews_directory, Parameters.SOIL_PREVIEW_NORMALIZED_FILENAME
-        )
-        colored_preview_path = os.path.join(
-            self.previews_directory, Parameters.SOIL_PREVIEW_COLORED_FILENAME
-        )
-
-        normalized = cv2.normalize(
-            soil_map,
-            dst=np.empty_like(soil_map),
-            alpha=0,
-            beta=255,
-            norm_type=cv2.NORM_MINMAX,
-            dtype=cv2.CV_8U,
-        )
-
-        cv2.imwrite(normalized_preview_path, normalized)
-
-        colored = cv2.applyColorMap(normalized, cv2.COLORMAP_JET)
-        cv2.imwrite(colored_preview_path, colored)
+        def normalized_preview() -> np.ndarray | None:
+            soil_map = self.map.preview_cache.load(soil_map_path)
+            if soil_map is None:
+                return None
+            if soil_map.ndim == 3:
+                soil_map = cv2.cvtColor(soil_map, cv2.COLOR_BGR2GRAY)
+            return cv2.normalize(
+                soil_map,
+                dst=np.empty_like(soil_map),
+                alpha=0,
+                beta=255,
+                norm_type=cv2.NORM_MINMAX,
+                dtype=cv2.CV_8U,
+            )
 
-        return [normalized_preview_path, colored_preview_path]
+        def colored_preview() -> np.ndarray | None:
+            normalized = normalized_preview()
+            if normalized is None:
+                return None
+            return cv2.applyColorMap(normalized, cv2.COLORMAP_JET)
+
+        preview_paths = []
+        for filename, render in (
+            (Parameters.SOIL_PREVIEW_NORMALIZED_FILENAME, normalized_preview),
+            (Parameters.SOIL_PREVIEW_COLORED_FILENAME, colored_preview),
+        ):
+            preview_path = self.render_preview(filename, [soil_map_path], render)
+            if preview_path is None:
+                self.logger.warning(
+                    "Could not read soil map for preview generation: %s", soil_map_path
+                )
+                return []
+            preview_paths.append(preview_path)
+        return preview_paths
 
     def _generate_soil_map_from_dem(self) -> str | None:
         """Create soil map PNG from the best available DEM variant.
@@ -112,7 +120,7 @@ class Soil(ImageComponent):
         soil_map = self._classify_soils(normalized_height)
 
         soil_map_path = os.path.join(self.game.weights_dir_path, Parameters.INFO_LAYER_SOIL_MAP)
-        cv2.imwrite(soil_map_path, soil_map)
+        self.write_image(soil_map_path, soil_map)
 
         values, counts = np.unique(soil_map, return_counts=True)
         class_distribution = {
@@ -2,12 +2,15 @@
 
 from __future__ import annotations
 
+import hashlib
 import json
 import os
-import shutil
+import threading
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
-from typing import Any, Literal, cast
+from functools import partial
+from typing import Any, Callable, Iterator, Literal, cast
 
 import cv2
 import numpy as np
@@ -16,11 +19,15 @@ from tqdm import tqdm
 
 from maps4fs.generator.component.base.component_image import ImageComponent
 from maps4fs.generator.component.layer import Layer
-from maps4fs.generator.monitor import monitor_performance
+from maps4fs.generator.constants import Paths
+from maps4fs.generator.image_io import ImageKind, PngStripWriter
+from maps4fs.generator.monitor import get_current_session, monitor_performance, run_in_session
 from maps4fs.generator.osm_pipeline import (
     LatLonProjector,
+    OSMFeatureDiskCache,
     OSMNXFeatureSource,
     OSMRasterPipeline,
+    OSMXMLFeatureSource,
 )
 from maps4fs.generator.osm_pipeline.rasterizer import OSMGeometryRasterizer
 from maps4fs.generator.settings import Parameters
@@ -36,6 +43,327 @@ class TextureOptions:
     cap_style: str = "round"
 
 
+class LayerShapes:
+    """Shapes of one layer in drawing order with their pixel bounds, so the layer can be
+    drawn tile by tile with only the shapes which intersect the tile.
+
+    Arguments:
+        matrix (np.ndarray | None, optional): Affine 2x3 transform applied to the points of
+            the added shapes, e.g. to draw a rotated map in its own frame.
+    """
+
+    def __init__(self, matrix: np.ndarray | None = None) -> None:
+        self._matrix = matrix
+        self._shapes: list[tuple[np.ndarray, list[np.ndarray]] | tuple[tuple[int, int], int]]
+        self._shapes = []
+        self._bounds: list[tuple[int, int, int, int]] = []
+        self._bounds_array: np.ndarray | None = None
+        self._edges: list[np.ndarray] = []
+        self._edges_array: np.ndarray | None = None
+        self._edges_offsets: np.ndarray | None = None
+
+    def __len__(self) -> int:
+        return len(self._shapes)
+
+    def add_polygon(self, polygon: np.ndarray, holes: list[np.ndarray]) -> None:
+        """Add a polygon filled with 255 and its holes cleared to 0."""
+        polygon = self._transformed(polygon)
+        holes = [self._transformed(hole) for hole in holes]
+        rings = [ring.reshape(-1, 2).astype(np.int64) for ring in [polygon] + holes]
+        points = np.concatenate(rings)
+        if len(points) == 0:
+            return
+        x_min, y_min = points.min(axis=0)
+        x_max, y_max = points.max(axis=0)
+        self._shapes.append((polygon, holes))
+        self._bounds.append((int(x_min), int(y_min), int(x_max), int(y_max)))
+        # Bounds of every edge of the rings, including the closing one.
+        ends = np.concatenate([np.roll(ring, -1, axis=0) for ring in rings])
+        self._edges.append(np.hstack([np.minimum(points, ends), np.maximum(points, ends)]))
+        self._bounds_array = None
+        self._edges_array = None
+
+    def add_circle(self, center: tuple[int, int], radius: int) -> None:
+        """Add a filled circle."""
+        x, y = self._transformed(np.array(center)).reshape(2).tolist()
+        self._shapes.append(((x, y), radius))
+        self._bounds.append((x - radius, y - radius, x + radius, y + radius))
+        self._edges.append(np.zeros((0, 4), dtype=np.int64))
+        self._bounds_array = None
+        self._edges_array = None
+
+    def _transformed(self, points: np.ndarray) -> np.ndarray:
+        """Return the points moved by the matrix and rounded to pixels, in the same shape."""
+        if self._matrix is None:
+            return points
+        moved = points.reshape(-1, 2) @ self._matrix[:, :2].T + self._matrix[:, 2]
+        return np.rint(moved).astype(np.int32).reshape(points.shape)
+
+    def shapes_in(self, left: int, top: int, width: int, height: int) -> np.ndarray:
+        """Return indices of the shapes intersecting the tile, in drawing order."""
+        if self._bounds_array is None:
+            self._bounds_array = np.asarray(self._bounds, dtype=np.int64).reshape(-1, 4)
+        return np.flatnonzero(_intersecting(self._bounds_array, left, top, width, height))
+
+    def canvas_bounds(
+        self, indices: np.ndarray, left: int, top: int, width: int, height: int, size: int
+    ) -> tuple[int, int, int, int]:
+        """Return the left, top, width and height of the canvas the shapes are drawn on for the
+        tile. OpenCV clips the outline of a polygon to the canvas and a clipped edge is drawn
+        along other pixels than the whole one, so the canvas holds every edge passing the tile
+        as far as the edge is within the raster. Then the tile matches drawing at once.
+
+        Arguments:
+            indices (np.ndarray): Indices of the shapes to draw, from shapes_in().
+            left (int): Column of the tile in the full raster.
+            top (int): Row of the tile in the full raster.
+            width (int): Width of the tile.
+            height (int): Height of the tile.
+            size (int): Size of the full raster.
+
+        Returns:
+            tuple[int, int, int, int]: Left, top, width and height of the canvas.
+        """
+        if self._edges_array is None:
+            self._edges_array = np.concatenate(self._edges).reshape(-1, 4)
+            self._edges_offsets = np.cumsum([0] + [len(edges) for edges in self._edges])
+        offsets = cast(np.ndarray, self._edges_offsets)
+        counts = offsets[indices + 1] - offsets[indices]
+        positions = np.repeat(offsets[indices] - np.cumsum(counts) + counts, counts)
+        edges = self._edges_array[positions + np.arange(len(positions))]
+        edges = edges[_intersecting(edges, left, top, width, height)]
+        if len(edges) == 0:
+            return left, top, width, height
+
+        canvas_left = min(left, max(int(edges[:, 0].min()), 0))
+        canvas_top = min(top, max(int(edges[:, 1].min()), 0))
+        canvas_right = max(left + width, min(int(edges[:, 2].max()) + 1, size))
+        canvas_bottom = max(top + height, min(int(edges[:, 3].max()) + 1, size))
+        return (canvas_left, canvas_top, canvas_right - canvas_left, canvas_bottom - canvas_top)
+
+    def draw(
+        self, canvas: np.ndarray, left: int, top: int, indices: np.ndarray, logger: Any
+    ) -> None:
+        """Draw the shapes on the canvas with the top left corner at left, top.
+
+        Arguments:
+            canvas (np.ndarray): Canvas to draw on.
+            left (int): Column of the canvas in the full raster.
+            top (int): Row of the canvas in the full raster.
+            indices (np.ndarray): Indices of the shapes to draw, from shapes_in().
+            logger (Any): Logger for drawing errors.
+        """
+        offset = (-left, -top)
+        for index in indices.tolist():
+            shape = self._shapes[index]
+            if isinstance(shape[0], np.ndarray):
+                polygon, holes = shape
+                try:
+                    cv2.fillPoly(canvas, [polygon], color=255, offset=offset)
+                    if holes:
+                        cv2.fillPoly(canvas, holes, color=0, offset=offset)
+                except Exception as e:
+                    logger.warning("Error drawing polygon: %s.", repr(e))
+            else:
+                (x, y), radius = shape
+                try:
+                    cv2.circle(canvas, (x - left, y - top), radius=radius, color=255, thickness=-1)
+                except Exception as e:
+                    logger.warning("Error drawing point: %s.", repr(e))
+
+
+def _intersecting(bounds: np.ndarray, left: int, top: int, width: int, height: int) -> np.ndarray:
+    """Return the mask of the bounds (x_min, y_min, x_max, y_max rows) intersecting the tile."""
+    # One pixel of margin keeps shapes whose outline touches the tile edge.
+    x_min, y_min, x_max, y_max = bounds.T
+    return (
+        (x_max >= left - 1) & (x_min <= left + width) & (y_max >= top - 1) & (y_min <= top + height)
+    )
+
+
+class TextureCompositor:
+    """Composites drawn layers into one label raster in priority order.
+
+    Layers are drawn one tile at a time on a scratch canvas, which covers the tile and the edges
+    of the polygons passing it, so the result is identical to drawing the whole raster at once.
+    Pixels of a layer are assigned its label where no layer with a higher priority was drawn
+    yet, and the weight of every layer is obtained from the label raster once all of them are
+    drawn. Labels take one byte per pixel, two for more than 255 layers.
+
+    External layers may overlap the others, so only the first drawn layer occupies its pixels
+    when it is external. The images of external layers and road masks are rendered one at a
+    time when they are written.
+
+    The raster is composited in strips of one row of tiles, the label raster and the images
+    returned for the layers hold the current strip only. So the memory is bounded by the tile
+    size and the longest polygon edge passing a tile rather than by the raster size.
+
+    Arguments:
+        size (int): Size of the rasters in pixels.
+        layers_count (int): Number of layers which will be composited.
+        tile_size (int, optional): Size of the tiles, the whole raster is one tile if 0.
+    """
+
+    def __init__(self, size: int, layers_count: int, tile_size: int = 0) -> None:
+        self.size = size
+        self.tile_size = min(tile_size, size) if tile_size > 0 else size
+        dtype = np.uint8 if layers_count < 256 else np.uint16
+        self._strip = np.zeros((self.tile_size, size), dtype=dtype)
+        self.labels = self._strip
+        self.top = 0
+        self._canvas = np.zeros((0, 0), dtype=np.uint8)
+        self._label_by_name: dict[str, int] = {}
+
+    @property
+    def composited(self) -> bool:
+        """Whether any layer was composited."""
+        return bool(self._label_by_name)
+
+    @property
+    def strips_count(self) -> int:
+        """Number of strips of the raster."""
+        return -(-self.size // self.tile_size)
+
+    def strips(self) -> Iterator[list[tuple[int, int, int, int]]]:
+        """Start every strip in turn, top to bottom, and yield the left, top, width and height
+        of its tiles. The labels of the previous strip are cleared."""
+        for top in range(0, self.size, self.tile_size):
+            height = min(self.tile_size, self.size - top)
+            self.top = top
+            self.labels = self._strip[:height]
+            self.labels.fill(0)
+            yield [
+                (left, top, min(self.tile_size, self.size - left), height)
+                for left in range(0, self.size, self.tile_size)
+            ]
+
+    def draw(
+        self, shapes: LayerShapes, left: int, top: int, width: int, height: int, logger: Any
+    ) -> np.ndarray | None:
+        """Draw the shapes of a layer in the tile.
+
+        Arguments:
+            shapes (LayerShapes): Shapes of the layer.
+            left (int): Column of the tile in the full raster.
+            top (int): Row of the tile in the full raster.
+            width (int): Width of the tile.
+            height (int): Height of the tile.
+            logger (Any): Logger for drawing errors.
+
+        Returns:
+            np.ndarray | None: View of the scratch canvas with the tile, valid until the next
+                draw, None if no shape is in the tile.
+        """
+        indices = shapes.shapes_in(left, top, width, height)
+        if len(indices) == 0:
+            return None
+        canvas_left, canvas_top, canvas_width, canvas_height = shapes.canvas_bounds(
+            indices, left, top, width, height, self.size
+        )
+        if self._canvas.shape != (canvas_height, canvas_width):
+            self._canvas = np.zeros((canvas_height, canvas_width), dtype=np.uint8)
+        else:
+            self._canvas.fill(0)
+        shapes.draw(self._canvas, canvas_left, canvas_top, indices, logger)
+        return self._canvas[
+            top - canvas_top : top - canvas_top + height,
+            left - canvas_left : left - canvas_left + width,
+        ]
+
+    def render(self, shapes: LayerShapes, logger: Any) -> np.ndarray:
+        """Return the current strip of a layer drawn tile by tile, without compositing."""
+        image = np.zeros_like(self.labels, dtype=np.uint8)
+        height = len(image)
+        for left in range(0, self.size, self.tile_size):
+            width = min(self.tile_size, self.size - left)
+            canvas = self.draw(shapes, left, self.top, width, height, logger)
+            if canvas is not None:
+                image[:, left : left + width] = canvas
+        return image
+
+    def occupies(self, layer: Layer) -> bool:
+        """Register the layer in drawing order and return whether it takes pixels from the
+        layers added after it. External layers do only when they are drawn first."""
+        label = self._label_by_name.setdefault(layer.name, len(self._label_by_name) + 1)
+        return not layer.external or label == 1
+
+    def add(self, layer: Layer, canvas: np.ndarray, left: int = 0, top: int = 0) -> None:
+        """Composite the tile of the layer under the layers added before it.
+
+        Arguments:
+            layer (Layer): Drawn layer, registered with occupies().
+            canvas (np.ndarray): Tile with the layer drawn with value 255.
+            left (int, optional): Column of the tile in the full raster.
+            top (int, optional): Row of the tile in the full raster, within the current strip.
+        """
+        label = self._label_by_name[layer.name]
+        height, width = canvas.shape
+        window = self.labels[top - self.top : top - self.top + height, left : left + width]
+        window[(canvas > 0) & (window == 0)] = label
+
+    def layer_image(self, layer: Layer) -> np.ndarray:
+        """Return the current strip of the weight image of a composited layer, empty if it was
+        not composited."""
+        label = self._label_by_name.get(layer.name)
+        if label is None or layer.external:
+            return np.zeros_like(self.labels, dtype=np.uint8)
+        # One element arrays are compared as scalars.
+        return cv2.compare(self.labels, np.array([label], dtype=np.float64), cv2.CMP_EQ)
+
+    def occupied(self) -> np.ndarray:
+        """Return the current strip of the pixels occupied by the composited layers."""
+        return cv2.compare(self.labels, np.array([0], dtype=np.float64), cv2.CMP_GT)
+
+
+class _StripOutputs:
+    """Files written from the composited strips. A raster of one strip is written through the
+    raster store like any other image, the strips of larger rasters are streamed to the files.
+
+    Arguments:
+        component (ImageComponent): Component which writes the files.
+        size (int): Size of the rasters in pixels.
+        streamed (bool): Whether the rasters are written strip by strip.
+    """
+
+    def __init__(self, component: ImageComponent, size: int, streamed: bool) -> None:
+        self._component = component
+        self._size = size
+        self._streamed = streamed
+        self._writers: dict[str, PngStripWriter] = {}
+
+    def __enter__(self) -> _StripOutputs:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        writers = list(self._writers.values())
+        self._writers.clear()
+        if exc_type is not None:
+            for writer in writers:
+                writer.abort()
+            return
+        for writer in writers:
+            writer.close()
+
+    def write(
+        self, image_path: str, strip: np.ndarray, kind: ImageKind = ImageKind.DELIVERABLE
+    ) -> None:
+        """Write the current strip of the image, every file gets the strips in order.
+
+        Arguments:
+            image_path (str): Path to the image.
+            strip (np.ndarray): Rows of the current strip.
+            kind (ImageKind, optional): Kind of the image. Defaults to ImageKind.DELIVERABLE.
+        """
+        if not self._streamed:
+            self._component.write_image(image_path, strip, kind)
+            return
+        writer = self._writers.get(image_path)
+        if writer is None:
+            writer = self._component.stream_image(image_path, self._size, self._size, kind)
+            self._writers[image_path] = writer
+        writer.write(strip)
+
+
 class Texture(ImageComponent):
     """Class which generates textures for the map using OSM data.
 
@@ -47,6 +375,23 @@ class Texture(ImageComponent):
         color (tuple[int, int, int]): Color of the layer in BGR format.
     """
 
+    reads = (Parameters.RESOURCE_OSM, "texture_layers")
+    writes = (
+        "texture_layers",
+        "fields",
+        "buildings",
+        "farmyards",
+        "forest",
+        "water",
+        "roads_polylines",
+        "electricity_lines_polylines",
+        "electricity_poles_points",
+        "water_polylines",
+        Parameters.RESOURCE_WEIGHTS,
+        Parameters.RESOURCE_ROADS,
+    )
+    cache_inputs = ("texture_settings", "texture_custom_schema")
+
     def __init__(
         self,
         game,
@@ -226,7 +571,7 @@ class Texture(ImageComponent):
 
     def _iter_layer_output_paths(self, layer: Layer, include_preview: bool = False) -> list[str]:
         """Return generated file paths for a layer, optionally including preview image."""
-        paths = layer.paths(self._weights_dir)
+        paths = layer.paths(self._weights_dir, self.map.context.rasters.listdir)
         if include_preview:
             paths.append(layer.path_preview(self._weights_dir))
         return paths
@@ -243,7 +588,7 @@ class Texture(ImageComponent):
 
     def _load_layer_image(self, layer_path: str) -> np.ndarray | None:
         """Read a layer image and log if it cannot be loaded."""
-        image = cv2.imread(layer_path, cv2.IMREAD_UNCHANGED)
+        image = self.read_image(layer_path)
         if image is None:
             self.logger.warning("Could not read layer image: %s", layer_path)
         return image
@@ -257,29 +602,81 @@ class Texture(ImageComponent):
         base_layer = self.get_base_layer()
         base_layer_image = None
         if base_layer:
-            base_layer_image = cv2.imread(base_layer.path(self._weights_dir), cv2.IMREAD_UNCHANGED)
+            base_layer_image = self.read_image(base_layer.path(self._weights_dir))
 
         layers_with_borders = [layer for layer in self.layers if layer.border is not None]
+        self._process_layers(
+            partial(self._add_layer_border, base_layer_image, threading.Lock()),
+            layers_with_borders,
+        )
 
-        for layer in layers_with_borders:
-            # Read the image.
-            # Read pixels on borders with specified width (border property).
-            # Where the pixel value is 255 - set it to 255 in base layer image.
-            # And set it to 0 in the current layer image.
-            layer_image = cv2.imread(layer.path(self._weights_dir), cv2.IMREAD_UNCHANGED)
-            if layer_image is None:
-                continue
-            border = layer.border
-            if not border:
-                continue
+        if base_layer and base_layer_image is not None:
+            self.write_image(
+                base_layer.path(self._weights_dir), base_layer_image, ImageKind.DELIVERABLE
+            )
+
+    def _add_layer_border(
+        self,
+        base_layer_image: np.ndarray | None,
+        base_layer_lock: threading.Lock,
+        layer: Layer,
+    ) -> None:
+        """Move the border pixels of one layer to the base layer image."""
+        # Read the image.
+        # Read pixels on borders with specified width (border property).
+        # Where the pixel value is 255 - set it to 255 in base layer image.
+        # And set it to 0 in the current layer image.
+        layer_image = self.read_image(layer.path(self._weights_dir))
+        if layer_image is None:
+            return
+        border = layer.border
+        if not border:
+            return
 
+        with base_layer_lock:
             self.transfer_border(layer_image, base_layer_image, border)
 
-            cv2.imwrite(layer.path(self._weights_dir), layer_image)
-            self.logger.debug("Borders added to layer %s.", layer.name)
+        self.write_image(layer.path(self._weights_dir), layer_image, ImageKind.DELIVERABLE)
+        self.logger.debug("Borders added to layer %s.", layer.name)
 
-        if base_layer and base_layer_image is not None:
-            cv2.imwrite(base_layer.path(self._weights_dir), base_layer_image)
+    def _process_layers(
+        self,
+        process: Callable[[Layer], None],
+        layers: list[Layer],
+        desc: str | None = None,
+        max_workers: int | None = None,
+    ) -> None:
+        """Run an independent per-layer step for all layers, in a thread pool when more than
+        one post-processing worker is configured. OpenCV releases the GIL, so the layers are
+        processed in parallel.
+
+        Arguments:
+            process (Callable[[Layer], None]): Step to run for each layer.
+            layers (list[Layer]): Layers to process.
+            desc (str | None): Progress bar description, no progress bar if None.
+            max_workers (int | None): Limit of the workers for steps with a large working set,
+                the post-processing workers setting if None.
+        """
+        workers = self.map.texture_settings.postprocess_workers
+        if max_workers is not None:
+            workers = min(workers, max_workers)
+        workers = max(1, min(workers, len(layers)))
+        if workers == 1:
+            for layer in tqdm(layers, desc=desc, unit="layer", disable=desc is None):
+                process(layer)
+            return
+
+        session_id = get_current_session()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(run_in_session, session_id, process, layer) for layer in layers
+            ]
+            with tqdm(
+                total=len(futures), desc=desc, unit="layer", disable=desc is None
+            ) as progress:
+                for future in as_completed(futures):
+                    future.result()
+                    progress.update(1)
 
     def copy_procedural(self) -> None:
         """Copies some of the textures to use them as mask for procedural generation.
@@ -297,11 +694,11 @@ class Texture(ImageComponent):
     def _ensure_blockmask(self) -> None:
         """Ensure procedural BLOCKMASK file exists."""
         blockmask_path = os.path.join(self.procedural_dir, Parameters.BLOCKMASK_FILENAME)
-        if os.path.isfile(blockmask_path):
+        if self.map.context.rasters.exists(blockmask_path):
             return
         self.logger.debug("%s not found, creating an empty file.", Parameters.BLOCKMASK_FILENAME)
         img = np.zeros((self.scaled_size, self.scaled_size), dtype=np.uint8)
-        cv2.imwrite(blockmask_path, img)
+        self.write_image(blockmask_path, img)
 
     def _collect_procedural_sources(self) -> dict[str, list[str]]:
         """Collect source texture paths grouped by procedural layer name."""
@@ -309,7 +706,9 @@ class Texture(ImageComponent):
         for layer in self.layers:
             if not layer.procedural:
                 continue
-            texture_path = layer.get_preview_or_path(self._weights_dir)
+            texture_path = layer.get_preview_or_path(
+                self._weights_dir, self.map.context.rasters.exists
+            )
             for procedural_layer_name in layer.procedural:
                 pg_layers_by_type[procedural_layer_name].append(texture_path)
         return pg_layers_by_type
@@ -323,11 +722,11 @@ class Texture(ImageComponent):
         if len(texture_paths) > 1:
             merged_texture = np.zeros((self.scaled_size, self.scaled_size), dtype=np.uint8)
             for texture_path in texture_paths:
-                texture = cv2.imread(texture_path, cv2.IMREAD_UNCHANGED)
+                texture = self.read_image(texture_path)
                 if texture is None:
                     continue
                 merged_texture[texture == 255] = 255
-            cv2.imwrite(procedural_save_path, merged_texture)
+            self.write_image(procedural_save_path, merged_texture)
             self.logger.debug(
                 "Procedural file %s merged from %s textures.",
                 procedural_save_path,
@@ -336,7 +735,7 @@ class Texture(ImageComponent):
             return
 
         if len(texture_paths) == 1:
-            shutil.copyfile(texture_paths[0], procedural_save_path)
+            self.copy_image(texture_paths[0], procedural_save_path)
             self.logger.debug(
                 "Procedural file %s copied from %s.", procedural_save_path, texture_paths[0]
             )
@@ -389,48 +788,69 @@ class Texture(ImageComponent):
             return
 
         merged_image = cv2.add(target_layer_image, layer_image)
-        cv2.imwrite(target_path, merged_image)
+        self.write_image(target_path, merged_image, ImageKind.DELIVERABLE)
         self.logger.debug("Merged layer %s into %s.", layer.name, target_layer.name)
 
-        cv2.imwrite(source_path, np.zeros_like(layer_image))
+        self.write_image(source_path, np.zeros_like(layer_image), ImageKind.DELIVERABLE)
         self.logger.debug("Cleared layer %s.", layer.name)
 
     @monitor_performance
     def rotate_textures(self) -> None:
-        """Rotates textures of the layers which have tags."""
-        if not self.rotation:
+        """Rotates textures of the layers which have tags. Every rotated layer holds the read
+        image, the rotated one and the cropped copy, so the number of layers rotated at once is
+        bounded by Parameters.TEXTURE_POSTPROCESS_MAX_BYTES. Layers drawn in the map frame
+        are not rotated."""
+        if not self.rotation or self._draws_in_map_frame:
             return
 
-        for layer in tqdm(self.layers, desc="Rotating textures", unit="layer"):
-            if not self._has_tag_textures(layer):
-                self.logger.debug(
-                    "Skipping rotation of layer %s because it has no tags.", layer.name
+        layer_bytes = 2 * self.map_rotated_size**2 + self.map_size**2
+        self._process_layers(
+            self._rotate_layer,
+            self.layers,
+            "Rotating textures",
+            max_workers=Parameters.TEXTURE_POSTPROCESS_MAX_BYTES // max(layer_bytes, 1),
+        )
+
+    def _rotate_layer(self, layer: Layer) -> None:
+        """Rotate all texture files of one layer."""
+        if not self._has_tag_textures(layer):
+            self.logger.debug("Skipping rotation of layer %s because it has no tags.", layer.name)
+            return
+        self.logger.debug("Rotating layer %s.", layer.name)
+        for layer_path in self._iter_layer_output_paths(layer, include_preview=True):
+            if self.map.context.rasters.exists(layer_path):
+                self.rotate_image(
+                    layer_path,
+                    self.rotation,
+                    output_height=self.map_size,
+                    output_width=self.map_size,
                 )
-                continue
-            self.logger.debug("Rotating layer %s.", layer.name)
-            for layer_path in self._iter_layer_output_paths(layer, include_preview=True):
-                if os.path.isfile(layer_path):
-                    self.rotate_image(
-                        layer_path,
-                        self.rotation,
-                        output_height=self.map_size,
-                        output_width=self.map_size,
-                    )
 
     @monitor_performance
     def scale_textures(self) -> None:
-        """Resizes all the textures to the map output size."""
+        """Resizes all the textures to the map output size. Every scaled layer holds the read
+        image, the resized one and its stored copy, so the number of layers scaled at once is
+        bounded by Parameters.TEXTURE_POSTPROCESS_MAX_BYTES."""
         if not self.map.output_size:
             self.logger.debug("No output size defined, skipping scaling.")
             return
 
-        for layer in tqdm(self.layers, desc="Scaling textures", unit="layer"):
-            for layer_path in self._iter_layer_output_paths(layer, include_preview=True):
-                self._scale_texture_file(layer_path)
+        layer_bytes = self.map_size**2 + 2 * self.map.output_size**2
+        self._process_layers(
+            self._scale_layer,
+            self.layers,
+            "Scaling textures",
+            max_workers=Parameters.TEXTURE_POSTPROCESS_MAX_BYTES // max(layer_bytes, 1),
+        )
+
+    def _scale_layer(self, layer: Layer) -> None:
+        """Scale all texture files of one layer."""
+        for layer_path in self._iter_layer_output_paths(layer, include_preview=True):
+            self._scale_texture_file(layer_path)
 
     def _scale_texture_file(self, layer_path: str) -> None:
         """Scale one texture file to map output size if it exists."""
-        if not os.path.isfile(layer_path):
+        if not self.map.context.rasters.exists(layer_path):
             self.logger.debug("Layer %s not found, skipping scaling.", layer_path)
             return
 
@@ -443,7 +863,7 @@ class Texture(ImageComponent):
             (self.map.output_size, self.map.output_size),
             interpolation=cv2.INTER_NEAREST,
         )
-        cv2.imwrite(layer_path, scaled)
+        self.write_image(layer_path, scaled, ImageKind.DELIVERABLE)
 
     def _read_parameters(self) -> None:
         """Reads map parameters from OSM data, such as:
@@ -461,21 +881,35 @@ class Texture(ImageComponent):
             maximum_y=self.maximum_y,
             raster_size=self.map_rotated_size,
         )
-        source = OSMNXFeatureSource(
-            bbox=self.new_bbox,
-            custom_osm_path=self.map.custom_osm,
-            use_cache=self.map.texture_settings.use_cache,
-            requests_timeout=Parameters.OSM_REQUESTS_TIMEOUT,
-            logger=self.logger,
-        )
+        source: OSMXMLFeatureSource | OSMNXFeatureSource
+        if self.map.custom_osm is not None:
+            # The local file is parsed once and every tag filter is answered from it.
+            source = OSMXMLFeatureSource(custom_osm_path=self.map.custom_osm, logger=self.logger)
+        else:
+            source = OSMNXFeatureSource(
+                bbox=self.new_bbox,
+                custom_osm_path=None,
+                use_cache=self.map.texture_settings.use_cache,
+                requests_timeout=Parameters.OSM_REQUESTS_TIMEOUT,
+                logger=self.logger,
+            )
         rasterizer = OSMGeometryRasterizer(
             projector=projector,
             cap_style=self.cap_style,
             fields_padding=self.map.texture_settings.fields_padding,
             logger=self.logger,
         )
+        # Features are shared by all texture passes of the map, the projector is per pass.
+        feature_cache = self.map.context.osm_features
+        disk_cache = None
+        if self.map.texture_settings.use_cache:
+            disk_cache = OSMFeatureDiskCache(Paths.OSM_FEATURES_CACHE_DIR)
         self.osm_pipeline = OSMRasterPipeline(
-            source=source, rasterizer=rasterizer, logger=self.logger
+            source=feature_cache.shared_source(source),
+            rasterizer=rasterizer,
+            logger=self.logger,
+            cache=feature_cache,
+            disk_cache=disk_cache,
         )
 
     def info_sequence(self) -> dict[str, Any]:
@@ -502,15 +936,16 @@ class Texture(ImageComponent):
 
     def _generate_weights(self, layer: Layer) -> None:
         """Generates weight files for textures. Each file is a numpy array of zeros and
-            dtype uint8 (0-255).
+            dtype uint8 (0-255). The first weight file of drawable layers is skipped, since
+            it's written by draw().
 
         Arguments:
             layer (Layer): Layer with textures and tags.
         """
         if layer.tags is None and layer.precise_tags is None:
-            size = (self.map_size, self.map_size)
+            size = self.map_size
         else:
-            size = (self.map_rotated_size, self.map_rotated_size)
+            size = self._draw_size
         postfix = (
             Parameters.WEIGHT_FILE_POSTFIX if not layer.exclude_weight else Parameters.PNG_EXTENSION
         )
@@ -522,9 +957,20 @@ class Texture(ImageComponent):
                 for i in range(1, layer.count + 1)
             ]
 
+        if self._is_drawable_layer(layer):
+            filepaths = filepaths[1:]
+
+        tile_size = self.map.texture_settings.draw_tile_size
         for filepath in filepaths:
-            img = np.zeros(size, dtype=np.uint8)
-            cv2.imwrite(filepath, img)
+            if 0 < tile_size < size:
+                # Large empty weights are streamed, so they don't take the raster store memory.
+                empty_strip = np.zeros((tile_size, size), dtype=np.uint8)
+                with self.stream_image(filepath, size, size, ImageKind.DELIVERABLE) as writer:
+                    for top in range(0, size, tile_size):
+                        writer.write(empty_strip[: size - top])
+            else:
+                img = np.zeros((size, size), dtype=np.uint8)
+                self.write_image(filepath, img, ImageKind.DELIVERABLE)
 
     @property
     def layers(self) -> list[Layer]:
@@ -559,51 +1005,97 @@ class Texture(ImageComponent):
             ),
         )
 
-    def save_road_mask(self, layer: Layer, layer_image: np.ndarray) -> None:
-        """Processes road mask for the layer and saves it to the corresponding file.
+    def road_mask_path(self, layer: Layer) -> str | None:
+        """Returns the path of the road mask of the layer and creates its directory.
 
         Arguments:
             layer (Layer): Layer with textures and tags.
-            layer_image (np.ndarray): Layer image.
+
+        Returns:
+            str | None: Path of the road mask, None if the layer has no road texture.
         """
         if not layer.road_texture:
-            return
+            return None
 
         roads_directory = os.path.join(self.map_directory, Parameters.ROADS_DIRECTORY)
         os.makedirs(roads_directory, exist_ok=True)
-        mask_path = os.path.join(
-            roads_directory,
-            f"{layer.road_texture}_mask{Parameters.PNG_EXTENSION}",
-        )
+        return os.path.join(roads_directory, f"{layer.road_texture}_mask{Parameters.PNG_EXTENSION}")
 
-        cv2.imwrite(mask_path, layer_image)
-        self.rotate_image(
-            mask_path, self.rotation, output_height=self.map_size, output_width=self.map_size
-        )
+    @property
+    def _draws_in_map_frame(self) -> bool:
+        """Whether a rotated map is drawn directly in the map frame. The shapes are rotated
+        instead of the drawn weights, so the rotated canvas is never allocated. This is the case
+        when the layers are drawn in tiles."""
+        return bool(self.rotation) and self.map.texture_settings.draw_tile_size > 0
+
+    @property
+    def _draw_size(self) -> int:
+        """Size of the raster the layers are drawn on."""
+        return self.map_size if self._draws_in_map_frame else self.map_rotated_size
+
+    @property
+    def _streams_weights(self) -> bool:
+        """Whether the raster has several strips of tiles, which are streamed to the files."""
+        return 0 < self.map.texture_settings.draw_tile_size < self._draw_size
+
+    def _map_frame_matrix(self) -> np.ndarray | None:
+        """Returns the affine transform from the rotated canvas to the map, the same which
+        rotate_image() applies to the drawn weights, None if the map is drawn on the canvas.
+        """
+        if not self._draws_in_map_frame:
+            return None
+        center = (self.map_rotated_size // 2, self.map_rotated_size // 2)
+        matrix = cv2.getRotationMatrix2D(center, self.rotation, 1.0)
+        matrix[:, 2] -= (center[0] - self.map_size // 2, center[1] - self.map_size // 2)
+        return matrix
 
     @monitor_performance
     def draw(self) -> None:
-        """Iterates over layers and fills them with polygons from OSM data."""
+        """Iterates over layers and fills them with polygons from OSM data. The shapes of all
+        layers are collected first, then drawn and composited in priority order one strip of
+        tiles at a time, so each weight file is written once. With several strips the weights
+        are streamed to the files strip by strip."""
         layers = [layer for layer in self.layers_by_priority() if self._is_drawable_layer(layer)]
         self._prefetch_osm_data(layers)
 
         info_layer_data: dict[str, list[Any]] = defaultdict(list)
-        cumulative_image: np.ndarray | None = None
+        drawn_layers: list[tuple[Layer, LayerShapes]] = []
 
         for layer in tqdm(layers, desc="Drawing textures", unit="layer"):
-            cumulative_image = self._draw_single_layer(
-                layer,
-                info_layer_data,
-                cumulative_image,
-            )
+            shapes = self._draw_single_layer(layer, info_layer_data)
+            if shapes is not None:
+                drawn_layers.append((layer, shapes))
 
         self._publish_info_layer_data(info_layer_data)
 
-        if cumulative_image is not None:
-            self.draw_base_layer(cumulative_image)
+        compositor = TextureCompositor(
+            self._draw_size, len(drawn_layers), tile_size=self.map.texture_settings.draw_tile_size
+        )
+        with _StripOutputs(self, self._draw_size, self._streams_weights) as outputs:
+            for tiles in tqdm(
+                compositor.strips(),
+                total=compositor.strips_count,
+                desc="Compositing textures",
+                unit="strip",
+                disable=compositor.strips_count == 1,
+            ):
+                self._composite_layers(drawn_layers, compositor, tiles)
+                self._write_composited_layers(layers, drawn_layers, compositor, outputs)
+
+        if not self.rotation or self._draws_in_map_frame:
+            return
+        for layer, _ in drawn_layers:
+            mask_path = self.road_mask_path(layer)
+            if mask_path is not None:
+                self.rotate_image(
+                    mask_path,
+                    self.rotation,
+                    output_height=self.map_size,
+                    output_width=self.map_size,
+                )
 
     def _prefetch_osm_data(self, layers: list[Layer]) -> None:
-        """Prefetch unique OSM queries in parallel to reduce Overpass wait time."""
+        """Prefetch unique OSM queries in parallel to reduce Overpass wait and parsing time."""
         if self.osm_pipeline is None:
             return
 
@@ -618,7 +1110,7 @@ class Texture(ImageComponent):
 
         self.osm_pipeline.prefetch(
             tags_to_prefetch,
-            max_workers=Parameters.OSM_PREFETCH_WORKERS,
+            max_workers=self.map.texture_settings.osm_prefetch_workers,
         )
 
     def _resolve_layer_tags_for_prefetch(
@@ -634,46 +1126,69 @@ class Texture(ImageComponent):
         self,
         layer: Layer,
         info_layer_data: dict[str, list[Any]],
-        cumulative_image: np.ndarray | None,
-    ) -> np.ndarray | None:
-        """Draw one layer and update cumulative mask image."""
+    ) -> LayerShapes | None:
+        """Collect the shapes and info layer data of one layer, None for skipped layers."""
         if self.map.texture_settings.skip_drains and layer.usage == Parameters.DRAIN:
             self.logger.debug("Skipping layer %s because of the usage.", layer.name)
-            return cumulative_image
+            return None
 
         if layer.priority == 0:
             self.logger.debug(
                 "Found base layer %s. Postponing that to be the last layer drawn.", layer.name
             )
-            return cumulative_image
-
-        layer_path = layer.path(self._weights_dir)
-        self.logger.debug("Drawing layer %s.", layer_path)
-        layer_image = self._load_layer_image(layer_path)
-        if layer_image is None:
-            return cumulative_image
+            return None
 
-        if cumulative_image is None:
-            self.logger.debug("First layer, creating new cumulative image.")
-            cumulative_image = layer_image
-
-        mask = cv2.bitwise_not(cumulative_image)
-        self._draw_layer(layer, info_layer_data, layer_image)
+        self.logger.debug("Drawing layer %s.", layer.name)
+        shapes = LayerShapes(self._map_frame_matrix())
+        self._draw_layer(layer, info_layer_data, shapes)
+        self._add_roads(layer, info_layer_data)
+        return shapes
 
-        if layer.road_texture:
-            self.save_road_mask(layer, layer_image)
+    def _composite_layers(
+        self,
+        drawn_layers: list[tuple[Layer, LayerShapes]],
+        compositor: TextureCompositor,
+        tiles: list[tuple[int, int, int, int]],
+    ) -> None:
+        """Draw the layers in the tiles of the current strip and composite them."""
+        for left, top, width, height in tiles:
+            for layer, shapes in drawn_layers:
+                if not compositor.occupies(layer):
+                    continue
+                canvas = compositor.draw(shapes, left, top, width, height, self.logger)
+                if canvas is not None:
+                    compositor.add(layer, canvas, left, top)
 
-        self._add_roads(layer, info_layer_data)
+    def _write_composited_layers(
+        self,
+        layers: list[Layer],
+        drawn_layers: list[tuple[Layer, LayerShapes]],
+        compositor: TextureCompositor,
+        outputs: _StripOutputs,
+    ) -> None:
+        """Split the current strip of the composited layers into their weight files, draw the
+        base layer and the road masks. External layers and road masks are rendered as drawn.
+        """
+        for layer, shapes in drawn_layers:
+            mask_path = self.road_mask_path(layer)
+            if mask_path is not None:
+                outputs.write(
+                    mask_path, compositor.render(shapes, self.logger), ImageKind.INTERMEDIATE
+                )
 
-        if layer.external:
-            output_image = layer_image
-        else:
-            output_image = cv2.bitwise_and(layer_image, mask)
-            cumulative_image = cv2.bitwise_or(cumulative_image, output_image)
+        base_layer = self.get_base_layer()
+        shapes_by_name = {layer.name: shapes for layer, shapes in drawn_layers}
+        for layer in layers:
+            if layer is base_layer and compositor.composited:
+                continue
+            if layer.external and layer.name in shapes_by_name:
+                layer_image = compositor.render(shapes_by_name[layer.name], self.logger)
+            else:
+                layer_image = compositor.layer_image(layer)
+            outputs.write(layer.path(self._weights_dir), layer_image, ImageKind.DELIVERABLE)
 
-        cv2.imwrite(layer_path, output_image)
-        self.logger.debug("Texture %s saved.", layer_path)
-        return cumulative_image
+        if compositor.composited:
+            self.draw_base_layer(compositor.occupied(), outputs)
 
     def _publish_info_layer_data(self, info_layer_data: dict[str, list[Any]]) -> None:
         """Publish drawn info-layer data into map context."""
@@ -868,14 +1383,15 @@ class Texture(ImageComponent):
         return shifted_entries
 
     def _draw_layer(
-        self, layer: Layer, info_layer_data: dict[str, list[Any]], layer_image: np.ndarray
+        self, layer: Layer, info_layer_data: dict[str, list[Any]], shapes: LayerShapes
     ) -> None:
-        """Draws polygons from OSM data on the layer image and updates the info layer data.
+        """Collects polygons from OSM data into the layer shapes and updates the info layer
+        data.
 
         Arguments:
             layer (Layer): Layer with textures and tags.
             info_layer_data (dict[list[list[int]]]): Dictionary to store info layer data.
-            layer_image (np.ndarray): Layer image.
+            shapes (LayerShapes): Shapes of the layer.
         """
         tags = self._resolve_layer_tags(layer)
         if tags is None:
@@ -886,7 +1402,7 @@ class Texture(ImageComponent):
 
         is_fields = layer.info_layer == Parameters.FIELDS
         for polygon, holes, osm_tags, geom_type in self.osm_pipeline.polygons(
-            tags, layer.width, is_fields
+            tags, layer.width, is_fields, layer.save_tags
         ):
             if not len(polygon) > 2:
                 self.logger.debug("Skipping polygon with less than 3 points.")
@@ -894,9 +1410,9 @@ class Texture(ImageComponent):
             self._append_info_layer_entry(
                 layer, polygon, holes, osm_tags, geom_type, info_layer_data
             )
-            self._fill_layer_polygon(layer, layer_image, polygon, holes)
+            self._fill_layer_polygon(layer, shapes, polygon, holes)
 
-        self._add_points(layer, tags, info_layer_data, layer_image)
+        self._add_points(layer, tags, info_layer_data, shapes)
 
     def _resolve_layer_tags(self, layer: Layer) -> dict[str, str | list[str] | bool] | None:
         """Resolve OSM tags for a layer, honoring precise-tags setting."""
@@ -947,19 +1463,14 @@ class Texture(ImageComponent):
     def _fill_layer_polygon(
         self,
         layer: Layer,
-        layer_image: np.ndarray,
+        shapes: LayerShapes,
         polygon: np.ndarray,
         holes: list[np.ndarray],
     ) -> None:
-        """Fill one polygon into layer image if layer is visible."""
+        """Add one polygon to the layer shapes if layer is visible."""
         if layer.invisible:
             return
-        try:
-            cv2.fillPoly(layer_image, [polygon], color=255)
-            if holes:
-                cv2.fillPoly(layer_image, holes, color=0)
-        except Exception as e:
-            self.logger.warning("Error drawing polygon: %s.", repr(e))
+        shapes.add_polygon(polygon, holes)
 
     def _add_roads(self, layer: Layer, info_layer_data: dict[str, list[Any]]) -> None:
         """Adds roads to the info layer data.
@@ -982,7 +1493,7 @@ class Texture(ImageComponent):
             if tags is None:
                 return
 
-            for linestring, osm_tags in self.osm_pipeline.linestrings(tags):
+            for linestring, osm_tags in self.osm_pipeline.linestrings(tags, layer.save_tags):
                 linestring = self.scale_point_tuples(linestring, self.map.size_scale)
                 linestring_entry = {
                     Parameters.POINTS: linestring,
@@ -999,16 +1510,16 @@ class Texture(ImageComponent):
         layer: Layer,
         tags: dict[str, str | list[str] | bool],
         info_layer_data: dict[str, list[Any]],
-        layer_image: np.ndarray,
+        shapes: LayerShapes,
     ) -> None:
-        """Adds point features to info layer data and optionally draws them."""
+        """Adds point features to info layer data and optionally to the layer shapes."""
         if not layer.info_layer:
             return
 
         if self.osm_pipeline is None:
             raise RuntimeError("OSM pipeline is not initialized. Call process() first.")
 
-        for point, osm_tags in self.osm_pipeline.points(tags):
+        for point, osm_tags in self.osm_pipeline.points(tags, layer.save_tags):
             scaled_point = self.scale_point_tuples([point], self.map.size_scale)[0]
             point_entry = {
                 Parameters.POINT: scaled_point,
@@ -1020,10 +1531,7 @@ class Texture(ImageComponent):
                 continue
 
             radius = max(1, int(layer.width or 1))
-            try:
-                cv2.circle(layer_image, point, radius=radius, color=255, thickness=-1)
-            except Exception as e:
-                self.logger.warning("Error drawing point: %s.", repr(e))
+            shapes.add_circle(point, radius)
 
     @monitor_performance
     def dissolve(self) -> None:
@@ -1032,9 +1540,19 @@ class Texture(ImageComponent):
         Iterates over all layers with tags and reads the first texture, checks if the file
         contains any non-zero values (255), splits those non-values between different weight
         files of the corresponding layer and saves the changes to the files.
+        Every dissolved layer holds the layer image, the random assignment and one sublayer
+        (or one strip of it when the sublayers are streamed), so the number of layers dissolved
+        at once is bounded by Parameters.TEXTURE_POSTPROCESS_MAX_BYTES.
         """
-        for layer in tqdm(self.layers, desc="Dissolving textures", unit="layer"):
-            self.dissolve_layer(layer)
+        # Layers are scaled to the output size before dissolving, unless scaling is skipped.
+        size = max(self.map_size, self.map.output_size or 0)
+        layer_bytes = 3 * size * size
+        self._process_layers(
+            self.dissolve_layer,
+            self.layers,
+            "Dissolving textures",
+            max_workers=Parameters.TEXTURE_POSTPROCESS_MAX_BYTES // max(layer_bytes, 1),
+        )
 
     def dissolve_layer(self, layer: Layer) -> None:
         """Dissolves texture of the layer into sublayers."""
@@ -1042,7 +1560,7 @@ class Texture(ImageComponent):
             self.logger.debug("Layer %s has no tags, there's nothing to dissolve.", layer.name)
             return
         layer_path = layer.path(self._weights_dir)
-        layer_paths = layer.paths(self._weights_dir)
+        layer_paths = layer.paths(self._weights_dir, self.map.context.rasters.listdir)
 
         if len(layer_paths) < 2:
             self.logger.debug("Layer %s has only one texture, skipping.", layer.name)
@@ -1060,9 +1578,10 @@ class Texture(ImageComponent):
             )
             return
 
-        cv2.imwrite(layer.path_preview(self._weights_dir), layer_image.copy())
-        sublayers = self._build_dissolved_sublayers(layer_image, layer.count)
-        self._write_sublayers(sublayers, layer_paths)
+        random_assignment = self._random_assignment(
+            layer_image, layer.count, self._dissolve_rng(layer)
+        )
+        self._write_dissolved_layer(layer, layer_image, random_assignment, layer_paths)
 
         self.logger.debug("Dissolved layer %s.", layer.name)
 
@@ -1071,35 +1590,81 @@ class Texture(ImageComponent):
         """Return whether an image contains at least one non-zero pixel."""
         return bool(np.any(image > 0))
 
-    def _build_dissolved_sublayers(self, layer_image: np.ndarray, count: int) -> list[np.ndarray]:
-        """Split non-zero pixels randomly into count binary sublayers."""
-        mask = layer_image > 0
-        random_assignment = np.random.randint(0, count, size=layer_image.shape)
-        return [
-            np.where(mask & (random_assignment == idx), 255, 0).astype(np.uint8)
-            for idx in range(count)
-        ]
+    def _dissolve_rng(self, layer: Layer) -> np.random.Generator:
+        """Return the random generator for dissolving the layer. It's seeded by the map and the
+        layer name, so the output doesn't depend on the order in which layers are processed.
+        Signed coordinates are hashed, so maps mirrored across the equator or the prime meridian
+        get different seeds."""
+        seed_source = f"{self.coordinates!r}|{self.map_size}|{layer.name}"
+        digest = hashlib.sha256(seed_source.encode("utf-8")).digest()
+        return np.random.default_rng(int.from_bytes(digest[:16], "little"))
 
     @staticmethod
-    def _write_sublayers(sublayers: list[np.ndarray], layer_paths: list[str]) -> None:
-        """Write generated dissolved sublayers to disk paths."""
-        for sublayer, sublayer_path in zip(sublayers, layer_paths):
-            cv2.imwrite(sublayer_path, sublayer)
+    def _random_assignment(
+        layer_image: np.ndarray, count: int, rng: np.random.Generator
+    ) -> np.ndarray:
+        """Assign non-zero pixels randomly to one of count sublayers. Pixels outside of the layer
+        are assigned to none of them, the count of textures of a layer is always below 256.
+        """
+        random_assignment = rng.integers(0, count, size=layer_image.shape, dtype=np.uint8)
+        random_assignment[layer_image == 0] = count
+        return random_assignment
+
+    def _write_dissolved_layer(
+        self,
+        layer: Layer,
+        layer_image: np.ndarray,
+        random_assignment: np.ndarray,
+        layer_paths: list[str],
+    ) -> None:
+        """Write the preview of the layer and its binary sublayers. When the layer is larger than
+        the draw tile size, the files are streamed strip by strip, so no full sized sublayer is
+        built or held by the raster store.
+
+        Arguments:
+            layer (Layer): Dissolved layer.
+            layer_image (np.ndarray): Image of the layer.
+            random_assignment (np.ndarray): Sublayer of every pixel of the layer.
+            layer_paths (list[str]): Paths to the sublayers.
+        """
+        size = layer_image.shape[0]
+        streamed = 0 < self.map.texture_settings.draw_tile_size < size
+        step = self.map.texture_settings.draw_tile_size if streamed else size
+        sublayer_paths = layer_paths[: layer.count]
+        with _StripOutputs(self, size, streamed) as outputs:
+            for top in range(0, size, step):
+                assignment = random_assignment[top : top + step]
+                outputs.write(
+                    layer.path_preview(self._weights_dir),
+                    layer_image[top : top + step],
+                    ImageKind.INTERMEDIATE,
+                )
+                for idx, sublayer_path in enumerate(sublayer_paths):
+                    sublayer = cv2.compare(
+                        assignment, np.array([idx], dtype=np.float64), cv2.CMP_EQ
+                    )
+                    outputs.write(sublayer_path, sublayer, ImageKind.DELIVERABLE)
 
-    def draw_base_layer(self, cumulative_image: np.ndarray) -> None:
+    def draw_base_layer(
+        self, cumulative_image: np.ndarray, outputs: _StripOutputs | None = None
+    ) -> None:
         """Draws base layer and saves it into the png file.
         Base layer is the last layer to be drawn, it fills the remaining area of the map.
 
         Arguments:
             cumulative_image (np.ndarray): Cumulative image with all layers.
+            outputs (_StripOutputs | None, optional): Outputs of the composited strips, the
+                cumulative image is the current strip then. The whole image is written if None.
         """
         base_layer = self.get_base_layer()
         if base_layer is not None:
             layer_path = base_layer.path(self._weights_dir)
-            self.logger.debug("Drawing base layer %s.", layer_path)
             img = cv2.bitwise_not(cumulative_image)
-            cv2.imwrite(layer_path, img)
-            self.logger.debug("Base texture %s saved.", layer_path)
+            if outputs is None:
+                self.write_image(layer_path, img, ImageKind.DELIVERABLE)
+                self.logger.debug("Base texture %s saved.", layer_path)
+            else:
+                outputs.write(layer_path, img, ImageKind.DELIVERABLE)
 
     @monitor_performance
     def previews(self) -> list[str]:
@@ -1108,15 +1673,15 @@ class Texture(ImageComponent):
         Returns:
             list[str]: List of paths to previews.
         """
-        preview_paths = []
-        preview_paths.append(self._osm_preview())
-        return preview_paths
+        preview_path = self._osm_preview()
+        return [preview_path] if preview_path else []
 
-    def _osm_preview(self) -> str:
-        """Merges layers into one image and saves it into the png file.
+    def _osm_preview(self) -> str | None:
+        """Merges layers into one image and saves it into the png file, unless the layers
+        did not change since the preview was rendered.
 
         Returns:
-            str: Path to the preview.
+            str | None: Path to the preview or None if it could not be rendered.
         """
         scaling_factor = Parameters.PREVIEW_MAXIMUM_SIZE / self.map_size
 
@@ -1137,34 +1702,37 @@ class Texture(ImageComponent):
         ]
         self.logger.debug("Following layers have tag textures: %s.", len(active_layers))
 
-        images = [
-            cv2.resize(image, preview_size)
+        layer_paths = [
+            (layer, layer_path)
             for layer in active_layers
-            for image in [
-                cv2.imread(layer.get_preview_or_path(self._weights_dir), cv2.IMREAD_UNCHANGED)
-            ]
-            if image is not None
+            for layer_path in [layer.get_preview_or_path(self._weights_dir)]
+            if os.path.isfile(layer_path)
         ]
-        colors = [layer.color for layer in active_layers]
-        color_images = []
-        for img, color in zip(images, colors):
-            color_img = np.zeros((img.shape[0], img.shape[1], 3), dtype=np.uint8)
-            color_img[img > 0] = cast(tuple[int, int, int] | list[int], color)
-            color_images.append(color_img)
-        if color_images:
-            merged = cast(np.ndarray, np.sum(color_images, axis=0, dtype=np.uint8))
-        else:
-            merged = np.zeros((preview_size[1], preview_size[0], 3), dtype=np.uint8)
-        self.logger.debug(
-            "Merged layers into one image. Shape: %s, dtype: %s.",
-            merged.shape,
-            merged.dtype,
+        options = (
+            preview_size,
+            [(layer.name, list(layer.color or (255, 255, 255))) for layer, _ in layer_paths],
         )
-        preview_path = os.path.join(
-            self.previews_directory,
+
+        def render() -> np.ndarray:
+            merged = np.zeros((preview_size[1], preview_size[0], 3), dtype=np.uint8)
+            for layer, layer_path in layer_paths:
+                image = self.map.preview_cache.load(layer_path, size=preview_size)
+                if image is None:
+                    continue
+                # Overlapping colors wrap around like a uint8 sum.
+                merged[image > 0] += np.asarray(layer.color, dtype=np.uint8)
+            self.logger.debug(
+                "Merged layers into one image. Shape: %s, dtype: %s.",
+                merged.shape,
+                merged.dtype,
+            )
+            return merged
+
+        preview_path = self.render_preview(
             Parameters.TEXTURES_OSM_PREVIEW_FILENAME,
+            [layer_path for _, layer_path in layer_paths],
+            render,
+            options,
         )
-
-        cv2.imwrite(preview_path, merged)
         self.logger.debug("Preview saved to %s.", preview_path)
         return preview_path
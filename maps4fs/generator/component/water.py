@@ -22,6 +22,26 @@ from maps4fs.generator.settings import Parameters
 class Water(MeshComponent, ImageComponent):
     """Generates water mask/meshes and applies optional DEM water-depth subtraction."""
 
+    reads = (
+        Parameters.RESOURCE_OSM,
+        "texture_layers",
+        "dem_path",
+        "height_scale_multiplier",
+        "mesh_z_scaling_factor",
+        Parameters.RESOURCE_BACKGROUND_DEM,
+    )
+    writes = (
+        "water_mask_path",
+        "dem_not_subtracted_path",
+        "background_water",
+        "background_water_polylines",
+        "mesh_positions",
+        Parameters.RESOURCE_BACKGROUND_DEM,
+        Parameters.RESOURCE_WEIGHTS,
+        Parameters.RESOURCE_WATER,
+    )
+    cache_inputs = ("background_settings", "texture_custom_schema")
+
     @monitor_performance
     def preprocess(self) -> None:
         output_size_multiplier = 1.5 if self.rotation else 1
@@ -56,16 +76,11 @@ class Water(MeshComponent, ImageComponent):
     def process(self) -> None:
         self.create_water_mask()
 
-        if not os.path.isfile(self.output_path):
+        if not self.map.context.rasters.exists(self.output_path):
             self.logger.warning("DEM file not found for water processing: %s", self.output_path)
             return
 
-        shutil_src = self.output_path
-        shutil_dst = self.not_substracted_path
-        if os.path.isfile(shutil_src):
-            import shutil
-
-            shutil.copyfile(shutil_src, shutil_dst)
+        self.copy_image(self.output_path, self.not_substracted_path)
 
         if self.map.dem_settings.water_depth:
             self.subtract_water_depth()
@@ -119,11 +134,11 @@ class Water(MeshComponent, ImageComponent):
             (self.background_size, self.background_size), dtype=np.uint8
         )
         for path in background_paths:
-            layer_image = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+            layer_image = self.read_image(path, cv2.IMREAD_GRAYSCALE)
             if layer_image is not None:
                 background_image = cv2.add(background_image, layer_image)
 
-        cv2.imwrite(self.water_mask_path, background_image)
+        self.write_image(self.water_mask_path, background_image)
         self.logger.debug("Water mask created: %s", self.water_mask_path)
 
     @staticmethod
@@ -489,12 +504,12 @@ class Water(MeshComponent, ImageComponent):
     @monitor_performance
     def subtract_water_depth(self) -> None:
         """Subtract water depth from DEM where polygon-water mask is present."""
-        if not os.path.isfile(self.water_mask_path):
+        if not self.map.context.rasters.exists(self.water_mask_path):
             self.logger.warning("Water mask texture was not generated, skipping subtraction.")
             return
 
-        water_mask_image = cv2.imread(self.water_mask_path, cv2.IMREAD_UNCHANGED)
-        dem_image = cv2.imread(self.output_path, cv2.IMREAD_UNCHANGED)
+        water_mask_image = self.read_image(self.water_mask_path)
+        dem_image = self.read_image(self.output_path)
         if water_mask_image is None or dem_image is None:
             self.logger.warning("DEM or water mask could not be read, skipping subtraction.")
             return
@@ -567,7 +582,7 @@ class Water(MeshComponent, ImageComponent):
         else:
             self.flattened_water_dem = None
 
-        cv2.imwrite(self.output_path, dem_image)
+        self.write_image(self.output_path, dem_image)
         self.logger.debug("Water depth subtracted from DEM data: %s", self.output_path)
 
     @monitor_performance
@@ -603,7 +618,7 @@ class Water(MeshComponent, ImageComponent):
         mesh.apply_transform(rotation_matrix)
         center = mesh.vertices.mean(axis=0)
 
-        background_dem = cv2.imread(self.not_substracted_path, cv2.IMREAD_UNCHANGED)
+        background_dem = self.read_image(self.not_substracted_path)
         if background_dem is not None:
             elevation = self.get_z_coordinate_from_dem(
                 background_dem, int(center[0]), int(center[2])
@@ -761,7 +776,7 @@ class Water(MeshComponent, ImageComponent):
             self.water_directory, Parameters.POLYLINE_WATER_MESH_FILENAME
         )
 
-        dem_image = cv2.imread(self.not_substracted_path, cv2.IMREAD_UNCHANGED)
+        dem_image = self.read_image(self.not_substracted_path)
         if dem_image is None:
             self.logger.error("Could not read DEM image for polyline water generation.")
             return
@@ -817,7 +832,7 @@ class Water(MeshComponent, ImageComponent):
         if dem_override is not None:
             not_resized_dem = dem_override
         else:
-            not_resized_dem = cv2.imread(self.not_substracted_path, cv2.IMREAD_UNCHANGED)
+            not_resized_dem = self.read_image(self.not_substracted_path)
             if not_resized_dem is None:
                 self.logger.warning(
                     "Could not read non-subtracted DEM: %s", self.not_substracted_path
@@ -0,0 +1,407 @@
+"""This module contains the ComponentCache class, which allows to skip processing of components
+whose inputs did not change since a previous generation."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import time
+import uuid
+from typing import TYPE_CHECKING, Any
+
+from pydantic import BaseModel
+
+from maps4fs.generator.bootstrap import Bootstrap
+from maps4fs.generator.constants import Parameters, Paths
+from maps4fs.generator.scheduler import ComponentScheduler
+
+if TYPE_CHECKING:
+    from maps4fs.generator.component.base.component import Component
+    from maps4fs.generator.map import Map
+
+ENTRY_FILENAME = "entry.pkl"
+FILES_DIRECTORY = "files"
+
+# Map-level files, which are maintained by the Map itself and never belong to a component.
+EXCLUDED_FILES = {
+    "main_settings.json",
+    "generation_settings.json",
+    "generation_info.json",
+    "generation_logs.json",
+    "performance_report.json",
+    "texture_custom_schema.json",
+    "tree_custom_schema.json",
+    "buildings_custom_schema.json",
+    "electricity_custom_schema.json",
+}
+
+MAP_DIRECTORY_PLACEHOLDER = "<map_directory>"
+
+
+def _hash_file(file_path: str) -> str:
+    """Returns SHA-256 hex digest of the file content.
+
+    Arguments:
+        file_path (str): Path to the file.
+
+    Returns:
+        str: Hex digest of the file.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _relocate(value: Any, source: str, target: str) -> Any:
+    """Replaces the source directory prefix in all strings of the value with the target.
+
+    Arguments:
+        value (Any): Value to process, containers are processed recursively.
+        source (str): Directory prefix to replace.
+        target (str): Replacement for the prefix.
+
+    Returns:
+        Any: Value with replaced prefixes.
+    """
+    if isinstance(value, str):
+        return target + value[len(source) :] if value.startswith(source) else value
+    if isinstance(value, list):
+        return [_relocate(item, source, target) for item in value]
+    if isinstance(value, tuple):
+        return tuple(_relocate(item, source, target) for item in value)
+    if isinstance(value, dict):
+        return {key: _relocate(item, source, target) for key, item in value.items()}
+    return value
+
+
+def _is_plain(value: Any) -> bool:
+    """Checks whether the value contains only builtin scalars and containers.
+
+    Arguments:
+        value (Any): Value to check.
+
+    Returns:
+        bool: True if the value is safe to persist as component state.
+    """
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return True
+    if isinstance(value, (list, tuple, set)):
+        return all(_is_plain(item) for item in value)
+    if isinstance(value, dict):
+        return all(isinstance(key, str) and _is_plain(item) for key, item in value.items())
+    return False
+
+
+class ComponentCache:
+    """Content-addressed cache of component results.
+
+    Each cacheable component (see Component.cache_inputs) gets a fingerprint built from
+    the map parameters, the settings it uses, the game schemas and the fingerprints of all
+    upstream components it depends on (according to Component.reads / Component.writes).
+    When an entry with the same fingerprint exists, the files written by the component, its
+    MapContext contributions and its plain instance attributes are restored instead of running
+    process(). Components running after an uncacheable component are never restored.
+    When the cache grows over its size limit the least recently used entries are evicted.
+
+    Arguments:
+        map (Map): The map instance for which the components are generated.
+        directory (str, optional): Directory where the cache entries are stored.
+        max_bytes (int, optional): Size limit of all entries in bytes.
+    """
+
+    def __init__(
+        self,
+        map: Map,
+        directory: str = Paths.COMPONENTS_CACHE_DIR,
+        max_bytes: int = Parameters.COMPONENTS_CACHE_MAX_BYTES,
+    ):
+        self.map = map
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.logger = map.logger
+        os.makedirs(self.directory, exist_ok=True)
+
+        components = list(map.game.components)
+        dependencies = ComponentScheduler(components, max_workers=1).dependencies
+        self.dependencies: dict[type[Component], list[type[Component]]] = {
+            component: [components[index] for index in sorted(dependencies[position])]
+            for position, component in enumerate(components)
+        }
+        self.fingerprints: dict[type[Component], str] = {}
+        self._pending: dict[type[Component], str] = {}
+        self._base_payload = self._get_base_payload()
+
+    def _get_base_payload(self) -> dict[str, Any]:
+        """Returns inputs shared by all components.
+
+        Returns:
+            dict[str, Any]: JSON-serializable payload.
+        """
+        game = self.map.game
+        schemas = {}
+        for schema_path in (
+            game.texture_schema,
+            game.grle_schema,
+            game.tree_schema,
+            game.buildings_schema,
+            game.electricity_schema,
+            game.background_schema,
+        ):
+            if schema_path and os.path.isfile(schema_path):
+                schemas[os.path.basename(schema_path)] = _hash_file(schema_path)
+
+        template_path = self.map.template_path
+        template_stat = os.stat(template_path) if os.path.isfile(template_path) else None
+        return {
+            "version": Bootstrap.package_version(),
+            "game": game.code,
+            "template": (
+                [template_path, template_stat.st_size, template_stat.st_mtime_ns]
+                if template_stat
+                else None
+            ),
+            "schemas": schemas,
+            "coordinates": list(self.map.coordinates),
+            "size": self.map.size,
+            "rotation": self.map.rotation,
+            "output_size": self.map.output_size,
+            "dem_settings": self.map.dem_settings.model_dump(mode="json"),
+        }
+
+    def _input_value(self, name: str) -> Any:
+        """Returns JSON-serializable representation of the map attribute.
+
+        Arguments:
+            name (str): Name of the map attribute.
+
+        Returns:
+            Any: Representation of the attribute value, files are represented by content hash.
+        """
+        value = getattr(self.map, name, None)
+        if isinstance(value, BaseModel):
+            return value.model_dump(mode="json")
+        if isinstance(value, type):
+            return f"{value.__module__}.{value.__qualname__}"
+        if isinstance(value, str) and os.path.isfile(value):
+            return _hash_file(value)
+        return value
+
+    def fingerprint(self, component: Component) -> str | None:
+        """Returns fingerprint of the component inputs.
+
+        Arguments:
+            component (Component): The component instance.
+
+        Returns:
+            str | None: Fingerprint or None if the component can not be cached.
+        """
+        component_cls = component.__class__
+        if component_cls.cache_inputs is None or component_cls not in self.dependencies:
+            return None
+
+        upstream = []
+        for dependency in self.dependencies[component_cls]:
+            dependency_fingerprint = self.fingerprints.get(dependency)
+            if dependency_fingerprint is None:
+                return None
+            upstream.append(dependency_fingerprint)
+
+        payload = {
+            "component": component_cls.__name__,
+            "base": self._base_payload,
+            "inputs": {name: self._input_value(name) for name in component_cls.cache_inputs},
+            "upstream": upstream,
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    def snapshot(self) -> dict[str, tuple[int, int]]:
+        """Returns size and modification time of every file in the map directory.
+
+        Returns:
+            dict[str, tuple[int, int]]: Relative file path to (size, mtime) mapping.
+        """
+        map_directory = self.map.map_directory
+        state = {}
+        for root, _, files in os.walk(map_directory):
+            for filename in files:
+                file_path = os.path.join(root, filename)
+                relative_path = os.path.relpath(file_path, map_directory)
+                if relative_path in EXCLUDED_FILES:
+                    continue
+                stat = os.stat(file_path)
+                state[relative_path] = (stat.st_size, stat.st_mtime_ns)
+        return state
+
+    def restore(self, component: Component) -> bool:
+        """Restores results of the component from the cache if a matching entry exists.
+
+        Arguments:
+            component (Component): The component instance.
+
+        Returns:
+            bool: True if the results were restored and process() must be skipped.
+        """
+        component_cls = component.__class__
+        self.fingerprints.pop(component_cls, None)
+        fingerprint = self.fingerprint(component)
+        if fingerprint is None:
+            return False
+        self._pending[component_cls] = fingerprint
+
+        entry_directory = os.path.join(self.directory, fingerprint)
+        entry_path = os.path.join(entry_directory, ENTRY_FILENAME)
+        if not os.path.isfile(entry_path):
+            return False
+
+        try:
+            with open(entry_path, "rb") as file:
+                entry = pickle.load(file)
+            # The access time of the entry file drives LRU eviction.
+            os.utime(entry_path, (time.time(), os.stat(entry_path).st_mtime))
+
+            map_directory = self.map.map_directory
+            files_directory = os.path.join(entry_directory, FILES_DIRECTORY)
+            rasters = self.map.context.rasters
+            for relative_path in entry["files"]:
+                destination = os.path.join(map_directory, relative_path)
+                os.makedirs(os.path.dirname(destination), exist_ok=True)
+                rasters.discard(destination)
+                shutil.copy2(os.path.join(files_directory, relative_path), destination)
+            for relative_path in entry["deleted"]:
+                rasters.remove(os.path.join(map_directory, relative_path))
+
+            for name, value in entry["context"].items():
+                setattr(self.map.context, name, self._from_entry(value))
+            for name, value in entry["state"].items():
+                value = self._from_entry(value)
+                current = getattr(component, name, None)
+                if isinstance(current, dict) and isinstance(value, dict):
+                    current.clear()
+                    current.update(value)
+                else:
+                    setattr(component, name, value)
+            component.restore_cache_state(self._from_entry(entry["extra"]))
+            component.update_generation_info(self._from_entry(entry["info"]))
+        except Exception as e:
+            self.logger.warning(
+                "Could not restore %s from cache, it will be processed: %s",
+                component_cls.__name__,
+                e,
+            )
+            return False
+
+        self._pending.pop(component_cls, None)
+        self.fingerprints[component_cls] = fingerprint
+        self.logger.info("Component %s restored from cache.", component_cls.__name__)
+        return True
+
+    def store(self, component: Component, snapshot: dict[str, tuple[int, int]]) -> None:
+        """Stores results of the processed component in the cache.
+
+        Arguments:
+            component (Component): The processed component instance.
+            snapshot (dict[str, tuple[int, int]]): Map directory state taken before processing.
+        """
+        component_cls = component.__class__
+        fingerprint = self._pending.pop(component_cls, None)
+        if fingerprint is None:
+            return
+
+        entry_directory = os.path.join(self.directory, fingerprint)
+        temp_directory = f"{entry_directory}.{uuid.uuid4().hex}.tmp"
+        try:
+            current = self.snapshot()
+            changed = [path for path, state in current.items() if snapshot.get(path) != state]
+            deleted = [path for path in snapshot if path not in current]
+
+            map_directory = self.map.map_directory
+            files_directory = os.path.join(temp_directory, FILES_DIRECTORY)
+            for relative_path in changed:
+                destination = os.path.join(files_directory, relative_path)
+                os.makedirs(os.path.dirname(destination), exist_ok=True)
+                shutil.copy2(os.path.join(map_directory, relative_path), destination)
+
+            context_fields = set(component_cls.writes or ()) & set(vars(self.map.context))
+            entry = {
+                "files": changed,
+                "deleted": deleted,
+                "context": {
+                    name: self._to_entry(getattr(self.map.context, name))
+                    for name in sorted(context_fields)
+                },
+                "state": {
+                    name: self._to_entry(value)
+                    for name, value in vars(component).items()
+                    if not name.startswith("_") and _is_plain(value)
+                },
+                "extra": self._to_entry(component.get_cache_state()),
+                "info": self._to_entry(component.info_sequence()),
+            }
+            with open(os.path.join(temp_directory, ENTRY_FILENAME), "wb") as file:
+                pickle.dump(entry, file)
+
+            if os.path.isdir(entry_directory):
+                shutil.rmtree(entry_directory)
+            os.rename(temp_directory, entry_directory)
+        except Exception as e:
+            self.logger.warning("Could not cache %s results: %s", component_cls.__name__, e)
+            return
+        finally:
+            if os.path.isdir(temp_directory):
+                shutil.rmtree(temp_directory, ignore_errors=True)
+
+        self.fingerprints[component_cls] = fingerprint
+        self.logger.debug(
+            "Cached %s results: %s files, fingerprint %s.",
+            component_cls.__name__,
+            len(changed),
+            fingerprint,
+        )
+        self.evict(keep=fingerprint)
+
+    def evict(self, keep: str | None = None) -> None:
+        """Removes the least recently used entries over the size limit.
+
+        Arguments:
+            keep (str | None, optional): Fingerprint of the entry which is never removed.
+        """
+        entries: list[tuple[float, int, str]] = []
+        for fingerprint in os.listdir(self.directory):
+            entry_directory = os.path.join(self.directory, fingerprint)
+            try:
+                accessed = os.stat(os.path.join(entry_directory, ENTRY_FILENAME)).st_atime
+            except OSError:
+                # Temporary directories of entries being stored.
+                continue
+            size = 0
+            for root, _, files in os.walk(entry_directory):
+                for filename in files:
+                    try:
+                        size += os.stat(os.path.join(root, filename)).st_size
+                    except OSError:
+                        continue
+            if fingerprint == keep:
+                accessed = float("inf")
+            entries.append((accessed, size, entry_directory))
+
+        total_size = sum(size for _, size, _ in entries)
+        for accessed, size, entry_directory in sorted(entries):
+            if total_size <= self.max_bytes or accessed == float("inf"):
+                break
+            shutil.rmtree(entry_directory, ignore_errors=True)
+            total_size -= size
+            self.logger.debug("Evicted component cache entry %s.", entry_directory)
+
+    def _to_entry(self, value: Any) -> Any:
+        """Makes paths in the value independent of the map directory."""
+        return _relocate(value, self.map.map_directory, MAP_DIRECTORY_PLACEHOLDER)
+
+    def _from_entry(self, value: Any) -> Any:
+        """Resolves paths in the value against the current map directory."""
+        return _relocate(value, MAP_DIRECTORY_PLACEHOLDER, self.map.map_directory)
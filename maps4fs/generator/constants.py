@@ -37,8 +37,19 @@ class Paths:
     SAT_CACHE_DIR = os.path.join(CACHE_DIR, "sat")
     OSMNX_CACHE_DIR = os.path.join(CACHE_DIR, "osmnx")
     OSMNX_DATA_DIR = os.path.join(CACHE_DIR, "odata")
-
-    CACHE_DIRS = [DTM_CACHE_DIR, SAT_CACHE_DIR, OSMNX_CACHE_DIR, OSMNX_DATA_DIR]
+    COMPONENTS_CACHE_DIR = os.path.join(CACHE_DIR, "components")
+    OSM_TILES_CACHE_DIR = os.path.join(CACHE_DIR, "osm_tiles")
+    OSM_FEATURES_CACHE_DIR = os.path.join(CACHE_DIR, "osm_features")
+
+    CACHE_DIRS = [
+        DTM_CACHE_DIR,
+        SAT_CACHE_DIR,
+        OSMNX_CACHE_DIR,
+        OSMNX_DATA_DIR,
+        COMPONENTS_CACHE_DIR,
+        OSM_TILES_CACHE_DIR,
+        OSM_FEATURES_CACHE_DIR,
+    ]
 
     # ---- Executable names and remote URLs --------------------------------
     I3D_CONVERTER_NAME = "i3dConverter.exe"
@@ -124,12 +135,40 @@ class Parameters:
     ELECTRICITY_RADIUS = "electricity_radius"
     DRAIN = "drain"
 
+    # ---- Component scheduling -------------------------------------------
+    # On-disk artifacts shared between components. Together with MapContext field names they
+    # are used in Component.reads / Component.writes to order components in Map.generate.
+    RESOURCE_OSM = "osm"
+    RESOURCE_SATELLITE = "satellite"
+    RESOURCE_WEIGHTS = "weights"
+    RESOURCE_BACKGROUND_DEM = "background_dem"
+    RESOURCE_GAME_DEM = "game_dem"
+    RESOURCE_ROADS = "roads"
+    RESOURCE_WATER = "water_assets"
+    RESOURCE_MAP_I3D = "map_i3d"
+    RESOURCE_MAP_XML = "map_xml"
+    RESOURCE_SPLINES = "splines"
+    RESOURCE_BUILDINGS = "buildings_assets"
+    COMPONENT_WORKERS = 4
+    COMPONENTS_CACHE_MAX_BYTES = 4 * 1024**3
+
+    # ---- Raster store ---------------------------------------------------
+    RASTER_STORE_MAX_BYTES = 2 * 1024**3
+    IMAGE_WRITE_WORKERS = 4
+    IMAGE_WRITE_MAX_PENDING = 8
+
     # ---- Texture channels / runtime keys -------------------------------
     TEXTURE_CHANNEL_TEXTURES = "textures"
     TEXTURE_CHANNEL_BACKGROUND = "background"
     TEXTURE_CHANNEL_EXTENDED = "extended"
     OSM_REQUESTS_TIMEOUT = 10
     OSM_PREFETCH_WORKERS = 3
+    TEXTURE_POSTPROCESS_WORKERS = 4
+    TEXTURE_POSTPROCESS_MAX_BYTES = 1024**3
+    TEXTURE_DRAW_TILE_SIZE = 2048
+    OSM_TILE_CACHE_TTL = 7 * 24 * 3600
+    OSM_TILE_CACHE_MAX_BYTES = 512 * 1024**2
+    OSM_FEATURES_CACHE_MAX_BYTES = 512 * 1024**2
 
     # ---- Texture file/path fragments -----------------------------------
     MASKS_DIRECTORY = "masks"
@@ -142,11 +181,15 @@ class Parameters:
     # ---- Image / texture sizes ------------------------------------------
     MAXIMUM_BACKGROUND_TEXTURE_SIZE = 4096
     PREVIEW_MAXIMUM_SIZE = 2048
+    PREVIEW_WORKERS = 4
     OVERVIEW_IMAGE_SIZE = 4096
     OVERVIEW_IMAGE_FILENAME = "overview"
     FULL = "FULL"
     PREVIEW = "PREVIEW"
 
+    # DEM working buffers of at least this many pixels are memory-mapped to a temporary file.
+    DEM_MEMMAP_MIN_PIXELS = 1 << 28
+
     # ---- Map geometry ---------------------------------------------------
     BACKGROUND_DISTANCE = 2048
     EXTENDED_DISTANCE = 512
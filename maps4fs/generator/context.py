@@ -9,6 +9,9 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 from typing import Any
 
+from maps4fs.generator.osm_pipeline.cache import OSMFeatureCache
+from maps4fs.generator.raster_store import RasterStore
+
 
 @dataclass
 class MapContext:
@@ -71,6 +74,16 @@ class MapContext:
     # Values only contain fields that are actually consumed by Scene.
     mesh_positions: dict[str, dict[str, float]] = field(default_factory=dict)
 
+    # ---- Shared rasters ----
+    # Latest arrays of PNG artifacts (DEM, weights, info layers) keyed by file path, so
+    # components do not decode files written by previous components again.
+    rasters: RasterStore = field(default_factory=RasterStore)
+
+    # ---- Shared OSM features ----
+    # Features fetched by every Texture pass (main, water, background forest, extended), keyed
+    # by the OSM source and the tag filter, so each query is fetched once per generation.
+    osm_features: OSMFeatureCache = field(default_factory=OSMFeatureCache)
+
     # ---- Layer query helpers (mirror Texture component methods) ----
 
     def get_layer_by_usage(self, usage: str) -> Any | None:
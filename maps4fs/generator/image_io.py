@@ -0,0 +1,320 @@
+"""This module contains the image I/O used by the components instead of raw cv2 calls: PNG
+compression by artifact kind, parallel background writes, PNG files written strip by strip and
+per-artifact I/O statistics."""
+
+from __future__ import annotations
+
+import os
+import struct
+import threading
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from enum import Enum
+from time import perf_counter
+
+import cv2
+import numpy as np
+
+from maps4fs.generator.constants import Parameters
+from maps4fs.generator.monitor import PerformanceMonitor, get_current_session
+
+
+class ImageKind(Enum):
+    """Kind of an image artifact, which selects its PNG compression.
+
+    INTERMEDIATE images (masks and DEM variants which are only re-read by later components) and
+    PREVIEW images are encoded with fast settings. DELIVERABLE images, the weights and the DEM
+    which end up in the game map, keep the OpenCV defaults.
+    """
+
+    INTERMEDIATE = "intermediate"
+    PREVIEW = "preview"
+    DELIVERABLE = "deliverable"
+
+
+# Row filters can be selected since OpenCV 4.11.
+_NO_PNG_FILTER = (
+    [cv2.IMWRITE_PNG_FILTER, cv2.IMWRITE_PNG_FILTER_NONE]
+    if hasattr(cv2, "IMWRITE_PNG_FILTER")
+    else []
+)
+# Level 1 with run-length encoding and without row filters encodes masks several times faster
+# than the defaults and to smaller files.
+_FAST_PNG_PARAMS = [
+    cv2.IMWRITE_PNG_COMPRESSION,
+    1,
+    cv2.IMWRITE_PNG_STRATEGY,
+    cv2.IMWRITE_PNG_STRATEGY_RLE,
+    *_NO_PNG_FILTER,
+]
+# 16-bit DEMs barely compress with fast settings, they are stored uncompressed instead.
+_STORED_PNG_PARAMS = [cv2.IMWRITE_PNG_COMPRESSION, 0, *_NO_PNG_FILTER]
+
+
+def encode_params(image_path: str, image: np.ndarray, kind: ImageKind) -> list[int]:
+    """Returns the cv2.imwrite parameters of the image.
+
+    Arguments:
+        image_path (str): Path to the image file.
+        image (np.ndarray): Image data.
+        kind (ImageKind): Kind of the image.
+
+    Returns:
+        list[int]: cv2.imwrite parameters, empty for the OpenCV defaults.
+    """
+    if kind is ImageKind.DELIVERABLE or not image_path.lower().endswith(Parameters.PNG_EXTENSION):
+        return []
+    if image.dtype == np.uint16:
+        return _STORED_PNG_PARAMS
+    return _FAST_PNG_PARAMS
+
+
+def write_image(
+    image_path: str,
+    image: np.ndarray,
+    kind: ImageKind = ImageKind.DELIVERABLE,
+    session: str | None = None,
+) -> None:
+    """Writes the image and records the bytes and time of the artifact.
+
+    Arguments:
+        image_path (str): Path to the image file.
+        image (np.ndarray): Image data.
+        kind (ImageKind, optional): Kind of the image. Defaults to ImageKind.DELIVERABLE.
+        session (str | None, optional): Performance session of the write, the current one
+            if None.
+
+    Raises:
+        OSError: If the image could not be written.
+    """
+    start = perf_counter()
+    if not cv2.imwrite(image_path, image, encode_params(image_path, image, kind)):
+        raise OSError(f"Could not write image: {image_path}")
+    _record(session, image_path, "write", os.path.getsize(image_path), perf_counter() - start)
+
+
+class PngStripWriter:
+    """Writes an 8-bit grayscale PNG strip by strip, so the whole image is never held in
+    memory. The rows are compressed with the settings write_image() uses for the kind: level 1
+    with run-length encoding, without row filters for intermediate images and with the SUB
+    filter for deliverables.
+
+    Arguments:
+        image_path (str): Path to the image file.
+        width (int): Width of the image.
+        height (int): Height of the image.
+        kind (ImageKind, optional): Kind of the image. Defaults to ImageKind.DELIVERABLE.
+    """
+
+    _SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+    def __init__(
+        self, image_path: str, width: int, height: int, kind: ImageKind = ImageKind.DELIVERABLE
+    ) -> None:
+        self.image_path = image_path
+        self.width = width
+        self.height = height
+        self.rows_written = 0
+        self._sub_filter = kind is ImageKind.DELIVERABLE
+        self._compressor = zlib.compressobj(1, zlib.DEFLATED, 15, 8, zlib.Z_RLE)
+        self._time_taken = 0.0
+        start = perf_counter()
+        self._file = open(image_path, "wb")  # pylint: disable=consider-using-with
+        self._file.write(self._SIGNATURE)
+        # 8-bit depth, grayscale, deflate, adaptive filtering, no interlace.
+        self._write_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0))
+        self._time_taken += perf_counter() - start
+
+    def __enter__(self) -> PngStripWriter:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write(self, rows: np.ndarray) -> None:
+        """Appends the rows to the image.
+
+        Arguments:
+            rows (np.ndarray): 8-bit rows with the width of the image.
+
+        Raises:
+            ValueError: If the rows don't fit the image.
+        """
+        if rows.dtype != np.uint8 or rows.ndim != 2 or rows.shape[1] != self.width:
+            raise ValueError(f"Rows of shape {rows.shape} don't fit {self.image_path}.")
+        if self.rows_written + len(rows) > self.height:
+            raise ValueError(f"Too many rows written to {self.image_path}.")
+        start = perf_counter()
+        filtered = np.empty((len(rows), self.width + 1), dtype=np.uint8)
+        filtered[:, 0] = 1 if self._sub_filter else 0
+        filtered[:, 1:] = rows
+        if self._sub_filter:
+            # Differences to the left neighbour wrap around modulo 256.
+            np.subtract(rows[:, 1:], rows[:, :-1], out=filtered[:, 2:])
+        data = self._compressor.compress(filtered.tobytes())
+        if data:
+            self._write_chunk(b"IDAT", data)
+        self.rows_written += len(rows)
+        self._time_taken += perf_counter() - start
+
+    def close(self) -> None:
+        """Finishes the image and records the bytes and time of the artifact.
+
+        Raises:
+            ValueError: If not all rows of the image were written.
+        """
+        if self.rows_written != self.height:
+            self.abort()
+            raise ValueError(
+                f"{self.rows_written} of {self.height} rows written to {self.image_path}."
+            )
+        start = perf_counter()
+        self._write_chunk(b"IDAT", self._compressor.flush())
+        self._write_chunk(b"IEND", b"")
+        self._file.close()
+        self._time_taken += perf_counter() - start
+        _record(None, self.image_path, "write", os.path.getsize(self.image_path), self._time_taken)
+
+    def abort(self) -> None:
+        """Closes and removes the unfinished image."""
+        self._file.close()
+        if os.path.isfile(self.image_path):
+            os.remove(self.image_path)
+
+    def _write_chunk(self, chunk_type: bytes, data: bytes) -> None:
+        self._file.write(struct.pack(">I", len(data)))
+        self._file.write(chunk_type)
+        self._file.write(data)
+        self._file.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(chunk_type))))
+
+
+def read_image(image_path: str, flags: int = cv2.IMREAD_UNCHANGED) -> np.ndarray | None:
+    """Reads the image and records the bytes and time of the artifact.
+
+    Arguments:
+        image_path (str): Path to the image file.
+        flags (int, optional): cv2.imread flags. Defaults to cv2.IMREAD_UNCHANGED.
+
+    Returns:
+        np.ndarray | None: The image or None if it could not be read.
+    """
+    start = perf_counter()
+    image = cv2.imread(image_path, flags)
+    if image is not None:
+        _record(None, image_path, "read", os.path.getsize(image_path), perf_counter() - start)
+    return image
+
+
+def _record(
+    session: str | None, image_path: str, operation: str, size: int, time_taken: float
+) -> None:
+    """Adds the I/O of the artifact to the performance session, if there is one."""
+    session = session or get_current_session()
+    if session:
+        PerformanceMonitor().add_image_record(
+            session, os.path.basename(image_path), operation, size, time_taken
+        )
+
+
+class ImageWriter:
+    """Writes images in background threads.
+
+    The number of queued writes is bounded, submit() blocks until a slot is free, so at most
+    max_pending images are held in memory waiting to be encoded. Errors are raised by wait().
+    With 0 workers the images are written immediately.
+
+    Arguments:
+        workers (int, optional): Number of writing threads.
+        max_pending (int, optional): Maximum number of queued and running writes.
+    """
+
+    def __init__(
+        self,
+        workers: int = Parameters.IMAGE_WRITE_WORKERS,
+        max_pending: int = Parameters.IMAGE_WRITE_MAX_PENDING,
+    ) -> None:
+        self.workers = workers
+        self._slots = threading.BoundedSemaphore(max(max_pending, 1))
+        self._executor: ThreadPoolExecutor | None = None
+        self._pending: dict[str, Future[None]] = {}
+        self._lock = threading.Lock()
+
+    def submit(
+        self, image_path: str, image: np.ndarray, kind: ImageKind = ImageKind.DELIVERABLE
+    ) -> None:
+        """Queues the image for writing. The image must not be modified afterwards.
+
+        Arguments:
+            image_path (str): Path to the image file.
+            image (np.ndarray): Image data.
+            kind (ImageKind, optional): Kind of the image. Defaults to ImageKind.DELIVERABLE.
+        """
+        if self.workers < 1:
+            write_image(image_path, image, kind)
+            return
+
+        # Writes of the same file must not overlap.
+        self.wait_for(image_path)
+        # The slot is held until the write is done, it's released by the done callback of the
+        # future, so it can't be acquired in a with block.
+        self._slots.acquire()  # pylint: disable=consider-using-with
+        try:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers, thread_name_prefix="image-writer"
+                    )
+                future = self._executor.submit(
+                    write_image, image_path, image, kind, get_current_session()
+                )
+                self._pending[os.path.abspath(image_path)] = future
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+
+    def wait_for(self, image_path: str) -> None:
+        """Waits until the queued write of the image is finished, if there is one.
+
+        Arguments:
+            image_path (str): Path to the image file.
+        """
+        with self._lock:
+            future = self._pending.pop(os.path.abspath(image_path), None)
+        if future is not None:
+            future.result()
+
+    def pending(self) -> list[str]:
+        """Returns absolute paths of the images which are queued or being written.
+
+        Returns:
+            list[str]: Paths of the pending images.
+        """
+        with self._lock:
+            return list(self._pending)
+
+    def wait(self) -> None:
+        """Waits until all queued writes are finished and raises the first error."""
+        with self._lock:
+            futures = list(self._pending.values())
+            self._pending.clear()
+        error: BaseException | None = None
+        for future in futures:
+            exception = future.exception()
+            if exception is not None and error is None:
+                error = exception
+        if error is not None:
+            raise error
+
+    def close(self) -> None:
+        """Waits for the queued writes and stops the threads."""
+        try:
+            self.wait()
+        finally:
+            with self._lock:
+                executor, self._executor = self._executor, None
+            if executor is not None:
+                executor.shutdown(wait=True)
@@ -5,6 +5,8 @@ from __future__ import annotations
 import json
 import os
 import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from time import perf_counter
 from typing import Any, Generator
 
@@ -12,12 +14,15 @@ from pydtmdl import DTMProvider
 from pydtmdl.base.dtm import DTMProviderSettings
 
 from maps4fs.generator.component import DEM, Component, Preprocessor
+from maps4fs.generator.component_cache import ComponentCache
 from maps4fs.generator.constants import Paths
 from maps4fs.generator.context import MapContext
 from maps4fs.generator.game import Game
 from maps4fs.generator.monitor import Logger, PerformanceMonitor, performance_session
 from maps4fs.generator.osm import check_and_fix_osm
-from maps4fs.generator.settings import GenerationSettings, MainSettings
+from maps4fs.generator.preview import PreviewCache
+from maps4fs.generator.scheduler import ComponentScheduler
+from maps4fs.generator.settings import GenerationSettings, MainSettings, Parameters
 from maps4fs.generator.statistics import StatisticsClient
 
 _stats = StatisticsClient()
@@ -32,6 +37,8 @@ class Map:
         size (int): Height and width of the map in pixels (it's a square).
         map_directory (str): Path to the directory where map files will be stored.
         logger (Any): Logger instance
+        use_component_cache (bool): Restore results of components whose inputs did not change
+            since a previous generation instead of processing them again.
     """
 
     def __init__(
@@ -53,6 +60,7 @@ class Map:
         electricity_custom_schema: list[dict] | None = None,
         custom_template_path: str | None = None,
         custom_background_path: str | None = None,
+        use_component_cache: bool = False,
         **kwargs,
     ):
 
@@ -88,6 +96,9 @@ class Map:
 
         self.generation_settings_json = generation_settings.to_json()
 
+        # Components may run concurrently, guards shared JSON files and the components list.
+        self._lock = threading.RLock()
+
         # Custom inputs.
         if custom_osm and not os.path.isfile(custom_osm):
             raise FileNotFoundError(f"Custom OSM file {custom_osm} does not exist.")
@@ -111,13 +122,16 @@ class Map:
         self._save_json_files()
 
         # Unpack map template.
-        self._unpack_template(custom_template_path or game.template_path)
+        self.template_path = custom_template_path or game.template_path
+        self._unpack_template(self.template_path)
 
         self.assets_directory = os.path.join(self.map_directory, "assets")
         os.makedirs(self.assets_directory, exist_ok=True)
 
         self.context = MapContext()
         self.components: list[Component] = []
+        self.component_cache = ComponentCache(self) if use_component_cache else None
+        self.preview_cache = PreviewCache(os.path.join(self.map_directory, "previews"))
 
     @staticmethod
     def _dump_json(filename: str, directory: str, data) -> None:
@@ -247,16 +261,21 @@ class Map:
             generation_start = perf_counter()
 
             try:
-                for game_component in self.game.components:
-                    component = game_component(self.game, self)
-                    self._register_component(component)
-                    yield component.__class__.__name__
-                    self._run_component(component)
+                # Cached results are collected by diffing the map directory, which requires
+                # components to be processed one at a time.
+                max_workers = 1 if self.component_cache else Parameters.COMPONENT_WORKERS
+                scheduler = ComponentScheduler(self.game.components, max_workers=max_workers)
+                yield from scheduler.run(
+                    lambda component_cls: self._create_and_run_component(component_cls, session_id)
+                )
 
                 elapsed = perf_counter() - generation_start
                 self.logger.info("Map generation completed in %.2f seconds.", elapsed)
                 self._update_main_settings({"completed": True})
             finally:
+                self._sort_components()
+                self.context.rasters.clear()
+                self.context.osm_features.clear()
                 self._save_metrics(session_id)
 
         if self.i3d_settings.self_clear:
@@ -291,6 +310,8 @@ class Map:
                 )
                 return component
             finally:
+                # The files of a standalone run are expected on disk when it returns.
+                self.context.rasters.flush()
                 self._save_metrics(session_id, send_statistics=False)
 
     def run_preprocessor(self) -> Component:
@@ -309,6 +330,25 @@ class Map:
         """
         return self.run_component(DEM)
 
+    def _create_and_run_component(self, component_cls: type[Component], session_id: str) -> None:
+        """Instantiate, register and process a component. Called by the component scheduler,
+        possibly from a worker thread, so the performance session is re-entered here.
+
+        Arguments:
+            component_cls (type[Component]): Component class to instantiate and run.
+            session_id (str): ID of the generation performance session.
+        """
+        with performance_session(session_id):
+            component = component_cls(self.game, self)
+            self._register_component(component)
+            self._run_component(component)
+
+    def _sort_components(self) -> None:
+        """Restore the game order of the registered components after a concurrent run."""
+        order = {component_cls: index for index, component_cls in enumerate(self.game.components)}
+        with self._lock:
+            self.components.sort(key=lambda component: order.get(component.__class__, len(order)))
+
     def _register_component(self, component: Component) -> None:
         """Store the latest instance of a component class on the map.
 
@@ -317,11 +357,12 @@ class Map:
 
         Re-running a component should replace the previous instance instead of creating duplicates.
         """
-        for index, existing_component in enumerate(self.components):
-            if existing_component.__class__ is component.__class__:
-                self.components[index] = component
-                return
-        self.components.append(component)
+        with self._lock:
+            for index, existing_component in enumerate(self.components):
+                if existing_component.__class__ is component.__class__:
+                    self.components[index] = component
+                    return
+            self.components.append(component)
 
     def _run_component(self, component: Component) -> None:
         """Process a single component and commit its generation info.
@@ -335,12 +376,23 @@ class Map:
         name = component.__class__.__name__
         self.logger.debug("Processing component: %s", name)
         try:
+            cache = self.component_cache
+            if cache is not None and cache.restore(component):
+                return
+            snapshot = cache.snapshot() if cache is not None else None
+
             start = perf_counter()
             component.process()
             self.logger.debug(
                 "Component %s processed in %.2f seconds.", name, perf_counter() - start
             )
             component.commit_generation_info()
+
+            if cache is not None and snapshot is not None:
+                # Rasters stay in memory until the generation is finished, the cache collects
+                # the results of the component from the map directory.
+                self.context.rasters.flush(component.written_rasters)
+                cache.store(component, snapshot)
         except Exception as e:
             self.logger.error("Error processing component %s: %s", name, e)
             self._update_main_settings({"error": f"{name} error: {repr(e)}"})
@@ -366,12 +418,15 @@ class Map:
 
         try:
             session_json = PerformanceMonitor().pop_session_json(session_id)
+            images_json = PerformanceMonitor().pop_session_images(session_id)
             if session_json:
+                # Image I/O by artifact is only kept in the local report.
+                report = {**session_json, "images": images_json} if images_json else session_json
                 report_filename = "performance_report.json"
                 with open(
                     os.path.join(self.map_directory, report_filename), "w", encoding="utf-8"
                 ) as file:
-                    json.dump(session_json, file, indent=4)
+                    json.dump(report, file, indent=4)
                 _stats.send_performance_report(session_json)
         except Exception as e:
             self.logger.error("Error saving performance report to JSON: %s", e)
@@ -412,16 +467,17 @@ class Map:
         Arguments:
             data (dict[str, Any]): Data to update main settings.
         """
-        if os.path.exists(self.main_settings_path):
-            with open(self.main_settings_path, "r", encoding="utf-8") as file:
-                main_settings_json = json.load(file)
+        with self._lock:
+            if os.path.exists(self.main_settings_path):
+                with open(self.main_settings_path, "r", encoding="utf-8") as file:
+                    main_settings_json = json.load(file)
 
-            main_settings_json.update(data)
-        else:
-            main_settings_json = data
+                main_settings_json.update(data)
+            else:
+                main_settings_json = data
 
-        with open(self.main_settings_path, "w", encoding="utf-8") as file:
-            json.dump(main_settings_json, file, indent=4)
+            with open(self.main_settings_path, "w", encoding="utf-8") as file:
+                json.dump(main_settings_json, file, indent=4)
 
     def get_component(self, component_name: str) -> Component | None:
         """Get component by name.
@@ -438,21 +494,30 @@ class Map:
         return None
 
     def previews(self) -> list[str]:
-        """Get list of preview images.
+        """Get list of preview images. Previews are rendered on demand by the components in
+        parallel, previews whose sources did not change since they were rendered are reused.
 
         Returns:
             list[str]: List of preview images.
         """
+        # Previews are rendered from the files, pending rasters must be on disk.
+        self.context.rasters.flush()
+        with ThreadPoolExecutor(max_workers=Parameters.PREVIEW_WORKERS) as executor:
+            futures = [
+                (component, executor.submit(component.previews)) for component in self.components
+            ]
+
         previews = []
-        for component in self.components:
+        for component, future in futures:
             try:
-                previews.extend(component.previews())
+                previews.extend(future.result())
             except Exception as e:
                 self.logger.error(
                     "Error getting previews for component %s: %s",
                     component.__class__.__name__,
                     e,
                 )
+        self.preview_cache.clear()
         return previews
 
     def pack(self, archive_path: str, remove_source: bool = True) -> str:
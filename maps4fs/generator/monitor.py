@@ -171,12 +171,35 @@ def performance_session(session_id: str | None = None) -> Generator[str, None, N
     if session_id is None:
         session_id = str(uuid.uuid4())
 
+    # Sessions are re-entered by the component scheduler, the outer one must survive.
+    previous_session = get_current_session()
     _local.current_session = session_id
 
     try:
         yield session_id
     finally:
-        _local.current_session = None
+        _local.current_session = previous_session
+
+
+def run_in_session(
+    session_id: str | None, func: Callable[P, R], *args: P.args, **kwargs: P.kwargs
+) -> R:
+    """Run the function in the performance session. Worker threads don't inherit the session
+    of the thread which submitted the work, so pools pass it explicitly.
+
+    Arguments:
+        session_id (str | None): Session ID, the function runs without a session if None.
+        func (Callable[P, R]): Function to run.
+        *args (P.args): Positional arguments of the function.
+        **kwargs (P.kwargs): Keyword arguments of the function.
+
+    Returns:
+        R: Result of the function.
+    """
+    if session_id is None:
+        return func(*args, **kwargs)
+    with performance_session(session_id):
+        return func(*args, **kwargs)
 
 
 class PerformanceMonitor(metaclass=Singleton):
@@ -186,6 +209,10 @@ class PerformanceMonitor(metaclass=Singleton):
         self.sessions: dict[str, dict[str, dict[str, float]]] = defaultdict(
             lambda: defaultdict(lambda: defaultdict(float))
         )
+        self.images: dict[str, dict[str, dict[str, float]]] = defaultdict(
+            lambda: defaultdict(lambda: defaultdict(float))
+        )
+        self._lock = threading.Lock()
 
     def add_record(self, session: str, component: str, function: str, time_taken: float) -> None:
         """Add a performance record.
@@ -196,7 +223,38 @@ class PerformanceMonitor(metaclass=Singleton):
             function (str): The function/method name.
             time_taken (float): Time taken in seconds.
         """
-        self.sessions[session][component][function] += time_taken
+        with self._lock:
+            self.sessions[session][component][function] += time_taken
+
+    def add_image_record(
+        self, session: str, artifact: str, operation: str, size: int, time_taken: float
+    ) -> None:
+        """Add an image I/O record.
+
+        Arguments:
+            session (str): The session name.
+            artifact (str): The image file name.
+            operation (str): The operation, "read" or "write".
+            size (int): Size of the file in bytes.
+            time_taken (float): Time taken in seconds.
+        """
+        with self._lock:
+            record = self.images[session][artifact]
+            record[f"{operation}s"] += 1
+            record[f"{operation}_bytes"] += size
+            record[f"{operation}_time"] += time_taken
+
+    def pop_session_images(self, session: str) -> dict[str, dict[str, float]]:
+        """Pop image I/O data for a session in JSON-serializable format.
+
+        Arguments:
+            session (str): The session name.
+
+        Returns:
+            dict[str, dict[str, float]]: Reads and writes, bytes and seconds by image file name.
+        """
+        with self._lock:
+            return self.images.pop(session, {})
 
     def pop_session_json(self, session: str) -> dict[str, dict[str, float]]:
         """Pop performance data for a session in JSON-serializable format.
@@ -207,7 +265,8 @@ class PerformanceMonitor(metaclass=Singleton):
         Returns:
             dict[str, dict[str, float]]: Performance data.
         """
-        return self.sessions.pop(session, {})
+        with self._lock:
+            return self.sessions.pop(session, {})
 
 
 def monitor_performance(func: Callable[P, R]) -> Callable[P, R]:
@@ -2,32 +2,56 @@
 
 from __future__ import annotations
 
+import base64
 import gzip
+import hashlib
+import http.client
+import json
 import math
 import os
 import shutil
+import threading
+import time
+import uuid
+from array import array
+from collections.abc import Iterator, Mapping
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from contextlib import contextmanager
 from copy import deepcopy
-from dataclasses import dataclass
-from typing import TypeAlias
-from urllib.error import HTTPError, URLError
-from urllib.parse import urlencode
-from urllib.request import Request, urlopen
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import BinaryIO, Iterable, TypeAlias
+from urllib.parse import unquote, urlencode, urljoin, urlsplit
+from urllib.request import getproxies, proxy_bypass
 from xml.etree import ElementTree as ET
+from xml.parsers import expat
 
+import numpy as np
 import osmnx as ox
 from osmnx._errors import InsufficientResponseError
 from pyproj import Transformer
+from shapely import STRtree, from_wkb, to_wkb
 from shapely.geometry import (
     GeometryCollection,
     LineString,
     MultiPolygon,
     Point,
     Polygon,
+    box,
 )
 from shapely.geometry.base import BaseGeometry
 from shapely.ops import polygonize, transform, unary_union
 from shapely.validation import make_valid
 
+from maps4fs.generator.constants import Parameters, Paths
+from maps4fs.generator.monitor import get_current_session, run_in_session
+
 # Representative tags — if the file is fundamentally broken it will fail on any of these.
 OSMTagValue: TypeAlias = bool | str | list[str]
 OSMTagFilter: TypeAlias = dict[str, OSMTagValue]
@@ -68,9 +92,25 @@ _POINT_HOLE_RADII: dict[tuple[str, str], float] = {
 _OSM_API_MAP_URL = "https://api.openstreetmap.org/api/0.6/map"
 _OSM_TILE_MAX_DEPTH = 10
 _OSM_TILE_MIN_SPAN = 1e-6
+# Pre-split tile area in km2, small enough to stay under the API node limit in most areas. It is
+# about the area of a 0.05 degree square at the equator.
+_OSM_TILE_AREA = 31.0
+# Side of the tile cache cells in degrees. The grid is fixed so that cells are reused.
+_OSM_TILE_SPAN = 0.05
+_KM_PER_DEGREE_LAT = 110.57
+_KM_PER_DEGREE_LON = 111.32
+_OSM_DOWNLOAD_WORKERS = 4
+_OSM_DOWNLOAD_RETRIES = 3
+_OSM_DOWNLOAD_BACKOFF = 1.0
+_OSM_RETRY_STATUSES = {429, 500, 502, 503, 504}
+_OSM_REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+_OSM_MAX_REDIRECTS = 5
 _M4FS_OVERLAY_TAG_KEY = "m4fs:overlay"
 _M4FS_OVERLAY_TAG_VALUE = "bounds"
 _M4FS_BOUNDS_KIND_TAG_KEY = "m4fs:bounds"
+_OSM_PRIMITIVES = ("node", "way", "relation")
+# Elements serialized at once when the OSM data is written.
+_OSM_WRITE_BATCH_SIZE = 4096
 
 
 class _OSMTooManyNodesError(RuntimeError):
@@ -79,10 +119,12 @@ class _OSMTooManyNodesError(RuntimeError):
 
 @dataclass
 class _WayData:
-    """Internal representation of an OSM way."""
+    """Internal representation of an OSM way.
+    Node refs of loaded ways are views into the CSR arrays of _OSMData.
+    """
 
-    element: ET.Element
-    node_refs: list[int]
+    id: int
+    node_refs: np.ndarray
     tags: dict[str, str]
 
 
@@ -90,7 +132,7 @@ class _WayData:
 class _RelationData:
     """Internal representation of an OSM relation."""
 
-    element: ET.Element
+    id: int
     members: list[tuple[str, int, str]]
     tags: dict[str, str]
 
@@ -132,6 +174,316 @@ class _ProcessedPolygonData:
     tags: dict[str, str]
 
 
+class _NodeStore(Mapping[int, tuple[float, float]]):
+    """Node coordinates kept in NumPy arrays sorted by node id.
+
+    Behaves like a read-only ``dict[int, tuple[float, float]]`` of ``(longitude, latitude)``
+    pairs with binary-search lookups. The vectorized ``resolve()`` and ``coordinates()``
+    helpers look up all node refs of a way at once.
+
+    Arguments:
+        ids (np.ndarray): Sorted unique node ids.
+        lonlat (np.ndarray): ``(longitude, latitude)`` rows matching ``ids``.
+    """
+
+    def __init__(self, ids: np.ndarray, lonlat: np.ndarray) -> None:
+        self.ids = ids
+        self.lonlat = lonlat
+
+    @classmethod
+    def from_records(cls, ids: np.ndarray, lonlat: np.ndarray) -> _NodeStore:
+        """Build the store from node records in file order.
+        Duplicated ids keep the last record, the same as a dict filled in file order.
+
+        Arguments:
+            ids (np.ndarray): Node ids in file order.
+            lonlat (np.ndarray): ``(longitude, latitude)`` rows matching ``ids``.
+
+        Returns:
+            _NodeStore: Node store.
+        """
+        order = np.argsort(ids, kind="stable")
+        sorted_ids = ids[order]
+        last = np.ones(len(sorted_ids), dtype=bool)
+        last[:-1] = sorted_ids[1:] != sorted_ids[:-1]
+        return cls(sorted_ids[last], lonlat.reshape(-1, 2)[order[last]])
+
+    def positions(self, node_ids: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Return store positions of the node ids and a mask of ids present in the store.
+
+        Arguments:
+            node_ids (np.ndarray): Node ids to look up.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Positions (valid only where found) and found mask.
+        """
+        node_ids = np.asarray(node_ids, dtype=np.int64)
+        if len(self.ids) == 0:
+            return np.zeros(len(node_ids), dtype=np.int64), np.zeros(len(node_ids), dtype=bool)
+        positions = np.minimum(np.searchsorted(self.ids, node_ids), len(self.ids) - 1)
+        return positions, self.ids[positions] == node_ids
+
+    def resolve(self, node_refs: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Return the referenced node ids present in the store and their coordinates.
+
+        Arguments:
+            node_refs (np.ndarray): Node ids, e.g. way node refs.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Present node ids in the original order and
+                ``(longitude, latitude)`` rows for them.
+        """
+        node_refs = np.asarray(node_refs, dtype=np.int64)
+        positions, found = self.positions(node_refs)
+        return node_refs[found], self.lonlat[positions[found]]
+
+    def coordinates(self, node_refs: np.ndarray) -> list[tuple[float, float]]:
+        """Return coordinates of the referenced nodes present in the store.
+
+        Arguments:
+            node_refs (np.ndarray): Node ids, e.g. way node refs.
+
+        Returns:
+            list[tuple[float, float]]: ``(longitude, latitude)`` pairs in the original order.
+        """
+        _, lonlat = self.resolve(node_refs)
+        return list(map(tuple, lonlat.tolist()))
+
+    def _position(self, node_id: object) -> int:
+        """Return the store position of one node id or -1 if it is missing."""
+        if not isinstance(node_id, (int, np.integer)):
+            return -1
+        position = int(np.searchsorted(self.ids, node_id))
+        if position < len(self.ids) and self.ids[position] == node_id:
+            return position
+        return -1
+
+    def __getitem__(self, node_id: int) -> tuple[float, float]:
+        position = self._position(node_id)
+        if position < 0:
+            raise KeyError(node_id)
+        longitude, latitude = self.lonlat[position].tolist()
+        return longitude, latitude
+
+    def __contains__(self, node_id: object) -> bool:
+        return self._position(node_id) >= 0
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.ids.tolist())
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+@dataclass
+class _OSMData:
+    """Compact index of an OSM XML file and the edits pending for it.
+
+    Only the index is kept in memory: node coordinates in a _NodeStore, way node refs in
+    CSR arrays (row ``i`` is ``way_refs[way_offsets[i]:way_offsets[i + 1]]``) and tags of
+    tagged primitives. The XML itself is streamed again from ``source_path`` when the result
+    is written, skipping removed primitives and adding the appended ones at the end. Appended
+    nodes are the bulk of the new primitives, so they're kept as arrays of ids and coordinates,
+    appended ways and relations as elements. Removed ways and relations are dropped from
+    ``ways`` and ``relations``, so these always describe the current state. Appended
+    primitives supersede earlier ones with the same id.
+    """
+
+    source_path: str
+    nodes: _NodeStore
+    node_record_ids: np.ndarray
+    node_tags: dict[int, dict[str, str]]
+    way_ids: np.ndarray
+    way_offsets: np.ndarray
+    way_refs: np.ndarray
+    ways: dict[int, _WayData]
+    relations: dict[int, _RelationData]
+    removed_nodes: np.ndarray
+    removed_ways: set[int] = field(default_factory=set)
+    removed_relations: set[int] = field(default_factory=set)
+    appended_node_ids: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int64))
+    appended_node_lonlat: np.ndarray = field(
+        default_factory=lambda: np.zeros((0, 2), dtype=np.float64)
+    )
+    appended: list[ET.Element] = field(default_factory=list)
+    appended_ids: dict[str, set[int]] = field(
+        default_factory=lambda: {"way": set(), "relation": set()}
+    )
+
+
+class _GeometryCache:
+    """Geometry built from indexed OSM primitives, shared between preprocessing passes.
+
+    Entries are validated by the identity of the source primitives, so primitives replaced
+    or removed by an earlier pass are rebuilt instead of being served from the cache.
+    """
+
+    def __init__(self) -> None:
+        self._way_polygons: dict[int, tuple[_WayData, Polygon | None]] = {}
+        self._relation_polygons: dict[
+            int,
+            tuple[_RelationData, tuple[_WayData | None, ...], tuple[list[Polygon], set[int]]],
+        ] = {}
+        self._splitters: dict[
+            tuple[str, int], tuple[_WayData, tuple[list[int], LineString] | None]
+        ] = {}
+
+    def way_polygon(self, way: _WayData, nodes: _NodeStore) -> Polygon | None:
+        """Return the cached result of _way_to_polygon()."""
+        entry = self._way_polygons.get(way.id)
+        if entry is None or entry[0] is not way:
+            entry = (way, _way_to_polygon(way, nodes))
+            self._way_polygons[way.id] = entry
+        return entry[1]
+
+    def relation_polygons(
+        self,
+        relation: _RelationData,
+        ways: dict[int, _WayData],
+        nodes: _NodeStore,
+    ) -> tuple[list[Polygon], set[int]]:
+        """Return the cached result of _relation_to_polygons(), the polygon list must not be
+        modified by the caller."""
+        member_ways = tuple(
+            ways.get(member_ref)
+            for member_type, member_ref, _ in relation.members
+            if member_type == "way"
+        )
+        entry = self._relation_polygons.get(relation.id)
+        if (
+            entry is None
+            or entry[0] is not relation
+            or len(entry[1]) != len(member_ways)
+            or any(cached is not way for cached, way in zip(entry[1], member_ways))
+        ):
+            entry = (relation, member_ways, _relation_to_polygons(relation, ways, nodes))
+            self._relation_polygons[relation.id] = entry
+        return entry[2]
+
+    def splitter_line(
+        self,
+        way: _WayData,
+        nodes: _NodeStore,
+        exclude_cut_tags: dict[str, OSMTagValue] | None,
+    ) -> tuple[list[int], LineString] | None:
+        """Return available node refs and the line of a way which may cut target polygons.
+
+        Arguments:
+            way (_WayData): Parsed OSM way.
+            nodes (_NodeStore): Node coordinate mapping.
+            exclude_cut_tags (dict[str, OSMTagValue] | None): Optional tag filter
+                for linear features that must not cut polygons.
+
+        Returns:
+            tuple[list[int], LineString] | None: Node refs with known coordinates and the
+                line geometry, or None when the way is not a splitter.
+        """
+        key = (json.dumps(exclude_cut_tags, sort_keys=True), way.id)
+        entry = self._splitters.get(key)
+        if entry is None or entry[0] is not way:
+            entry = (way, _splitter_line(way, nodes, exclude_cut_tags))
+            self._splitters[key] = entry
+        return entry[1]
+
+
+class _CutFeatureIndex:
+    """Spatial index of the features which may cut or carve the target polygon groups.
+
+    Splitters, area holes and point holes are indexed once in STRtrees and queried per group
+    by envelope. Area holes also include the target polygons themselves, each labelled with
+    the merge key of its group, so one group can be carved by the other groups without
+    rebuilding the hole list. Projected geometry is cached per local UTM zone, so a feature
+    shared by many groups is only transformed once.
+    """
+
+    def __init__(
+        self,
+        splitter_lines: list[_SplitterData],
+        area_polygons: list[Polygon],
+        area_owners: list[tuple[tuple[str, str], ...] | None],
+        point_holes: list[_PointHoleData],
+    ) -> None:
+        self.splitter_lines = splitter_lines
+        self.area_polygons = area_polygons
+        self.area_owners = area_owners
+        self.point_holes = point_holes
+        self._splitter_tree = _build_strtree([splitter.geometry for splitter in splitter_lines])
+        self._area_tree = _build_strtree(area_polygons)
+        self._point_hole_tree = _build_strtree([point_hole.geometry for point_hole in point_holes])
+        self._projected_splitters: dict[tuple[int, int], BaseGeometry] = {}
+        self._projected_areas: dict[tuple[int, int], list[Polygon]] = {}
+        self._projected_point_holes: dict[tuple[int, int], BaseGeometry] = {}
+
+    def query_splitters(self, bounds: tuple[float, float, float, float]) -> list[int]:
+        """Return indices of splitters whose envelope intersects the bounds."""
+        return _query_strtree(self._splitter_tree, bounds)
+
+    def query_areas(
+        self,
+        bounds: tuple[float, float, float, float],
+        merge_key: tuple[tuple[str, str], ...],
+    ) -> list[int]:
+        """Return indices of area holes intersecting the bounds, excluding the polygons that
+        belong to the group with the given merge key."""
+        return [
+            index
+            for index in _query_strtree(self._area_tree, bounds)
+            if self.area_owners[index] != merge_key
+        ]
+
+    def query_point_holes(self, bounds: tuple[float, float, float, float]) -> list[int]:
+        """Return indices of point holes whose envelope intersects the bounds."""
+        return _query_strtree(self._point_hole_tree, bounds)
+
+    def projected_splitter(self, index: int, epsg_code: int) -> BaseGeometry:
+        """Return the splitter line projected to the given UTM zone."""
+        key = (epsg_code, index)
+        if key not in self._projected_splitters:
+            forward, _ = _local_transformers(epsg_code)
+            self._projected_splitters[key] = make_valid(
+                _transform_geometry(self.splitter_lines[index].geometry, forward)
+            )
+        return self._projected_splitters[key]
+
+    def projected_area(self, index: int, epsg_code: int) -> list[Polygon]:
+        """Return the area polygon projected to the given UTM zone, the list must not be
+        modified by the caller."""
+        key = (epsg_code, index)
+        if key not in self._projected_areas:
+            forward, _ = _local_transformers(epsg_code)
+            self._projected_areas[key] = _transform_polygons([self.area_polygons[index]], forward)
+        return self._projected_areas[key]
+
+    def projected_point_hole(self, index: int, epsg_code: int) -> BaseGeometry:
+        """Return the buffered point hole projected to the given UTM zone, empty geometry
+        means the point hole carves nothing."""
+        key = (epsg_code, index)
+        if key not in self._projected_point_holes:
+            forward, _ = _local_transformers(epsg_code)
+            point_hole = self.point_holes[index]
+            projected_point = _transform_geometry(point_hole.geometry, forward)
+            self._projected_point_holes[key] = (
+                projected_point
+                if projected_point.is_empty
+                else projected_point.buffer(point_hole.radius)
+            )
+        return self._projected_point_holes[key]
+
+
+def _build_strtree(geometries: list[BaseGeometry]) -> STRtree | None:
+    """Return an STRtree over the geometries, or None when there is nothing to index."""
+    return STRtree(geometries) if geometries else None
+
+
+def _query_strtree(tree: STRtree | None, bounds: tuple[float, float, float, float]) -> list[int]:
+    """Return sorted indices of the geometries whose envelope intersects the bounds.
+    Sorting keeps the original feature order, so the output does not depend on the tree layout.
+    """
+    if tree is None:
+        return []
+    return sorted(int(index) for index in tree.query(box(*bounds)))
+
+
 def check_osm_file(file_path: str) -> bool:
     """Try to parse the OSM file with OSMnx using representative tag queries.
 
@@ -232,12 +584,19 @@ def download_osm_map_by_bbox(
     *,
     timeout: int,
     user_agent: str = "maps4fs OSM downloader",
+    api_url: str = _OSM_API_MAP_URL,
+    workers: int = _OSM_DOWNLOAD_WORKERS,
+    cache_directory: str | None = Paths.OSM_TILES_CACHE_DIR,
 ) -> str:
     """Download raw OSM XML for a bounding box via the main OSM API.
 
-    When the API rejects one large bbox because it exceeds the per-request node limit, the bbox
-    is split recursively into smaller tiles and the resulting XML payloads are merged into one
-    output file.
+    The bbox is split upfront into a grid of tiles which are downloaded concurrently over
+    keep-alive connections and merged into one output file. When the API still rejects a tile
+    because it exceeds the per-request node limit, that tile is split recursively.
+
+    With a cache directory the tiles come from a fixed geographic grid and are kept on disk,
+    so overlapping requests only download the tiles which are not cached yet. The merged
+    tiles are clipped to the bbox with the same rules the OSM API uses for one request.
 
     Arguments:
         bbox (tuple[float, float, float, float]): Bounding box in OSMnx order
@@ -245,6 +604,9 @@ def download_osm_map_by_bbox(
         output_file_path (str): Path where the downloaded ``.osm`` file will be written.
         timeout (int): HTTP request timeout in seconds.
         user_agent (str): User-Agent header value.
+        api_url (str): URL of the OSM API map endpoint.
+        workers (int): Maximum number of concurrent tile requests.
+        cache_directory (str | None): Directory of the tile cache, None disables caching.
 
     Returns:
         str: The written file path.
@@ -261,12 +623,19 @@ def download_osm_map_by_bbox(
     if output_directory:
         os.makedirs(output_directory, exist_ok=True)
 
-    root = _download_osm_root_by_bbox(
-        bbox,
+    downloader = _OSMTileDownloader(
+        api_url,
         timeout=timeout,
         user_agent=user_agent,
-        depth=0,
+        workers=workers,
     )
+    try:
+        if cache_directory is None:
+            root = downloader.download(bbox)
+        else:
+            root = _OSMTileCache(cache_directory, api_url).download(bbox, downloader)
+    finally:
+        downloader.close()
 
     tree = ET.ElementTree(root)
     tree.write(output_file_path, encoding="utf-8", xml_declaration=True)
@@ -275,77 +644,534 @@ def download_osm_map_by_bbox(
     return output_file_path
 
 
-def _download_osm_root_by_bbox(
-    bbox: tuple[float, float, float, float],
-    *,
-    timeout: int,
-    user_agent: str,
-    depth: int,
-) -> ET.Element:
-    """Download one bbox or recursively merge smaller bbox downloads."""
-    try:
-        payload = _download_osm_payload_by_bbox(
-            bbox,
-            timeout=timeout,
-            user_agent=user_agent,
+class _OSMConnectionPool:
+    """Keep-alive HTTP connections to one host, shared between download threads.
+
+    The proxies of the environment are honored like urllib does: plain HTTP requests are sent
+    to the proxy with the absolute URL, HTTPS requests are tunneled through it with CONNECT.
+    """
+
+    def __init__(self, url: str, timeout: int) -> None:
+        parts = urlsplit(url)
+        self._connection_class = (
+            http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
         )
-    except _OSMTooManyNodesError as exc:
-        if depth >= _OSM_TILE_MAX_DEPTH or not _can_split_bbox(bbox):
-            raise RuntimeError(
-                "Failed to download OSM data: bbox exceeds the OSM API node limit even after "
-                f"subdivision ({bbox!r})."
-            ) from exc
-
-        child_roots = [
-            _download_osm_root_by_bbox(
-                child_bbox,
-                timeout=timeout,
-                user_agent=user_agent,
-                depth=depth + 1,
-            )
-            for child_bbox in _split_bbox(bbox)
+        self._host = parts.netloc
+        self._tunnel: tuple[str, dict[str, str]] | None = None
+        self._absolute_targets = False
+        self._timeout = timeout
+        self.headers: dict[str, str] = {}
+
+        proxy = _environment_proxy(parts.scheme, parts.hostname or "")
+        if proxy is not None:
+            proxy_parts = urlsplit(proxy if "://" in proxy else f"http://{proxy}")
+            proxy_headers = {}
+            if proxy_parts.username is not None:
+                credentials = (
+                    f"{unquote(proxy_parts.username)}:{unquote(proxy_parts.password or '')}"
+                )
+                token = base64.b64encode(credentials.encode("utf-8")).decode("ascii")
+                proxy_headers["Proxy-Authorization"] = f"Basic {token}"
+            self._host = proxy_parts.netloc.rpartition("@")[2]
+            if parts.scheme == "https":
+                self._tunnel = (parts.netloc, proxy_headers)
+            else:
+                self._absolute_targets = True
+                self.headers = proxy_headers
+
+        self._idle: list[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+
+    def target(self, url: str) -> str:
+        """Return the request target of the URL, which is the absolute URL for a proxy."""
+        if self._absolute_targets:
+            return url
+        parts = urlsplit(url)
+        return f"{parts.path or '/'}?{parts.query}" if parts.query else parts.path or "/"
+
+    @contextmanager
+    def connection(self) -> Iterator[http.client.HTTPConnection]:
+        """Borrow an idle connection or open a new one. Connections which failed are closed
+        instead of being returned to the pool."""
+        with self._lock:
+            connection = self._idle.pop() if self._idle else None
+        if connection is None:
+            connection = self._connection_class(self._host, timeout=self._timeout)
+            if self._tunnel is not None:
+                connection.set_tunnel(self._tunnel[0], headers=self._tunnel[1])
+        try:
+            yield connection
+        except BaseException:
+            connection.close()
+            raise
+        with self._lock:
+            self._idle.append(connection)
+
+    def close(self) -> None:
+        """Close all idle connections."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+
+def _environment_proxy(scheme: str, hostname: str) -> str | None:
+    """Return the proxy URL configured for the scheme, None without one or for bypassed hosts."""
+    proxy = getproxies().get(scheme)
+    if not proxy or proxy_bypass(hostname):
+        return None
+    return proxy
+
+
+class _OSMTileDownloader:
+    """Concurrent OSM API downloader over a pre-split tile grid.
+
+    Tiles are requested with bounded concurrency, transient failures (connection errors,
+    rate limiting and server errors) are retried with exponential backoff, and tiles rejected
+    for exceeding the node limit are split further. The result does not depend on the order
+    in which the requests complete.
+    """
+
+    def __init__(
+        self,
+        api_url: str,
+        *,
+        timeout: int,
+        user_agent: str,
+        workers: int = _OSM_DOWNLOAD_WORKERS,
+        retries: int = _OSM_DOWNLOAD_RETRIES,
+        backoff: float = _OSM_DOWNLOAD_BACKOFF,
+    ) -> None:
+        self.api_url = api_url
+        self.timeout = timeout
+        self.user_agent = user_agent
+        self.workers = max(1, workers)
+        self.retries = max(0, retries)
+        self.backoff = backoff
+        self._pools: dict[tuple[str, str], _OSMConnectionPool] = {}
+        self._pools_lock = threading.Lock()
+
+    def close(self) -> None:
+        """Close the pooled connections."""
+        with self._pools_lock:
+            pools, self._pools = list(self._pools.values()), {}
+        for pool in pools:
+            pool.close()
+
+    def _pool(self, url: str) -> _OSMConnectionPool:
+        """Return the connection pool for the scheme and host of the URL."""
+        parts = urlsplit(url)
+        with self._pools_lock:
+            pool = self._pools.get((parts.scheme, parts.netloc))
+            if pool is None:
+                pool = _OSMConnectionPool(url, self.timeout)
+                self._pools[(parts.scheme, parts.netloc)] = pool
+            return pool
+
+    def _get(self, url: str, headers: dict[str, str]) -> tuple[http.client.HTTPResponse, bytes]:
+        """Send a GET request and follow redirects.
+
+        Returns:
+            tuple[http.client.HTTPResponse, bytes]: The final response and its payload.
+
+        Raises:
+            RuntimeError: If the redirect limit is exceeded.
+        """
+        for _ in range(_OSM_MAX_REDIRECTS + 1):
+            pool = self._pool(url)
+            with pool.connection() as connection:
+                connection.request("GET", pool.target(url), headers=headers | pool.headers)
+                response = connection.getresponse()
+                payload = response.read()
+                if response.will_close:
+                    connection.close()
+            location = response.getheader("Location")
+            if response.status not in _OSM_REDIRECT_STATUSES or not location:
+                return response, payload
+            url = urljoin(url, location)
+        raise RuntimeError(f"Failed to download OSM data: too many redirects ({url}).")
+
+    def download(self, bbox: tuple[float, float, float, float]) -> ET.Element:
+        """Download the bbox and return one OSM root with deduplicated primitives.
+
+        Arguments:
+            bbox (tuple[float, float, float, float]): Bounding box in OSMnx order
+                ``(left, bottom, right, top)``.
+
+        Returns:
+            ET.Element: The OSM root element.
+        """
+        roots = self.download_tiles(_osm_tile_grid(bbox, *_osm_tile_spans(bbox)))
+        if len(roots) == 1:
+            return roots[0]
+        return _merge_osm_roots(roots, bbox)
+
+    def download_tiles(self, tiles: list[tuple[float, float, float, float]]) -> list[ET.Element]:
+        """Download the tiles concurrently.
+
+        Arguments:
+            tiles (list[tuple[float, float, float, float]]): Tile bboxes in OSMnx order.
+
+        Returns:
+            list[ET.Element]: One OSM root per tile, in the order of the tiles.
+        """
+        if not tiles:
+            return []
+
+        roots: dict[tuple[int, ...], ET.Element] = {}
+        session_id = get_current_session()
+        executor = ThreadPoolExecutor(
+            max_workers=min(self.workers, len(tiles)),
+            thread_name_prefix="maps4fs-osm-download",
+        )
+        try:
+            pending: dict[
+                Future[ET.Element],
+                tuple[tuple[int, ...], tuple[float, float, float, float], int],
+            ] = {
+                executor.submit(run_in_session, session_id, self.fetch, tile): ((index,), tile, 0)
+                for index, tile in enumerate(tiles)
+            }
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key, tile, depth = pending.pop(future)
+                    try:
+                        roots[key] = future.result()
+                    except _OSMTooManyNodesError as exc:
+                        if depth >= _OSM_TILE_MAX_DEPTH or not _can_split_bbox(tile):
+                            raise RuntimeError(
+                                "Failed to download OSM data: bbox exceeds the OSM API node "
+                                f"limit even after subdivision ({tile!r})."
+                            ) from exc
+                        for child_index, child_tile in enumerate(_split_bbox(tile)):
+                            child_future = executor.submit(
+                                run_in_session, session_id, self.fetch, child_tile
+                            )
+                            pending[child_future] = (key + (child_index,), child_tile, depth + 1)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        # Keys sort in tile order with the parts of a split tile in place of the tile.
+        tile_parts: list[list[ET.Element]] = [[] for _ in tiles]
+        for key in sorted(roots):
+            tile_parts[key[0]].append(roots[key])
+        return [
+            parts[0] if len(parts) == 1 else _merge_osm_roots(parts, tile)
+            for tile, parts in zip(tiles, tile_parts)
         ]
-        return _merge_osm_roots(child_roots, bbox)
 
-    return _parse_osm_payload(payload)
+    def fetch(self, bbox: tuple[float, float, float, float]) -> ET.Element:
+        """Download and parse one tile."""
+        return _parse_osm_payload(self.fetch_payload(bbox))
 
+    def fetch_payload(self, bbox: tuple[float, float, float, float]) -> bytes:
+        """Download one raw OSM API bbox payload, retrying transient failures.
 
-def _download_osm_payload_by_bbox(
-    bbox: tuple[float, float, float, float],
-    *,
-    timeout: int,
-    user_agent: str,
-) -> bytes:
-    """Download one raw OSM API bbox payload."""
-    left, bottom, right, top = bbox
-    query = urlencode({"bbox": f"{left:.7f},{bottom:.7f},{right:.7f},{top:.7f}"})
-    request = Request(
-        f"{_OSM_API_MAP_URL}?{query}",
-        headers={
+        Raises:
+            _OSMTooManyNodesError: If the bbox exceeds the API node limit.
+            RuntimeError: If the request fails after all retries.
+        """
+        left, bottom, right, top = bbox
+        query = urlencode({"bbox": f"{left:.7f},{bottom:.7f},{right:.7f},{top:.7f}"})
+        url = f"{self.api_url}?{query}"
+        headers = {
             "Accept": "application/xml",
             "Accept-Encoding": "gzip",
-            "User-Agent": user_agent,
-        },
-    )
+            "User-Agent": self.user_agent,
+        }
 
+        for attempt in range(self.retries + 1):
+            delay = self.backoff * (2**attempt)
+            try:
+                response, payload = self._get(url, headers)
+            except (OSError, http.client.HTTPException) as exc:
+                if attempt < self.retries:
+                    time.sleep(delay)
+                    continue
+                raise RuntimeError(f"Failed to download OSM data: {exc}") from exc
+
+            if response.status == 200:
+                if (response.getheader("Content-Encoding") or "").lower() == "gzip":
+                    payload = gzip.decompress(payload)
+                return payload
+
+            details = payload.decode("utf-8", errors="replace").strip()
+            if response.status == 400 and "too many nodes" in details.lower():
+                raise _OSMTooManyNodesError(details or "Too many nodes in bbox request")
+            if response.status in _OSM_RETRY_STATUSES and attempt < self.retries:
+                time.sleep(_retry_after_seconds(response.getheader("Retry-After"), delay))
+                continue
+
+            message = f"Failed to download OSM data: HTTP {response.status}"
+            if details:
+                message = f"{message}: {details}"
+            raise RuntimeError(message)
+
+        raise RuntimeError("Failed to download OSM data: retries exhausted.")
+
+
+def _retry_after_seconds(header: str | None, default: float) -> float:
+    """Return the delay requested by a Retry-After header in seconds, or the default."""
     try:
-        with urlopen(request, timeout=timeout) as response:
-            payload = response.read()
-            if response.headers.get("Content-Encoding", "").lower() == "gzip":
-                payload = gzip.decompress(payload)
-    except HTTPError as exc:
-        details = exc.read().decode("utf-8", errors="replace").strip()
-        if exc.code == 400 and "too many nodes" in details.lower():
-            raise _OSMTooManyNodesError(details or "Too many nodes in bbox request") from exc
+        return max(0.0, float(header)) if header else default
+    except ValueError:
+        return default
 
-        message = f"Failed to download OSM data: HTTP {exc.code}"
-        if details:
-            message = f"{message}: {details}"
-        raise RuntimeError(message) from exc
-    except URLError as exc:
-        raise RuntimeError(f"Failed to download OSM data: {exc.reason}") from exc
 
-    return payload
+def _osm_tile_spans(bbox: tuple[float, float, float, float]) -> tuple[float, float]:
+    """Return the longitude and latitude span in degrees of square tiles of _OSM_TILE_AREA at
+    the middle latitude of the bbox, so that the number of tiles follows the bbox area.
+
+    Arguments:
+        bbox (tuple[float, float, float, float]): Bounding box in OSMnx order
+            ``(left, bottom, right, top)``.
+
+    Returns:
+        tuple[float, float]: Longitude and latitude span in degrees.
+    """
+    side = math.sqrt(_OSM_TILE_AREA)
+    latitude = math.radians((bbox[1] + bbox[3]) / 2)
+    # Meridians converge towards the poles, the cap keeps the spans finite there.
+    km_per_degree_lon = _KM_PER_DEGREE_LON * max(math.cos(latitude), 0.01)
+    return side / km_per_degree_lon, side / _KM_PER_DEGREE_LAT
+
+
+def _osm_tile_grid(
+    bbox: tuple[float, float, float, float],
+    lon_span: float,
+    lat_span: float,
+) -> list[tuple[float, float, float, float]]:
+    """Split a bbox into a row-major grid of tiles no larger than the spans.
+
+    Arguments:
+        bbox (tuple[float, float, float, float]): Bounding box in OSMnx order
+            ``(left, bottom, right, top)``.
+        lon_span (float): Maximum tile width in degrees.
+        lat_span (float): Maximum tile height in degrees.
+
+    Returns:
+        list[tuple[float, float, float, float]]: Tiles covering the bbox.
+    """
+    left, bottom, right, top = bbox
+    columns = max(1, math.ceil((right - left) / lon_span))
+    rows = max(1, math.ceil((top - bottom) / lat_span))
+    xs = [left + (right - left) * column / columns for column in range(columns)] + [right]
+    ys = [bottom + (top - bottom) * row / rows for row in range(rows)] + [top]
+    return [
+        (xs[column], ys[row], xs[column + 1], ys[row + 1])
+        for row in range(rows)
+        for column in range(columns)
+    ]
+
+
+class _OSMTileCache:
+    """Disk cache of OSM API downloads on a fixed geographic tile grid.
+
+    Every cell of the grid is stored as one gzip-compressed OSM file. Cells older than the TTL
+    are downloaded again, and when the cache grows over its size limit the least recently used
+    cells are evicted. Cells of different API endpoints are kept apart.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        api_url: str,
+        *,
+        ttl: float = Parameters.OSM_TILE_CACHE_TTL,
+        max_bytes: int = Parameters.OSM_TILE_CACHE_MAX_BYTES,
+        tile_span: float = _OSM_TILE_SPAN,
+    ) -> None:
+        endpoint_key = hashlib.sha256(f"{api_url}|{tile_span}".encode("utf-8")).hexdigest()
+        self.directory = os.path.join(directory, endpoint_key[:16])
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.tile_span = tile_span
+        os.makedirs(self.directory, exist_ok=True)
+
+    def download(
+        self,
+        bbox: tuple[float, float, float, float],
+        downloader: _OSMTileDownloader,
+    ) -> ET.Element:
+        """Assemble the bbox from cached cells, downloading only the missing ones.
+
+        Arguments:
+            bbox (tuple[float, float, float, float]): Bounding box in OSMnx order
+                ``(left, bottom, right, top)``.
+            downloader (_OSMTileDownloader): Downloader for the missing cells.
+
+        Returns:
+            ET.Element: The OSM root element clipped to the bbox.
+        """
+        cells = _osm_cache_cells(bbox, self.tile_span)
+        cached = {cell: self.get(cell) for cell in cells}
+        roots = {cell: root for cell, root in cached.items() if root is not None}
+        missing = [cell for cell in cells if cell not in roots]
+        if missing:
+            downloaded = downloader.download_tiles([self.cell_bbox(cell) for cell in missing])
+            for cell, root in zip(missing, downloaded):
+                self.put(cell, root)
+                roots[cell] = root
+            self.evict()
+
+        merged = _merge_osm_roots([roots[cell] for cell in cells], bbox)
+        return _clip_osm_root(merged, bbox)
+
+    def cell_bbox(self, cell: tuple[int, int]) -> tuple[float, float, float, float]:
+        """Return the bbox of a grid cell in OSMnx order."""
+        column, row = cell
+        left = -180.0 + column * self.tile_span
+        bottom = -90.0 + row * self.tile_span
+        return left, bottom, left + self.tile_span, bottom + self.tile_span
+
+    def cell_path(self, cell: tuple[int, int]) -> str:
+        """Return the path of the cached cell file."""
+        column, row = cell
+        return os.path.join(self.directory, f"{column}_{row}.osm.gz")
+
+    def get(self, cell: tuple[int, int]) -> ET.Element | None:
+        """Return the cached cell or None when it is missing, expired or unreadable."""
+        path = self.cell_path(cell)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+
+        now = time.time()
+        if now - stat.st_mtime > self.ttl:
+            remove_file(path)
+            return None
+        try:
+            with gzip.open(path, "rb") as file:
+                root = _parse_osm_payload(file.read())
+        except (OSError, EOFError, ValueError, ET.ParseError):
+            remove_file(path)
+            return None
+
+        # The access time drives LRU eviction, the modification time drives the TTL.
+        os.utime(path, (now, stat.st_mtime))
+        return root
+
+    def put(self, cell: tuple[int, int], root: ET.Element) -> None:
+        """Store the downloaded cell."""
+        path = self.cell_path(cell)
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with gzip.open(temp_path, "wb") as file:
+                file.write(ET.tostring(root, encoding="utf-8"))
+            os.replace(temp_path, path)
+        finally:
+            remove_file(temp_path)
+
+    def evict(self) -> None:
+        """Remove expired cells and the least recently used ones over the size limit."""
+        now = time.time()
+        entries: list[tuple[float, int, str]] = []
+        for filename in os.listdir(self.directory):
+            if not filename.endswith(".osm.gz"):
+                continue
+            path = os.path.join(self.directory, filename)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if now - stat.st_mtime > self.ttl:
+                remove_file(path)
+                continue
+            entries.append((stat.st_atime, stat.st_size, path))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_bytes:
+                break
+            remove_file(path)
+            total_size -= size
+
+
+def remove_file(path: str) -> None:
+    """Remove a file if it exists."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _osm_cache_cells(
+    bbox: tuple[float, float, float, float],
+    tile_span: float,
+) -> list[tuple[int, int]]:
+    """Return the (column, row) indices of the fixed grid cells covering a bbox, row-major."""
+    left, bottom, right, top = bbox
+    first_column = math.floor((left + 180.0) / tile_span)
+    last_column = max(first_column, math.ceil((right + 180.0) / tile_span) - 1)
+    first_row = math.floor((bottom + 90.0) / tile_span)
+    last_row = max(first_row, math.ceil((top + 90.0) / tile_span) - 1)
+    return [
+        (column, row)
+        for row in range(first_row, last_row + 1)
+        for column in range(first_column, last_column + 1)
+    ]
+
+
+def _clip_osm_root(root: ET.Element, bbox: tuple[float, float, float, float]) -> ET.Element:
+    """Drop primitives the OSM API would not return for the bbox, in place.
+
+    Kept are the nodes inside the bbox, the ways referencing them with all their nodes, the
+    relations referencing those nodes or ways and the relations referencing such relations.
+
+    Arguments:
+        root (ET.Element): OSM root element.
+        bbox (tuple[float, float, float, float]): Bounding box in OSMnx order
+            ``(left, bottom, right, top)``.
+
+    Returns:
+        ET.Element: The same root element.
+    """
+    left, bottom, right, top = bbox
+    inside_nodes: set[str] = set()
+    for node in root.iter("node"):
+        try:
+            lon = float(node.get("lon", ""))
+            lat = float(node.get("lat", ""))
+        except ValueError:
+            continue
+        if left <= lon <= right and bottom <= lat <= top:
+            inside_nodes.add(node.get("id", ""))
+
+    kept_ways: set[str] = set()
+    kept_nodes = set(inside_nodes)
+    for way in root.iter("way"):
+        node_refs = [nd.get("ref") for nd in way.iter("nd")]
+        if any(ref in inside_nodes for ref in node_refs):
+            kept_ways.add(way.get("id", ""))
+            kept_nodes.update(ref for ref in node_refs if ref is not None)
+
+    relations = list(root.iter("relation"))
+    kept_relations: set[str] = set()
+    for relation in relations:
+        for member in relation.iter("member"):
+            member_type, member_ref = member.get("type"), member.get("ref")
+            if (member_type == "node" and member_ref in inside_nodes) or (
+                member_type == "way" and member_ref in kept_ways
+            ):
+                kept_relations.add(relation.get("id", ""))
+                break
+    parent_relations = {
+        relation.get("id", "")
+        for relation in relations
+        if any(
+            member.get("type") == "relation" and member.get("ref") in kept_relations
+            for member in relation.iter("member")
+        )
+    }
+    kept_relations |= parent_relations
+
+    kept_ids = {"node": kept_nodes, "way": kept_ways, "relation": kept_relations}
+    for child in list(root):
+        if child.tag in kept_ids and child.get("id") not in kept_ids[child.tag]:
+            root.remove(child)
+    return root
 
 
 def _parse_osm_payload(payload: bytes) -> ET.Element:
@@ -425,6 +1251,341 @@ def _merge_osm_roots(
     return merged_root
 
 
+class OSMDocument:
+    """OSM XML file loaded once for several in-memory edits.
+
+    The file is indexed with a single streaming pass, preprocess(), prune() and
+    append_bounds_overlays() edit the index, and save() writes the result once. Geometry of
+    splitters, holes and targets is built once and shared between preprocessing passes.
+    The module-level functions with the same names wrap a single edit.
+
+    Arguments:
+        file_path (str): Path to the OSM XML file.
+    """
+
+    def __init__(self, file_path: str) -> None:
+        if not os.path.isfile(file_path):
+            raise FileNotFoundError(f"OSM file {file_path} does not exist.")
+        self.file_path = file_path
+        self._osm_data: _OSMData | None = None
+        self._cache = _GeometryCache()
+        self._ensure_versions = False
+
+    @property
+    def _data(self) -> _OSMData:
+        """Index of the file, loaded on first use and after the file was saved in place."""
+        if self._osm_data is None:
+            self._osm_data = _load_osm_data(self.file_path)
+            self._cache = _GeometryCache()
+        return self._osm_data
+
+    @property
+    def modified(self) -> bool:
+        """Whether the document has edits which are not saved yet."""
+        if self._osm_data is None:
+            return False
+        data = self._osm_data
+        return bool(
+            data.appended_node_ids.size
+            or data.appended
+            or data.removed_ways
+            or data.removed_relations
+            or data.removed_nodes.any()
+        )
+
+    def save(self, output_file_path: str | None = None) -> None:
+        """Write the document with all edits applied.
+
+        Arguments:
+            output_file_path (str | None): Path to save the file. Defaults to overwrite the
+                loaded file.
+        """
+        output_file_path = output_file_path or self.file_path
+        _write_osm_data(self._data, output_file_path, ensure_versions=self._ensure_versions)
+        if os.path.abspath(output_file_path) == os.path.abspath(self.file_path):
+            # The file already contains the edits, further edits start from a fresh index.
+            self._osm_data = None
+            self._ensure_versions = False
+
+    def preprocess(
+        self,
+        tags: OSMTagFilters,
+        process_bbox: tuple[float, float, float, float] | None = None,
+        exclude_cut_tags: dict[str, OSMTagValue] | None = None,
+        smooth_strength: float = 0.3,
+        merge_distance: float = 0.0,
+        split_width: float = 4.0,
+        merge_tags: bool = True,
+        collapse_tags: dict[str, str] | None = None,
+        add_holes: bool = True,
+        shrink_distance: float = 0.75,
+        narrow_connection_width: float = 3.0,
+        min_part_area: float = 40.0,
+        min_part_width: float = 2.0,
+        workers: int = 1,
+    ) -> dict[str, int]:
+        """Preprocess matching OSM polygons in memory. See preprocess() for the description
+        of the steps and the arguments.
+
+        Returns:
+            dict[str, int]: Processing statistics.
+        """
+        target_filters = _normalize_target_filters(tags)
+        data = self._data
+        nodes = data.nodes
+        ways = data.ways
+        relations = data.relations
+        relation_way_usage = _count_relation_way_usage(relations)
+
+        target_way_ids, target_relation_ids, target_member_way_ids, target_polygons = (
+            _collect_target_polygons(
+                tags=target_filters,
+                nodes=nodes,
+                ways=ways,
+                relations=relations,
+                relation_way_usage=relation_way_usage,
+                merge_tags=merge_tags,
+                collapse_tags=collapse_tags,
+                process_bbox=process_bbox,
+                cache=self._cache,
+            )
+        )
+        if not target_polygons:
+            return {
+                "target_input_polygons": 0,
+                "target_output_polygons": 0,
+                "splitter_lines": 0,
+                "hole_polygons": 0,
+                "removed_elements": 0,
+                "created_ways": 0,
+                "created_relations": 0,
+            }
+
+        if add_holes:
+            hole_polygons = _collect_hole_polygons(
+                tags=target_filters,
+                nodes=nodes,
+                ways=ways,
+                relations=relations,
+                excluded_way_ids=target_way_ids | target_member_way_ids,
+                excluded_relation_ids=target_relation_ids,
+                process_bbox=process_bbox,
+                cache=self._cache,
+            )
+            point_holes = _collect_point_holes(
+                node_tags=data.node_tags,
+                tags=target_filters,
+                nodes=nodes,
+                process_bbox=process_bbox,
+            )
+        else:
+            hole_polygons = []
+            point_holes = []
+        splitter_lines = _collect_splitter_lines(
+            nodes=nodes,
+            ways=ways,
+            excluded_way_ids=target_way_ids,
+            exclude_cut_tags=exclude_cut_tags,
+            process_bbox=process_bbox,
+            cache=self._cache,
+        )
+
+        processed_polygons = _preprocess_target_polygon_groups(
+            target_polygons=target_polygons,
+            hole_polygons=hole_polygons,
+            point_holes=point_holes,
+            splitter_lines=splitter_lines,
+            smooth_strength=smooth_strength,
+            merge_distance=merge_distance,
+            split_width=split_width,
+            shrink_distance=shrink_distance,
+            narrow_connection_width=narrow_connection_width,
+            min_part_area=min_part_area,
+            min_part_width=min_part_width,
+            workers=workers,
+        )
+
+        removed_elements = _remove_target_elements(
+            data=data,
+            target_way_ids=target_way_ids | target_member_way_ids,
+            target_relation_ids=target_relation_ids,
+        )
+        created_ways, created_relations = _append_polygons(data=data, polygons=processed_polygons)
+        _remove_orphan_untagged_nodes(data)
+        self._ensure_versions = True
+
+        return {
+            "target_input_polygons": len(target_polygons),
+            "target_output_polygons": len(processed_polygons),
+            "splitter_lines": len(splitter_lines),
+            "hole_polygons": len(hole_polygons) + len(point_holes),
+            "removed_elements": removed_elements,
+            "created_ways": created_ways,
+            "created_relations": created_relations,
+        }
+
+    def prune(
+        self,
+        tags: OSMTagFilters,
+        spatial_filters: (
+            list[tuple[OSMTagFilter, tuple[float, float, float, float] | None]] | None
+        ) = None,
+    ) -> dict[str, int]:
+        """Remove OSM primitives that are not needed by the runtime tag set in memory.
+        See prune_osm_file() for the arguments.
+
+        Returns:
+            dict[str, int]: Pruning statistics.
+        """
+        retain_filters = _normalize_target_filters(tags)
+        retain_rules = spatial_filters or [
+            (target_filter, None) for target_filter in retain_filters
+        ]
+        data = self._data
+        nodes = data.nodes
+        ways = data.ways
+        relations = data.relations
+
+        retained_node_ids: list[np.ndarray] = []
+        retained_way_ids: set[int] = set()
+        retained_relation_ids: set[int] = set()
+        pending_relation_ids: list[int] = []
+
+        retained_node_ids.append(
+            np.asarray(
+                [
+                    node_id
+                    for node_id, node_tags in data.node_tags.items()
+                    if node_tags
+                    and _matches_spatial_rule_set(
+                        node_tags,
+                        (
+                            (coordinate[0], coordinate[1], coordinate[0], coordinate[1])
+                            if (coordinate := nodes.get(node_id)) is not None
+                            else None
+                        ),
+                        retain_rules,
+                    )
+                ],
+                dtype=np.int64,
+            )
+        )
+
+        for way_id, way in ways.items():
+            if way.tags and _matches_spatial_rule_set(
+                way.tags,
+                _way_bounds(way, nodes),
+                retain_rules,
+            ):
+                retained_way_ids.add(way_id)
+
+        for relation_id, relation in relations.items():
+            if relation.tags and _matches_spatial_rule_set(
+                relation.tags,
+                _relation_bounds(relation, ways, relations, nodes),
+                retain_rules,
+            ):
+                retained_relation_ids.add(relation_id)
+                pending_relation_ids.append(relation_id)
+
+        while pending_relation_ids:
+            relation_id = pending_relation_ids.pop()
+            retained_relation = relations.get(relation_id)
+            if retained_relation is None:
+                continue
+
+            member_node_ids: list[int] = []
+            for member_type, member_ref, _ in retained_relation.members:
+                if member_type == "node":
+                    member_node_ids.append(member_ref)
+                elif member_type == "way":
+                    retained_way_ids.add(member_ref)
+                elif member_type == "relation" and member_ref not in retained_relation_ids:
+                    if member_ref in relations:
+                        retained_relation_ids.add(member_ref)
+                        pending_relation_ids.append(member_ref)
+            retained_node_ids.append(np.asarray(member_node_ids, dtype=np.int64))
+
+        retained_node_ids.append(_way_node_refs(data, retained_way_ids))
+
+        elements_before = _count_live_elements(data)
+        _remove_nodes(data, ~np.isin(nodes.ids, np.concatenate(retained_node_ids)))
+        _remove_ways(data, ways.keys() - retained_way_ids)
+        _remove_relations(data, relations.keys() - retained_relation_ids)
+        kept_nodes, kept_ways, kept_relations = _count_live_elements(data)
+        removed_elements = sum(elements_before) - kept_nodes - kept_ways - kept_relations
+        return {
+            "kept_nodes": kept_nodes,
+            "kept_ways": kept_ways,
+            "kept_relations": kept_relations,
+            "removed_elements": removed_elements,
+        }
+
+    def append_bounds_overlays(
+        self,
+        center_coordinates: tuple[float, float],
+        *,
+        map_size: float,
+        background_size: float,
+        rotation: float = 0.0,
+    ) -> dict[str, int | float]:
+        """Append or refresh synthetic maps4fs bounds overlays in memory.
+        See append_bounds_overlays() for the arguments.
+
+        Returns:
+            dict[str, int | float]: Overlay update statistics.
+        """
+        if map_size <= 0 or background_size <= 0:
+            raise ValueError("Overlay sizes must be positive.")
+
+        data = self._data
+
+        removed_relations, removed_ways = _remove_maps4fs_bounds_overlays(data)
+        removed_nodes = _remove_orphan_untagged_nodes(data)
+
+        overlays = [
+            _ProcessedPolygonData(
+                geometry=Polygon(
+                    _rotated_rectangle_coordinates(
+                        center_coordinates=center_coordinates,
+                        width=background_size,
+                        height=background_size,
+                        rotation=rotation,
+                    )
+                ),
+                tags=_maps4fs_bounds_tags("background"),
+            ),
+            _ProcessedPolygonData(
+                geometry=Polygon(
+                    _rotated_rectangle_coordinates(
+                        center_coordinates=center_coordinates,
+                        width=map_size,
+                        height=map_size,
+                        rotation=rotation,
+                    )
+                ),
+                tags=_maps4fs_bounds_tags("playable"),
+            ),
+        ]
+
+        created_ways, created_relations = _append_polygons(
+            data=data,
+            polygons=overlays,
+            prefer_negative_ids=True,
+        )
+        self._ensure_versions = True
+        return {
+            "created_ways": created_ways,
+            "created_relations": created_relations,
+            "removed_ways": removed_ways,
+            "removed_relations": removed_relations,
+            "removed_orphan_nodes": removed_nodes,
+            "map_size": map_size,
+            "background_size": background_size,
+            "rotation": rotation,
+        }
+
+
 def preprocess(
     input_file_path: str,
     output_file_path: str,
@@ -443,6 +1604,7 @@ def preprocess(
     narrow_connection_width: float = 3.0,
     min_part_area: float = 40.0,
     min_part_width: float = 2.0,
+    workers: int = 1,
 ) -> dict[str, int]:
     """Preprocess matching OSM polygons and save a normalized output file.
 
@@ -495,6 +1657,8 @@ def preprocess(
         min_part_width (float): Minimum effective width in meters for keeping
             narrow leftover polygon slivers after cut/split cleanup. Set to 0
             to disable width-based cleanup.
+        workers (int): Number of worker processes for independent polygon groups.
+            The output is identical to the serial run with 1 worker.
 
     Returns:
         dict[str, int]: Processing statistics.
@@ -514,105 +1678,30 @@ def preprocess(
     if validate_input:
         check_and_fix_osm(output_file_path)
 
-    tree = ET.parse(output_file_path)
-    root = tree.getroot()
-
-    nodes = _parse_nodes(root)
-    ways = _parse_ways(root)
-    relations = _parse_relations(root)
-    relation_way_usage = _count_relation_way_usage(relations)
-
-    target_way_ids, target_relation_ids, target_member_way_ids, target_polygons = (
-        _collect_target_polygons(
-            tags=target_filters,
-            nodes=nodes,
-            ways=ways,
-            relations=relations,
-            relation_way_usage=relation_way_usage,
-            merge_tags=merge_tags,
-            collapse_tags=collapse_tags,
-            process_bbox=process_bbox,
-        )
-    )
-    if not target_polygons:
-        tree.write(output_file_path, encoding="utf-8", xml_declaration=True)
-        return {
-            "target_input_polygons": 0,
-            "target_output_polygons": 0,
-            "splitter_lines": 0,
-            "hole_polygons": 0,
-            "removed_elements": 0,
-            "created_ways": 0,
-            "created_relations": 0,
-        }
-
-    if add_holes:
-        hole_polygons = _collect_hole_polygons(
-            tags=target_filters,
-            nodes=nodes,
-            ways=ways,
-            relations=relations,
-            excluded_way_ids=target_way_ids | target_member_way_ids,
-            excluded_relation_ids=target_relation_ids,
-            process_bbox=process_bbox,
-        )
-        point_holes = _collect_point_holes(
-            root=root,
-            tags=target_filters,
-            nodes=nodes,
-            process_bbox=process_bbox,
-        )
-    else:
-        hole_polygons = []
-        point_holes = []
-    splitter_lines = _collect_splitter_lines(
-        nodes=nodes,
-        ways=ways,
-        excluded_way_ids=target_way_ids,
-        exclude_cut_tags=exclude_cut_tags,
+    document = OSMDocument(output_file_path)
+    stats = document.preprocess(
+        target_filters,
         process_bbox=process_bbox,
-    )
-
-    processed_polygons = _preprocess_target_polygon_groups(
-        target_polygons=target_polygons,
-        hole_polygons=hole_polygons,
-        point_holes=point_holes,
-        splitter_lines=splitter_lines,
+        exclude_cut_tags=exclude_cut_tags,
         smooth_strength=smooth_strength,
         merge_distance=merge_distance,
         split_width=split_width,
+        merge_tags=merge_tags,
+        collapse_tags=collapse_tags,
+        add_holes=add_holes,
         shrink_distance=shrink_distance,
         narrow_connection_width=narrow_connection_width,
         min_part_area=min_part_area,
         min_part_width=min_part_width,
+        workers=workers,
     )
+    if not document.modified:
+        return stats
 
-    removed_elements = _remove_target_elements(
-        root=root,
-        target_way_ids=target_way_ids | target_member_way_ids,
-        target_relation_ids=target_relation_ids,
-        ways=ways,
-        relations=relations,
-    )
-    created_ways, created_relations = _append_polygons(root=root, polygons=processed_polygons)
-    _remove_orphan_untagged_nodes(root)
-
-    # JOSM expects a version on every persisted primitive.
-    _ensure_primitive_versions(root)
-
-    tree.write(output_file_path, encoding="utf-8", xml_declaration=True)
+    document.save()
     if validate_output and not check_osm_file(output_file_path):
         raise ValueError(f"Processed OSM file {output_file_path} is invalid.")
-
-    return {
-        "target_input_polygons": len(target_polygons),
-        "target_output_polygons": len(processed_polygons),
-        "splitter_lines": len(splitter_lines),
-        "hole_polygons": len(hole_polygons) + len(point_holes),
-        "removed_elements": removed_elements,
-        "created_ways": created_ways,
-        "created_relations": created_relations,
-    }
+    return stats
 
 
 def prune_osm_file(
@@ -641,8 +1730,6 @@ def prune_osm_file(
     Returns:
         dict[str, int]: Pruning statistics.
     """
-    retain_filters = _normalize_target_filters(tags)
-    retain_rules = spatial_filters or [(target_filter, None) for target_filter in retain_filters]
     if not os.path.isfile(input_file_path):
         raise FileNotFoundError(f"Input OSM file {input_file_path} does not exist.")
 
@@ -653,135 +1740,10 @@ def prune_osm_file(
             os.makedirs(output_directory, exist_ok=True)
         shutil.copyfile(input_file_path, output_file_path)
 
-    tree = ET.parse(output_file_path)
-    root = tree.getroot()
-    nodes = _parse_nodes(root)
-    ways = _parse_ways(root)
-    relations = _parse_relations(root)
-
-    retained_node_ids: set[int] = set()
-    retained_way_ids: set[int] = set()
-    retained_relation_ids: set[int] = set()
-    pending_relation_ids: list[int] = []
-
-    for node_element in root.findall("node"):
-        node_id = node_element.get("id")
-        if not node_id:
-            continue
-        try:
-            parsed_node_id = int(node_id)
-        except ValueError:
-            continue
-
-        node_tags = _extract_tags(node_element)
-        if node_tags and _matches_spatial_rule_set(
-            node_tags,
-            (
-                (coordinate[0], coordinate[1], coordinate[0], coordinate[1])
-                if (coordinate := nodes.get(parsed_node_id)) is not None
-                else None
-            ),
-            retain_rules,
-        ):
-            retained_node_ids.add(parsed_node_id)
-
-    for way_id, way in ways.items():
-        if way.tags and _matches_spatial_rule_set(
-            way.tags,
-            _way_bounds(way, nodes),
-            retain_rules,
-        ):
-            retained_way_ids.add(way_id)
-
-    for relation_id, relation in relations.items():
-        if relation.tags and _matches_spatial_rule_set(
-            relation.tags,
-            _relation_bounds(relation, ways, relations, nodes),
-            retain_rules,
-        ):
-            retained_relation_ids.add(relation_id)
-            pending_relation_ids.append(relation_id)
-
-    while pending_relation_ids:
-        relation_id = pending_relation_ids.pop()
-        retained_relation = relations.get(relation_id)
-        if retained_relation is None:
-            continue
-
-        for member_type, member_ref, _ in retained_relation.members:
-            if member_type == "node":
-                retained_node_ids.add(member_ref)
-            elif member_type == "way":
-                retained_way_ids.add(member_ref)
-            elif member_type == "relation" and member_ref not in retained_relation_ids:
-                if member_ref in relations:
-                    retained_relation_ids.add(member_ref)
-                    pending_relation_ids.append(member_ref)
-
-    for way_id in retained_way_ids:
-        retained_way = ways.get(way_id)
-        if retained_way is None:
-            continue
-        retained_node_ids.update(retained_way.node_refs)
-
-    removed_elements = 0
-    kept_nodes = 0
-    kept_ways = 0
-    kept_relations = 0
-
-    for element in list(root):
-        if element.tag == "bounds":
-            continue
-
-        element_id = element.get("id")
-        if element.tag == "node":
-            if element_id is None:
-                continue
-            try:
-                keep = int(element_id) in retained_node_ids
-            except ValueError:
-                continue
-            if keep:
-                kept_nodes += 1
-                continue
-            root.remove(element)
-            removed_elements += 1
-            continue
-
-        if element.tag == "way":
-            if element_id is None:
-                continue
-            try:
-                keep = int(element_id) in retained_way_ids
-            except ValueError:
-                continue
-            if keep:
-                kept_ways += 1
-                continue
-            root.remove(element)
-            removed_elements += 1
-            continue
-
-        if element.tag == "relation":
-            if element_id is None:
-                continue
-            try:
-                keep = int(element_id) in retained_relation_ids
-            except ValueError:
-                continue
-            if keep:
-                kept_relations += 1
-                continue
-            root.remove(element)
-            removed_elements += 1
-
-    tree.write(output_file_path, encoding="utf-8", xml_declaration=True)
-    return {
-        "kept_nodes": kept_nodes,
-        "kept_ways": kept_ways,
-        "kept_relations": kept_relations,
-        "removed_elements": removed_elements,
-    }
+    document = OSMDocument(output_file_path)
+    stats = document.prune(tags, spatial_filters=spatial_filters)
+    document.save()
+    return stats
 
 
 def append_bounds_overlays(
@@ -806,58 +1768,16 @@ def append_bounds_overlays(
     """
     if not os.path.isfile(osm_file_path):
         raise FileNotFoundError(f"OSM file {osm_file_path} does not exist.")
-    if map_size <= 0 or background_size <= 0:
-        raise ValueError("Overlay sizes must be positive.")
-
-    tree = ET.parse(osm_file_path)
-    root = tree.getroot()
 
-    removed_relations, removed_ways = _remove_maps4fs_bounds_overlays(root)
-    removed_nodes = _remove_orphan_untagged_nodes(root)
-
-    overlays = [
-        _ProcessedPolygonData(
-            geometry=Polygon(
-                _rotated_rectangle_coordinates(
-                    center_coordinates=center_coordinates,
-                    width=background_size,
-                    height=background_size,
-                    rotation=rotation,
-                )
-            ),
-            tags=_maps4fs_bounds_tags("background"),
-        ),
-        _ProcessedPolygonData(
-            geometry=Polygon(
-                _rotated_rectangle_coordinates(
-                    center_coordinates=center_coordinates,
-                    width=map_size,
-                    height=map_size,
-                    rotation=rotation,
-                )
-            ),
-            tags=_maps4fs_bounds_tags("playable"),
-        ),
-    ]
-
-    created_ways, created_relations = _append_polygons(
-        root=root,
-        polygons=overlays,
-        prefer_negative_ids=True,
+    document = OSMDocument(osm_file_path)
+    stats = document.append_bounds_overlays(
+        center_coordinates,
+        map_size=map_size,
+        background_size=background_size,
+        rotation=rotation,
     )
-    _ensure_primitive_versions(root)
-
-    tree.write(osm_file_path, encoding="utf-8", xml_declaration=True)
-    return {
-        "created_ways": created_ways,
-        "created_relations": created_relations,
-        "removed_ways": removed_ways,
-        "removed_relations": removed_relations,
-        "removed_orphan_nodes": removed_nodes,
-        "map_size": map_size,
-        "background_size": background_size,
-        "rotation": rotation,
-    }
+    document.save()
+    return stats
 
 
 def _matches_spatial_rule_set(
@@ -879,168 +1799,598 @@ def _matches_spatial_rule_set(
 
 def _way_bounds(
     way: _WayData,
-    nodes: dict[int, tuple[float, float]],
+    nodes: _NodeStore,
 ) -> tuple[float, float, float, float] | None:
     """Return the bounds of a way from its referenced coordinates."""
-    coordinates = [nodes[node_id] for node_id in way.node_refs if node_id in nodes]
-    if not coordinates:
+    _, lonlat = nodes.resolve(way.node_refs)
+    if len(lonlat) == 0:
+        return None
+
+    minx, miny = lonlat.min(axis=0).tolist()
+    maxx, maxy = lonlat.max(axis=0).tolist()
+    return minx, miny, maxx, maxy
+
+
+def _relation_bounds(
+    relation: _RelationData,
+    ways: dict[int, _WayData],
+    relations: dict[int, _RelationData],
+    nodes: _NodeStore,
+) -> tuple[float, float, float, float] | None:
+    """Return approximate bounds of a relation from all reachable member coordinates."""
+    xs: list[float] = []
+    ys: list[float] = []
+    pending_relation_ids = [relation.id]
+    seen_relation_ids: set[int] = set()
+
+    while pending_relation_ids:
+        current_relation_id = pending_relation_ids.pop()
+        if current_relation_id in seen_relation_ids:
+            continue
+        seen_relation_ids.add(current_relation_id)
+
+        current_relation = relations.get(current_relation_id)
+        if current_relation is None:
+            continue
+
+        for member_type, member_ref, _ in current_relation.members:
+            if member_type == "node":
+                coordinate = nodes.get(member_ref)
+                if coordinate is None:
+                    continue
+                xs.append(coordinate[0])
+                ys.append(coordinate[1])
+                continue
+
+            if member_type == "way":
+                way = ways.get(member_ref)
+                if way is None:
+                    continue
+                way_bounds = _way_bounds(way, nodes)
+                if way_bounds is None:
+                    continue
+                minx, miny, maxx, maxy = way_bounds
+                xs.extend((minx, maxx))
+                ys.extend((miny, maxy))
+                continue
+
+            if member_type == "relation":
+                nested_relation = relations.get(member_ref)
+                if nested_relation is not None:
+                    pending_relation_ids.append(member_ref)
+
+    if not xs or not ys:
+        return None
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def _node_record(element: ET.Element | Mapping[str, str]) -> tuple[int, float, float] | None:
+    """Read id and coordinates of an OSM node element.
+
+    Arguments:
+        element (ET.Element | Mapping[str, str]): Node XML element or its attributes.
+
+    Returns:
+        tuple[int, float, float] | None: ``(id, longitude, latitude)`` or None for
+            incomplete nodes.
+    """
+    element_id = element.get("id")
+    lat = element.get("lat")
+    lon = element.get("lon")
+    if not element_id or lat is None or lon is None:
+        return None
+    try:
+        return int(element_id), float(lon), float(lat)
+    except ValueError:
         return None
 
-    xs = [coordinate[0] for coordinate in coordinates]
-    ys = [coordinate[1] for coordinate in coordinates]
-    return min(xs), min(ys), max(xs), max(ys)
+
+def _way_record(element: ET.Element) -> tuple[int, list[int], dict[str, str]] | None:
+    """Read id, node refs and tags of an OSM way element.
+
+    Arguments:
+        element (ET.Element): Way XML element.
+
+    Returns:
+        tuple[int, list[int], dict[str, str]] | None: Way id, node refs and tags or None
+            for ways without a valid id.
+    """
+    way_id = _element_id(element)
+    if way_id is None:
+        return None
+
+    refs: list[int] = []
+    for node_ref in element.findall("nd"):
+        ref_value = node_ref.get("ref")
+        if ref_value is None:
+            continue
+        try:
+            refs.append(int(ref_value))
+        except ValueError:
+            continue
+    return way_id, refs, _extract_tags(element)
+
+
+def _relation_record(element: ET.Element) -> _RelationData | None:
+    """Read an OSM relation element.
+
+    Arguments:
+        element (ET.Element): Relation XML element.
+
+    Returns:
+        _RelationData | None: Parsed relation or None for relations without a valid id.
+    """
+    relation_id = _element_id(element)
+    if relation_id is None:
+        return None
+
+    members: list[tuple[str, int, str]] = []
+    for member in element.findall("member"):
+        member_type = member.get("type")
+        member_ref = member.get("ref")
+        role = member.get("role") or ""
+        if not member_type or member_ref is None:
+            continue
+        try:
+            members.append((member_type, int(member_ref), role))
+        except ValueError:
+            continue
+    return _RelationData(id=relation_id, members=members, tags=_extract_tags(element))
+
+
+def _element_id(element: ET.Element | Mapping[str, str]) -> int | None:
+    """Return the integer id of an OSM primitive element (or of its attributes) or None if it
+    is missing or invalid."""
+    element_id = element.get("id")
+    if not element_id:
+        return None
+    try:
+        return int(element_id)
+    except ValueError:
+        return None
+
+
+def _iter_osm_primitives(file_path: str) -> Iterator[tuple[ET.Element, ET.Element]]:
+    """Stream top-level elements of an OSM XML file.
+
+    Every yielded element is released right after the consumer is done with it, so only
+    one primitive is kept in memory at a time.
+
+    Arguments:
+        file_path (str): Path to the OSM XML file.
+
+    Yields:
+        Iterator[tuple[ET.Element, ET.Element]]: Root element (without children) and
+            the complete top-level element.
+    """
+    root: ET.Element | None = None
+    depth = 0
+    for event, element in ET.iterparse(file_path, events=("start", "end")):
+        if event == "start":
+            depth += 1
+            if root is None:
+                root = element
+            continue
+
+        depth -= 1
+        if depth != 1 or root is None:
+            continue
+        yield root, element
+        del root[:]
+
+
+def _load_osm_data(file_path: str) -> _OSMData:
+    """Load an OSM XML file into a compact array-backed index with a single streaming pass.
+
+    Arguments:
+        file_path (str): Path to the OSM XML file.
+
+    Returns:
+        _OSMData: Loaded OSM data without pending edits.
+    """
+    node_ids = array("q")
+    node_lonlat = array("d")
+    node_tags: dict[int, dict[str, str]] = {}
+    way_ids = array("q")
+    way_offsets = array("q", [0])
+    way_refs = array("q")
+    way_tags: list[dict[str, str]] = []
+    relations: dict[int, _RelationData] = {}
+
+    for _, element in _iter_osm_primitives(file_path):
+        if element.tag == "node":
+            node = _node_record(element)
+            if node is None:
+                continue
+            node_id, longitude, latitude = node
+            node_ids.append(node_id)
+            node_lonlat.extend((longitude, latitude))
+            if element.find("tag") is not None:
+                node_tags[node_id] = _extract_tags(element)
+        elif element.tag == "way":
+            way = _way_record(element)
+            if way is None:
+                continue
+            way_id, refs, tags = way
+            way_ids.append(way_id)
+            way_refs.extend(refs)
+            way_offsets.append(len(way_refs))
+            way_tags.append(tags)
+        elif element.tag == "relation":
+            relation = _relation_record(element)
+            if relation is not None:
+                relations[relation.id] = relation
+
+    nodes = _NodeStore.from_records(
+        np.frombuffer(node_ids, dtype=np.int64),
+        np.frombuffer(node_lonlat, dtype=np.float64),
+    )
+    way_ids_array = np.frombuffer(way_ids, dtype=np.int64)
+    way_offsets_array = np.frombuffer(way_offsets, dtype=np.int64)
+    way_refs_array = np.frombuffer(way_refs, dtype=np.int64)
+    ways = {
+        way_id: _WayData(
+            id=way_id,
+            node_refs=way_refs_array[way_offsets_array[row] : way_offsets_array[row + 1]],
+            tags=tags,
+        )
+        for row, (way_id, tags) in enumerate(zip(way_ids_array.tolist(), way_tags))
+    }
+
+    return _OSMData(
+        source_path=file_path,
+        nodes=nodes,
+        node_record_ids=np.frombuffer(node_ids, dtype=np.int64),
+        node_tags=node_tags,
+        way_ids=way_ids_array,
+        way_offsets=way_offsets_array,
+        way_refs=way_refs_array,
+        ways=ways,
+        relations=relations,
+        removed_nodes=np.zeros(len(nodes), dtype=bool),
+    )
+
+
+def _add_osm_elements(
+    data: _OSMData,
+    node_ids: np.ndarray,
+    node_lonlat: np.ndarray,
+    elements: Iterable[ET.Element],
+) -> None:
+    """Append new primitives to the OSM data and index them like loaded ones.
+
+    Arguments:
+        data (_OSMData): OSM data to extend.
+        node_ids (np.ndarray): Ids of the new untagged nodes.
+        node_lonlat (np.ndarray): ``(longitude, latitude)`` rows matching ``node_ids``.
+        elements (Iterable[ET.Element]): New way and relation elements.
+    """
+    for element in elements:
+        data.appended.append(element)
+        if element.tag == "way":
+            way = _way_record(element)
+            if way is None:
+                continue
+            way_id, refs, tags = way
+            data.ways[way_id] = _WayData(
+                id=way_id, node_refs=np.asarray(refs, dtype=np.int64), tags=tags
+            )
+            data.appended_ids["way"].add(way_id)
+            data.removed_ways.discard(way_id)
+        elif element.tag == "relation":
+            relation = _relation_record(element)
+            if relation is None:
+                continue
+            data.relations[relation.id] = relation
+            data.appended_ids["relation"].add(relation.id)
+            data.removed_relations.discard(relation.id)
+
+    if len(node_ids) == 0:
+        return
+
+    node_lonlat = node_lonlat.reshape(-1, 2)
+    data.appended_node_ids = np.concatenate([data.appended_node_ids, node_ids])
+    data.appended_node_lonlat = np.concatenate([data.appended_node_lonlat, node_lonlat])
+    removed_node_ids = data.nodes.ids[data.removed_nodes]
+    data.nodes = _NodeStore.from_records(
+        np.concatenate([data.nodes.ids, node_ids]),
+        np.concatenate([data.nodes.lonlat, node_lonlat]),
+    )
+    data.removed_nodes = np.isin(data.nodes.ids, removed_node_ids) & ~np.isin(
+        data.nodes.ids, node_ids
+    )
+
+
+def _source_way_rows(data: _OSMData, way_ids: set[int]) -> np.ndarray:
+    """Return the mask of loaded CSR way rows, which are still present and listed in way_ids."""
+    source_way_ids = way_ids - data.removed_ways - data.appended_ids["way"]
+    return np.isin(data.way_ids, np.fromiter(source_way_ids, dtype=np.int64))
 
 
-def _relation_bounds(
-    relation: _RelationData,
-    ways: dict[int, _WayData],
-    relations: dict[int, _RelationData],
-    nodes: dict[int, tuple[float, float]],
-) -> tuple[float, float, float, float] | None:
-    """Return approximate bounds of a relation from all reachable member coordinates."""
-    xs: list[float] = []
-    ys: list[float] = []
-    relation_id = relation.element.get("id")
-    if relation_id is None:
-        return None
+def _way_node_refs(data: _OSMData, way_ids: set[int]) -> np.ndarray:
+    """Return node refs of all present ways listed in way_ids as one array.
 
-    try:
-        pending_relation_ids = [int(relation_id)]
-    except ValueError:
-        return None
+    Refs of loaded ways are selected from the CSR arrays in one vectorized step.
 
-    seen_relation_ids: set[int] = set()
+    Arguments:
+        data (_OSMData): Indexed OSM file.
+        way_ids (set[int]): Ids of the ways.
 
-    while pending_relation_ids:
-        current_relation_id = pending_relation_ids.pop()
-        if current_relation_id in seen_relation_ids:
-            continue
-        seen_relation_ids.add(current_relation_id)
+    Returns:
+        np.ndarray: Concatenated node refs, may contain duplicates.
+    """
+    rows = _source_way_rows(data, way_ids)
+    node_refs = [data.way_refs[np.repeat(rows, np.diff(data.way_offsets))]]
+    node_refs.extend(
+        data.ways[way_id].node_refs
+        for way_id in way_ids & data.appended_ids["way"]
+        if way_id in data.ways
+    )
+    return np.concatenate(node_refs)
 
-        current_relation = relations.get(current_relation_id)
-        if current_relation is None:
-            continue
 
-        for member_type, member_ref, _ in current_relation.members:
-            if member_type == "node":
-                coordinate = nodes.get(member_ref)
-                if coordinate is None:
-                    continue
-                xs.append(coordinate[0])
-                ys.append(coordinate[1])
-                continue
+def _count_live_elements(data: _OSMData) -> tuple[int, int, int]:
+    """Return the number of nodes, ways and relations which are not removed."""
+    return int(np.count_nonzero(~data.removed_nodes)), len(data.ways), len(data.relations)
 
-            if member_type == "way":
-                way = ways.get(member_ref)
-                if way is None:
-                    continue
-                way_bounds = _way_bounds(way, nodes)
-                if way_bounds is None:
-                    continue
-                minx, miny, maxx, maxy = way_bounds
-                xs.extend((minx, maxx))
-                ys.extend((miny, maxy))
-                continue
 
-            if member_type == "relation":
-                nested_relation = relations.get(member_ref)
-                if nested_relation is not None:
-                    pending_relation_ids.append(member_ref)
+def _remove_nodes(data: _OSMData, mask: np.ndarray) -> int:
+    """Mark nodes selected by a mask aligned to the node store as removed.
 
-    if not xs or not ys:
-        return None
-    return min(xs), min(ys), max(xs), max(ys)
+    Arguments:
+        data (_OSMData): Indexed OSM file.
+        mask (np.ndarray): Boolean mask aligned to ``data.nodes.ids``.
 
+    Returns:
+        int: Number of newly removed nodes.
+    """
+    mask = mask & ~data.removed_nodes
+    data.removed_nodes |= mask
+    if data.node_tags:
+        for node_id in data.nodes.ids[mask].tolist():
+            data.node_tags.pop(node_id, None)
+    return int(np.count_nonzero(mask))
 
-def _parse_nodes(root: ET.Element) -> dict[int, tuple[float, float]]:
-    """Read all node coordinates from OSM XML.
+
+def _remove_ways(data: _OSMData, way_ids: Iterable[int]) -> int:
+    """Remove ways from the index and mark them as removed.
 
     Arguments:
-        root (ET.Element): Root OSM XML element.
+        data (_OSMData): Indexed OSM file.
+        way_ids (Iterable[int]): Ids of the ways to remove.
 
     Returns:
-        dict[int, tuple[float, float]]: Mapping of node ids to
-            ``(longitude, latitude)`` coordinates.
-    """
-    nodes: dict[int, tuple[float, float]] = {}
-    for element in root.findall("node"):
-        element_id = element.get("id")
-        lat = element.get("lat")
-        lon = element.get("lon")
-        if not element_id or lat is None or lon is None:
-            continue
-        try:
-            nodes[int(element_id)] = (float(lon), float(lat))
-        except ValueError:
-            continue
-    return nodes
+        int: Number of removed ways.
+    """
+    removed_way_ids = data.ways.keys() & set(way_ids)
+    for way_id in removed_way_ids:
+        del data.ways[way_id]
+    data.removed_ways |= removed_way_ids
+    return len(removed_way_ids)
 
 
-def _parse_ways(root: ET.Element) -> dict[int, _WayData]:
-    """Read all ways from OSM XML.
+def _remove_relations(data: _OSMData, relation_ids: Iterable[int]) -> int:
+    """Remove relations from the index and mark them as removed.
 
     Arguments:
-        root (ET.Element): Root OSM XML element.
+        data (_OSMData): Indexed OSM file.
+        relation_ids (Iterable[int]): Ids of the relations to remove.
 
     Returns:
-        dict[int, _WayData]: Mapping of way ids to parsed way data.
+        int: Number of removed relations.
     """
-    ways: dict[int, _WayData] = {}
-    for way_element in root.findall("way"):
-        way_id = way_element.get("id")
-        if not way_id:
-            continue
+    removed_relation_ids = data.relations.keys() & set(relation_ids)
+    for relation_id in removed_relation_ids:
+        del data.relations[relation_id]
+    data.removed_relations |= removed_relation_ids
+    return len(removed_relation_ids)
+
+
+def _xml_start_tag(element: ET.Element) -> str:
+    """Serialize the start tag of an element followed by its text."""
+    shell = ET.Element(element.tag, element.attrib)
+    shell.text = element.text
+    serialized = ET.tostring(shell, encoding="unicode", short_empty_elements=False)
+    return serialized[: serialized.rindex("</")]
+
+
+def _serialize_elements(elements: list[ET.Element]) -> str:
+    """Serialize the elements one after another in one pass of the serializer."""
+    if not elements:
+        return ""
+    container = ET.Element("osm")
+    container.extend(elements)
+    serialized = ET.tostring(container, encoding="unicode")
+    return serialized[len("<osm>") : -len("</osm>")]
+
+
+def _serialize_nodes(node_ids: np.ndarray, lonlat: np.ndarray) -> str:
+    """Serialize untagged nodes the same way as ElementTree serializes node elements."""
+    return "".join(
+        f'<node id="{node_id}" lat="{latitude:.10f}" lon="{longitude:.10f}" version="1" />'
+        for node_id, (longitude, latitude) in zip(node_ids.tolist(), lonlat.tolist())
+    )
 
-        refs: list[int] = []
-        for node_ref in way_element.findall("nd"):
-            ref_value = node_ref.get("ref")
-            if ref_value is None:
-                continue
-            try:
-                refs.append(int(ref_value))
-            except ValueError:
-                continue
 
-        way_tags = _extract_tags(way_element)
-        ways[int(way_id)] = _WayData(element=way_element, node_refs=refs, tags=way_tags)
-    return ways
+def _appended_node_rows(data: _OSMData) -> np.ndarray:
+    """Return rows of the appended nodes to write: the last record of every id, unless the
+    node was removed later, in the order the nodes were appended."""
+    node_ids = data.appended_node_ids
+    _, last_reversed = np.unique(node_ids[::-1], return_index=True)
+    rows = np.sort(len(node_ids) - 1 - last_reversed)
+    positions, found = data.nodes.positions(node_ids[rows])
+    return rows[~(found & data.removed_nodes[positions])]
+
+
+def _appended_elements(data: _OSMData) -> list[ET.Element]:
+    """Return the appended ways and relations to write: the last element of every id, unless
+    the primitive was removed later, in the order the elements were appended."""
+    removed_ids = {"way": data.removed_ways, "relation": data.removed_relations}
+    written: set[tuple[str, int]] = set()
+    elements = []
+    for element in reversed(data.appended):
+        element_id = _element_id(element)
+        if element_id is not None:
+            if (element.tag, element_id) in written or element_id in removed_ids.get(
+                element.tag, ()
+            ):
+                continue
+            written.add((element.tag, element_id))
+        elements.append(element)
+    elements.reverse()
+    return elements
 
 
-def _parse_relations(root: ET.Element) -> dict[int, _RelationData]:
-    """Read all relations from OSM XML.
+def _scan_osm_source(
+    data: _OSMData, ensure_versions: bool
+) -> tuple[list[tuple[int, int, bytes]], tuple[str, dict[str, str], int, int], str]:
+    """Find the edits of the source file: byte ranges of the removed primitives and missing
+    versions, without building the elements.
 
     Arguments:
-        root (ET.Element): Root OSM XML element.
+        data (_OSMData): OSM data with pending edits.
+        ensure_versions (bool): When True, a version is added to primitives without one.
 
     Returns:
-        dict[int, _RelationData]: Mapping of relation ids to parsed
-            relation data.
+        tuple[list[tuple[int, int, bytes]], tuple[str, dict[str, str], int, int], str]:
+            ``(start, end, replacement)`` edits in file order, the tag, attributes, start and
+            end offset of the root element and the encoding of the file.
     """
-    relations: dict[int, _RelationData] = {}
-    for relation_element in root.findall("relation"):
-        relation_id = relation_element.get("id")
-        if not relation_id:
-            continue
+    node_positions, node_found = data.nodes.positions(data.node_record_ids)
+    removed_node_records = node_found & data.removed_nodes[node_positions]
+    removed_node_records |= np.isin(data.node_record_ids, data.appended_node_ids)
+    removed_ids = {
+        "way": data.removed_ways | data.appended_ids["way"],
+        "relation": data.removed_relations | data.appended_ids["relation"],
+    }
+    edits: list[tuple[int, int, bytes]] = []
+    root_tag = "osm"
+    root_attributes: dict[str, str] = {}
+    root_start = root_end = 0
+    encoding = "utf-8"
+    depth = 0
+    node_index = 0
+    removed_start: int | None = None
+    parser = expat.ParserCreate()
+
+    def end_removed_run() -> None:
+        nonlocal removed_start
+        if removed_start is not None:
+            edits.append((removed_start, parser.CurrentByteIndex, b""))
+            removed_start = None
+
+    def xml_declaration(_version: str, declared_encoding: str | None, _standalone: int) -> None:
+        nonlocal encoding
+        encoding = declared_encoding or encoding
+
+    def start_element(tag: str, attributes: dict[str, str]) -> None:
+        nonlocal depth, node_index, removed_start, root_tag, root_attributes, root_start
+        depth += 1
+        if depth == 1:
+            root_tag, root_attributes, root_start = tag, attributes, parser.CurrentByteIndex
+        if depth != 2:
+            return
+
+        if tag == "node" and _node_record(attributes) is not None:
+            removed = bool(removed_node_records[node_index])
+            node_index += 1
+        elif tag in removed_ids:
+            removed = _element_id(attributes) in removed_ids[tag]
+        else:
+            removed = False
+        if removed:
+            if removed_start is None:
+                removed_start = parser.CurrentByteIndex
+            return
+
+        end_removed_run()
+        if ensure_versions and tag in _OSM_PRIMITIVES and not attributes.get("version"):
+            # The version is added right after the tag name.
+            offset = parser.CurrentByteIndex + 1 + len(tag.encode(encoding))
+            edits.append((offset, offset, b' version="1"'))
+
+    def end_element(_tag: str) -> None:
+        nonlocal depth, root_end
+        depth -= 1
+        if depth == 0:
+            end_removed_run()
+            root_end = parser.CurrentByteIndex
+
+    parser.XmlDeclHandler = xml_declaration
+    parser.StartElementHandler = start_element
+    parser.EndElementHandler = end_element
+    with open(data.source_path, "rb") as file:
+        parser.ParseFile(file)
+    return edits, (root_tag, root_attributes, root_start, root_end), encoding
+
+
+def _copy_bytes(source: BinaryIO, destination: BinaryIO, start: int, end: int) -> None:
+    """Copy the byte range of the source file to the destination file."""
+    source.seek(start)
+    remaining = end - start
+    while remaining > 0:
+        chunk = source.read(min(remaining, 1 << 20))
+        if not chunk:
+            break
+        destination.write(chunk)
+        remaining -= len(chunk)
 
-        members: list[tuple[str, int, str]] = []
-        for member in relation_element.findall("member"):
-            member_type = member.get("type")
-            member_ref = member.get("ref")
-            role = member.get("role") or ""
-            if not member_type or member_ref is None:
-                continue
-            try:
-                members.append((member_type, int(member_ref), role))
-            except ValueError:
-                continue
 
-        relation_tags = _extract_tags(relation_element)
-        relations[int(relation_id)] = _RelationData(
-            element=relation_element,
-            members=members,
-            tags=relation_tags,
-        )
-    return relations
+def _write_osm_data(data: _OSMData, output_file_path: str, ensure_versions: bool = False) -> None:
+    """Write the OSM data with all pending edits applied.
+
+    The source file is parsed once more only to find the byte ranges of the removed
+    primitives, everything else is copied as it is, so the kept primitives are not serialized
+    again and the memory usage does not depend on the size of the file. Appended primitives
+    are serialized in batches of _OSM_WRITE_BATCH_SIZE at the end. The output is written to a
+    temporary file first, which allows to overwrite the source file.
+
+    Arguments:
+        data (_OSMData): OSM data with pending edits.
+        output_file_path (str): Path to the output OSM XML file.
+        ensure_versions (bool): When True, a missing version attribute is set to 1 on every
+            primitive, JOSM expects a version on every persisted primitive.
+    """
+    edits, (root_tag, root_attributes, root_start, root_end), encoding = _scan_osm_source(
+        data, ensure_versions
+    )
+
+    temp_file_path = f"{output_file_path}.tmp"
+    with open(data.source_path, "rb") as source, open(temp_file_path, "wb") as file:
+        # The end offset of an empty-element tag is after the tag instead of before an end tag.
+        # Such a root is written as a start tag, so the appended primitives fit in it.
+        source.seek(root_end)
+        self_closing = source.read(2) != b"</"
+        position = 0
+        for start, end, replacement in edits:
+            _copy_bytes(source, file, position, start)
+            file.write(replacement)
+            position = end
+        _copy_bytes(source, file, position, root_start if self_closing else root_end)
+        if self_closing:
+            root = ET.Element(root_tag, root_attributes)
+            file.write(_xml_start_tag(root).encode(encoding, "xmlcharrefreplace"))
+
+        node_rows = _appended_node_rows(data)
+        for start in range(0, len(node_rows), _OSM_WRITE_BATCH_SIZE):
+            rows = node_rows[start : start + _OSM_WRITE_BATCH_SIZE]
+            nodes = _serialize_nodes(data.appended_node_ids[rows], data.appended_node_lonlat[rows])
+            file.write(nodes.encode(encoding))
+
+        elements = _appended_elements(data)
+        for start in range(0, len(elements), _OSM_WRITE_BATCH_SIZE):
+            batch = elements[start : start + _OSM_WRITE_BATCH_SIZE]
+            if ensure_versions:
+                for element in batch:
+                    if element.tag in _OSM_PRIMITIVES and not element.get("version"):
+                        element.set("version", "1")
+            file.write(_serialize_elements(batch).encode(encoding, "xmlcharrefreplace"))
+
+        if self_closing:
+            file.write(f"</{root_tag}>".encode(encoding))
+        _copy_bytes(source, file, root_end, os.path.getsize(data.source_path))
+
+    os.replace(temp_file_path, output_file_path)
 
 
 def _extract_tags(element: ET.Element) -> dict[str, str]:
@@ -1092,15 +2442,15 @@ def _coordinates_intersect_bbox(
 
 def _way_intersects_bbox(
     way: _WayData,
-    nodes: dict[int, tuple[float, float]],
+    nodes: _NodeStore,
     bbox: tuple[float, float, float, float] | None,
 ) -> bool:
     """Return whether a way's referenced coordinates intersect an optional bbox."""
     if bbox is None:
         return True
 
-    coordinates = [nodes[node_id] for node_id in way.node_refs if node_id in nodes]
-    return _coordinates_intersect_bbox(coordinates, bbox)
+    bounds = _way_bounds(way, nodes)
+    return bounds is not None and _bounds_intersect_bbox(bounds, bbox)
 
 
 def _count_relation_way_usage(relations: dict[int, _RelationData]) -> dict[int, int]:
@@ -1288,12 +2638,12 @@ def _is_area_way(way: _WayData) -> bool:
     return not any(tag in _LINEAR_TAGS for tag in way.tags)
 
 
-def _way_to_polygon(way: _WayData, nodes: dict[int, tuple[float, float]]) -> Polygon | None:
+def _way_to_polygon(way: _WayData, nodes: _NodeStore) -> Polygon | None:
     """Build a polygon from an OSM way when possible.
 
     Arguments:
         way (_WayData): Parsed OSM way.
-        nodes (dict[int, tuple[float, float]]): Node coordinate mapping.
+        nodes (_NodeStore): Node coordinate mapping.
 
     Returns:
         Polygon | None: Polygon geometry for the way, or None when the
@@ -1301,7 +2651,7 @@ def _way_to_polygon(way: _WayData, nodes: dict[int, tuple[float, float]]) -> Pol
     """
     if not _is_area_way(way):
         return None
-    coordinates = [nodes[node_id] for node_id in way.node_refs if node_id in nodes]
+    coordinates = nodes.coordinates(way.node_refs)
     if len(coordinates) < 4:
         return None
     polygon = Polygon(coordinates)
@@ -1316,19 +2666,19 @@ def _way_to_polygon(way: _WayData, nodes: dict[int, tuple[float, float]]) -> Pol
 
 def _way_to_line_string(
     way: _WayData,
-    nodes: dict[int, tuple[float, float]],
+    nodes: _NodeStore,
 ) -> LineString | None:
     """Build a line string from an OSM way when possible.
 
     Arguments:
         way (_WayData): Parsed OSM way.
-        nodes (dict[int, tuple[float, float]]): Node coordinate mapping.
+        nodes (_NodeStore): Node coordinate mapping.
 
     Returns:
         LineString | None: Line geometry for the way, or None when the way cannot be
             converted into a valid line.
     """
-    coordinates = [nodes[node_id] for node_id in way.node_refs if node_id in nodes]
+    coordinates = nodes.coordinates(way.node_refs)
     if len(coordinates) < 2:
         return None
     if len(set(coordinates)) < 2:
@@ -1341,7 +2691,7 @@ def _way_to_line_string(
 def _assemble_relation_member_polygons(
     member_way_ids: list[int],
     ways: dict[int, _WayData],
-    nodes: dict[int, tuple[float, float]],
+    nodes: _NodeStore,
 ) -> tuple[list[Polygon], set[int]]:
     """Assemble polygon geometry from relation member ways.
 
@@ -1352,7 +2702,7 @@ def _assemble_relation_member_polygons(
     Arguments:
         member_way_ids (list[int]): Relation member way ids for one role.
         ways (dict[int, _WayData]): Parsed OSM ways by id.
-        nodes (dict[int, tuple[float, float]]): Node coordinate mapping.
+        nodes (_NodeStore): Node coordinate mapping.
 
     Returns:
         tuple[list[Polygon], set[int]]: Assembled polygons and the subset of member way ids that
@@ -1386,14 +2736,14 @@ def _assemble_relation_member_polygons(
 def _relation_to_polygons(
     relation: _RelationData,
     ways: dict[int, _WayData],
-    nodes: dict[int, tuple[float, float]],
+    nodes: _NodeStore,
 ) -> tuple[list[Polygon], set[int]]:
     """Build polygons from a multipolygon relation.
 
     Arguments:
         relation (_RelationData): Parsed OSM relation.
         ways (dict[int, _WayData]): Parsed OSM ways by id.
-        nodes (dict[int, tuple[float, float]]): Node coordinate mapping.
+        nodes (_NodeStore): Node coordinate mapping.
 
     Returns:
         tuple[list[Polygon], set[int]]: Polygon geometry extracted from the
@@ -1443,19 +2793,20 @@ def _relation_to_polygons(
 
 def _collect_target_polygons(
     tags: list[OSMTagFilter],
-    nodes: dict[int, tuple[float, float]],
+    nodes: _NodeStore,
     ways: dict[int, _WayData],
     relations: dict[int, _RelationData],
     relation_way_usage: dict[int, int],
     merge_tags: bool,
     collapse_tags: dict[str, str] | None,
     process_bbox: tuple[float, float, float, float] | None = None,
+    cache: _GeometryCache | None = None,
 ) -> tuple[set[int], set[int], set[int], list[_TargetPolygonData]]:
     """Collect target polygons and the source elements they replace.
 
     Arguments:
         tags (list[OSMTagFilter]): OR-combined target polygon tag filters.
-        nodes (dict[int, tuple[float, float]]): Node coordinate mapping.
+        nodes (_NodeStore): Node coordinate mapping.
         ways (dict[int, _WayData]): Parsed OSM ways by id.
         relations (dict[int, _RelationData]): Parsed OSM relations by id.
         relation_way_usage (dict[int, int]): Count of how many relations use
@@ -1464,12 +2815,14 @@ def _collect_target_polygons(
             normalized before grouping.
         collapse_tags (dict[str, str] | None): Optional canonical tags that replace
             matched target keys on output.
+        cache (_GeometryCache | None): Optional geometry cache shared between passes.
 
     Returns:
         tuple[set[int], set[int], set[int], list[_TargetPolygonData]]:
             Target way ids, target relation ids, orphaned relation-member way
             ids to remove, and collected target polygons.
     """
+    cache = cache or _GeometryCache()
     target_way_ids: set[int] = set()
     target_relation_ids: set[int] = set()
     target_member_way_ids: set[int] = set()
@@ -1483,7 +2836,7 @@ def _collect_target_polygons(
             continue
         if not _way_intersects_bbox(way, nodes, process_bbox):
             continue
-        polygon = _way_to_polygon(way, nodes)
+        polygon = cache.way_polygon(way, nodes)
         if polygon is None:
             continue
         if not _bounds_intersect_bbox(polygon.bounds, process_bbox):
@@ -1507,7 +2860,7 @@ def _collect_target_polygons(
         matching_filter = _matching_target_filter(relation.tags, tags)
         if matching_filter is None:
             continue
-        relation_polygons, member_way_ids = _relation_to_polygons(relation, ways, nodes)
+        relation_polygons, member_way_ids = cache.relation_polygons(relation, ways, nodes)
         if process_bbox is not None:
             relation_polygons = [
                 polygon
@@ -1546,27 +2899,30 @@ def _collect_target_polygons(
 
 def _collect_hole_polygons(
     tags: list[OSMTagFilter],
-    nodes: dict[int, tuple[float, float]],
+    nodes: _NodeStore,
     ways: dict[int, _WayData],
     relations: dict[int, _RelationData],
     excluded_way_ids: set[int],
     excluded_relation_ids: set[int],
     process_bbox: tuple[float, float, float, float] | None = None,
+    cache: _GeometryCache | None = None,
 ) -> list[Polygon]:
     """Collect non-target area polygons that should carve holes.
 
     Arguments:
         tags (list[OSMTagFilter]): OR-combined target polygon tag filters.
-        nodes (dict[int, tuple[float, float]]): Node coordinate mapping.
+        nodes (_NodeStore): Node coordinate mapping.
         ways (dict[int, _WayData]): Parsed OSM ways by id.
         relations (dict[int, _RelationData]): Parsed OSM relations by id.
         excluded_way_ids (set[int]): Way ids that belong to target polygons.
         excluded_relation_ids (set[int]): Relation ids that belong to target
             polygons.
+        cache (_GeometryCache | None): Optional geometry cache shared between passes.
 
     Returns:
         list[Polygon]: Area polygons that should be subtracted from targets.
     """
+    cache = cache or _GeometryCache()
     hole_polygons: list[Polygon] = []
 
     for way_id, way in ways.items():
@@ -1576,7 +2932,7 @@ def _collect_hole_polygons(
             continue
         if not _way_intersects_bbox(way, nodes, process_bbox):
             continue
-        polygon = _way_to_polygon(way, nodes)
+        polygon = cache.way_polygon(way, nodes)
         if polygon is not None and _bounds_intersect_bbox(polygon.bounds, process_bbox):
             hole_polygons.append(polygon)
 
@@ -1587,7 +2943,7 @@ def _collect_hole_polygons(
             continue
         if _matching_target_filter(relation.tags, tags) is not None:
             continue
-        relation_polygons, _ = _relation_to_polygons(relation, ways, nodes)
+        relation_polygons, _ = cache.relation_polygons(relation, ways, nodes)
         if process_bbox is not None:
             relation_polygons = [
                 polygon
@@ -1600,17 +2956,17 @@ def _collect_hole_polygons(
 
 
 def _collect_point_holes(
-    root: ET.Element,
+    node_tags: dict[int, dict[str, str]],
     tags: list[OSMTagFilter],
-    nodes: dict[int, tuple[float, float]],
+    nodes: _NodeStore,
     process_bbox: tuple[float, float, float, float] | None = None,
 ) -> list[_PointHoleData]:
     """Collect point obstacles that should carve circular holes.
 
     Arguments:
-        root (ET.Element): Root OSM XML element.
+        node_tags (dict[int, dict[str, str]]): Tags of tagged nodes by node id.
         tags (list[OSMTagFilter]): OR-combined target polygon tag filters.
-        nodes (dict[int, tuple[float, float]]): Node coordinate mapping.
+        nodes (_NodeStore): Node coordinate mapping.
 
     Returns:
         list[_PointHoleData]: Tagged point obstacles with projected hole
@@ -1618,27 +2974,17 @@ def _collect_point_holes(
     """
     point_holes: list[_PointHoleData] = []
 
-    for node_element in root.findall("node"):
-        node_id = node_element.get("id")
-        if not node_id:
-            continue
-
-        try:
-            parsed_node_id = int(node_id)
-        except ValueError:
-            continue
-
-        coordinate = nodes.get(parsed_node_id)
+    for node_id, feature_tags in node_tags.items():
+        coordinate = nodes.get(node_id)
         if coordinate is None:
             continue
         if not _coordinates_intersect_bbox([coordinate], process_bbox):
             continue
 
-        node_tags = _extract_tags(node_element)
-        if not node_tags or _matching_target_filter(node_tags, tags) is not None:
+        if not feature_tags or _matching_target_filter(feature_tags, tags) is not None:
             continue
 
-        hole_radius = _point_hole_radius(node_tags)
+        hole_radius = _point_hole_radius(feature_tags)
         if hole_radius <= 0:
             continue
 
@@ -1646,7 +2992,7 @@ def _collect_point_holes(
             _PointHoleData(
                 geometry=Point(coordinate),
                 radius=hole_radius,
-                tags=node_tags,
+                tags=feature_tags,
             )
         )
 
@@ -1669,74 +3015,96 @@ def _point_hole_radius(tags: dict[str, str]) -> float:
 
 
 def _collect_splitter_lines(
-    nodes: dict[int, tuple[float, float]],
+    nodes: _NodeStore,
     ways: dict[int, _WayData],
     excluded_way_ids: set[int],
     exclude_cut_tags: dict[str, OSMTagValue] | None,
     process_bbox: tuple[float, float, float, float] | None = None,
+    cache: _GeometryCache | None = None,
 ) -> list[_SplitterData]:
     """Collect linear objects that may split target polygons.
 
     Arguments:
-        nodes (dict[int, tuple[float, float]]): Node coordinate mapping.
+        nodes (_NodeStore): Node coordinate mapping.
         ways (dict[int, _WayData]): Parsed OSM ways by id.
         excluded_way_ids (set[int]): Way ids that should never be treated as
             splitters.
         exclude_cut_tags (dict[str, OSMTagValue] | None): Optional tag filter
             for linear features that must not cut polygons.
+        cache (_GeometryCache | None): Optional geometry cache shared between passes.
 
     Returns:
         list[_SplitterData]: Linear features eligible to cut target polygons.
     """
-    splitter_candidates: list[tuple[dict[str, str], list[int], list[tuple[float, float]]]] = []
+    cache = cache or _GeometryCache()
+    splitter_candidates: list[tuple[dict[str, str], list[int], LineString]] = []
     endpoint_counts: dict[int, int] = {}
 
     for way_id, way in ways.items():
         if way_id in excluded_way_ids:
             continue
-        if not way.tags:
-            continue
-        if exclude_cut_tags and _matches_tags(way.tags, exclude_cut_tags):
-            continue
-        if _is_area_way(way):
-            continue
-        if not _is_splitter_feature(way.tags):
-            continue
-        if not _way_intersects_bbox(way, nodes, process_bbox):
-            continue
-
-        available_node_refs = [node_id for node_id in way.node_refs if node_id in nodes]
-        if len(available_node_refs) < 2:
+        splitter = cache.splitter_line(way, nodes, exclude_cut_tags)
+        if splitter is None:
             continue
-
-        coordinates = [nodes[node_id] for node_id in available_node_refs]
-        if len(set(coordinates)) < 2:
+        available_node_refs, line = splitter
+        if not _bounds_intersect_bbox(line.bounds, process_bbox):
             continue
 
-        splitter_candidates.append((way.tags, available_node_refs, coordinates))
+        splitter_candidates.append((way.tags, available_node_refs, line))
         endpoint_counts[available_node_refs[0]] = endpoint_counts.get(available_node_refs[0], 0) + 1
         endpoint_counts[available_node_refs[-1]] = (
             endpoint_counts.get(available_node_refs[-1], 0) + 1
         )
 
-    lines: list[_SplitterData] = []
-
-    for tags, available_node_refs, coordinates in splitter_candidates:
-        line = LineString(coordinates)
-        if line.is_empty:
-            continue
-        if not _bounds_intersect_bbox(line.bounds, process_bbox):
-            continue
-        lines.append(
-            _SplitterData(
-                geometry=line,
-                tags=tags,
-                round_start=endpoint_counts.get(available_node_refs[0], 0) == 1,
-                round_end=endpoint_counts.get(available_node_refs[-1], 0) == 1,
-            )
+    return [
+        _SplitterData(
+            geometry=line,
+            tags=tags,
+            round_start=endpoint_counts.get(available_node_refs[0], 0) == 1,
+            round_end=endpoint_counts.get(available_node_refs[-1], 0) == 1,
         )
+        for tags, available_node_refs, line in splitter_candidates
+    ]
+
+
+def _splitter_line(
+    way: _WayData,
+    nodes: _NodeStore,
+    exclude_cut_tags: dict[str, OSMTagValue] | None,
+) -> tuple[list[int], LineString] | None:
+    """Build the line of a linear object that may split target polygons.
 
-    return lines
+    Arguments:
+        way (_WayData): Parsed OSM way.
+        nodes (_NodeStore): Node coordinate mapping.
+        exclude_cut_tags (dict[str, OSMTagValue] | None): Optional tag filter
+            for linear features that must not cut polygons.
+
+    Returns:
+        tuple[list[int], LineString] | None: Node refs with known coordinates and the line
+            geometry, or None when the way is not a splitter.
+    """
+    if not _is_splitter_way(way, exclude_cut_tags):
+        return None
+
+    available_node_refs, lonlat = nodes.resolve(way.node_refs)
+    coordinates = [tuple(coordinate) for coordinate in lonlat.tolist()]
+    if len(available_node_refs) < 2 or len(set(coordinates)) < 2:
+        return None
+
+    line = LineString(coordinates)
+    if line.is_empty:
+        return None
+    return available_node_refs.tolist(), line
+
+
+def _is_splitter_way(way: _WayData, exclude_cut_tags: dict[str, OSMTagValue] | None) -> bool:
+    """Return whether the tags of a way make it a linear object that may split polygons."""
+    if not way.tags or _is_area_way(way):
+        return False
+    if exclude_cut_tags and _matches_tags(way.tags, exclude_cut_tags):
+        return False
+    return _is_splitter_feature(way.tags)
 
 
 def _is_splitter_feature(tags: dict[str, str]) -> bool:
@@ -1747,10 +3115,9 @@ def _is_splitter_feature(tags: dict[str, str]) -> bool:
 
 
 def _preprocess_polygons(
-    target_polygons: list[Polygon],
-    hole_polygons: list[Polygon],
-    point_holes: list[_PointHoleData],
-    splitter_lines: list[_SplitterData],
+    target_indices: list[int],
+    merge_key: tuple[tuple[str, str], ...],
+    features: _CutFeatureIndex,
     smooth_strength: float,
     merge_distance: float,
     split_width: float,
@@ -1762,13 +3129,11 @@ def _preprocess_polygons(
     """Apply projected geometry cleanup to one polygon group.
 
     Arguments:
-        target_polygons (list[Polygon]): Source polygons for one merge group.
-        hole_polygons (list[Polygon]): Area polygons that should be
-            subtracted from the targets.
-        point_holes (list[_PointHoleData]): Point obstacles that should carve
-            circular holes.
-        splitter_lines (list[_SplitterData]): Linear features that may split
-            the targets.
+        target_indices (list[int]): Indices of the group polygons among the indexed area
+            polygons.
+        merge_key (tuple[tuple[str, str], ...]): Merge key of the group, polygons of the
+            other groups are subtracted from the targets.
+        features (_CutFeatureIndex): Indexed splitters, area holes and point holes.
         smooth_strength (float): Corner-rounding strength in the [0, 1]
             range.
         merge_distance (float): Optional gap-closing merge distance in
@@ -1783,36 +3148,28 @@ def _preprocess_polygons(
     Returns:
         list[Polygon]: Cleaned output polygons in geographic coordinates.
     """
-    if not target_polygons:
+    if not target_indices:
         return []
 
-    target_union = unary_union(target_polygons)
+    target_union = unary_union([features.area_polygons[index] for index in target_indices])
     target_bounds = target_union.bounds
-    forward_transformer, backward_transformer = _build_local_transformers(target_union)
+    epsg_code = _local_epsg_code(target_union)
+    _, backward_transformer = _local_transformers(epsg_code)
 
-    projected_targets = _transform_polygons(target_polygons, forward_transformer)
+    projected_targets = [
+        polygon for index in target_indices for polygon in features.projected_area(index, epsg_code)
+    ]
     working_geometry = make_valid(unary_union(projected_targets))
 
-    relevant_splitter_lines = [
-        splitter
-        for splitter in splitter_lines
-        if _bounds_intersect_bbox(splitter.geometry.bounds, target_bounds)
-    ]
-    relevant_hole_polygons = [
-        polygon
-        for polygon in hole_polygons
-        if _bounds_intersect_bbox(polygon.bounds, target_bounds)
-    ]
-    relevant_point_holes = [
-        point_hole
-        for point_hole in point_holes
-        if _bounds_intersect_bbox(point_hole.geometry.bounds, target_bounds)
-    ]
+    relevant_splitters = features.query_splitters(target_bounds)
+    relevant_areas = features.query_areas(target_bounds, merge_key)
+    relevant_point_holes = features.query_point_holes(target_bounds)
 
-    if relevant_splitter_lines and split_width > 0:
+    if relevant_splitters and split_width > 0:
         split_buffers: list[BaseGeometry] = []
-        for splitter in relevant_splitter_lines:
-            projected_line = make_valid(_transform_geometry(splitter.geometry, forward_transformer))
+        for index in relevant_splitters:
+            splitter = features.splitter_lines[index]
+            projected_line = features.projected_splitter(index, epsg_code)
             if projected_line.is_empty or not projected_line.intersects(working_geometry):
                 continue
 
@@ -1836,28 +3193,24 @@ def _preprocess_polygons(
         return []
 
     post_split_merge_distance = merge_distance
-    if relevant_splitter_lines and split_width > 0:
+    if relevant_splitters and split_width > 0:
         # Keep post-cut merging conservative so roads are not bridged back together.
         post_split_merge_distance = min(merge_distance, max(0.25, split_width * 0.2))
 
     merged = _merge_connected_polygons(working_polygons, post_split_merge_distance)
 
     hole_geometries: list[BaseGeometry] = []
-    if relevant_hole_polygons:
+    for index in relevant_areas:
         hole_geometries.extend(
             polygon
-            for polygon in _transform_polygons(relevant_hole_polygons, forward_transformer)
+            for polygon in features.projected_area(index, epsg_code)
             if polygon.intersects(merged)
         )
-    if relevant_point_holes:
-        for point_hole in relevant_point_holes:
-            projected_point = _transform_geometry(point_hole.geometry, forward_transformer)
-            if projected_point.is_empty:
-                continue
-            buffered_point = projected_point.buffer(point_hole.radius)
-            if buffered_point.is_empty or not buffered_point.intersects(merged):
-                continue
-            hole_geometries.append(buffered_point)
+    for index in relevant_point_holes:
+        buffered_point = features.projected_point_hole(index, epsg_code)
+        if buffered_point.is_empty or not buffered_point.intersects(merged):
+            continue
+        hole_geometries.append(buffered_point)
     if hole_geometries:
         hole_mask = make_valid(unary_union(hole_geometries))
         merged = make_valid(merged.difference(hole_mask))
@@ -1929,6 +3282,7 @@ def _preprocess_target_polygon_groups(
     narrow_connection_width: float,
     min_part_area: float,
     min_part_width: float,
+    workers: int = 1,
 ) -> list[_ProcessedPolygonData]:
     """Process target polygons per normalized tag group.
 
@@ -1950,6 +3304,9 @@ def _preprocess_target_polygon_groups(
             for breaking thin bridges.
         min_part_area (float): Minimum fragment area in square meters.
         min_part_width (float): Minimum effective fragment width in meters.
+        workers (int): Number of worker processes. Groups are independent, so with more
+            than one worker they are processed in a process pool and the results are
+            collected in the group order, keeping the output identical to the serial run.
 
     Returns:
         list[_ProcessedPolygonData]: Processed polygons paired with their
@@ -1962,39 +3319,66 @@ def _preprocess_target_polygon_groups(
     for target_polygon in target_polygons:
         grouped_targets.setdefault(target_polygon.merge_key, []).append(target_polygon)
 
-    group_geometries = {
-        merge_key: [target.geometry for target in group_targets]
-        for merge_key, group_targets in grouped_targets.items()
+    area_polygons = list(hole_polygons)
+    area_owners: list[tuple[tuple[str, str], ...] | None] = [None] * len(hole_polygons)
+    group_indices: dict[tuple[tuple[str, str], ...], list[int]] = {}
+    for merge_key, group_targets in grouped_targets.items():
+        group_indices[merge_key] = list(
+            range(len(area_polygons), len(area_polygons) + len(group_targets))
+        )
+        area_polygons.extend(target.geometry for target in group_targets)
+        area_owners.extend([merge_key] * len(group_targets))
+    features = _CutFeatureIndex(
+        splitter_lines=splitter_lines,
+        area_polygons=area_polygons,
+        area_owners=area_owners,
+        point_holes=point_holes,
+    )
+
+    options = {
+        "smooth_strength": smooth_strength,
+        "merge_distance": merge_distance,
+        "split_width": split_width,
+        "shrink_distance": shrink_distance,
+        "narrow_connection_width": narrow_connection_width,
+        "min_part_area": min_part_area,
+        "min_part_width": min_part_width,
     }
+    merge_keys = list(grouped_targets)
+    workers = min(workers, len(merge_keys))
+    if workers > 1:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_polygon_group_worker,
+            initargs=(_encode_cut_features(features),),
+        ) as executor:
+            encoded_outputs = executor.map(
+                _preprocess_polygon_group_worker,
+                [group_indices[merge_key] for merge_key in merge_keys],
+                merge_keys,
+                [options] * len(merge_keys),
+            )
+            group_outputs = [list(from_wkb(encoded)) for encoded in encoded_outputs]
+    else:
+        group_outputs = [
+            _preprocess_polygons(
+                target_indices=group_indices[merge_key],
+                merge_key=merge_key,
+                features=features,
+                **options,
+            )
+            for merge_key in merge_keys
+        ]
 
     processed_polygons: list[_ProcessedPolygonData] = []
-    for merge_key, group_targets in grouped_targets.items():
-        group_holes = list(hole_polygons)
-        for other_merge_key, other_geometries in group_geometries.items():
-            if other_merge_key == merge_key:
-                continue
-            group_holes.extend(other_geometries)
+    for merge_key, group_output_polygons in zip(merge_keys, group_outputs):
+        if not group_output_polygons:
+            continue
 
+        group_targets = grouped_targets[merge_key]
         group_target_keys = {
             key for target_polygon in group_targets for key in target_polygon.target_keys
         }
-
-        group_output_polygons = _preprocess_polygons(
-            target_polygons=group_geometries[merge_key],
-            hole_polygons=group_holes,
-            point_holes=point_holes,
-            splitter_lines=splitter_lines,
-            smooth_strength=smooth_strength,
-            merge_distance=merge_distance,
-            split_width=split_width,
-            shrink_distance=shrink_distance,
-            narrow_connection_width=narrow_connection_width,
-            min_part_area=min_part_area,
-            min_part_width=min_part_width,
-        )
-        if not group_output_polygons:
-            continue
-
         group_tags = _common_output_tags(
             [target_polygon.tags for target_polygon in group_targets],
             merge_key,
@@ -2008,6 +3392,80 @@ def _preprocess_target_polygon_groups(
     return processed_polygons
 
 
+_WORKER_CUT_FEATURES: _CutFeatureIndex | None = None
+
+
+def _encode_cut_features(features: _CutFeatureIndex) -> tuple:
+    """Return a compact picklable form of the cut features with geometry encoded as WKB."""
+    return (
+        to_wkb([splitter.geometry for splitter in features.splitter_lines]),
+        [
+            (splitter.tags, splitter.round_start, splitter.round_end)
+            for splitter in features.splitter_lines
+        ],
+        to_wkb(features.area_polygons),
+        features.area_owners,
+        to_wkb([point_hole.geometry for point_hole in features.point_holes]),
+        [(point_hole.radius, point_hole.tags) for point_hole in features.point_holes],
+    )
+
+
+def _decode_cut_features(payload: tuple) -> _CutFeatureIndex:
+    """Rebuild the cut feature index from the output of _encode_cut_features()."""
+    (
+        splitter_geometries,
+        splitter_data,
+        area_geometries,
+        area_owners,
+        point_geometries,
+        point_data,
+    ) = payload
+    return _CutFeatureIndex(
+        splitter_lines=[
+            _SplitterData(
+                geometry=geometry, tags=tags, round_start=round_start, round_end=round_end
+            )
+            for geometry, (tags, round_start, round_end) in zip(
+                from_wkb(splitter_geometries), splitter_data
+            )
+        ],
+        area_polygons=list(from_wkb(area_geometries)),
+        area_owners=area_owners,
+        point_holes=[
+            _PointHoleData(geometry=geometry, radius=radius, tags=tags)
+            for geometry, (radius, tags) in zip(from_wkb(point_geometries), point_data)
+        ],
+    )
+
+
+def _init_polygon_group_worker(payload: tuple) -> None:
+    """Process pool initializer, decodes the cut features once per worker."""
+    global _WORKER_CUT_FEATURES
+    _WORKER_CUT_FEATURES = _decode_cut_features(payload)
+
+
+def _preprocess_polygon_group_worker(
+    target_indices: list[int],
+    merge_key: tuple[tuple[str, str], ...],
+    options: dict[str, float],
+) -> list[bytes]:
+    """Run _preprocess_polygons() for one group in a worker process.
+
+    Returns:
+        list[bytes]: Output polygons encoded as WKB. WKB keeps the full coordinate precision,
+            so the decoded polygons are identical to the ones of the serial run.
+    """
+    if _WORKER_CUT_FEATURES is None:
+        raise RuntimeError("Polygon group worker is not initialized.")
+    polygons = _preprocess_polygons(
+        target_indices=target_indices,
+        merge_key=merge_key,
+        features=_WORKER_CUT_FEATURES,
+        **options,
+    )
+    return list(to_wkb(polygons))
+
+
 def _smooth_polygons(
     polygons: list[Polygon],
     strength: float,
@@ -2608,8 +4066,26 @@ def _build_local_transformers(reference_geometry: BaseGeometry) -> tuple[Transfo
         tuple[Transformer, Transformer]: Forward and backward CRS
             transformers.
     """
+    return _local_transformers(_local_epsg_code(reference_geometry))
+
+
+def _local_epsg_code(reference_geometry: BaseGeometry) -> int:
+    """Return the EPSG code of the UTM zone containing the geometry centroid."""
     centroid = reference_geometry.centroid
-    epsg_code = _utm_epsg_for_coordinate(centroid.x, centroid.y)
+    return _utm_epsg_for_coordinate(centroid.x, centroid.y)
+
+
+@lru_cache(maxsize=None)
+def _local_transformers(epsg_code: int) -> tuple[Transformer, Transformer]:
+    """Return cached forward and backward transformers between WGS84 and a UTM zone.
+
+    Arguments:
+        epsg_code (int): EPSG code of the UTM zone.
+
+    Returns:
+        tuple[Transformer, Transformer]: Forward and backward CRS
+            transformers.
+    """
     forward = Transformer.from_crs("EPSG:4326", f"EPSG:{epsg_code}", always_xy=True)
     backward = Transformer.from_crs(f"EPSG:{epsg_code}", "EPSG:4326", always_xy=True)
     return forward, backward
@@ -2765,45 +4241,25 @@ def _geometry_to_polygons(geometry: BaseGeometry) -> list[Polygon]:
 
 
 def _remove_target_elements(
-    root: ET.Element,
+    data: _OSMData,
     target_way_ids: set[int],
     target_relation_ids: set[int],
-    ways: dict[int, _WayData],
-    relations: dict[int, _RelationData],
 ) -> int:
-    """Remove replaced target elements from the XML tree.
+    """Mark replaced target elements as removed.
 
     Arguments:
-        root (ET.Element): Root OSM XML element.
+        data (_OSMData): Indexed OSM file.
         target_way_ids (set[int]): Way ids to remove.
         target_relation_ids (set[int]): Relation ids to remove.
-        ways (dict[int, _WayData]): Parsed OSM ways by id.
-        relations (dict[int, _RelationData]): Parsed OSM relations by id.
 
     Returns:
         int: Number of removed way and relation elements.
     """
-    removed_elements = 0
-
-    for way_id in target_way_ids:
-        way = ways.get(way_id)
-        if not way:
-            continue
-        root.remove(way.element)
-        removed_elements += 1
-
-    for relation_id in target_relation_ids:
-        relation = relations.get(relation_id)
-        if not relation:
-            continue
-        root.remove(relation.element)
-        removed_elements += 1
-
-    return removed_elements
+    return _remove_ways(data, target_way_ids) + _remove_relations(data, target_relation_ids)
 
 
 def _append_polygons(
-    root: ET.Element,
+    data: _OSMData,
     polygons: list[_ProcessedPolygonData],
     *,
     prefer_negative_ids: bool = False,
@@ -2811,7 +4267,7 @@ def _append_polygons(
     """Append processed polygons as OSM ways and relations.
 
     Arguments:
-        root (ET.Element): Root OSM XML element.
+        data (_OSMData): Indexed OSM file.
         polygons (list[_ProcessedPolygonData]): Processed polygons paired with
             output tags.
         prefer_negative_ids (bool): If True, allocate new primitive ids from the
@@ -2820,26 +4276,17 @@ def _append_polygons(
     Returns:
         tuple[int, int]: Number of created ways and created relations.
     """
-    node_ids = [
-        int(existing_node_id)
-        for node in root.findall("node")
-        if (existing_node_id := node.get("id")) is not None
-    ]
-    way_ids = [
-        int(existing_way_id)
-        for way in root.findall("way")
-        if (existing_way_id := way.get("id")) is not None
-    ]
-    relation_ids = [
-        int(existing_relation_id)
-        for relation in root.findall("relation")
-        if (existing_relation_id := relation.get("id")) is not None
-    ]
-
-    next_node_id = _initial_primitive_id(node_ids, prefer_negative=prefer_negative_ids)
-    next_way_id = _initial_primitive_id(way_ids, prefer_negative=prefer_negative_ids)
-    next_relation_id = _initial_primitive_id(relation_ids, prefer_negative=prefer_negative_ids)
+    next_node_id = _initial_primitive_id(
+        data.nodes.ids[~data.removed_nodes], prefer_negative=prefer_negative_ids
+    )
+    next_way_id = _initial_primitive_id(data.ways.keys(), prefer_negative=prefer_negative_ids)
+    next_relation_id = _initial_primitive_id(
+        data.relations.keys(), prefer_negative=prefer_negative_ids
+    )
     id_step = -1 if prefer_negative_ids else 1
+    node_ids = array("q")
+    node_lonlat = array("d")
+    elements: list[ET.Element] = []
 
     node_cache: dict[tuple[float, float], int] = {}
     created_ways = 0
@@ -2863,12 +4310,8 @@ def _append_polygons(
         node_id = next_node_id
         next_node_id += id_step
         node_cache[rounded] = node_id
-
-        node_element = ET.SubElement(root, "node")
-        node_element.set("id", str(node_id))
-        node_element.set("lat", f"{rounded[1]:.10f}")
-        node_element.set("lon", f"{rounded[0]:.10f}")
-        node_element.set("version", "1")
+        node_ids.append(node_id)
+        node_lonlat.extend(rounded)
         return node_id
 
     def append_way(
@@ -2890,7 +4333,8 @@ def _append_polygons(
         next_way_id += id_step
         created_ways += 1
 
-        way_element = ET.SubElement(root, "way")
+        way_element = ET.Element("way")
+        elements.append(way_element)
         way_element.set("id", str(way_id))
         way_element.set("version", "1")
         for coordinate in coordinates:
@@ -2923,7 +4367,8 @@ def _append_polygons(
         next_relation_id += id_step
         created_relations += 1
 
-        relation_element = ET.SubElement(root, "relation")
+        relation_element = ET.Element("relation")
+        elements.append(relation_element)
         relation_element.set("id", str(relation_id))
         relation_element.set("version", "1")
 
@@ -2947,36 +4392,42 @@ def _append_polygons(
             tag_element.set("k", key)
             tag_element.set("v", value)
 
+    _add_osm_elements(
+        data,
+        np.frombuffer(node_ids, dtype=np.int64),
+        np.frombuffer(node_lonlat, dtype=np.float64),
+        elements,
+    )
     return created_ways, created_relations
 
 
-def _initial_primitive_id(existing_ids: list[int], *, prefer_negative: bool = False) -> int:
+def _initial_primitive_id(
+    existing_ids: Iterable[int] | np.ndarray, *, prefer_negative: bool = False
+) -> int:
     """Return the next OSM primitive id in the requested direction."""
+    ids = (
+        np.fromiter(existing_ids, dtype=np.int64)
+        if not isinstance(existing_ids, np.ndarray)
+        else existing_ids
+    )
     if prefer_negative:
-        return min([0, *existing_ids]) - 1
-    return max([0, *existing_ids]) + 1
-
+        return min(0, int(ids.min(initial=0))) - 1
+    return max(0, int(ids.max(initial=0))) + 1
 
-def _remove_maps4fs_bounds_overlays(root: ET.Element) -> tuple[int, int]:
-    """Remove previously generated maps4fs bounds overlay ways and relations."""
-    removed_relations = 0
-    removed_ways = 0
 
-    for relation_element in list(root.findall("relation")):
-        tags = _extract_tags(relation_element)
-        if tags.get(_M4FS_OVERLAY_TAG_KEY) != _M4FS_OVERLAY_TAG_VALUE:
-            continue
-        root.remove(relation_element)
-        removed_relations += 1
-
-    for way_element in list(root.findall("way")):
-        tags = _extract_tags(way_element)
-        if tags.get(_M4FS_OVERLAY_TAG_KEY) != _M4FS_OVERLAY_TAG_VALUE:
-            continue
-        root.remove(way_element)
-        removed_ways += 1
-
-    return removed_relations, removed_ways
+def _remove_maps4fs_bounds_overlays(data: _OSMData) -> tuple[int, int]:
+    """Mark previously generated maps4fs bounds overlay ways and relations as removed."""
+    overlay_relation_ids = [
+        relation_id
+        for relation_id, relation in data.relations.items()
+        if relation.tags.get(_M4FS_OVERLAY_TAG_KEY) == _M4FS_OVERLAY_TAG_VALUE
+    ]
+    overlay_way_ids = [
+        way_id
+        for way_id, way in data.ways.items()
+        if way.tags.get(_M4FS_OVERLAY_TAG_KEY) == _M4FS_OVERLAY_TAG_VALUE
+    ]
+    return _remove_relations(data, overlay_relation_ids), _remove_ways(data, overlay_way_ids)
 
 
 def _maps4fs_bounds_tags(bounds_kind: str) -> dict[str, str]:
@@ -3029,66 +4480,31 @@ def _rotated_rectangle_coordinates(
     return coordinates
 
 
-def _remove_orphan_untagged_nodes(root: ET.Element) -> int:
-    """Remove nodes that have no tags and are not referenced by any way or relation.
+def _remove_orphan_untagged_nodes(data: _OSMData) -> int:
+    """Mark nodes that have no tags and are not referenced by any way or relation as removed.
 
     Arguments:
-        root (ET.Element): Root OSM XML element.
+        data (_OSMData): Indexed OSM file.
 
     Returns:
         int: Number of removed orphan nodes.
     """
-    referenced_node_ids: set[int] = set()
-
-    for way_element in root.findall("way"):
-        for nd_element in way_element.findall("nd"):
-            ref_value = nd_element.get("ref")
-            if ref_value is None:
-                continue
-            try:
-                referenced_node_ids.add(int(ref_value))
-            except ValueError:
-                continue
-
-    for relation_element in root.findall("relation"):
-        for member_element in relation_element.findall("member"):
-            if member_element.get("type") != "node":
-                continue
-            ref_value = member_element.get("ref")
-            if ref_value is None:
-                continue
-            try:
-                referenced_node_ids.add(int(ref_value))
-            except ValueError:
-                continue
-
-    removed_nodes = 0
-    for node_element in list(root.findall("node")):
-        node_id = node_element.get("id")
-        if node_id is None:
-            continue
-        try:
-            parsed_node_id = int(node_id)
-        except ValueError:
-            continue
-        if parsed_node_id in referenced_node_ids:
-            continue
-        if node_element.findall("tag"):
-            continue
-
-        root.remove(node_element)
-        removed_nodes += 1
-
-    return removed_nodes
-
-
-def _ensure_primitive_versions(root: ET.Element) -> None:
-    """Ensure all OSM primitives have a version attribute.
+    referenced_node_ids = [_way_node_refs(data, set(data.ways))]
+    referenced_node_ids.append(
+        np.asarray(
+            [
+                member_ref
+                for relation in data.relations.values()
+                for member_type, member_ref, _ in relation.members
+                if member_type == "node"
+            ],
+            dtype=np.int64,
+        )
+    )
 
-    Arguments:
-        root (ET.Element): Root OSM XML element.
-    """
-    for primitive_name in ("node", "way", "relation"):
-        for element in root.findall(primitive_name):
-            if not element.get("version"):
-                element.set("version", "1")
+    orphan_nodes = ~np.isin(data.nodes.ids, np.concatenate(referenced_node_ids))
+    if data.node_tags:
+        orphan_nodes &= ~np.isin(
+            data.nodes.ids, np.fromiter(data.node_tags, dtype=np.int64, count=len(data.node_tags))
+        )
+    return _remove_nodes(data, orphan_nodes)
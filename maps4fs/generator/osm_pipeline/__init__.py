@@ -2,8 +2,21 @@
 
 from __future__ import annotations
 
+from maps4fs.generator.osm_pipeline.cache import OSMFeatureCache, OSMFeatureDiskCache
 from maps4fs.generator.osm_pipeline.pipeline import OSMRasterPipeline
 from maps4fs.generator.osm_pipeline.projector import LatLonProjector
-from maps4fs.generator.osm_pipeline.source import OSMNXFeatureSource
+from maps4fs.generator.osm_pipeline.source import (
+    OSMFeatureTable,
+    OSMNXFeatureSource,
+    OSMXMLFeatureSource,
+)
 
-__all__ = ["LatLonProjector", "OSMNXFeatureSource", "OSMRasterPipeline"]
+__all__ = [
+    "LatLonProjector",
+    "OSMFeatureCache",
+    "OSMFeatureDiskCache",
+    "OSMFeatureTable",
+    "OSMNXFeatureSource",
+    "OSMRasterPipeline",
+    "OSMXMLFeatureSource",
+]
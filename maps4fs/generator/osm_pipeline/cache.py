@@ -0,0 +1,222 @@
+"""Caches of OSM features: a map-scoped one shared by every texture pass of one generation
+and a persistent one reused across generations of the same OSM file."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+import time
+import uuid
+from concurrent.futures import Future
+from threading import Lock
+from typing import Any, Callable
+
+import geopandas as gpd
+import numpy as np
+import osmnx as ox
+import pandas as pd
+from shapely import from_wkb, to_wkb
+
+from maps4fs.generator.constants import Parameters
+from maps4fs.generator.osm import remove_file
+
+# Bump when the stored payload changes, so older entries are not decoded.
+_DISK_FORMAT_VERSION = 1
+
+TagFilter = dict[str, str | list[str] | bool]
+
+
+class OSMFeatureCache:
+    """Thread-safe cache of fetched OSM features keyed by the source and the tag filter.
+
+    The source key identifies the data (e.g. the local OSM file and its version or the
+    Overpass bbox), so passes rendering different rasters from the same data share the
+    fetched features. Concurrent requests of the same key wait for the first fetch instead of
+    fetching again. Sources themselves can be shared as well, so a local file is parsed once.
+    """
+
+    def __init__(self) -> None:
+        self._entries: dict[tuple[str, str], Future[gpd.GeoDataFrame | None]] = {}
+        self._sources: dict[str, Any] = {}
+        self._lock = Lock()
+
+    @staticmethod
+    def tags_key(tags: TagFilter) -> str:
+        """Build a stable cache key for tag dictionary values."""
+        return json.dumps(tags, sort_keys=True, separators=(",", ":"), ensure_ascii=True)
+
+    def shared_source(self, source: Any) -> Any:
+        """Return the registered source with the same cache key, registering this one if
+        there is none yet."""
+        with self._lock:
+            return self._sources.setdefault(source.cache_key, source)
+
+    def contains(self, source_key: str, tags: TagFilter) -> bool:
+        """Return whether the features were fetched or are being fetched."""
+        with self._lock:
+            return (source_key, self.tags_key(tags)) in self._entries
+
+    def get_or_fetch(
+        self,
+        source_key: str,
+        tags: TagFilter,
+        fetch: Callable[[TagFilter], gpd.GeoDataFrame | None],
+    ) -> gpd.GeoDataFrame | None:
+        """Return cached features or fetch and store them.
+
+        Arguments:
+            source_key (str): Key of the source the features come from.
+            tags (TagFilter): Tag filter.
+            fetch (Callable[[TagFilter], gpd.GeoDataFrame | None]): Fetches features for the
+                tag filter on a cache miss.
+
+        Returns:
+            gpd.GeoDataFrame | None: Matching features or None.
+        """
+        key = (source_key, self.tags_key(tags))
+        with self._lock:
+            future = self._entries.get(key)
+            owner = future is None
+            if future is None:
+                future = Future()
+                self._entries[key] = future
+        if not owner:
+            return future.result()
+
+        try:
+            objects = fetch(tags)
+        except BaseException as exc:
+            with self._lock:
+                self._entries.pop(key, None)
+            future.set_exception(exc)
+            raise
+        future.set_result(objects)
+        return objects
+
+    def clear(self) -> None:
+        """Drop all cached features and sources."""
+        with self._lock:
+            self._entries.clear()
+            self._sources.clear()
+
+
+class OSMFeatureDiskCache:
+    """Persistent cache of fetched OSM features keyed by the OSM content and the tag filter.
+
+    Entries are the columnar form of encode_features() (WKB geometry and sparse tag arrays),
+    so warm entries are loaded without parsing the OSM data. Empty results are stored as well.
+    When the cache grows over its size limit the least recently used entries are evicted.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        *,
+        max_bytes: int = Parameters.OSM_FEATURES_CACHE_MAX_BYTES,
+    ) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path(self, content_key: str, tags: TagFilter) -> str:
+        """Return the path of the entry for the OSM content and the tag filter."""
+        # Features are built by osmnx, so its version is part of the key as well.
+        key = "|".join(
+            (
+                str(_DISK_FORMAT_VERSION),
+                ox.__version__,
+                content_key,
+                OSMFeatureCache.tags_key(tags),
+            )
+        )
+        return os.path.join(self.directory, f"{hashlib.sha256(key.encode()).hexdigest()}.pkl")
+
+    def get(self, content_key: str, tags: TagFilter) -> tuple[bool, gpd.GeoDataFrame | None]:
+        """Return whether the entry exists and the stored features (None for no features)."""
+        path = self.path(content_key, tags)
+        try:
+            with open(path, "rb") as file:
+                payload = pickle.load(file)
+        except FileNotFoundError:
+            return False, None
+        except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+            remove_file(path)
+            return False, None
+
+        # The access time drives LRU eviction.
+        try:
+            os.utime(path, (time.time(), os.stat(path).st_mtime))
+        except FileNotFoundError:
+            pass
+        if payload is None:
+            return True, None
+        return True, decode_features(payload)
+
+    def put(self, content_key: str, tags: TagFilter, objects: gpd.GeoDataFrame | None) -> None:
+        """Store the features and evict entries over the size limit."""
+        path = self.path(content_key, tags)
+        payload = None if objects is None else encode_features(objects)
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(temp_path, "wb") as file:
+                pickle.dump(payload, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, path)
+        finally:
+            remove_file(temp_path)
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove the least recently used entries over the size limit."""
+        entries: list[tuple[float, int, str]] = []
+        for filename in os.listdir(self.directory):
+            if not filename.endswith(".pkl"):
+                continue
+            path = os.path.join(self.directory, filename)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_atime, stat.st_size, path))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_bytes:
+                break
+            remove_file(path)
+            total_size -= size
+
+
+def encode_features(objects: gpd.GeoDataFrame) -> tuple:
+    """Return a compact picklable form of the features: geometry as WKB and, for every tag
+    column, only the rows with a value."""
+    geometry_name = objects.geometry.name
+    tag_columns = []
+    for name in objects.columns:
+        if name == geometry_name:
+            continue
+        column = objects[name]
+        rows = np.flatnonzero(column.notna().to_numpy())
+        values = column.to_numpy(dtype=object)[rows]
+        tag_columns.append((name, column.dtype, rows.astype(np.int32), values))
+    return (
+        objects.index,
+        objects.crs,
+        list(objects.columns),
+        geometry_name,
+        to_wkb(objects.geometry.values),
+        tag_columns,
+    )
+
+
+def decode_features(payload: tuple) -> gpd.GeoDataFrame:
+    """Rebuild the features from the output of encode_features()."""
+    index, crs, columns, geometry_name, geometry, tag_columns = payload
+    data: dict[str, Any] = {}
+    for name, dtype, rows, values in tag_columns:
+        dense = np.full(len(index), np.nan, dtype=object)
+        dense[rows] = values
+        data[name] = pd.Series(dense, index=index, dtype=object).astype(dtype)
+    data[geometry_name] = gpd.GeoSeries(from_wkb(geometry), index=index, crs=crs)
+    return gpd.GeoDataFrame(data, index=index, geometry=geometry_name, crs=crs)[columns]
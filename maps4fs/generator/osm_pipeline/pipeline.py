@@ -2,10 +2,9 @@
 
 from __future__ import annotations
 
-import json
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from dataclasses import dataclass
-from threading import Lock
+from dataclasses import dataclass, field
+from functools import partial
 from typing import Any, Generator
 
 import geopandas as gpd
@@ -13,38 +12,74 @@ import numpy as np
 from tqdm import tqdm
 
 from maps4fs.generator.constants import Paths
+from maps4fs.generator.monitor import get_current_session, run_in_session
+from maps4fs.generator.osm_pipeline.cache import (
+    OSMFeatureCache,
+    OSMFeatureDiskCache,
+)
 from maps4fs.generator.osm_pipeline.rasterizer import OSMGeometryRasterizer
+from maps4fs.generator.osm_pipeline.source import OSMXMLFeatureSource
 
 
 @dataclass
 class OSMRasterPipeline:
-    """Coordinates feature fetching and geometry rasterization."""
+    """Coordinates feature fetching and geometry rasterization.
+
+    Fetched features live in the feature cache, which can be shared by several pipelines
+    (e.g. all texture passes of one map), while the rasterizer stays specific to the pipeline.
+    With a disk cache, features of sources with a content key also persist across generations.
+    """
 
     source: Any
     rasterizer: OSMGeometryRasterizer
     logger: Any
-
-    def __post_init__(self) -> None:
-        self._cache: dict[str, gpd.GeoDataFrame | None] = {}
-        self._cache_lock = Lock()
-
-    @staticmethod
-    def _tags_key(tags: dict[str, str | list[str] | bool]) -> str:
-        """Build a stable cache key for tag dictionary values."""
-        return json.dumps(tags, sort_keys=True, separators=(",", ":"), ensure_ascii=True)
+    cache: OSMFeatureCache = field(default_factory=OSMFeatureCache)
+    disk_cache: OSMFeatureDiskCache | None = None
 
     def _get_or_fetch_objects(
         self, tags: dict[str, str | list[str] | bool]
     ) -> gpd.GeoDataFrame | None:
         """Get objects from cache or fetch from source and store result."""
-        key = self._tags_key(tags)
-        with self._cache_lock:
-            if key in self._cache:
-                return self._cache[key]
+        return self.cache.get_or_fetch(self.source.cache_key, tags, self._fetch)
+
+    def _content_key(self) -> str | None:
+        """Return the content key of the source when results are persisted."""
+        if self.disk_cache is None:
+            return None
+        return self.source.content_key
 
+    def _load_from_disk(
+        self, tags: dict[str, str | list[str] | bool]
+    ) -> tuple[bool, gpd.GeoDataFrame | None]:
+        """Return whether the disk cache has the objects and the objects."""
+        content_key = self._content_key()
+        if self.disk_cache is None or content_key is None:
+            return False, None
+        return self.disk_cache.get(content_key, tags)
+
+    def _store_on_disk(
+        self,
+        tags: dict[str, str | list[str] | bool],
+        objects: gpd.GeoDataFrame | None,
+    ) -> None:
+        """Persist fetched objects, unless the source failed to read its data."""
+        content_key = self._content_key()
+        if self.disk_cache is None or content_key is None:
+            return
+        if isinstance(self.source, OSMXMLFeatureSource) and self.source.failed:
+            return
+        try:
+            self.disk_cache.put(content_key, tags, objects)
+        except OSError as exc:
+            self.logger.debug("Could not store OSM features for tags %s: %s", tags, exc)
+
+    def _fetch(self, tags: dict[str, str | list[str] | bool]) -> gpd.GeoDataFrame | None:
+        """Load objects from the disk cache or fetch them from source and persist them."""
+        found, objects = self._load_from_disk(tags)
+        if found:
+            return objects
         objects = self.source.fetch(tags)
-        with self._cache_lock:
-            self._cache[key] = objects
+        self._store_on_disk(tags, objects)
         return objects
 
     def prefetch(
@@ -52,19 +87,30 @@ class OSMRasterPipeline:
         tags_list: list[dict[str, str | list[str] | bool]],
         max_workers: int,
     ) -> None:
-        """Fetch unique tag filters in parallel and populate cache."""
+        """Fetch unique tag filters in parallel and populate cache.
+
+        Network sources are queried from threads. A local OSM file is parsed once by the first
+        query and every query is then a row selection from the parsed features.
+        """
         if not tags_list:
             return
 
+        source_key = self.source.cache_key
         pending_by_key: dict[str, dict[str, str | list[str] | bool]] = {}
-        with self._cache_lock:
-            for tags in tags_list:
-                key = self._tags_key(tags)
-                if key in self._cache or key in pending_by_key:
-                    continue
-                pending_by_key[key] = tags
+        for tags in tags_list:
+            key = self.cache.tags_key(tags)
+            if key in pending_by_key or self.cache.contains(source_key, tags):
+                continue
+            pending_by_key[key] = tags
+
+        for key, tags in list(pending_by_key.items()):
+            found, objects = self._load_from_disk(tags)
+            if found:
+                self.cache.get_or_fetch(source_key, tags, partial(_loaded_features, objects))
+                del pending_by_key[key]
 
         if not pending_by_key:
+            self.logger.debug("OSM prefetch completed from the disk cache.")
             return
 
         workers = max(1, min(max_workers, len(pending_by_key)))
@@ -73,27 +119,26 @@ class OSMRasterPipeline:
             len(pending_by_key),
             workers,
         )
-
+        session_id = get_current_session()
         with ThreadPoolExecutor(max_workers=workers) as executor:
-            future_to_key = {
-                executor.submit(self.source.fetch, tags): key
-                for key, tags in pending_by_key.items()
-            }
+            futures = [
+                executor.submit(
+                    run_in_session,
+                    session_id,
+                    self.cache.get_or_fetch,
+                    source_key,
+                    tags,
+                    self._safe_fetch,
+                )
+                for tags in pending_by_key.values()
+            ]
             with tqdm(
-                total=len(future_to_key),
+                total=len(futures),
                 desc="Prefetching OSM",
                 unit="query",
                 disable=Paths.TQDM_DISABLE,
             ) as progress:
-                for future in as_completed(future_to_key):
-                    key = future_to_key[future]
-                    try:
-                        objects = future.result()
-                    except Exception as exc:
-                        self.logger.debug("OSM prefetch failed for key %s: %s", key, exc)
-                        objects = None
-                    with self._cache_lock:
-                        self._cache[key] = objects
+                for _ in as_completed(futures):
                     progress.update(1)
 
         self.logger.debug(
@@ -102,43 +147,61 @@ class OSMRasterPipeline:
             workers,
         )
 
+    def _safe_fetch(self, tags: dict[str, str | list[str] | bool]) -> gpd.GeoDataFrame | None:
+        """Fetch objects for prefetching, failed fetches are stored as None."""
+        try:
+            return self._fetch(tags)
+        except Exception as exc:
+            self.logger.debug("OSM prefetch failed for tags %s: %s", tags, exc)
+            return None
+
     def polygons(
         self,
         tags: dict[str, str | list[str] | bool],
         width: int | None,
         is_fields: bool,
+        with_tags: bool = True,
     ) -> Generator[tuple[np.ndarray, list[np.ndarray], dict[str, Any], str], None, None]:
-        """Yield rasterized polygons for a tag filter."""
+        """Yield rasterized polygons for a tag filter, with empty tags unless with_tags."""
         objects = self._get_or_fetch_objects(tags)
         if objects is None or objects.empty:
             self.logger.debug("No objects found for tags: %s.", tags)
             return
 
         self.logger.debug("Fetched %s elements for tags: %s.", len(objects), tags)
-        yield from self.rasterizer.polygons(objects, width, is_fields)
+        yield from self.rasterizer.polygons(objects, width, is_fields, with_tags)
 
     def linestrings(
         self,
         tags: dict[str, str | list[str] | bool],
+        with_tags: bool = True,
     ) -> Generator[tuple[list[tuple[int, int]], dict[str, Any]], None, None]:
-        """Yield rasterized linestrings for a tag filter."""
+        """Yield rasterized linestrings for a tag filter, with empty tags unless with_tags."""
         objects = self._get_or_fetch_objects(tags)
         if objects is None or objects.empty:
             self.logger.debug("No objects found for tags: %s.", tags)
             return
 
         self.logger.debug("Fetched %s elements for tags: %s.", len(objects), tags)
-        yield from self.rasterizer.linestrings(objects)
+        yield from self.rasterizer.linestrings(objects, with_tags)
 
     def points(
         self,
         tags: dict[str, str | list[str] | bool],
+        with_tags: bool = True,
     ) -> Generator[tuple[tuple[int, int], dict[str, Any]], None, None]:
-        """Yield rasterized points for a tag filter."""
+        """Yield rasterized points for a tag filter, with empty tags unless with_tags."""
         objects = self._get_or_fetch_objects(tags)
         if objects is None or objects.empty:
             self.logger.debug("No objects found for tags: %s.", tags)
             return
 
         self.logger.debug("Fetched %s elements for tags: %s.", len(objects), tags)
-        yield from self.rasterizer.points(objects)
+        yield from self.rasterizer.points(objects, with_tags)
+
+
+def _loaded_features(
+    objects: gpd.GeoDataFrame | None, _: dict[str, str | list[str] | bool]
+) -> gpd.GeoDataFrame | None:
+    """Fetch function for the feature cache which returns features loaded already."""
+    return objects
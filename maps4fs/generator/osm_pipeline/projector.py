@@ -4,6 +4,9 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 
+import numpy as np
+import shapely
+
 
 @dataclass(frozen=True)
 class LatLonProjector:
@@ -34,3 +37,26 @@ class LatLonProjector:
         x = int((lon - self.minimum_x) / (self.maximum_x - self.minimum_x) * self.raster_size)
         y = int((lat - self.maximum_y) / (self.minimum_y - self.maximum_y) * self.raster_size)
         return x, y
+
+    def pixel_coordinates(self, coordinates: np.ndarray) -> np.ndarray:
+        """Convert an (N, 2) array of lon/lat coordinates to pixel coordinates at once.
+
+        The result matches latlon_to_pixel() for every coordinate, the values are truncated
+        towards zero but kept as float64, so the array can be used by shapely.transform().
+        """
+        pixels = np.empty_like(coordinates, dtype=np.float64)
+        pixels[:, 0] = (
+            (coordinates[:, 0] - self.minimum_x)
+            / (self.maximum_x - self.minimum_x)
+            * self.raster_size
+        )
+        pixels[:, 1] = (
+            (coordinates[:, 1] - self.maximum_y)
+            / (self.minimum_y - self.maximum_y)
+            * self.raster_size
+        )
+        return np.trunc(pixels, out=pixels)
+
+    def project_geometries(self, geometries: np.ndarray) -> np.ndarray:
+        """Project an array of lon/lat geometries to pixel space with one vectorized pass."""
+        return shapely.transform(geometries, self.pixel_coordinates)
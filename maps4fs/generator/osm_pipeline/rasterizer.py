@@ -7,16 +7,21 @@ from typing import Any, Generator
 
 import geopandas as gpd
 import numpy as np
-import pandas as pd
-from shapely import LineString, MultiLineString, MultiPoint, Point, Polygon
+from shapely import LineString, MultiLineString, MultiPoint, Point, Polygon, get_coordinates
 from shapely.geometry import GeometryCollection, MultiPolygon
 
 from maps4fs.generator.osm_pipeline.projector import LatLonProjector
 
+_IGNORED_TAG_COLUMNS = {"geometry", "osmid", "element_type", "action", "visible"}
+
 
 @dataclass
 class OSMGeometryRasterizer:
-    """Converts OSM geometries to raster-space polygons and polylines."""
+    """Converts OSM geometries to raster-space polygons and polylines.
+
+    Objects are walked column-wise: geometries come from the raw geometry array and tags are
+    collected for all rows at once from the non-null cells, only when the caller needs them.
+    """
 
     projector: LatLonProjector
     cap_style: str
@@ -28,13 +33,17 @@ class OSMGeometryRasterizer:
         objects: gpd.GeoDataFrame,
         width: int | None,
         is_fields: bool,
+        with_tags: bool = True,
     ) -> Generator[tuple[np.ndarray, list[np.ndarray], dict[str, Any], str], None, None]:
-        """Yield exterior/interior polygon arrays, tags, and original geometry type."""
-        for _, obj in objects.iterrows():
-            geom_type = obj["geometry"].geom_type
-            osm_tags = self._get_tags_from_osm_object(obj)
+        """Yield exterior/interior polygon arrays, tags, and original geometry type.
+        Without with_tags empty tag dictionaries are yielded."""
+        geometries = objects.geometry.values
+        pixel_geometries = self.projector.project_geometries(geometries)
+        rows_tags = self._rows_tags(objects, with_tags)
+        for geometry, pixel_geometry, osm_tags in zip(geometries, pixel_geometries, rows_tags):
+            geom_type = geometry.geom_type
             try:
-                polygons = self._to_polygons(obj, width)
+                polygons = self._to_polygons(pixel_geometry, width)
             except Exception as exc:
                 self.logger.warning("Error converting object to polygon: %s.", exc)
                 continue
@@ -58,86 +67,56 @@ class OSMGeometryRasterizer:
     def linestrings(
         self,
         objects: gpd.GeoDataFrame,
+        with_tags: bool = True,
     ) -> Generator[tuple[list[tuple[int, int]], dict[str, Any]], None, None]:
         """Yield pixel-space line point lists and tags."""
-        for _, obj in objects.iterrows():
-            geometry = obj["geometry"]
-            osm_tags = self._get_tags_from_osm_object(obj)
-            if isinstance(geometry, LineString):
-                points = [self.projector.latlon_to_pixel(lat, lon) for lon, lat in geometry.coords]
-                yield points, osm_tags
-            elif isinstance(geometry, MultiLineString):
-                for linestring in geometry.geoms:
-                    points = [
-                        self.projector.latlon_to_pixel(lat, lon) for lon, lat in linestring.coords
-                    ]
-                    yield points, osm_tags
+        pixel_geometries = self.projector.project_geometries(objects.geometry.values)
+        rows_tags = self._rows_tags(objects, with_tags)
+        for pixel_geometry, osm_tags in zip(pixel_geometries, rows_tags):
+            if isinstance(pixel_geometry, LineString):
+                yield self._point_tuples(pixel_geometry), osm_tags
+            elif isinstance(pixel_geometry, MultiLineString):
+                for linestring in pixel_geometry.geoms:
+                    yield self._point_tuples(linestring), osm_tags
 
     def points(
         self,
         objects: gpd.GeoDataFrame,
+        with_tags: bool = True,
     ) -> Generator[tuple[tuple[int, int], dict[str, Any]], None, None]:
         """Yield pixel-space points and tags."""
-        for _, obj in objects.iterrows():
-            geometry = obj["geometry"]
-            osm_tags = self._get_tags_from_osm_object(obj)
-            if isinstance(geometry, Point):
-                yield self.projector.latlon_to_pixel(geometry.y, geometry.x), osm_tags
-            elif isinstance(geometry, MultiPoint):
-                for point in geometry.geoms:
-                    yield self.projector.latlon_to_pixel(point.y, point.x), osm_tags
-
-    def _to_polygons(self, obj: pd.core.series.Series, width: int | None) -> list[Polygon]:
-        geometry = obj["geometry"]
-        if isinstance(geometry, Polygon):
-            return [self._polygon_to_pixel_coordinates(geometry)]
-        if isinstance(geometry, MultiPolygon):
-            return [self._polygon_to_pixel_coordinates(poly) for poly in geometry.geoms]
-        if isinstance(geometry, LineString):
-            return self._extract_polygons(self._sequence_to_pixel(geometry, width))
-        if isinstance(geometry, Point):
-            return self._extract_polygons(self._sequence_to_pixel(geometry, width))
-
-        self.logger.debug("Geometry type %s not supported.", geometry.geom_type)
+        pixel_geometries = self.projector.project_geometries(objects.geometry.values)
+        rows_tags = self._rows_tags(objects, with_tags)
+        for pixel_geometry, osm_tags in zip(pixel_geometries, rows_tags):
+            if isinstance(pixel_geometry, (Point, MultiPoint)):
+                for point in self._point_tuples(pixel_geometry):
+                    yield point, osm_tags
+
+    def _to_polygons(self, pixel_geometry: Any, width: int | None) -> list[Polygon]:
+        if isinstance(pixel_geometry, Polygon):
+            return [pixel_geometry]
+        if isinstance(pixel_geometry, MultiPolygon):
+            return list(pixel_geometry.geoms)
+        if isinstance(pixel_geometry, (LineString, Point)):
+            buffered = pixel_geometry.buffer(width if width else 0, cap_style=self.cap_style)
+            return self._extract_polygons(buffered)
+
+        self.logger.debug("Geometry type %s not supported.", pixel_geometry.geom_type)
         return []
 
-    def _polygon_to_np(self, polygon: Polygon) -> tuple[np.ndarray, list[np.ndarray]]:
-        coords = list(polygon.exterior.coords)
-        points = np.array(coords, np.int32).reshape((-1, 1, 2))
+    @staticmethod
+    def _polygon_to_np(polygon: Polygon) -> tuple[np.ndarray, list[np.ndarray]]:
+        points = get_coordinates(polygon.exterior).astype(np.int32).reshape((-1, 1, 2))
         interior_points = [
-            np.array(list(interior.coords), np.int32).reshape((-1, 1, 2))
+            get_coordinates(interior).astype(np.int32).reshape((-1, 1, 2))
             for interior in polygon.interiors
         ]
         return points, interior_points
 
-    def _polygon_to_pixel_coordinates(self, polygon: Polygon) -> Polygon:
-        exterior_coords_pixel = [
-            self.projector.latlon_to_pixel(lat, lon) for lon, lat in list(polygon.exterior.coords)
-        ]
-        interior_coords_pixel = [
-            [self.projector.latlon_to_pixel(lat, lon) for lon, lat in list(interior.coords)]
-            for interior in polygon.interiors
-        ]
-        return Polygon(exterior_coords_pixel, holes=interior_coords_pixel)
-
-    def _linestring_to_pixel_coordinates(self, linestring: LineString) -> LineString:
-        coords_pixel = [
-            self.projector.latlon_to_pixel(lat, lon) for lon, lat in list(linestring.coords)
-        ]
-        return LineString(coords_pixel)
-
-    def _point_to_pixel_coordinates(self, point: Point) -> Point:
-        x, y = self.projector.latlon_to_pixel(point.y, point.x)
-        return Point(x, y)
-
-    def _sequence_to_pixel(self, geometry: LineString | Point, width: int | None) -> Any:
-        if isinstance(geometry, LineString):
-            geometry = self._linestring_to_pixel_coordinates(geometry)
-        elif isinstance(geometry, Point):
-            geometry = self._point_to_pixel_coordinates(geometry)
-
-        buffered = geometry.buffer(width if width else 0, cap_style=self.cap_style)
-        return buffered
+    @staticmethod
+    def _point_tuples(pixel_geometry: Any) -> list[tuple[int, int]]:
+        """Return integer pixel points of a projected geometry."""
+        return list(map(tuple, get_coordinates(pixel_geometry).astype(np.int64).tolist()))
 
     @staticmethod
     def _extract_polygons(geometry: Any) -> list[Polygon]:
@@ -150,14 +129,19 @@ class OSMGeometryRasterizer:
         return []
 
     @staticmethod
-    def _get_tags_from_osm_object(obj: pd.core.series.Series) -> dict[str, Any]:
-        ignored_keys = {"geometry", "osmid", "element_type", "action", "visible"}
-        tags: dict[str, Any] = {}
-        for key in obj.index:
-            if key in ignored_keys:
-                continue
-            value = obj[key]
-            if pd.isna(value):
-                continue
-            tags[key] = value
-        return tags
+    def _rows_tags(objects: gpd.GeoDataFrame, with_tags: bool) -> list[dict[str, Any]]:
+        """Return the non-null tags of every row, in column order, or empty dictionaries."""
+        if not with_tags:
+            return [{} for _ in range(len(objects))]
+
+        columns = [column for column in objects.columns if column not in _IGNORED_TAG_COLUMNS]
+        rows_tags: list[dict[str, Any]] = [{} for _ in range(len(objects))]
+        if not columns:
+            return rows_tags
+
+        tag_frame = objects[columns]
+        values = tag_frame.to_numpy(dtype=object)
+        rows, cells = np.nonzero(tag_frame.notna().to_numpy())
+        for row, cell in zip(rows.tolist(), cells.tolist()):
+            rows_tags[row][columns[cell]] = values[row, cell]
+        return rows_tags
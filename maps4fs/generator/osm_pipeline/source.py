@@ -2,11 +2,16 @@
 
 from __future__ import annotations
 
+import hashlib
+import os
 import warnings
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from functools import lru_cache
+from threading import Lock
 from typing import Any, Protocol
 
 import geopandas as gpd
+import numpy as np
 import osmnx as ox
 from osmnx import settings as ox_settings
 
@@ -14,6 +19,17 @@ from osmnx import settings as ox_settings
 class OSMFeatureSource(Protocol):
     """Source contract for fetching OSM features by tag filter."""
 
+    @property
+    def cache_key(self) -> str:
+        """Key identifying the data of the source in the shared feature cache."""
+        raise NotImplementedError
+
+    @property
+    def content_key(self) -> str | None:
+        """Hash of the source data for the persistent feature cache, None if the results
+        can not be persisted."""
+        raise NotImplementedError
+
     def fetch(self, tags: dict[str, str | list[str] | bool]) -> gpd.GeoDataFrame | None:
         """Fetch features for provided tag filter."""
         raise NotImplementedError
@@ -29,6 +45,18 @@ class OSMNXFeatureSource:
     requests_timeout: int
     logger: Any
 
+    @property
+    def cache_key(self) -> str:
+        """Key identifying the data of the source in the shared feature cache."""
+        if self.custom_osm_path is not None:
+            return f"xml:{_file_version(self.custom_osm_path)}"
+        return f"overpass:{self.bbox}"
+
+    @property
+    def content_key(self) -> str | None:
+        """Results are not persisted, osmnx caches the Overpass responses itself."""
+        return None
+
     def fetch(self, tags: dict[str, str | list[str] | bool]) -> gpd.GeoDataFrame | None:
         """Fetch matching features either from custom OSM XML or overpass."""
         ox_settings.use_cache = self.use_cache
@@ -43,3 +71,136 @@ class OSMNXFeatureSource:
         except Exception as exc:
             self.logger.debug("Error fetching objects for tags: %s. Error: %s.", tags, exc)
             return None
+
+
+class OSMFeatureTable:
+    """All tagged features of an OSM file in one GeoDataFrame with an inverted tag index.
+
+    Tag filters are answered as row selections with the osmnx match semantics: keys are
+    OR-combined, True matches any value, a string matches equal values and a list matches
+    any of its values. The key -> value -> rows index is built lazily for the queried keys.
+    """
+
+    def __init__(self, features: gpd.GeoDataFrame) -> None:
+        self.features = features
+        self._index: dict[str, tuple[np.ndarray, dict[Any, np.ndarray]]] = {}
+        self._index_lock = Lock()
+
+    @classmethod
+    def from_xml(cls, osm_path: str) -> OSMFeatureTable:
+        """Parse the OSM XML file once and keep every tagged feature."""
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", FutureWarning)
+            return cls(ox.features_from_xml(osm_path))
+
+    def _key_index(self, key: str) -> tuple[np.ndarray, dict[Any, np.ndarray]]:
+        """Return rows with any value of the key and rows per value."""
+        with self._index_lock:
+            if key in self._index:
+                return self._index[key]
+
+        column = self.features[key]
+        rows = np.flatnonzero(column.notna().to_numpy())
+        rows_by_value: dict[Any, list[int]] = {}
+        for row, value in zip(rows.tolist(), column.to_numpy()[rows].tolist()):
+            rows_by_value.setdefault(value, []).append(row)
+        key_index = (
+            rows,
+            {value: np.asarray(value_rows) for value, value_rows in rows_by_value.items()},
+        )
+        with self._index_lock:
+            self._index[key] = key_index
+        return key_index
+
+    def select(self, tags: dict[str, str | list[str] | bool]) -> gpd.GeoDataFrame | None:
+        """Return features matching the tag filter or None when nothing matches."""
+        matches: list[np.ndarray] = []
+        for key in set(self.features.columns) & tags.keys():
+            value = tags[key]
+            rows, rows_by_value = self._key_index(key)
+            if value is True:
+                matches.append(rows)
+            elif isinstance(value, str):
+                if value in rows_by_value:
+                    matches.append(rows_by_value[value])
+            elif isinstance(value, list):
+                matches.extend(rows_by_value[item] for item in set(value) if item in rows_by_value)
+
+        if not matches:
+            return None
+        selected = np.unique(np.concatenate(matches))
+        return self.features.iloc[selected].dropna(axis="columns", how="all")
+
+
+@dataclass
+class OSMXMLFeatureSource:
+    """OSM source backed by a local OSM XML file, which is parsed only once."""
+
+    custom_osm_path: str
+    logger: Any
+    _table: OSMFeatureTable | None = field(default=None, init=False, repr=False)
+    _table_lock: Lock = field(default_factory=Lock, init=False, repr=False)
+    _failed: bool = field(default=False, init=False, repr=False)
+    _cache_key: str = field(default="", init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._cache_key = f"xml:{_file_version(self.custom_osm_path)}"
+
+    @property
+    def cache_key(self) -> str:
+        """Key identifying the parsed file version in the shared feature cache."""
+        return self._cache_key
+
+    @property
+    def content_key(self) -> str | None:
+        """SHA-256 of the file content, None when the file can not be read."""
+        return _file_content_hash(self.custom_osm_path, self._cache_key)
+
+    @property
+    def failed(self) -> bool:
+        """Whether the file failed to parse in this process."""
+        with self._table_lock:
+            return self._failed
+
+    def table(self) -> OSMFeatureTable | None:
+        """Return the parsed feature table, parsing the file on the first call."""
+        with self._table_lock:
+            if self._table is None and not self._failed:
+                try:
+                    self._table = OSMFeatureTable.from_xml(self.custom_osm_path)
+                except Exception as exc:
+                    self.logger.debug(
+                        "Error parsing OSM file %s. Error: %s.", self.custom_osm_path, exc
+                    )
+                    self._failed = True
+            return self._table
+
+    def fetch(self, tags: dict[str, str | list[str] | bool]) -> gpd.GeoDataFrame | None:
+        """Select matching features from the parsed OSM file."""
+        table = self.table()
+        if table is None:
+            return None
+        return table.select(tags)
+
+
+def _file_version(path: str) -> str:
+    """Return the path together with the size and modification time of the file."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return os.path.abspath(path)
+    return f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+@lru_cache(maxsize=16)
+def _file_content_hash(path: str, version: str) -> str | None:  # pylint: disable=W0613
+    """Return the SHA-256 of the file content. The version (path, size and modification time)
+    only keys the memoization, so an unchanged file is hashed once per process."""
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b""):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
@@ -0,0 +1,192 @@
+"""This module contains the PreviewCache class, which renders previews on demand from
+downsampled rasters and reuses them while their source artifacts are unchanged."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import uuid
+from typing import Any, Callable
+
+import cv2
+import numpy as np
+
+from maps4fs.generator import image_io
+from maps4fs.generator.constants import Parameters
+
+# Bump when the rendering of previews changes, so previews rendered before are not reused.
+_PREVIEW_FORMAT_VERSION = 1
+
+
+class PreviewCache:
+    """Cache of rendered previews keyed by the fingerprint of their sources.
+
+    A preview is rendered only when it is requested and its file is missing, or any of its
+    source files or render options changed since it was rendered. Sources are decoded once,
+    downsampled and shared by all previews rendered from them. The fingerprints are stored in
+    the previews directory, so previews are reused by later Map instances as well.
+
+    Arguments:
+        directory (str): Directory of the previews.
+        max_size (int, optional): Maximum size of the downsampled sources in pixels.
+    """
+
+    FINGERPRINTS_FILENAME = ".fingerprints.json"
+
+    def __init__(self, directory: str, max_size: int = Parameters.PREVIEW_MAXIMUM_SIZE) -> None:
+        self.directory = directory
+        self.max_size = max_size
+        self._fingerprints: dict[str, str] | None = None
+        self._sources: dict[tuple, np.ndarray | None] = {}
+        self._lock = threading.Lock()
+        self._source_locks: dict[tuple, threading.Lock] = {}
+
+    @property
+    def fingerprints_path(self) -> str:
+        """Path of the file with the fingerprints of the rendered previews."""
+        return os.path.join(self.directory, self.FINGERPRINTS_FILENAME)
+
+    @staticmethod
+    def fingerprint(sources: list[str], options: Any = None) -> str | None:
+        """Returns the fingerprint of the source files and the render options.
+
+        Arguments:
+            sources (list[str]): Paths of the source files.
+            options (Any, optional): Render options, their repr is part of the fingerprint.
+
+        Returns:
+            str | None: The fingerprint or None if any of the sources does not exist.
+        """
+        digest = hashlib.sha256(f"{_PREVIEW_FORMAT_VERSION}|{options!r}".encode())
+        for source in sources:
+            try:
+                stat = os.stat(source)
+            except OSError:
+                return None
+            digest.update(f"|{os.path.abspath(source)}|{stat.st_size}|{stat.st_mtime_ns}".encode())
+        return digest.hexdigest()
+
+    def get_or_render(
+        self,
+        preview_path: str,
+        sources: list[str],
+        render: Callable[[str], bool],
+        options: Any = None,
+    ) -> str | None:
+        """Returns the preview, rendering it only if it is outdated.
+
+        Arguments:
+            preview_path (str): Path of the preview file.
+            sources (list[str]): Paths of the files the preview is rendered from.
+            render (Callable[[str], bool]): Writes the preview to the given path and returns
+                whether it was written.
+            options (Any, optional): Render options which change the preview.
+
+        Returns:
+            str | None: Path of the preview or None if it could not be rendered.
+        """
+        fingerprint = self.fingerprint(sources, options)
+        if fingerprint is None:
+            return None
+
+        key = os.path.basename(preview_path)
+        with self._lock:
+            fingerprints = self._load_fingerprints()
+            if fingerprints.get(key) == fingerprint and os.path.isfile(preview_path):
+                return preview_path
+            # The preview is being rendered or its sources changed.
+            fingerprints.pop(key, None)
+
+        os.makedirs(os.path.dirname(preview_path), exist_ok=True)
+        if not render(preview_path):
+            return None
+
+        with self._lock:
+            self._load_fingerprints()[key] = fingerprint
+            self._save_fingerprints()
+        return preview_path
+
+    def load(
+        self,
+        source_path: str,
+        flags: int = cv2.IMREAD_UNCHANGED,
+        size: tuple[int, int] | None = None,
+        interpolation: int = cv2.INTER_LINEAR,
+    ) -> np.ndarray | None:
+        """Returns the downsampled source raster, decoded once for all previews.
+
+        Arguments:
+            source_path (str): Path of the source raster.
+            flags (int, optional): cv2.imread flags.
+            size (tuple[int, int] | None, optional): Width and height of the returned raster.
+                If None, rasters larger than max_size are downsampled to it.
+            interpolation (int, optional): cv2.resize interpolation.
+
+        Returns:
+            np.ndarray | None: Read-only raster or None if it could not be read.
+        """
+        fingerprint = self.fingerprint([source_path])
+        if fingerprint is None:
+            return None
+        key = (fingerprint, flags, size, interpolation)
+        with self._lock:
+            if key in self._sources:
+                return self._sources[key]
+            source_lock = self._source_locks.setdefault(key, threading.Lock())
+
+        # Concurrent previews of the same source wait for the first decode.
+        with source_lock:
+            with self._lock:
+                if key in self._sources:
+                    return self._sources[key]
+            image = image_io.read_image(source_path, flags)
+            if image is not None:
+                image = self._downsample(image, size, interpolation)
+                image.flags.writeable = False
+            with self._lock:
+                self._sources[key] = image
+                self._source_locks.pop(key, None)
+        return image
+
+    def _downsample(
+        self, image: np.ndarray, size: tuple[int, int] | None, interpolation: int
+    ) -> np.ndarray:
+        """Resizes the image to the size, or to max_size if it is larger and no size is set."""
+        if size is None:
+            height, width = image.shape[:2]
+            if max(height, width) <= self.max_size:
+                return image
+            scale = self.max_size / max(height, width)
+            size = (max(int(width * scale), 1), max(int(height * scale), 1))
+        if image.shape[1] == size[0] and image.shape[0] == size[1]:
+            return image
+        return cv2.resize(image, size, interpolation=interpolation)
+
+    def clear(self) -> None:
+        """Releases the decoded sources."""
+        with self._lock:
+            self._sources.clear()
+
+    def _load_fingerprints(self) -> dict[str, str]:
+        """Returns the stored fingerprints, reading them on first use. Called with the lock."""
+        if self._fingerprints is None:
+            try:
+                with open(self.fingerprints_path, "r", encoding="utf-8") as file:
+                    self._fingerprints = dict(json.load(file))
+            except (OSError, ValueError, TypeError):
+                self._fingerprints = {}
+        return self._fingerprints
+
+    def _save_fingerprints(self) -> None:
+        """Writes the fingerprints atomically. Called with the lock."""
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = f"{self.fingerprints_path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as file:
+                json.dump(self._fingerprints, file, indent=4, sort_keys=True)
+            os.replace(temp_path, self.fingerprints_path)
+        finally:
+            if os.path.isfile(temp_path):
+                os.remove(temp_path)
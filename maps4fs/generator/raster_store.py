@@ -0,0 +1,300 @@
+"""This module contains the RasterStore class, which keeps rasters shared between components
+in memory to avoid encoding and decoding the same PNG files several times."""
+
+from __future__ import annotations
+
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Iterable
+
+import cv2
+import numpy as np
+
+from maps4fs.generator.constants import Parameters
+from maps4fs.generator.image_io import (
+    ImageKind,
+    ImageWriter,
+    PngStripWriter,
+    read_image,
+    write_image,
+)
+
+# Only these dtypes survive a PNG round-trip unchanged, everything else goes directly to disk.
+SUPPORTED_DTYPES = (np.uint8, np.uint16)
+
+
+@dataclass
+class _RasterEntry:
+    """Latest array of the raster and whether it still has to be written to disk.
+    For written entries the file signature is kept to detect changes made outside the store.
+    """
+
+    image: np.ndarray
+    dirty: bool
+    signature: tuple[int, int] | None = None
+    kind: ImageKind = ImageKind.DELIVERABLE
+
+
+class RasterStore:
+    """In-memory store of rasters keyed by their file path.
+
+    Writes are kept in memory and written to disk on flush(). The Map flushes the whole store
+    once when the generation is finished, and the rasters written by a component right after it
+    when the component cache needs its files on disk. Pending rasters are encoded in parallel by
+    the image writer, evicted ones in the background. Reads with
+    the default IMREAD_UNCHANGED flag (and IMREAD_GRAYSCALE of 8-bit single channel rasters)
+    are served from memory, other flags flush the raster and fall back to cv2.imread to keep
+    the exact OpenCV conversion semantics.
+
+    Arguments:
+        max_bytes (int, optional): Memory budget, least recently used rasters are evicted
+            (and written to disk if needed) when it is exceeded.
+        writer (ImageWriter | None, optional): Writer of the rasters, a new one if None.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = Parameters.RASTER_STORE_MAX_BYTES,
+        writer: ImageWriter | None = None,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.writer = writer or ImageWriter()
+        self._entries: OrderedDict[str, _RasterEntry] = OrderedDict()
+        self._size = 0
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _key(image_path: str) -> str:
+        return os.path.abspath(image_path)
+
+    @staticmethod
+    def _signature(image_path: str) -> tuple[int, int] | None:
+        try:
+            stat = os.stat(image_path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def read(self, image_path: str, flags: int = cv2.IMREAD_UNCHANGED) -> np.ndarray | None:
+        """Returns the raster, from memory if possible.
+
+        Arguments:
+            image_path (str): Path to the raster file.
+            flags (int, optional): cv2.imread flags.
+
+        Returns:
+            np.ndarray | None: Copy of the raster or None if it does not exist.
+        """
+        key = self._key(image_path)
+        with self._lock:
+            self.writer.wait_for(key)
+            entry = self._entries.get(key)
+            if entry is not None and not entry.dirty and entry.signature != self._signature(key):
+                # The file was replaced by other means, the cached array is outdated.
+                self.discard(image_path)
+                entry = None
+            if entry is not None:
+                if self._served_from_memory(entry.image, flags):
+                    self._entries.move_to_end(key)
+                    return entry.image.copy()
+                self._flush_entry(key, entry)
+
+        signature = self._signature(key)
+        image = read_image(image_path, flags)
+        if image is not None and flags == cv2.IMREAD_UNCHANGED:
+            if image.dtype.type in SUPPORTED_DTYPES:
+                with self._lock:
+                    if key not in self._entries:
+                        self._put(key, image.copy(), dirty=False, signature=signature)
+        return image
+
+    @staticmethod
+    def _served_from_memory(image: np.ndarray, flags: int) -> bool:
+        """Checks whether cv2.imread with the flags would return the stored array unchanged."""
+        if flags == cv2.IMREAD_UNCHANGED:
+            return True
+        return flags == cv2.IMREAD_GRAYSCALE and image.ndim == 2 and image.dtype == np.uint8
+
+    def write(
+        self, image_path: str, image: np.ndarray, kind: ImageKind = ImageKind.DELIVERABLE
+    ) -> None:
+        """Stores the raster in memory, it will be written to disk on flush().
+        Rasters which can not be represented exactly in PNG are written immediately.
+
+        Arguments:
+            image_path (str): Path to the raster file.
+            image (np.ndarray): Raster data.
+            kind (ImageKind, optional): Kind of the raster, selects the PNG compression.
+        """
+        key = self._key(image_path)
+        if image.dtype.type not in SUPPORTED_DTYPES or not image_path.lower().endswith(".png"):
+            self.discard(image_path)
+            self.writer.wait_for(image_path)
+            write_image(image_path, image, kind)
+            return
+
+        with self._lock:
+            self._put(key, image.copy(), dirty=True, kind=kind)
+
+    def stream(
+        self, image_path: str, width: int, height: int, kind: ImageKind = ImageKind.DELIVERABLE
+    ) -> PngStripWriter:
+        """Opens an 8-bit raster for writing strip by strip directly to disk. The raster is not
+        kept in memory, a pending version of it is dropped.
+
+        Arguments:
+            image_path (str): Path to the raster file.
+            width (int): Width of the raster.
+            height (int): Height of the raster.
+            kind (ImageKind, optional): Kind of the raster, selects the PNG compression.
+
+        Returns:
+            PngStripWriter: Writer of the raster strips.
+        """
+        self.discard(image_path)
+        self.writer.wait_for(image_path)
+        os.makedirs(os.path.dirname(self._key(image_path)), exist_ok=True)
+        return PngStripWriter(image_path, width, height, kind)
+
+    def exists(self, image_path: str) -> bool:
+        """Checks whether the raster exists in memory or on disk.
+
+        Arguments:
+            image_path (str): Path to the raster file.
+
+        Returns:
+            bool: True if the raster exists.
+        """
+        with self._lock:
+            entry = self._entries.get(self._key(image_path))
+            if entry is not None and entry.dirty:
+                return True
+        self.writer.wait_for(image_path)
+        return os.path.isfile(image_path)
+
+    def listdir(self, directory: str) -> list[str]:
+        """Lists file names in the directory like os.listdir, including the pending rasters
+        which are not written to disk yet.
+
+        Arguments:
+            directory (str): Path to the directory.
+
+        Returns:
+            list[str]: Sorted names of the files in the directory.
+        """
+        key = self._key(directory)
+        with self._lock:
+            pending = [path for path, entry in self._entries.items() if entry.dirty]
+        pending.extend(self.writer.pending())
+        names = {os.path.basename(path) for path in pending if os.path.dirname(path) == key}
+        if os.path.isdir(directory):
+            names.update(os.listdir(directory))
+        return sorted(names)
+
+    def copy(self, source_path: str, destination_path: str) -> None:
+        """Copies the raster, pending rasters are copied in memory.
+
+        Arguments:
+            source_path (str): Path to the source raster file.
+            destination_path (str): Path to the destination raster file.
+        """
+        with self._lock:
+            entry = self._entries.get(self._key(source_path))
+            if entry is not None and entry.dirty:
+                self.write(destination_path, entry.image, entry.kind)
+                return
+        self.discard(destination_path)
+        self.writer.wait_for(source_path)
+        self.writer.wait_for(destination_path)
+        shutil.copyfile(source_path, destination_path)
+
+    def remove(self, image_path: str) -> None:
+        """Removes the raster from memory and from disk.
+
+        Arguments:
+            image_path (str): Path to the raster file.
+        """
+        self.discard(image_path)
+        self.writer.wait_for(image_path)
+        if os.path.isfile(image_path):
+            os.remove(image_path)
+
+    def discard(self, image_path: str) -> None:
+        """Removes the raster from memory without writing it, e.g. after the file was replaced
+        on disk by other means.
+
+        Arguments:
+            image_path (str): Path to the raster file.
+        """
+        with self._lock:
+            entry = self._entries.pop(self._key(image_path), None)
+            if entry is not None:
+                self._size -= entry.image.nbytes
+
+    def flush(self, image_paths: Iterable[str] | None = None) -> None:
+        """Writes pending rasters to disk.
+
+        Arguments:
+            image_paths (Iterable[str] | None, optional): Paths of the rasters to write, all
+                pending rasters if None.
+        """
+        with self._lock:
+            if image_paths is None:
+                entries = list(self._entries.items())
+            else:
+                keys = {self._key(image_path) for image_path in image_paths}
+                entries = [(key, entry) for key, entry in self._entries.items() if key in keys]
+            flushed = []
+            for key, entry in entries:
+                if entry.dirty:
+                    self._flush_entry(key, entry, wait=False)
+                    flushed.append((key, entry))
+            self.writer.wait()
+            for key, entry in flushed:
+                entry.signature = self._signature(key)
+
+    def clear(self) -> None:
+        """Writes all pending rasters to disk and releases the memory."""
+        with self._lock:
+            try:
+                self.flush()
+            finally:
+                self.writer.close()
+            self._entries.clear()
+            self._size = 0
+
+    def _put(
+        self,
+        key: str,
+        image: np.ndarray,
+        dirty: bool,
+        signature: tuple[int, int] | None = None,
+        kind: ImageKind = ImageKind.DELIVERABLE,
+    ) -> None:
+        """Adds or replaces the entry and evicts old entries if the budget is exceeded."""
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._size -= previous.image.nbytes
+        self._entries[key] = _RasterEntry(image=image, dirty=dirty, signature=signature, kind=kind)
+        self._size += image.nbytes
+
+        while self._size > self.max_bytes and len(self._entries) > 1:
+            old_key, old_entry = self._entries.popitem(last=False)
+            self._flush_entry(old_key, old_entry, wait=False)
+            self._size -= old_entry.image.nbytes
+
+    def _flush_entry(self, key: str, entry: _RasterEntry, wait: bool = True) -> None:
+        """Writes the entry to disk if it has pending changes. Without waiting the entry is
+        only queued, its signature is set by the caller once the write is finished."""
+        if not entry.dirty:
+            return
+        os.makedirs(os.path.dirname(key), exist_ok=True)
+        # Stored arrays are replaced and never modified in place, so they can be queued as is.
+        self.writer.submit(key, entry.image, entry.kind)
+        entry.dirty = False
+        if wait:
+            self.writer.wait_for(key)
+            entry.signature = self._signature(key)
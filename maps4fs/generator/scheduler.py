@@ -0,0 +1,148 @@
+"""This module contains the ComponentScheduler class, which runs map generation components
+concurrently while respecting the resources they read and write."""
+
+from __future__ import annotations
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import fields
+from typing import TYPE_CHECKING, Any, Callable, Generator, Sequence
+
+from maps4fs.generator.context import MapContext
+from maps4fs.generator.settings import Parameters
+
+if TYPE_CHECKING:
+    from maps4fs.generator.component.base.component import Component
+
+
+def known_resources() -> set[str]:
+    """Returns all resource names which can be used in Component.reads / Component.writes.
+
+    Returns:
+        set[str]: MapContext field names and Parameters.RESOURCE_* artifact names.
+    """
+    resources = {field.name for field in fields(MapContext)}
+    resources.update(
+        value
+        for name, value in vars(Parameters).items()
+        if name.startswith("RESOURCE_") and isinstance(value, str)
+    )
+    return resources
+
+
+class ComponentScheduler:
+    """Builds a dependency graph from the component declarations and runs the components in
+    topological order. Two components depend on each other when one of them writes a resource
+    which the other one reads or writes; the earlier one in the list always runs first, so the
+    result is the same as in the sequential run. Components without declarations act as
+    barriers.
+
+    Threads are used instead of processes, since all components share the Map instance and
+    its MapContext.
+
+    Arguments:
+        components (Sequence[type[Component]]): Component classes in the sequential order.
+        max_workers (int): Maximum number of components running at the same time. With 1 the
+            components are executed sequentially in the calling thread.
+
+    Raises:
+        ValueError: If a component declares an unknown resource.
+    """
+
+    def __init__(self, components: Sequence[type[Component]], max_workers: int) -> None:
+        self.components = list(components)
+        self.max_workers = max(1, max_workers)
+        self.dependencies = self._build_dependencies()
+
+    def _build_dependencies(self) -> list[set[int]]:
+        """Returns indices of the components each component must wait for.
+
+        Raises:
+            ValueError: If a component declares an unknown resource.
+
+        Returns:
+            list[set[int]]: Dependencies for each component in the list.
+        """
+        resources = known_resources()
+        for component in self.components:
+            declared = set(component.reads or ()) | set(component.writes or ())
+            unknown = declared - resources
+            if unknown:
+                raise ValueError(
+                    f"Component {component.__name__} declares unknown resources: "
+                    f"{sorted(unknown)}."
+                )
+
+        dependencies: list[set[int]] = []
+        for index, component in enumerate(self.components):
+            required = set()
+            for previous_index, previous in enumerate(self.components[:index]):
+                if self._conflicts(previous, component):
+                    required.add(previous_index)
+            dependencies.append(required)
+        return dependencies
+
+    @staticmethod
+    def _conflicts(first: type[Component], second: type[Component]) -> bool:
+        """Checks whether two components can not run at the same time.
+
+        Arguments:
+            first (type[Component]): The first component class.
+            second (type[Component]): The second component class.
+
+        Returns:
+            bool: True if the components must be ordered, False otherwise.
+        """
+        if first.writes is None or second.writes is None:
+            return True
+        if first.reads is None or second.reads is None:
+            return True
+
+        first_writes = set(first.writes)
+        second_writes = set(second.writes)
+        return bool(
+            first_writes & (set(second.reads) | second_writes) or set(first.reads) & second_writes
+        )
+
+    def run(self, task: Callable[[type[Component]], Any]) -> Generator[str, None, None]:
+        """Runs the task for every component as soon as all its dependencies are finished.
+        Yields the component name when the component is started.
+        If the task fails, no new components are started, already running ones are awaited
+        and the exception is re-raised.
+
+        Arguments:
+            task (Callable[[type[Component]], Any]): Callable which creates and processes
+                the component.
+
+        Yields:
+            Generator[str, None, None]: Component names.
+        """
+        if self.max_workers == 1:
+            for component in self.components:
+                yield component.__name__
+                task(component)
+            return
+
+        pending = list(range(len(self.components)))
+        finished: set[int] = set()
+        running: dict[Future, int] = {}
+
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="maps4fs-component"
+        ) as executor:
+            try:
+                while pending or running:
+                    ready = [index for index in pending if self.dependencies[index] <= finished]
+                    for index in ready:
+                        pending.remove(index)
+                        component = self.components[index]
+                        running[executor.submit(task, component)] = index
+                        yield component.__name__
+
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in sorted(done, key=running.__getitem__):
+                        index = running.pop(future)
+                        future.result()
+                        finished.add(index)
+            finally:
+                for future in running:
+                    future.cancel()
@@ -63,6 +63,13 @@ class BackgroundSettings(SettingsModel):
         flatten_roads (bool): if True, roads will be flattened in the DEM data.
         flatten_water (bool): if True, smooth and flatten water bottoms while preserving
             broad elevation changes across the water area.
+        export_meshes (bool): if True, the intermediate background terrain meshes (full,
+            decimated and textured) are saved as obj files for debugging or manual import.
+        adaptive_mesh (bool): if True, the background terrain is meshed adaptively from the
+            DEM (RTIN) instead of decimating the full resolution mesh. Disabled by default until
+            the adaptive meshes are checked in game.
+        mesh_max_error (float): maximum vertical error of the adaptive mesh in meters. With 0
+            the error is derived from the decimation factor of the map size.
     """
 
     generate_background: bool = False
@@ -71,6 +78,9 @@ class BackgroundSettings(SettingsModel):
     remove_center: bool = True
     flatten_roads: bool = False
     flatten_water: bool = False
+    export_meshes: bool = False
+    adaptive_mesh: bool = False
+    mesh_max_error: float = Field(default=0.0, ge=0)
 
 
 class GRLESettings(SettingsModel):
@@ -138,6 +148,19 @@ class TextureSettings(SettingsModel):
         dissolve (bool): dissolve the texture into several images.
         fields_padding (int): padding around the fields.
         skip_drains (bool): skip drains generation.
+        osm_prefetch_workers (int): number of OSM queries prefetched concurrently. A local
+            OSM file is parsed once and the queries select from it.
+        postprocess_workers (int): number of threads rotating, scaling, dissolving and
+            bordering the layers. With 1 the layers are processed serially. Rotating, scaling
+            and dissolving are further limited by Parameters.TEXTURE_POSTPROCESS_MAX_BYTES on
+            large maps.
+        draw_tile_size (int): size in pixels of the tiles the layers are drawn in. Maps larger
+            than the tile are drawn strip by strip and the weights are streamed to the files
+            through image_io, so the drawing memory depends on the tile and the map width, not
+            on the map area. Rotated maps are drawn directly in the map frame instead of on a
+            1.5 times larger canvas which is rotated afterwards, which keeps the weight edges
+            sharp. Dissolved sublayers of the larger maps are streamed too. With 0 the whole
+            texture is drawn at once and written through the raster store.
     """
 
     dissolve: bool = False
@@ -145,6 +168,9 @@ class TextureSettings(SettingsModel):
     skip_drains: bool = False
     use_cache: bool = True
     use_precise_tags: bool = False
+    osm_prefetch_workers: int = Field(default=Parameters.OSM_PREFETCH_WORKERS, ge=1)
+    postprocess_workers: int = Field(default=Parameters.TEXTURE_POSTPROCESS_WORKERS, ge=1)
+    draw_tile_size: int = Field(default=Parameters.TEXTURE_DRAW_TILE_SIZE, ge=0)
 
 
 class SatelliteSettings(SettingsModel):
@@ -187,6 +213,8 @@ class PreprocessorSettings(SettingsModel):
             ``usage == \"field\"``.
         forests (UsagePreprocessSettings): preprocessing options for layers with
             ``usage == \"forest\"``.
+        workers (int): number of worker processes used to preprocess independent polygon
+            groups. With 1 the groups are processed serially in the generation process.
     """
 
     class UsagePreprocessSettings(SettingsModel):
@@ -215,6 +243,7 @@ class PreprocessorSettings(SettingsModel):
     download_osm: bool = True
     fields: UsagePreprocessSettings = UsagePreprocessSettings()
     forests: UsagePreprocessSettings = UsagePreprocessSettings()
+    workers: int = Field(default=1, ge=1)
 
 
 class GenerationSettings(BaseModel):
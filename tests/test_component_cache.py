@@ -0,0 +1,237 @@
+"""Tests for restoring, invalidating and evicting component cache entries with stub
+components on a stub map."""
+
+from __future__ import annotations
+
+import logging
+import os
+from types import SimpleNamespace
+from typing import Any
+
+import numpy as np
+import pytest
+
+from maps4fs.generator.component_cache import ComponentCache
+from maps4fs.generator.context import MapContext
+from maps4fs.generator.settings import DEMSettings, SatelliteSettings
+
+
+class StubComponent:
+    """Component which writes a file, a context field and a plain attribute."""
+
+    reads: tuple[str, ...] | None = ()
+    writes: tuple[str, ...] | None = ("fields",)
+    cache_inputs: tuple[str, ...] | None = ("satellite_settings",)
+
+    def __init__(self, map: Any) -> None:  # pylint: disable=W0622
+        self.map = map
+        self.result_path: str | None = None
+        self.generation_info: dict[str, Any] = {}
+
+    def process(self, content: bytes) -> None:
+        """Write the outputs of the component."""
+        self.result_path = os.path.join(self.map.map_directory, "stub", "result.bin")
+        os.makedirs(os.path.dirname(self.result_path), exist_ok=True)
+        with open(self.result_path, "wb") as file:
+            file.write(content)
+        os.remove(os.path.join(self.map.map_directory, "obsolete.txt"))
+        self.map.context.fields = [[(1, 2), (3, 4)]]
+
+    def info_sequence(self) -> dict[str, Any]:
+        """Return the generation info of the component."""
+        return {"result": self.result_path}
+
+    def get_cache_state(self) -> dict[str, Any]:
+        """Return no extra state."""
+        return {}
+
+    def restore_cache_state(self, state: dict[str, Any]) -> None:
+        """Nothing to restore besides the automatic state."""
+
+    def update_generation_info(self, data: dict[str, Any]) -> None:
+        """Keep the generation info in memory."""
+        self.generation_info.update(data)
+
+
+class DownstreamComponent(StubComponent):
+    """Component which reads the context field written by StubComponent."""
+
+    reads = ("fields",)
+    writes = ("farmyards",)
+    cache_inputs = ()
+
+
+class UncachedComponent(StubComponent):
+    """Component without cache inputs, which is always processed."""
+
+    cache_inputs = None
+
+
+def _map(map_directory: str, components: list[type], **overrides: Any) -> SimpleNamespace:
+    """Return a stub map with the attributes the component cache reads."""
+    os.makedirs(map_directory, exist_ok=True)
+    with open(os.path.join(map_directory, "obsolete.txt"), "w", encoding="utf-8") as file:
+        file.write("removed by the component")
+    attributes = {
+        "game": SimpleNamespace(
+            code="FS25",
+            components=components,
+            texture_schema=None,
+            grle_schema=None,
+            tree_schema=None,
+            buildings_schema=None,
+            electricity_schema=None,
+            background_schema=None,
+        ),
+        "template_path": os.path.join(map_directory, "missing_template.zip"),
+        "coordinates": (45.0, 20.0),
+        "size": 2048,
+        "rotation": 0,
+        "output_size": None,
+        "dem_settings": DEMSettings(),
+        "satellite_settings": SatelliteSettings(),
+        "map_directory": map_directory,
+        "context": MapContext(),
+        "logger": logging.getLogger(__name__),
+    }
+    attributes.update(overrides)
+    return SimpleNamespace(**attributes)
+
+
+def _process_and_store(cache: ComponentCache, content: bytes = b"result") -> StubComponent:
+    """Run StubComponent through the cache like Map.generate does."""
+    component = StubComponent(cache.map)
+    assert not cache.restore(component)
+    snapshot = cache.snapshot()
+    component.process(content)
+    cache.store(component, snapshot)
+    return component
+
+
+def test_restore_replays_files_context_and_state(tmp_path) -> None:
+    """An entry stored for one map directory is restored into another one."""
+    cache_directory = str(tmp_path / "cache")
+    first_map = _map(str(tmp_path / "first"), [StubComponent])
+    _process_and_store(ComponentCache(first_map, cache_directory))
+
+    second_map = _map(str(tmp_path / "second"), [StubComponent])
+    cache = ComponentCache(second_map, cache_directory)
+    component = StubComponent(second_map)
+    assert cache.restore(component)
+
+    result_path = os.path.join(second_map.map_directory, "stub", "result.bin")
+    with open(result_path, "rb") as file:
+        assert file.read() == b"result"
+    assert not os.path.exists(os.path.join(second_map.map_directory, "obsolete.txt"))
+    assert second_map.context.fields == [[(1, 2), (3, 4)]]
+    # Paths in the state and in the generation info point to the new map directory.
+    assert component.result_path == result_path
+    assert component.generation_info == {"result": result_path}
+    assert StubComponent in cache.fingerprints
+
+
+@pytest.mark.parametrize(
+    "overrides",
+    [
+        {"satellite_settings": SatelliteSettings(zoom_level=14)},
+        {"dem_settings": DEMSettings(multiplier=2)},
+        {"coordinates": (45.1, 20.0)},
+    ],
+    ids=["cache_inputs", "dem_settings", "coordinates"],
+)
+def test_changed_inputs_invalidate_entry(tmp_path, overrides: dict[str, Any]) -> None:
+    """A change of the cache inputs or of the shared map settings is a cache miss."""
+    cache_directory = str(tmp_path / "cache")
+    _process_and_store(
+        ComponentCache(_map(str(tmp_path / "first"), [StubComponent]), cache_directory)
+    )
+
+    changed_map = _map(str(tmp_path / "second"), [StubComponent], **overrides)
+    assert not ComponentCache(changed_map, cache_directory).restore(StubComponent(changed_map))
+
+    same_map = _map(str(tmp_path / "third"), [StubComponent])
+    assert ComponentCache(same_map, cache_directory).restore(StubComponent(same_map))
+
+
+def test_upstream_change_invalidates_dependent_components(tmp_path) -> None:
+    """Fingerprints include the upstream ones, and nothing after an uncached component is
+    restored."""
+    components = [StubComponent, DownstreamComponent]
+    cache = ComponentCache(_map(str(tmp_path / "first"), components), str(tmp_path / "cache"))
+    _process_and_store(cache)
+    downstream = cache.fingerprint(DownstreamComponent(cache.map))
+    assert downstream is not None
+
+    changed_map = _map(
+        str(tmp_path / "second"), components, satellite_settings=SatelliteSettings(zoom_level=14)
+    )
+    changed = ComponentCache(changed_map, str(tmp_path / "cache"))
+    _process_and_store(changed)
+    assert changed.fingerprint(DownstreamComponent(changed_map)) not in (None, downstream)
+
+    uncached_map = _map(str(tmp_path / "third"), [UncachedComponent, DownstreamComponent])
+    uncached = ComponentCache(uncached_map, str(tmp_path / "cache"))
+    assert uncached.fingerprint(UncachedComponent(uncached_map)) is None
+    assert uncached.fingerprint(DownstreamComponent(uncached_map)) is None
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path) -> None:
+    """Entries over the size limit are removed from the least recently used one, and the
+    entry which was just stored is kept even when it alone is over the limit."""
+    cache_directory = str(tmp_path / "cache")
+    fingerprints = []
+    for zoom_level in (14, 15, 16):
+        cache_map = _map(
+            str(tmp_path / f"map{zoom_level}"),
+            [StubComponent],
+            satellite_settings=SatelliteSettings(zoom_level=zoom_level),
+        )
+        cache = ComponentCache(cache_map, cache_directory, max_bytes=10**9)
+        _process_and_store(cache, content=bytes(1000))
+        fingerprints.append(cache.fingerprints[StubComponent])
+    # The first entry was used last, the second one is the least recently used.
+    for accessed, fingerprint in zip((300, 100, 200), fingerprints):
+        entry_path = os.path.join(cache_directory, fingerprint, "entry.pkl")
+        os.utime(entry_path, (accessed, os.stat(entry_path).st_mtime))
+
+    entry_size = sum(
+        os.path.getsize(os.path.join(root, filename))
+        for root, _, files in os.walk(os.path.join(cache_directory, fingerprints[0]))
+        for filename in files
+    )
+    cache.max_bytes = 2 * entry_size
+    cache.evict()
+    assert sorted(os.listdir(cache_directory)) == sorted([fingerprints[0], fingerprints[2]])
+
+    cache.max_bytes = 0
+    cache.evict(keep=fingerprints[2])
+    assert os.listdir(cache_directory) == [fingerprints[2]]
+
+
+def test_entry_holds_the_flushed_rasters_of_the_component(tmp_path) -> None:
+    """Rasters stay in memory until they are flushed. The map flushes only the rasters of the
+    finished component before storing it, pending rasters of other components stay pending."""
+    cache_directory = str(tmp_path / "cache")
+    first_map = _map(str(tmp_path / "first"), [StubComponent])
+    rasters = first_map.context.rasters
+    other_path = os.path.join(first_map.map_directory, "other.png")
+    rasters.write(other_path, np.zeros((4, 4), dtype=np.uint8))
+
+    cache = ComponentCache(first_map, cache_directory)
+    component = StubComponent(first_map)
+    assert not cache.restore(component)
+    snapshot = cache.snapshot()
+    component.process(b"result")
+    mask_path = os.path.join(first_map.map_directory, "stub", "mask.png")
+    rasters.write(mask_path, np.full((4, 4), 255, dtype=np.uint8))
+    rasters.flush([mask_path])
+    cache.store(component, snapshot)
+    assert not os.path.exists(other_path)
+
+    second_map = _map(str(tmp_path / "second"), [StubComponent])
+    assert ComponentCache(second_map, cache_directory).restore(StubComponent(second_map))
+    restored = second_map.context.rasters.read(
+        os.path.join(second_map.map_directory, "stub", "mask.png")
+    )
+    assert restored is not None and (restored == 255).all()
+    assert not os.path.exists(os.path.join(second_map.map_directory, "other.png"))
@@ -0,0 +1,110 @@
+"""Tests for the adaptive (RTIN) background terrain mesh."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from maps4fs.generator.component.base.component_mesh import MeshComponent
+from maps4fs.generator.settings import Parameters
+
+GRID_SHAPES = [(33, 33), (37, 50), (100, 71), (3, 9)]
+
+
+def _terrain(rows: int, cols: int, seed: int = 0) -> np.ndarray:
+    """Return heights with hills and some noise."""
+    rng = np.random.default_rng(seed)
+    ys, xs = np.mgrid[0:rows, 0:cols]
+    heights = 40 * np.sin(ys / 7) * np.cos(xs / 11) + 15 * np.sin((xs + ys) / 3)
+    return (heights + rng.normal(0, 2, (rows, cols))).astype(np.float32)
+
+
+def _rtin_triangles(heights: np.ndarray, threshold: float) -> tuple[np.ndarray, np.ndarray]:
+    """Return the row and column indices of the triangles within the grid, like the adaptive
+    mesh pads and triangulates it."""
+    rows, cols = heights.shape
+    size = 1 << int(np.ceil(np.log2(max(rows, cols, 2) - 1)))
+    z = np.pad(heights, ((0, size + 1 - rows), (0, size + 1 - cols)), mode="edge")
+    errors = MeshComponent._rtin_errors(z, rows, cols)
+    triangles = MeshComponent._rtin_triangles(errors, threshold)
+    ys, xs = triangles[..., 0], triangles[..., 1]
+    inside = ((ys < rows) & (xs < cols)).all(axis=1)
+    return ys[inside], xs[inside]
+
+
+def _interpolated(ys: np.ndarray, xs: np.ndarray, heights: np.ndarray) -> np.ndarray:
+    """Return the heights interpolated on the triangles at every grid point, NaN where no
+    triangle covers the point."""
+    result = np.full(heights.shape, np.nan)
+    for triangle_ys, triangle_xs in zip(ys, xs):
+        grid_ys, grid_xs = np.mgrid[
+            triangle_ys.min() : triangle_ys.max() + 1, triangle_xs.min() : triangle_xs.max() + 1
+        ]
+        (ay, by, cy), (ax, bx, cx) = triangle_ys, triangle_xs
+        det = (by - cy) * (ax - cx) + (cx - bx) * (ay - cy)
+        first = ((by - cy) * (grid_xs - cx) + (cx - bx) * (grid_ys - cy)) / det
+        second = ((cy - ay) * (grid_xs - cx) + (ax - cx) * (grid_ys - cy)) / det
+        third = 1 - first - second
+        inside = (first >= -1e-9) & (second >= -1e-9) & (third >= -1e-9)
+        values = first * heights[ay, ax] + second * heights[by, bx] + third * heights[cy, cx]
+        result[grid_ys[inside], grid_xs[inside]] = values[inside]
+    return result
+
+
+@pytest.mark.parametrize("threshold", [-1.0, 5.0, 1000.0])
+@pytest.mark.parametrize("shape", GRID_SHAPES)
+def test_rtin_covers_grid_without_cracks(shape: tuple[int, int], threshold: float) -> None:
+    """The triangles tile the grid exactly and neighbours share whole edges, so there are no
+    gaps, overlaps or T-junctions."""
+    rows, cols = shape
+    ys, xs = _rtin_triangles(_terrain(rows, cols), threshold)
+
+    doubled_areas = np.abs(
+        (xs[:, 1] - xs[:, 0]) * (ys[:, 2] - ys[:, 0])
+        - (ys[:, 1] - ys[:, 0]) * (xs[:, 2] - xs[:, 0])
+    )
+    assert doubled_areas.min() > 0
+    assert doubled_areas.sum() == 2 * (rows - 1) * (cols - 1)
+    if threshold < 0:
+        assert len(ys) == 2 * (rows - 1) * (cols - 1)
+
+    vertices = ys * cols + xs
+    edges = np.sort(np.stack([vertices, np.roll(vertices, -1, axis=1)], axis=-1), axis=-1)
+    edges, counts = np.unique(edges.reshape(-1, 2), axis=0, return_counts=True)
+    assert counts.max() == 2
+    # An edge of one triangle only is on the border of the grid, otherwise it has a crack.
+    edge_ys, edge_xs = np.divmod(edges[counts == 1], cols)
+    on_row = (edge_ys[:, 0] == edge_ys[:, 1]) & np.isin(edge_ys[:, 0], [0, rows - 1])
+    on_column = (edge_xs[:, 0] == edge_xs[:, 1]) & np.isin(edge_xs[:, 0], [0, cols - 1])
+    assert (on_row | on_column).all()
+
+
+@pytest.mark.parametrize("max_error", [0.5, 5.0, 20.0])
+@pytest.mark.parametrize("shape", GRID_SHAPES)
+def test_rtin_respects_max_error(shape: tuple[int, int], max_error: float) -> None:
+    """Every grid point is within the error of the surface of the triangles."""
+    heights = _terrain(*shape, seed=1)
+    ys, xs = _rtin_triangles(heights, max_error)
+
+    interpolated = _interpolated(ys, xs, heights)
+    assert not np.isnan(interpolated).any()
+    assert np.abs(interpolated - heights).max() <= max_error + 1e-3
+
+
+def test_adaptive_mesh_resolution() -> None:
+    """The mesh has the full resolution without an error or a reduction factor and fewer
+    faces with either of them."""
+    rows, cols = 65, 65
+    image = np.kron(_terrain(rows, cols), np.ones((Parameters.RESIZE_FACTOR,) * 2))
+    full_faces = 2 * (rows - 1) * (cols - 1)
+
+    full = MeshComponent.adaptive_mesh_from_np(image, 1.0)
+    coarse = MeshComponent.adaptive_mesh_from_np(image, 1.0, max_error=20.0)
+    reduced = MeshComponent.adaptive_mesh_from_np(image, 1.0, reduction_factor=0.1)
+
+    assert len(full.faces) == full_faces
+    assert len(coarse.faces) < len(full.faces)
+    assert len(reduced.faces) < full_faces * 0.3
+    # The coarse meshes keep the horizontal extent of the full one.
+    np.testing.assert_allclose(coarse.bounds[:, :2], full.bounds[:, :2], atol=1e-6)
+    np.testing.assert_allclose(reduced.bounds[:, :2], full.bounds[:, :2], atol=1e-6)
@@ -0,0 +1,81 @@
+"""Tests for the DEM processing pipeline against a float64 reference."""
+
+from __future__ import annotations
+
+import logging
+import math
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+import pytest
+
+from maps4fs.generator.component.dem import DEM
+from maps4fs.generator.settings import DEMSettings
+
+RESOLUTION = (300, 300)
+SETTINGS = [
+    DEMSettings(blur_radius=0),
+    DEMSettings(multiplier=3, plateau=10, water_depth=5, ceiling=7, blur_radius=0),
+    DEMSettings(adjust_terrain_to_ground_level=False, minimum_height_scale=1000, blur_radius=0),
+]
+
+
+def _elevation(dtype: str) -> np.ndarray:
+    """Return rolling terrain in the range a DTM provider returns for the type."""
+    rng = np.random.default_rng(7)
+    terrain = np.cumsum(np.cumsum(rng.normal(size=(220, 220)), axis=0), axis=1)
+    terrain = (terrain - terrain.min()) / (terrain.max() - terrain.min())
+    if dtype == "int16":
+        return (terrain * 900 - 50).astype(np.int16)
+    if dtype == "uint16":
+        return (terrain * 900 + 20).astype(np.uint16)
+    if dtype == "float32":
+        return (terrain * 1234.5 - 7.25).astype(np.float32)
+    return terrain * 345.678 + 100.0
+
+
+def _reference(data: np.ndarray, settings: DEMSettings) -> tuple[np.ndarray, float, float]:
+    """Return the normalized DEM and its raised minimum and maximum in float64 arithmetic."""
+    resampled = cv2.resize(data, RESOLUTION, interpolation=cv2.INTER_LINEAR).astype(np.float64)
+    resampled *= settings.multiplier
+    if settings.adjust_terrain_to_ground_level:
+        resampled += settings.plateau + settings.water_depth - resampled.min()
+    height_scale = math.ceil(max(settings.minimum_height_scale, resampled.max() + settings.ceiling))
+    normalized = np.clip(resampled / height_scale * 65535, 0, 65535).astype(np.uint16)
+    return normalized, float(resampled.min()), float(resampled.max())
+
+
+def _process(data: np.ndarray, settings: DEMSettings) -> tuple[np.ndarray, dict]:
+    """Run DEM.process on the data and return the written DEM and the DEM info."""
+    dem = DEM.__new__(DEM)
+    dem.map = SimpleNamespace(
+        custom_background_path=None, dem_settings=settings, context=SimpleNamespace()
+    )
+    dem.logger = logging.getLogger(__name__)
+    dem.dtm_provider = SimpleNamespace(get_numpy=data.copy)
+    dem.output_resolution = RESOLUTION
+    dem.rotation = 0
+    dem.info = {}
+    dem._dem_path = "dem.png"  # pylint: disable=protected-access
+    written = {}
+    dem.write_image = lambda path, image, kind=None: written.setdefault(path, image)
+    dem.process()
+    return written["dem.png"], dem.info
+
+
+@pytest.mark.parametrize("settings", SETTINGS)
+@pytest.mark.parametrize("dtype", ["int16", "uint16", "float32", "float64"])
+def test_process_matches_float64_reference(dtype: str, settings: DEMSettings) -> None:
+    """The float32 in-place pipeline is within one step of the float64 result, and the
+    extremes it tracks instead of scanning the data are those of the raised data."""
+    data = _elevation(dtype)
+    expected, minimum, maximum = _reference(data, settings)
+
+    output, info = _process(data, settings)
+
+    assert output.dtype == np.uint16
+    assert output.shape == expected.shape
+    assert np.abs(output.astype(np.int32) - expected).max() <= 1
+    assert info["raised_lowered"]["min"] == pytest.approx(minimum, rel=1e-5, abs=1e-3)
+    assert info["raised_lowered"]["max"] == pytest.approx(maximum, rel=1e-5, abs=1e-3)
@@ -0,0 +1,414 @@
+"""Tests for the OSM API tile downloader and tile cache against a local stand-in server, and
+for the OSM polygon preprocessor and the OSM feature prefetch on a small fixture file."""
+
+from __future__ import annotations
+
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from xml.etree import ElementTree as ET
+
+import pandas as pd
+import pytest
+
+from maps4fs.generator.osm import OSMDocument, _OSMTileCache, _OSMTileDownloader, preprocess
+from maps4fs.generator.osm_pipeline import (
+    OSMFeatureCache,
+    OSMFeatureTable,
+    OSMRasterPipeline,
+    OSMXMLFeatureSource,
+)
+
+# The stand-in API rejects tiles wider than this span, like the real node limit would.
+MAX_TILE_WIDTH = 0.03
+
+
+class FixtureOSMHandler(BaseHTTPRequestHandler):
+    """Serve fixture OSM XML for bbox requests, failing the first request with HTTP 503.
+    Requests under /moved/ are redirected to the same path under /api/."""
+
+    protocol_version = "HTTP/1.1"
+    requests: list[tuple[float, float, float, float]] = []
+    targets: list[str] = []
+    lock = threading.Lock()
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """Answer one map request."""
+        with self.lock:
+            self.targets.append(self.path)
+        parts = urlsplit(self.path)
+        if parts.path.startswith("/moved/"):
+            self.send_response(301)
+            self.send_header("Location", self.path.replace("/moved/", "/api/", 1))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        query = parse_qs(parts.query)
+        bbox = tuple(float(value) for value in query["bbox"][0].split(","))
+        with self.lock:
+            first_request = not self.requests
+            self.requests.append(bbox)
+
+        if first_request:
+            self._respond(503, b"Service temporarily unavailable")
+            return
+
+        left, bottom, right, top = bbox
+        if right - left > MAX_TILE_WIDTH:
+            self._respond(400, b"You requested too many nodes (limit is 50000).")
+            return
+
+        # Node 1 is shared by all tiles and must appear once in the merged output. Each tile
+        # has its own node in the tile center and a way connecting it to node 1.
+        tile_id = int(round(left * 1000)) + 1000
+        payload = (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<osm version="0.6" generator="fixture">'
+            f'<bounds minlat="{bottom}" minlon="{left}" maxlat="{top}" maxlon="{right}"/>'
+            '<node id="1" lat="0.0" lon="0.0"/>'
+            f'<node id="{tile_id}" lat="{(bottom + top) / 2}" lon="{(left + right) / 2}"/>'
+            f'<way id="{tile_id}"><nd ref="1"/><nd ref="{tile_id}"/></way>'
+            "</osm>"
+        ).encode("utf-8")
+        self._respond(200, payload)
+
+    def _respond(self, status: int, payload: bytes) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/xml")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format: str, *args: object) -> None:  # pylint: disable=W0622
+        """Keep the test output quiet."""
+
+
+@pytest.fixture
+def osm_api_url():
+    """Run the stand-in OSM API and return its map endpoint URL."""
+    FixtureOSMHandler.requests = []
+    FixtureOSMHandler.targets = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureOSMHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/api/0.6/map"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_tile_downloader_splits_retries_and_merges(osm_api_url: str) -> None:
+    """Pre-split tiles are fetched concurrently, retried, split and merged deterministically."""
+    downloader = _OSMTileDownloader(
+        osm_api_url, timeout=5, user_agent="maps4fs tests", workers=4, backoff=0.0
+    )
+    try:
+        root = downloader.download((0.0, 0.0, 0.1, 0.05))
+    finally:
+        downloader.close()
+
+    node_ids = [node.get("id") for node in root.findall("node")]
+    # Two 0.05 wide grid tiles, each split once by the node limit, in grid order.
+    assert node_ids == ["1", "1000", "1025", "1050", "1075"]
+    assert root.find("bounds").get("maxlon") == "0.1000000"
+
+    # One failed request, two rejected grid tiles and four child tiles.
+    assert len(FixtureOSMHandler.requests) == 7
+
+
+def test_tile_cache_reuses_cells_for_overlapping_bboxes(osm_api_url: str, tmp_path) -> None:
+    """Overlapping requests are assembled from cached cells and clipped like the API does."""
+    downloader = _OSMTileDownloader(
+        osm_api_url, timeout=5, user_agent="maps4fs tests", workers=4, backoff=0.0
+    )
+    cache = _OSMTileCache(str(tmp_path), osm_api_url)
+    try:
+        first = cache.download((0.01, 0.01, 0.04, 0.04), downloader)
+        requests_after_first = len(FixtureOSMHandler.requests)
+        second = cache.download((0.02, 0.02, 0.045, 0.045), downloader)
+    finally:
+        downloader.close()
+
+    # One failed request, the rejected grid cell and its two halves.
+    assert requests_after_first == 4
+    assert len(FixtureOSMHandler.requests) == requests_after_first
+
+    # Node 1 lies outside of both bboxes, but the ways inside reference it.
+    assert [node.get("id") for node in first.findall("node")] == ["1", "1000", "1025"]
+    assert [way.get("id") for way in first.findall("way")] == ["1000", "1025"]
+    # The center of the first half cell is outside of the second bbox.
+    assert [node.get("id") for node in second.findall("node")] == ["1", "1025"]
+    assert [way.get("id") for way in second.findall("way")] == ["1025"]
+    assert second.find("bounds").get("maxlon") == "0.0450000"
+
+
+def test_tile_downloader_follows_redirects(osm_api_url: str) -> None:
+    """Redirected requests are sent to the new location without using up a retry."""
+    downloader = _OSMTileDownloader(
+        osm_api_url.replace("/api/", "/moved/"),
+        timeout=5,
+        user_agent="maps4fs tests",
+        retries=1,
+        backoff=0.0,
+    )
+    try:
+        root = downloader.download((0.0, 0.0, 0.02, 0.02))
+    finally:
+        downloader.close()
+
+    assert [node.get("id") for node in root.findall("node")] == ["1", "1000"]
+    # Both attempts were redirected, the first one was answered with HTTP 503.
+    assert [urlsplit(target).path for target in FixtureOSMHandler.targets] == [
+        "/moved/0.6/map",
+        "/api/0.6/map",
+        "/moved/0.6/map",
+        "/api/0.6/map",
+    ]
+
+
+def test_tile_downloader_uses_environment_proxy(osm_api_url: str, monkeypatch) -> None:
+    """Plain HTTP requests go to the proxy of the environment with the absolute URL."""
+    monkeypatch.setenv("http_proxy", osm_api_url.split("/api/")[0])
+    monkeypatch.delenv("no_proxy", raising=False)
+    monkeypatch.delenv("NO_PROXY", raising=False)
+    downloader = _OSMTileDownloader(
+        "http://osm.invalid/api/0.6/map", timeout=5, user_agent="maps4fs tests", backoff=0.0
+    )
+    try:
+        root = downloader.download((0.0, 0.0, 0.02, 0.02))
+    finally:
+        downloader.close()
+
+    assert [node.get("id") for node in root.findall("node")] == ["1", "1000"]
+    assert all(
+        target.startswith("http://osm.invalid/api/0.6/map?bbox=")
+        for target in FixtureOSMHandler.targets
+    )
+
+
+# Fixture ways as (id, tags, corners in (lat, lon) offsets from 50.0, 10.0).
+FIXTURE_AREAS = [
+    # Farmland split by the track in two and with the building carved out.
+    (100, {"landuse": "farmland"}, [(0.0, 0.0), (0.0, 0.004), (0.003, 0.004), (0.003, 0.0)]),
+    (101, {"landuse": "meadow"}, [(0.004, 0.0), (0.004, 0.004), (0.007, 0.004), (0.007, 0.0)]),
+    # Outer and inner ring of the orchard multipolygon.
+    (102, {}, [(0.008, 0.0), (0.008, 0.004), (0.011, 0.004), (0.011, 0.0)]),
+    (103, {}, [(0.009, 0.001), (0.009, 0.002), (0.010, 0.002), (0.010, 0.001)]),
+    (
+        300,
+        {"building": "yes"},
+        [(0.0005, 0.0005), (0.0005, 0.001), (0.001, 0.001), (0.001, 0.0005)],
+    ),
+]
+FIXTURE_TRACK = (200, {"highway": "track"}, [(-0.001, 0.002), (0.0035, 0.002)])
+FIXTURE_TREE = (900, {"natural": "tree"}, (0.005, 0.002))
+FIXTURE_BENCH = (901, {"amenity": "bench"}, (0.02, 0.02))
+
+
+def _fixture_osm() -> str:
+    """Build the OSM XML of the preprocessor fixture."""
+    nodes: list[str] = []
+    ways: list[str] = []
+
+    def node(node_id: int, offset: tuple[float, float], tags: dict[str, str]) -> None:
+        tag_elements = "".join(f'<tag k="{key}" v="{value}"/>' for key, value in tags.items())
+        nodes.append(
+            f'<node id="{node_id}" version="1" lat="{50.0 + offset[0]:.7f}" '
+            f'lon="{10.0 + offset[1]:.7f}">{tag_elements}</node>'
+        )
+
+    def way(way_id: int, tags: dict[str, str], corners: list, closed: bool) -> None:
+        refs = []
+        for index, corner in enumerate(corners):
+            node(way_id * 10 + index, corner, {})
+            refs.append(way_id * 10 + index)
+        if closed:
+            refs.append(refs[0])
+        ways.append(
+            f'<way id="{way_id}" version="1">'
+            + "".join(f'<nd ref="{ref}"/>' for ref in refs)
+            + "".join(f'<tag k="{key}" v="{value}"/>' for key, value in tags.items())
+            + "</way>"
+        )
+
+    for way_id, tags, corners in FIXTURE_AREAS:
+        way(way_id, tags, corners, closed=True)
+    way(*FIXTURE_TRACK, closed=False)
+    for node_id, tags, offset in (FIXTURE_TREE, FIXTURE_BENCH):
+        node(node_id, offset, tags)
+
+    relation = (
+        '<relation id="400" version="1">'
+        '<member type="way" ref="102" role="outer"/>'
+        '<member type="way" ref="103" role="inner"/>'
+        '<tag k="type" v="multipolygon"/><tag k="landuse" v="orchard"/>'
+        "</relation>"
+    )
+    return "\n".join(
+        ['<?xml version="1.0" encoding="UTF-8"?>', '<osm version="0.6" generator="fixture">']
+        + nodes
+        + ways
+        + [relation, "</osm>"]
+    )
+
+
+@pytest.fixture
+def fixture_osm_path(tmp_path) -> str:
+    """Write the preprocessor fixture and return its path."""
+    path = tmp_path / "fixture.osm"
+    path.write_text(_fixture_osm(), encoding="utf-8")
+    return str(path)
+
+
+def _preprocess_fixture(input_path: str, output_path: str, workers: int) -> dict[str, int]:
+    """Preprocess farmland, meadow and orchard polygons of the fixture as separate groups."""
+    return preprocess(
+        input_path,
+        output_path,
+        [{"landuse": ["farmland", "meadow", "orchard"]}],
+        validate_input=False,
+        validate_output=False,
+        merge_tags=False,
+        workers=workers,
+    )
+
+
+def test_preprocess_fixture_stats_and_output(fixture_osm_path: str, tmp_path) -> None:
+    """Targets are split, holed and rewritten while all other elements are kept."""
+    output_path = str(tmp_path / "serial.osm")
+    stats = _preprocess_fixture(fixture_osm_path, output_path, workers=1)
+
+    assert stats == {
+        "target_input_polygons": 3,
+        "target_output_polygons": 4,
+        "splitter_lines": 1,
+        "hole_polygons": 2,
+        "removed_elements": 5,
+        "created_ways": 7,
+        "created_relations": 3,
+    }
+
+    root = ET.parse(output_path).getroot()
+    nodes = {node.get("id"): node for node in root.findall("node")}
+    ways = {way.get("id"): way for way in root.findall("way")}
+    relations = root.findall("relation")
+
+    def landuse(element: ET.Element) -> str | None:
+        tags = {tag.get("k"): tag.get("v") for tag in element.findall("tag")}
+        return tags.get("landuse")
+
+    # Source targets are replaced, the other features are kept untouched.
+    assert not {"100", "101", "102", "103"} & set(ways)
+    assert "400" not in {relation.get("id") for relation in relations}
+    assert [nd.get("ref") for nd in ways["200"].findall("nd")] == ["2000", "2001"]
+    assert len(ways["300"].findall("nd")) == 5
+    assert nodes["900"].find("tag").get("v") == "tree"
+    assert nodes["901"].find("tag").get("v") == "bench"
+
+    # The farmland is split by the track, its west part gets the building hole, the meadow
+    # gets the tree hole and the orchard keeps its inner ring.
+    landuses = [landuse(element) for element in [*ways.values(), *relations]]
+    assert sorted(value for value in landuses if value) == [
+        "farmland",
+        "farmland",
+        "meadow",
+        "orchard",
+    ]
+    assert [landuse(relation) for relation in relations] == ["farmland", "meadow", "orchard"]
+    for relation in relations:
+        roles = [member.get("role") for member in relation.findall("member")]
+        assert roles == ["outer", "inner"]
+
+    # Created rings are closed and reference existing nodes only.
+    for way_id, way in ways.items():
+        refs = [nd.get("ref") for nd in way.findall("nd")]
+        assert set(refs) <= set(nodes)
+        if way_id != "200":
+            assert refs[0] == refs[-1]
+
+
+def test_preprocess_fixture_workers_match_serial(fixture_osm_path: str, tmp_path) -> None:
+    """Polygon groups processed in worker processes give the output of the serial run."""
+    serial_path = tmp_path / "serial.osm"
+    parallel_path = tmp_path / "parallel.osm"
+    serial_stats = _preprocess_fixture(fixture_osm_path, str(serial_path), workers=1)
+    parallel_stats = _preprocess_fixture(fixture_osm_path, str(parallel_path), workers=3)
+
+    assert parallel_stats == serial_stats
+    assert parallel_path.read_bytes() == serial_path.read_bytes()
+
+
+def test_preprocess_twice_keeps_reappended_polygons(fixture_osm_path: str) -> None:
+    """A second pass replaces the polygons of the first one, which may reuse their ids, and
+    the kept source elements are copied to the output as they are."""
+    document = OSMDocument(fixture_osm_path)
+    for _ in range(2):
+        document.preprocess([{"landuse": ["farmland", "meadow", "orchard"]}], merge_tags=False)
+    document.save()
+
+    with open(fixture_osm_path, encoding="utf-8") as file:
+        text = file.read()
+    assert '<tag k="natural" v="tree"/></node>' in text
+    root = ET.fromstring(text)
+    ways = {way.get("id") for way in root.findall("way")}
+    landuses = []
+    for element in [*root.findall("way"), *root.findall("relation")]:
+        assert element.get("version") == "1"
+        tags = {tag.get("k"): tag.get("v") for tag in element.findall("tag")}
+        if "landuse" in tags:
+            landuses.append(tags["landuse"])
+        members = {member.get("ref") for member in element.findall("member")}
+        assert members <= ways
+    assert sorted(landuses) == ["farmland", "farmland", "meadow", "orchard"]
+
+
+def test_prefetch_parses_local_file_once(fixture_osm_path: str, monkeypatch) -> None:
+    """The local file is parsed once, every query selects from its table."""
+    logger = logging.getLogger("maps4fs tests")
+    tags_list = [
+        {"landuse": ["farmland", "meadow"]},
+        {"highway": True},
+        {"natural": "tree"},
+        {"waterway": True},
+    ]
+    reference_source = OSMXMLFeatureSource(custom_osm_path=fixture_osm_path, logger=logger)
+    expected = [reference_source.fetch(tags) for tags in tags_list]
+
+    parsed_paths: list[str] = []
+    from_xml = OSMFeatureTable.from_xml
+
+    def counting_from_xml(osm_path: str) -> OSMFeatureTable:
+        parsed_paths.append(osm_path)
+        return from_xml(osm_path)
+
+    monkeypatch.setattr(OSMFeatureTable, "from_xml", counting_from_xml)
+
+    cache = OSMFeatureCache()
+    source = cache.shared_source(
+        OSMXMLFeatureSource(custom_osm_path=fixture_osm_path, logger=logger)
+    )
+    pipeline = OSMRasterPipeline(source=source, rasterizer=None, logger=logger, cache=cache)
+    pipeline.prefetch(tags_list[:-1], max_workers=2)
+    assert parsed_paths == [fixture_osm_path]
+
+    for tags, expected_objects in zip(tags_list, expected):
+        objects = pipeline._get_or_fetch_objects(tags)
+        if expected_objects is None:
+            assert objects is None
+        else:
+            pd.testing.assert_frame_equal(objects, expected_objects, check_exact=True)
+
+    # A query which was not prefetched and a later pass are answered from the same table.
+    later_pipeline = OSMRasterPipeline(
+        source=cache.shared_source(
+            OSMXMLFeatureSource(custom_osm_path=fixture_osm_path, logger=logger)
+        ),
+        rasterizer=None,
+        logger=logger,
+        cache=cache,
+    )
+    later_pipeline.prefetch([{"building": True}], max_workers=2)
+    assert parsed_paths == [fixture_osm_path]
@@ -0,0 +1,169 @@
+"""Tests for running components concurrently with the ComponentScheduler on stub
+components, which only declare the resources they read and write."""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from collections import defaultdict
+
+import pytest
+
+from maps4fs.generator.monitor import get_current_session, performance_session, run_in_session
+from maps4fs.generator.scheduler import ComponentScheduler
+
+
+def _component(name: str, reads: tuple[str, ...] | None, writes: tuple[str, ...] | None) -> type:
+    """Return a stub component class with the declarations."""
+    return type(name, (), {"reads": reads, "writes": writes})
+
+
+# Two independent chains over the context fields, joined by the last component.
+COMPONENTS = [
+    _component("FieldsWriter", (), ("fields",)),
+    _component("ForestWriter", (), ("forest",)),
+    _component("FieldsReader", ("fields",), ("farmyards",)),
+    _component("ForestReader", ("forest",), ("water",)),
+    _component("FieldsRewriter", ("farmyards",), ("fields",)),
+    _component("Joiner", ("fields", "water"), ("buildings",)),
+]
+
+
+def _run(scheduler: ComponentScheduler, task, timeout: float = 10.0) -> list[str]:
+    """Run the scheduler in a thread and return the started names, failing on a hang."""
+    started: list[str] = []
+    errors: list[BaseException] = []
+
+    def target() -> None:
+        try:
+            started.extend(scheduler.run(task))
+        except Exception as exc:  # pylint: disable=broad-except
+            errors.append(exc)
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "The scheduler did not finish."
+    if errors:
+        raise errors[0]
+    return started
+
+
+def test_dependencies_follow_reads_and_writes() -> None:
+    """A component waits for the earlier ones writing what it reads or writes, or reading
+    what it writes. Components without declarations wait for and block all others."""
+    components = COMPONENTS + [
+        _component("Undeclared", None, None),
+        _component("LateReader", ("forest",), ()),
+    ]
+    dependencies = ComponentScheduler(components, max_workers=4).dependencies
+
+    assert dependencies[:6] == [set(), set(), {0}, {1}, {0, 2}, {0, 3, 4}]
+    assert dependencies[6] == set(range(6))
+    assert dependencies[7] == {1, 6}
+
+
+def test_unknown_resource_is_rejected() -> None:
+    """Declarations are checked against the context fields and the artifact names."""
+    with pytest.raises(ValueError, match="unknown resources"):
+        ComponentScheduler([_component("Typo", ("feilds",), ())], max_workers=2)
+
+
+def test_conflicting_components_run_in_order() -> None:
+    """Every component starts after its dependencies finished, while independent components
+    run at the same time."""
+    scheduler = ComponentScheduler(COMPONENTS, max_workers=3)
+    events: list[tuple[str, str]] = []
+    lock = threading.Lock()
+    # Both writers must be running at once to pass the barrier.
+    barrier = threading.Barrier(2, timeout=5)
+
+    def task(component: type) -> None:
+        with lock:
+            events.append(("start", component.__name__))
+        if component.__name__ in ("FieldsWriter", "ForestWriter"):
+            barrier.wait()
+        time.sleep(0.01)
+        with lock:
+            events.append(("finish", component.__name__))
+
+    _run(scheduler, task)
+
+    position = {event: index for index, event in enumerate(events)}
+    for index, component in enumerate(COMPONENTS):
+        for dependency in scheduler.dependencies[index]:
+            assert (
+                position[("finish", COMPONENTS[dependency].__name__)]
+                < position[("start", component.__name__)]
+            )
+
+
+def test_error_stops_new_components_and_awaits_running_ones() -> None:
+    """A failing component does not hang the run: components running at the same time
+    finish, components depending on it are not started and the error is raised."""
+    scheduler = ComponentScheduler(COMPONENTS, max_workers=2)
+    finished: list[str] = []
+    forest_started = threading.Event()
+
+    def task(component: type) -> None:
+        if component.__name__ == "FieldsWriter":
+            assert forest_started.wait(5)
+            raise RuntimeError("fields failed")
+        forest_started.set()
+        time.sleep(0.05)
+        finished.append(component.__name__)
+
+    with pytest.raises(RuntimeError, match="fields failed"):
+        _run(scheduler, task)
+    assert finished == ["ForestWriter"]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_concurrent_run_matches_sequential_run(seed: int) -> None:
+    """With random durations the resources end up as in the sequential run."""
+
+    def run(max_workers: int, rng: random.Random) -> dict[str, list[str]]:
+        resources: dict[str, list[str]] = defaultdict(list)
+        lock = threading.Lock()
+
+        def task(component: type) -> None:
+            time.sleep(rng.uniform(0, 0.02))
+            with lock:
+                # Written resources record the writer and what it has read.
+                seen = [resources[resource][-1:] for resource in component.reads]
+                for resource in component.writes:
+                    resources[resource].append(f"{component.__name__}{seen}")
+
+        _run(ComponentScheduler(COMPONENTS, max_workers=max_workers), task)
+        return dict(resources)
+
+    rng = random.Random(seed)
+    assert run(4, rng) == run(1, rng)
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_components_and_their_pools_keep_the_generation_session(max_workers: int) -> None:
+    """Components re-enter the generation session like Map does, which must not end the
+    session of the caller, and pools of the components pass it to their threads."""
+    sessions: dict[str, tuple[str | None, str | None]] = {}
+    lock = threading.Lock()
+
+    def task(component: type, session_id: str) -> None:
+        with performance_session(session_id):
+            pooled: list[str | None] = []
+            thread = threading.Thread(
+                target=lambda: pooled.append(run_in_session(session_id, get_current_session))
+            )
+            thread.start()
+            thread.join()
+            with lock:
+                sessions[component.__name__] = (get_current_session(), pooled[0])
+
+    with performance_session() as session_id:
+        scheduler = ComponentScheduler(COMPONENTS, max_workers=max_workers)
+        for _ in scheduler.run(lambda component: task(component, session_id)):
+            assert get_current_session() == session_id
+        assert get_current_session() == session_id
+    assert get_current_session() is None
+    assert sessions == {component.__name__: (session_id, session_id) for component in COMPONENTS}
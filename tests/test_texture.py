@@ -0,0 +1,247 @@
+"""Tests for drawing and compositing the texture layers tile by tile."""
+
+from __future__ import annotations
+
+import logging
+import os
+from collections import defaultdict
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+import pytest
+
+from maps4fs.generator.component.layer import Layer
+from maps4fs.generator.component.texture import (
+    LayerShapes,
+    Texture,
+    TextureCompositor,
+    _StripOutputs,
+)
+from maps4fs.generator.image_io import ImageKind
+from maps4fs.generator.raster_store import RasterStore
+
+SIZE = 160
+LOGGER = logging.getLogger(__name__)
+
+
+def _random_ring(rng: np.random.Generator) -> np.ndarray:
+    """Return a random ring which may be concave and reach out of the raster."""
+    count = int(rng.integers(3, 12))
+    center = rng.integers(-40, SIZE + 40, 2)
+    radius = rng.uniform(3, SIZE, count)
+    angles = np.sort(rng.uniform(0, 2 * np.pi, count))
+    points = center + np.column_stack([np.cos(angles), np.sin(angles)]) * radius[:, None]
+    return points.astype(np.int32).reshape(-1, 1, 2)
+
+
+def _random_layers(seed: int) -> list[tuple[Layer, LayerShapes]]:
+    """Return layers with random polygons, holes and circles, the second one external."""
+    rng = np.random.default_rng(seed)
+    drawn_layers = []
+    for index in range(5):
+        shapes = LayerShapes()
+        for _ in range(int(rng.integers(1, 8))):
+            if rng.random() < 0.75:
+                holes = [_random_ring(rng) for _ in range(int(rng.integers(0, 3)))]
+                shapes.add_polygon(_random_ring(rng), holes)
+            else:
+                center = rng.integers(-5, SIZE + 5, 2)
+                shapes.add_circle((int(center[0]), int(center[1])), int(rng.integers(1, 20)))
+        layer = Layer(name=f"layer{index}", count=1, external=index == 1)
+        drawn_layers.append((layer, shapes))
+    return drawn_layers
+
+
+def _composite(drawn_layers: list[tuple[Layer, LayerShapes]], tile_size: int) -> dict:
+    """Composite the layers like the texture component and return every output image."""
+    compositor = TextureCompositor(SIZE, len(drawn_layers), tile_size=tile_size)
+    strips: dict[str, list[np.ndarray]] = defaultdict(list)
+    for tiles in compositor.strips():
+        for left, top, width, height in tiles:
+            for layer, shapes in drawn_layers:
+                if not compositor.occupies(layer):
+                    continue
+                canvas = compositor.draw(shapes, left, top, width, height, LOGGER)
+                if canvas is not None:
+                    compositor.add(layer, canvas, left, top)
+
+        strips["occupied"].append(compositor.occupied())
+        for layer, shapes in drawn_layers:
+            strips[layer.name].append(compositor.layer_image(layer))
+            strips[f"{layer.name}_drawn"].append(compositor.render(shapes, LOGGER))
+    assert len(strips["occupied"]) == compositor.strips_count
+    return {name: np.vstack(images) for name, images in strips.items()}
+
+
+@pytest.mark.parametrize("tile_size", [7, 32, 50, SIZE + 1])
+@pytest.mark.parametrize("seed", range(10))
+def test_tiled_compositing_matches_drawing_at_once(seed: int, tile_size: int) -> None:
+    """Tiles are drawn on canvases which hold the edges passing them, so no pixel differs."""
+    drawn_layers = _random_layers(seed)
+    expected = _composite(drawn_layers, tile_size=0)
+    tiled = _composite(drawn_layers, tile_size=tile_size)
+
+    assert expected["occupied"].any()
+    assert not expected["layer1"].any()
+    for name, image in expected.items():
+        np.testing.assert_array_equal(tiled[name], image, err_msg=name)
+
+
+@pytest.mark.parametrize("kind", list(ImageKind))
+def test_streamed_strips_match_writing_at_once(tmp_path, kind: ImageKind) -> None:
+    """Weights streamed strip by strip decode to the images composited at once."""
+    drawn_layers = _random_layers(3)
+    expected = _composite(drawn_layers, tile_size=0)
+    store = RasterStore()
+    component = SimpleNamespace(stream_image=store.stream)
+
+    compositor = TextureCompositor(SIZE, len(drawn_layers), tile_size=48)
+    with _StripOutputs(component, SIZE, streamed=True) as outputs:  # type: ignore[arg-type]
+        for tiles in compositor.strips():
+            for left, top, width, height in tiles:
+                for layer, shapes in drawn_layers:
+                    if compositor.occupies(layer):
+                        canvas = compositor.draw(shapes, left, top, width, height, LOGGER)
+                        if canvas is not None:
+                            compositor.add(layer, canvas, left, top)
+            for layer, _ in drawn_layers:
+                outputs.write(
+                    str(tmp_path / f"{layer.name}.png"), compositor.layer_image(layer), kind
+                )
+
+    for layer, _ in drawn_layers:
+        image = cv2.imread(str(tmp_path / f"{layer.name}.png"), cv2.IMREAD_UNCHANGED)
+        np.testing.assert_array_equal(image, expected[layer.name], err_msg=layer.name)
+
+
+def test_unfinished_stream_is_removed(tmp_path) -> None:
+    """A failed generation doesn't leave truncated weight files behind."""
+    component = SimpleNamespace(stream_image=RasterStore().stream)
+    image_path = str(tmp_path / "layer.png")
+    with pytest.raises(RuntimeError):
+        with _StripOutputs(component, SIZE, streamed=True) as outputs:  # type: ignore[arg-type]
+            outputs.write(image_path, np.zeros((16, SIZE), dtype=np.uint8))
+            raise RuntimeError("drawing failed")
+    assert not (tmp_path / "layer.png").exists()
+
+
+def test_map_frame_drawing_matches_rotated_weights() -> None:
+    """Shapes drawn in the map frame cover the pixels of the weights drawn on the rotated
+    canvas and rotated afterwards, apart from the interpolated edges."""
+    texture = Texture.__new__(Texture)
+    texture.map_size = SIZE
+    texture.map_rotated_size = int(SIZE * 1.5)
+    texture.rotation = 30
+    texture.map = SimpleNamespace(texture_settings=SimpleNamespace(draw_tile_size=64))
+
+    rng = np.random.default_rng(5)
+    canvas_shapes = LayerShapes()
+    map_shapes = LayerShapes(texture._map_frame_matrix())  # pylint: disable=protected-access
+    for _ in range(6):
+        ring = _random_ring(rng) + SIZE // 4
+        canvas_shapes.add_polygon(ring, [])
+        map_shapes.add_polygon(ring, [])
+    canvas_shapes.add_circle((120, 90), 15)
+    map_shapes.add_circle((120, 90), 15)
+
+    rotated_size = texture.map_rotated_size
+    drawn = TextureCompositor(rotated_size, 1)
+    next(drawn.strips())
+    canvas = drawn.render(canvas_shapes, LOGGER)
+    center = (rotated_size // 2, rotated_size // 2)
+    rotated = cv2.warpAffine(
+        canvas, cv2.getRotationMatrix2D(center, 30, 1.0), (rotated_size, rotated_size)
+    )
+    start = center[0] - SIZE // 2
+    expected = rotated[start : start + SIZE, start : start + SIZE] > 127
+
+    compositor = TextureCompositor(SIZE, 1, tile_size=64)
+    image = np.vstack([compositor.render(map_shapes, LOGGER) for _ in compositor.strips()]) > 0
+
+    edges = cv2.dilate(cv2.Canny(expected.astype(np.uint8) * 255, 100, 200), np.ones((3, 3)))
+    assert expected.any()
+    assert not (image ^ expected)[edges == 0].any()
+
+
+def test_canvas_holds_only_edges_passing_the_tile() -> None:
+    """A long edge passing the tile extends the canvas up to the raster border only."""
+    shapes = LayerShapes()
+    shapes.add_polygon(np.array([[[-50, 10]], [[300, 30]], [[300, 40]], [[-50, 20]]]), [])
+    shapes.add_polygon(np.array([[[100, 100]], [[150, 100]], [[150, 150]]]), [])
+
+    indices = shapes.shapes_in(64, 0, 32, 32)
+    assert indices.tolist() == [0]
+    assert shapes.canvas_bounds(indices, 64, 0, 32, 32, SIZE) == (0, 0, SIZE, 41)
+
+    # Only the diagonal edge of the triangle passes the tile.
+    indices = shapes.shapes_in(112, 112, 16, 16)
+    assert indices.tolist() == [1]
+    assert shapes.canvas_bounds(indices, 112, 112, 16, 16, SIZE) == (100, 100, 51, 51)
+
+
+def _dissolve_seed(coordinates: tuple[float, float], map_size: int, name: str) -> int:
+    """Return the first number drawn by the dissolve generator of a texture component."""
+    texture = Texture.__new__(Texture)
+    texture.coordinates = coordinates
+    texture.map_size = map_size
+    rng = texture._dissolve_rng(Layer(name=name, count=2))  # pylint: disable=protected-access
+    return int(rng.integers(0, 2**62))
+
+
+def test_dissolve_seed_depends_on_signed_coordinates() -> None:
+    """Maps mirrored across the equator or the prime meridian are dissolved differently."""
+    seed = _dissolve_seed((45.5, 20.25), 2048, "grass")
+    assert seed == _dissolve_seed((45.5, 20.25), 2048, "grass")
+    mirrored = [(-45.5, 20.25), (45.5, -20.25), (-45.5, -20.25), (20.25, 45.5)]
+    for coordinates in mirrored:
+        assert _dissolve_seed(coordinates, 2048, "grass") != seed, coordinates
+    assert _dissolve_seed((45.5, 20.25), 4096, "grass") != seed
+    assert _dissolve_seed((45.5, 20.25), 2048, "forest") != seed
+
+
+@pytest.mark.parametrize("tile_size", [0, 48])
+def test_streamed_dissolve_matches_writing_at_once(tmp_path, tile_size: int) -> None:
+    """Sublayers streamed strip by strip are the same as the sublayers written at once."""
+    store = RasterStore()
+    texture = Texture.__new__(Texture)
+    texture.written_rasters = set()
+    texture._weights_dir = str(tmp_path)  # pylint: disable=protected-access
+    texture.map = SimpleNamespace(
+        texture_settings=SimpleNamespace(draw_tile_size=tile_size),
+        context=SimpleNamespace(rasters=store),
+    )
+
+    rng = np.random.default_rng(11)
+    layer = Layer(name="grass", count=3)
+    layer_image = (rng.random((SIZE, SIZE)) > 0.3).astype(np.uint8) * 255
+    assignment = Texture._random_assignment(layer_image, layer.count, rng)
+    layer_paths = [str(tmp_path / f"grass0{idx}_weight.png") for idx in range(1, 4)]
+    # pylint: disable=protected-access
+    texture._write_dissolved_layer(layer, layer_image, assignment, layer_paths)
+    store.flush()
+
+    sublayers = [cv2.imread(path, cv2.IMREAD_UNCHANGED) for path in layer_paths]
+    for idx, sublayer in enumerate(sublayers):
+        np.testing.assert_array_equal(sublayer > 0, assignment == idx)
+    np.testing.assert_array_equal(np.sum(sublayers, axis=0, dtype=np.int32), layer_image)
+    preview = cv2.imread(layer.path_preview(str(tmp_path)), cv2.IMREAD_UNCHANGED)
+    np.testing.assert_array_equal(preview, layer_image)
+
+
+def test_layer_paths_include_pending_rasters(tmp_path) -> None:
+    """Weight files written by the texture component are found before they are flushed."""
+    store = RasterStore()
+    (tmp_path / "grass01_weight.png").write_bytes(b"")
+    image = np.zeros((8, 8), dtype=np.uint8)
+    store.write(str(tmp_path / "grass02_weight.png"), image)
+    store.write(str(tmp_path / "grass03_weight.png"), image)
+    store.write(str(tmp_path / "other" / "grass04_weight.png"), image)
+
+    layer = Layer(name="grass", count=3)
+    assert [os.path.basename(path) for path in layer.paths(str(tmp_path))] == ["grass01_weight.png"]
+    assert layer.paths(str(tmp_path), store.listdir) == [
+        str(tmp_path / f"grass0{idx}_weight.png") for idx in range(1, 4)
+    ]
+    store.flush()
+    assert layer.paths(str(tmp_path), store.listdir) == sorted(layer.paths(str(tmp_path)))